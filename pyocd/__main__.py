@@ -40,6 +40,7 @@ from .subcommands.json_cmd import JsonSubcommand
 from .subcommands.list_cmd import ListSubcommand
 from .subcommands.load_cmd import LoadSubcommand
 from .subcommands.pack_cmd import PackSubcommand
+from .subcommands.profile_cmd import ProfileSubcommand
 from .subcommands.reset_cmd import ResetSubcommand
 from .subcommands.server_cmd import ServerSubcommand
 from .subcommands.rtt_cmd import RTTSubcommand
@@ -62,6 +63,7 @@ class PyOCDTool(SubcommandBase):
         JsonSubcommand,
         ListSubcommand,
         PackSubcommand,
+        ProfileSubcommand,
         ResetSubcommand,
         ServerSubcommand,
         RTTSubcommand,
@@ -15,10 +15,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from intervaltree import (Interval, IntervalTree)
 import logging
+from typing import (Dict, List, Optional, Tuple)
 
+from ..core.memory_map import (MemoryRegion, MemoryType)
 from ..utility import conversion
+from ..utility.mask import (align_down, align_up)
 from .metrics import CacheMetrics
 from ..core.exceptions import TransferFaultError
 
@@ -37,16 +39,53 @@ class MemoryCache(object):
     memory region, or a TransferFaultError will be raised. However, if an access is outside of all regions,
     the access is passed to the underlying context unmodified. When an access is within a region, that
     region's cacheability flag is honoured.
+
+    Cached data is held in fixed size, aligned pages stored in a dict keyed by page address. Each page
+    has a data bytearray and a second bytearray of the same size with a nonzero byte for each valid
+    data byte, so pages can be partially filled. On a read, the missing ranges of all pages touched by
+    the access are coalesced into as few reads of the backing context as possible. Writes are written
+    through to the backing context and then update the cache.
+
+    Read-ahead can be enabled per memory type by passing a map of memory type to line size. Missing
+    ranges in regions of a type with a nonzero line size are expanded to whole aligned lines (clipped
+    to the region), and missing ranges that end up touching or overlapping are merged. So many small
+    scattered reads, such as when a debugger unwinds the stack, are replaced with few larger reads.
     """
 
-    def __init__(self, context, core):
+    ## Default size in bytes of cache pages. Must be a power of two.
+    DEFAULT_PAGE_SIZE = 256
+
+    def __init__(
+                self,
+                context,
+                core,
+                page_size: int = DEFAULT_PAGE_SIZE,
+                read_ahead: Optional[Dict[MemoryType, int]] = None
+            ):
+        if page_size <= 0 or (page_size & (page_size - 1)) != 0:
+            raise ValueError(f"memory cache page size ({page_size}) must be a power of two")
+        self._read_ahead: Dict[MemoryType, int] = {}
+        for memory_type, line_size in (read_ahead or {}).items():
+            if line_size < 0 or (line_size & (line_size - 1)) != 0:
+                raise ValueError(f"memory cache read-ahead line size ({line_size}) for "
+                        f"{memory_type.name} memory must be zero or a power of two")
+            if line_size:
+                self._read_ahead[memory_type] = line_size
         self._context = context
         self._core = core
+        self._page_size = page_size
+        self._page_mask = page_size - 1
+        self._all_valid = memoryview(b'\x01' * page_size)
         self._run_token = -1
         self._reset_cache()
 
+    @property
+    def page_size(self) -> int:
+        return self._page_size
+
     def _reset_cache(self):
-        self._cache = IntervalTree()
+        # Map of page address to a tuple of data and valid byte flags.
+        self._pages: Dict[int, Tuple[bytearray, bytearray]] = {}
         self._metrics = CacheMetrics()
 
     def _check_cache(self):
@@ -60,62 +99,111 @@ class MemoryCache(object):
             self._reset_cache()
             self._run_token = self._core.run_token
 
-    def _get_ranges(self, addr, count):
-        """@brief Splits a memory address range into cached and uncached subranges.
-        @return Returns a 2-tuple with the first element being a set of Interval objects for each
-          of the cached subranges. The second element is a set of Interval objects for each of the
-          non-cached subranges.
+    def _iter_pages(self, addr, size):
+        """@brief Generator splitting an address range at page boundaries.
+        @return Yields a 3-tuple of page address, offset within the page, and length for each page
+            touched by the address range.
         """
-        cached = self._cache.overlap(addr, addr + count)
-        uncached = {Interval(addr, addr + count)}
-        for cachedIv in cached:
-            newUncachedSet = set()
-            for uncachedIv in uncached:
-
-                # No overlap.
-                if cachedIv.end < uncachedIv.begin or cachedIv.begin > uncachedIv.end:
-                    newUncachedSet.add(uncachedIv)
-                    continue
-
-                # Begin segment.
-                if cachedIv.begin - uncachedIv.begin > 0:
-                    newUncachedSet.add(Interval(uncachedIv.begin, cachedIv.begin))
-
-                # End segment.
-                if uncachedIv.end - cachedIv.end > 0:
-                    newUncachedSet.add(Interval(cachedIv.end, uncachedIv.end))
-            uncached = newUncachedSet
-        return cached, uncached
-
-    def _read_uncached(self, uncached):
-        """"@brief Reads uncached memory ranges and updates the cache.
-        @return A list of Interval objects is returned. Each Interval has its @a data attribute set
-          to a bytearray of the data read from target memory.
+        end = addr + size
+        while addr < end:
+            page_addr = addr & ~self._page_mask
+            offset = addr - page_addr
+            length = min(self._page_size - offset, end - addr)
+            yield page_addr, offset, length
+            addr += length
+
+    def _get_missing_ranges(self, addr, size) -> List[Tuple[int, int]]:
+        """@brief Find the uncached subranges of a memory range.
+
+        Adjacent missing ranges are coalesced, including across page boundaries.
+
+        @return List of (start, end) address tuples sorted by address.
         """
-        uncachedData = []
-        for uncachedIv in uncached:
-            data = self._context.read_memory_block8(uncachedIv.begin, uncachedIv.end - uncachedIv.begin)
-            iv = Interval(uncachedIv.begin, uncachedIv.end, bytearray(data))
-            self._cache.add(iv) # TODO merge contiguous cached intervals
-            uncachedData.append(iv)
-        return uncachedData
-
-    def _update_metrics(self, cached, uncached, addr, size):
-        cachedSize = 0
-        for iv in cached:
-            begin = iv.begin
-            end = iv.end
-            if iv.begin < addr:
-                begin = addr
-            if iv.end > addr + size:
-                end = addr + size
-            cachedSize += end - begin
-
-        uncachedSize = sum((iv.end - iv.begin) for iv in uncached)
+        missing: List[Tuple[int, int]] = []
 
-        self._metrics.reads += 1
-        self._metrics.hits += cachedSize
-        self._metrics.misses += uncachedSize
+        def add(start, end):
+            if missing and missing[-1][1] == start:
+                missing[-1] = (missing[-1][0], end)
+            else:
+                missing.append((start, end))
+
+        for page_addr, offset, length in self._iter_pages(addr, size):
+            page = self._pages.get(page_addr)
+            if page is None:
+                add(page_addr + offset, page_addr + offset + length)
+                continue
+            valid = page[1]
+            end_offset = offset + length
+            while offset < end_offset:
+                offset = valid.find(0, offset, end_offset)
+                if offset == -1:
+                    break
+                run_end = valid.find(1, offset, end_offset)
+                if run_end == -1:
+                    run_end = end_offset
+                add(page_addr + offset, page_addr + run_end)
+                offset = run_end
+        return missing
+
+    def _expand_missing_ranges(self, missing: List[Tuple[int, int]], region: MemoryRegion) \
+            -> List[Tuple[int, int]]:
+        """@brief Apply the read-ahead policy for a region to a list of missing ranges.
+
+        Each range is rounded out to the region type's line size and clipped to the region. Ranges that
+        then overlap or are adjacent are merged.
+
+        @return New list of (start, end) address tuples sorted by address.
+        """
+        line_size = self._read_ahead.get(region.type, 0)
+        if not line_size:
+            return missing
+        expanded: List[Tuple[int, int]] = []
+        for start, end in missing:
+            start = max(align_down(start, line_size), region.start)
+            end = min(align_up(end, line_size), region.end + 1)
+            if expanded and expanded[-1][1] >= start:
+                expanded[-1] = (expanded[-1][0], end)
+            else:
+                expanded.append((start, end))
+        return expanded
+
+    def _read_range(self, start: int, end: int, missing: List[Tuple[int, int]]) -> None:
+        """@brief Read a possibly expanded range into the cache.
+
+        If the read faults and the range was widened by read-ahead, only the missing ranges it
+        contains are read instead. This handles memory map regions that are larger than the memory
+        that is actually accessible.
+        """
+        try:
+            self._update_pages(start, self._context.read_memory_bytes(start, end - start))
+        except TransferFaultError:
+            exact = [(s, e) for s, e in missing if start <= s and e <= end]
+            if exact == [(start, end)]:
+                raise
+            LOG.debug("read-ahead of [%x:%x] faulted; reading only the requested data", start, end)
+            for exact_start, exact_end in exact:
+                self._update_pages(exact_start,
+                        self._context.read_memory_bytes(exact_start, exact_end - exact_start))
+
+    def _update_pages(self, addr, data):
+        """@brief Copy data into the cache, allocating pages as required."""
+        pos = 0
+        for page_addr, offset, length in self._iter_pages(addr, len(data)):
+            page = self._pages.get(page_addr)
+            if page is None:
+                page = (bytearray(self._page_size), bytearray(self._page_size))
+                self._pages[page_addr] = page
+            page[0][offset:offset + length] = data[pos:pos + length]
+            page[1][offset:offset + length] = self._all_valid[:length]
+            pos += length
+
+    def _read_pages(self, addr, size) -> bytes:
+        """@brief Extract data for a range of memory that is entirely cached."""
+        result = bytearray()
+        for page_addr, offset, length in self._iter_pages(addr, size):
+            with memoryview(self._pages[page_addr][0]) as view:
+                result += view[offset:offset + length]
+        return bytes(result)
 
     def _dump_metrics(self):
         if self._metrics.total > 0:
@@ -125,112 +213,27 @@ class MemoryCache(object):
         else:
             LOG.debug("no reads")
 
-    def _read(self, addr, size):
-        """@brief Performs a cached read operation of an address range.
-        @return A list of Interval objects sorted by address.
-        """
-        # Get the cached and uncached subranges of the requested read.
-        cached, uncached = self._get_ranges(addr, size)
-        self._update_metrics(cached, uncached, addr, size)
-
-        # Read any uncached ranges.
-        uncachedData = self._read_uncached(uncached)
-
-        # Merged cached with data we just read
-        combined = list(cached) + uncachedData
-        combined.sort(key=lambda x: x.begin)
-        return combined
-
-    def _merge_data(self, combined, addr, size):
-        """@brief Extracts data from the intersection of an address range across a list of interval objects.
-
-        The range represented by @a addr and @a size are assumed to overlap the intervals. The first
-        and last interval in the list may have ragged edges not fully contained in the address range, in
-        which case the correct slice of those intervals is extracted.
-
-        @param self
-        @param combined List of Interval objects forming a contiguous range. The @a data attribute of
-          each interval must be a bytearray.
-        @param addr Start address. Must be within the range of the first interval.
-        @param size Number of bytes. (@a addr + @a size) must be within the range of the last interval.
-        @return A single bytearray object with all data from the intervals that intersects the address
-          range.
-        """
-        result = bytearray()
-        resultAppend = bytearray()
-
-        # Check for fully contained subrange.
-        if len(combined) and combined[0].begin < addr and combined[0].end > addr + size:
-            offset = addr - combined[0].begin
-            endOffset = offset + size
-            result = combined[0].data[offset:endOffset]
-            return result
-
-        # Take slice of leading ragged edge.
-        if len(combined) and combined[0].begin < addr:
-            offset = addr - combined[0].begin
-            result += combined[0].data[offset:]
-            combined = combined[1:]
-        # Take slice of trailing ragged edge.
-        if len(combined) and combined[-1].end > addr + size:
-            offset = addr + size - combined[-1].begin
-            resultAppend = combined[-1].data[:offset]
-            combined = combined[:-1]
-
-        # Merge.
-        for iv in combined:
-            result += iv.data
-        result += resultAppend
-
-        return result
-
-    def _update_contiguous(self, cached, addr, value):
-        size = len(value)
-        end = addr + size
-        leadBegin = addr
-        leadData = bytearray()
-        trailData = bytearray()
-        trailEnd = end
-
-        if cached[0].begin < addr and cached[0].end > addr:
-            offset = addr - cached[0].begin
-            leadData = cached[0].data[:offset]
-            leadBegin = cached[0].begin
-        if cached[-1].begin < end and cached[-1].end > end:
-            offset = end - cached[-1].begin
-            trailData = cached[-1].data[offset:]
-            trailEnd = cached[-1].end
-
-        self._cache.remove_overlap(addr, end)
-
-        data = leadData + value + trailData
-        self._cache.addi(leadBegin, trailEnd, data)
-
-    def _check_regions(self, addr, count):
-        """@return A bool indicating whether the given address range is fully contained within
-              one known memory region, and that region is cacheable.
+    def _check_regions(self, addr, count) -> Optional[MemoryRegion]:
+        """@return The memory region if the given address range is fully contained within one known
+              memory region and that region is cacheable, otherwise None.
         @exception TransferFaultError Raised if the access is not entirely contained within a single region.
         """
         regions = self._core.memory_map.get_intersecting_regions(addr, length=count)
 
         # If no regions matched, then allow an uncached operation.
         if len(regions) == 0:
-            return False
+            return None
 
         # Raise if not fully contained within one region.
         if len(regions) > 1 or not regions[0].contains_range(addr, length=count):
             raise TransferFaultError("individual memory accesses must not cross memory region boundaries")
 
-        # Otherwise return whether the region is cacheable.
-        return regions[0].is_cacheable
+        # Otherwise return the region if it is cacheable.
+        return regions[0] if regions[0].is_cacheable else None
 
     def read_memory(self, addr, transfer_size=32, now=True):
         # TODO use more optimal underlying read_memory calls
-        if transfer_size == 8:
-            data = self.read_memory_block8(addr, 1)[0]
-        else:
-            data = conversion.byte_list_to_nbit_le_list(self.read_memory_block8(addr, transfer_size // 8),
-                    transfer_size)[0]
+        data = int.from_bytes(self.read_memory_bytes(addr, transfer_size // 8), 'little')
 
         if now:
             return data
@@ -239,70 +242,64 @@ class MemoryCache(object):
                 return data
             return read_cb
 
-    def read_memory_block8(self, addr, size):
+    def read_memory_bytes(self, addr, size):
         if size <= 0:
-            return []
+            return b''
 
         self._check_cache()
 
         # Validate memory regions.
-        if not self._check_regions(addr, size):
+        region = self._check_regions(addr, size)
+        if region is None:
             LOG.debug("range [%x:%x] is not cacheable", addr, addr+size)
-            return self._context.read_memory_block8(addr, size)
+            return self._context.read_memory_bytes(addr, size)
 
-        # Get the cached and uncached subranges of the requested read.
-        combined = self._read(addr, size)
+        # Read and cache any uncached ranges.
+        missing = self._get_missing_ranges(addr, size)
+        missing_size = sum((end - start) for start, end in missing)
+        for start, end in self._expand_missing_ranges(missing, region):
+            self._read_range(start, end, missing)
 
-        # Extract data out of combined intervals.
-        result = list(self._merge_data(combined, addr, size))
+        self._metrics.reads += 1
+        self._metrics.hits += size - missing_size
+        self._metrics.misses += missing_size
+
+        result = self._read_pages(addr, size)
         assert len(result) == size, "result size ({}) != requested size ({})".format(len(result), size)
         return result
 
+    def read_memory_block8(self, addr, size):
+        return list(self.read_memory_bytes(addr, size))
+
     def read_memory_block32(self, addr, size):
-        return conversion.byte_list_to_u32le_list(self.read_memory_block8(addr, size*4))
+        return conversion.bytes_to_u32le(self.read_memory_bytes(addr, size*4)).tolist()
 
     def write_memory(self, addr, value, transfer_size=32):
-        if transfer_size == 8:
-            return self.write_memory_block8(addr, [value])
-        else:
-            return self.write_memory_block8(addr, conversion.nbit_le_list_to_byte_list([value], transfer_size))
+        return self.write_memory_bytes(addr, (value & ((1 << transfer_size) - 1)).to_bytes(transfer_size // 8, 'little'))
 
     def write_memory_block8(self, addr, value):
+        return self.write_memory_bytes(addr, bytes(value))
+
+    def write_memory_bytes(self, addr, value):
         if len(value) <= 0:
             return
 
         self._check_cache()
 
         # Validate memory regions.
-        cacheable = self._check_regions(addr, len(value))
+        cacheable = self._check_regions(addr, len(value)) is not None
 
         # Write to the target first, so if it fails we don't update the cache.
-        result = self._context.write_memory_block8(addr, value)
+        result = self._context.write_memory_bytes(addr, value)
 
         if cacheable:
-            size = len(value)
-            end = addr + size
-            cached = sorted(self._cache.overlap(addr, end), key=lambda x:x.begin)
-            self._metrics.writes += size
-
-            if len(cached):
-                # Write data is entirely within a single cached interval.
-                if addr >= cached[0].begin and end <= cached[0].end:
-                    beginOffset = addr - cached[0].begin
-                    endOffset = beginOffset + size
-                    cached[0].data[beginOffset:endOffset] = value
-
-                else:
-                    self._update_contiguous(cached, addr, bytearray(value))
-            else:
-                # No cached data in this range, so just add the entire interval.
-                self._cache.addi(addr, end, bytearray(value))
+            self._metrics.writes += len(value)
+            self._update_pages(addr, value)
 
         return result
 
     def write_memory_block32(self, addr, data):
-        return self.write_memory_block8(addr, conversion.u32le_list_to_byte_list(data))
+        return self.write_memory_bytes(addr, conversion.u32le_to_bytes(data))
 
     def invalidate(self):
         self._reset_cache()
-
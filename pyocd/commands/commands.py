@@ -33,6 +33,7 @@ from ..core.helpers import ConnectHelper
 from ..core import exceptions
 from ..probe.tcp_probe_server import DebugProbeServer
 from ..core.target import Target
+from ..debug.profiler import (PCSRProfiler, ProfileSymbolizer, SWOProfiler)
 from ..flash.loader import FlashLoader
 from ..flash.eraser import FlashEraser
 from ..flash.file_programmer import FileProgrammer
@@ -1463,6 +1464,62 @@ class SymbolCommand(CommandBase):
         else:
             self.context.writef("No symbol named '{}' was found", self.name)
 
+class ProfileCommand(CommandBase):
+    INFO = {
+            'names': ['profile'],
+            'group': 'standard',
+            'category': 'symbols',
+            'nargs': [1, 2, 3, 4],
+            'usage': "[swo|pcsr] SECONDS [flat|collapsed] [FILENAME]",
+            'help': "Sample the PC while the target runs and show where time is spent.",
+            'extra_help': "The PC is sampled for the given number of seconds, then the samples are "
+                          "counted per function. With the 'swo' method (the default), DWT periodic PC "
+                          "sample packets are sent over SWO; this requires the 'swv_system_clock' option "
+                          "to be set. The 'pcsr' method reads the DWT_PCSR register through the debug "
+                          "port instead, for targets without SWO. The 'flat' format (the default) lists "
+                          "functions by sample count. The 'collapsed' format is the collapsed stack "
+                          "format used by flamegraph tools. The output is written to FILENAME if given. "
+                          "Function names are only available if an ELF file was specified with the --elf "
+                          "option.",
+            }
+
+    def parse(self, args):
+        self.method = 'swo'
+        if args[0].lower() in ('swo', 'pcsr'):
+            self.method = args[0].lower()
+            args = args[1:]
+        if not args:
+            raise exceptions.CommandError("missing duration")
+        self.duration = float(args[0])
+        self.format = args[1].lower() if len(args) > 1 else 'flat'
+        if self.format not in ('flat', 'collapsed'):
+            raise exceptions.CommandError("invalid format")
+        self.filename = args[2] if len(args) > 2 else None
+
+    def execute(self):
+        core_number = self.context.selected_core.core_number
+        if self.method == 'pcsr':
+            profiler = PCSRProfiler(self.context.session, core_number)
+        else:
+            profiler = SWOProfiler(self.context.session, core_number)
+        try:
+            profile = profiler.run(self.duration)
+        except exceptions.TargetSupportError as err:
+            raise exceptions.CommandError(str(err)) from err
+
+        symbolizer = ProfileSymbolizer(self.context.elf)
+        output = open(self.filename, 'w') if self.filename else self.context.output_stream
+        try:
+            if self.format == 'collapsed':
+                profile.write_collapsed(output, symbolizer)
+            else:
+                profile.write_flat(output, symbolizer)
+        finally:
+            if self.filename:
+                output.close()
+        if self.filename:
+            self.context.writei("Wrote %d samples to %s", profile.sample_count, self.filename)
+
 class GdbserverCommand(CommandBase):
     INFO = {
             'names': ['gdbserver'],
@@ -1542,6 +1599,8 @@ class ProbeserverCommand(CommandBase):
         elif self.action == 'status':
             if self.context.session.probeserver is not None:
                 self.context.write("probe server is running")
+                for stats in self.context.session.probeserver.client_statistics:
+                    self.context.write("  client " + str(stats))
             else:
                 self.context.write("probe server is not running")
 
@@ -154,6 +154,10 @@ class FlashProgramFailure(FlashFailure):
     """@brief An attempt to program flash failed. """
     pass
 
+class FlashVerifyFailure(FlashFailure):
+    """@brief Flash contents do not match the programmed data. """
+    pass
+
 class CommandError(Error):
     """@brief Raised when a command encounters an error."""
     pass
@@ -159,45 +159,66 @@ class MemoryInterface:
         """@brief Read a block of unaligned bytes in memory.
         @return an array of byte values
         """
-        res = []
+        return list(self.read_memory_bytes(addr, size))
+
+    def write_memory_block8(self, addr: int, data: Sequence[int]) -> None:
+        """@brief Write a block of unaligned bytes in memory."""
+        if not isinstance(data, (bytes, bytearray, memoryview)):
+            data = bytes(data)
+        self.write_memory_bytes(addr, data)
+
+    def read_memory_bytes(self, addr: int, size: int) -> bytes:
+        """@brief Read a block of unaligned bytes in memory.
+
+        This is the same as read_memory_block8() except that the data is returned as a bytes object
+        instead of a list of ints, so large transfers do not need an object per byte.
+
+        The default implementation reads unaligned leading and trailing bytes and halfwords with
+        read_memory(), and the aligned middle with read_memory_block32(). Subclasses should override
+        this method if they can access bytes more directly.
+
+        @return bytes object containing the data read from memory.
+        """
+        res = bytearray()
 
         # try to read 8bits data
         if (size > 0) and (addr & 0x01):
-            mem = self.read8(addr)
-            res.append(mem)
+            res.append(cast(int, self.read8(addr)))
             size -= 1
             addr += 1
 
         # try to read 16bits data
         if (size > 1) and (addr & 0x02):
-            mem = cast(int, self.read16(addr))
-            res.append(mem & 0xff)
-            res.append((mem >> 8) & 0xff)
+            res += cast(int, self.read16(addr)).to_bytes(2, 'little')
             size -= 2
             addr += 2
 
         # try to read aligned block of 32bits
         if (size >= 4):
             data32 = self.read_memory_block32(addr, size // 4)
-            res += conversion.u32le_list_to_byte_list(data32)
+            res += conversion.u32le_to_bytes(data32)
             size -= 4*len(data32)
             addr += 4*len(data32)
 
         if (size > 1):
-            mem = cast(int, self.read16(addr))
-            res.append(mem & 0xff)
-            res.append((mem >> 8) & 0xff)
+            res += cast(int, self.read16(addr)).to_bytes(2, 'little')
             size -= 2
             addr += 2
 
         if (size > 0):
-            mem = self.read8(addr)
-            res.append(mem)
+            res.append(cast(int, self.read8(addr)))
 
-        return res
+        return bytes(res)
 
-    def write_memory_block8(self, addr: int, data: Sequence[int]) -> None:
-        """@brief Write a block of unaligned bytes in memory."""
+    def write_memory_bytes(self, addr: int, data: conversion.BytesLike) -> None:
+        """@brief Write a block of unaligned bytes in memory.
+
+        This is the same as write_memory_block8() except that the data must be a bytes-like object.
+
+        The default implementation writes unaligned leading and trailing bytes and halfwords with
+        write_memory(), and the aligned middle with write_memory_block32(). Subclasses should override
+        this method if they can access bytes more directly.
+        """
         size = len(data)
         idx = 0
 
@@ -217,7 +238,7 @@ class MemoryInterface:
 
         # write aligned block of 32 bits
         if (size >= 4):
-            data32 = conversion.byte_list_to_u32le_list(data[idx:idx + (size & ~0x03)])
+            data32 = conversion.bytes_to_u32le(data[idx:idx + (size & ~0x03)]).tolist()
             self.write_memory_block32(addr, data32)
             addr += size & ~0x03
             idx += size & ~0x03
@@ -233,4 +254,3 @@ class MemoryInterface:
         #try to write 8 bits data
         if (size > 0):
             self.write8(addr, data[idx])
-
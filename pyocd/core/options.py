@@ -39,6 +39,17 @@ BUILTIN_OPTIONS = [
         "Enable the memory read cache. Default is enabled."),
     OptionInfo('cache.enable_register', bool, True,
         "Enable the core register cache. Default is enabled."),
+    OptionInfo('cache.memory_page_size', int, 256,
+        "Size in bytes of the pages used by the memory read cache. Must be a power of two. Default is 256."),
+    OptionInfo('cache.read_ahead.flash', int, 256,
+        "Line size in bytes that memory cache misses in flash regions are expanded to. Must be zero or a power "
+        "of two. Zero disables read-ahead. Default is 256."),
+    OptionInfo('cache.read_ahead.ram', int, 64,
+        "Line size in bytes that memory cache misses in RAM regions are expanded to. Must be zero or a power "
+        "of two. Zero disables read-ahead. Default is 64."),
+    OptionInfo('cache.read_ahead.rom', int, 256,
+        "Line size in bytes that memory cache misses in ROM regions are expanded to. Must be zero or a power "
+        "of two. Zero disables read-ahead. Default is 256."),
     OptionInfo('cache.read_code_from_elf', bool, True,
         "Controls whether reads of code sections will be taken from an attached ELF file instead of the "
         "target memory."),
@@ -72,6 +83,16 @@ BUILTIN_OPTIONS = [
     OptionInfo('fast_program', bool, False,
         "Setting this option to True will use CRC checks of existing flash sector contents to "
         "determine whether pages need to be programmed."),
+    OptionInfo('flash.content_cache.dir', str, None,
+        "Directory in which flash content cache files are stored. The default is a 'flash' directory "
+        "within the user's pyOCD cache directory."),
+    OptionInfo('flash.content_cache.enable', bool, False,
+        "Whether to record the CRCs of programmed flash pages on disk, per probe, target, and flash "
+        "region. If the CRC analyzer confirms the region is unchanged since the last load, the "
+        "recorded CRCs are used to skip unchanged pages without reading them back."),
+    OptionInfo('flash.pipeline_depth', int, 4,
+        "Number of pages prepared ahead of time by a background thread during double buffered flash "
+        "programming. Set to 0 to prepare pages on the programming thread."),
     OptionInfo('flash.timeout.init', float, 5.0,
         "Flash algorithm init and uninit timeout in seconds."),
     OptionInfo('flash.timeout.analyzer', float, 30.0,
@@ -82,6 +103,10 @@ BUILTIN_OPTIONS = [
         "Flash algorithm sector erase timeout in seconds."),
     OptionInfo('flash.timeout.program', float, 10.0,
         "Flash algorithm programming timeout in seconds."),
+    OptionInfo('flash.verify', str, "none",
+        "How to verify flash contents after programming. One of 'none', 'crc' to compare CRCs computed on "
+        "the target by the CRC analyzer (falling back to 'read' if not supported), or 'read' to read "
+        "back and compare the data."),
     OptionInfo('frequency', int, 1000000,
         "SWD/JTAG frequency in Hertz."),
     OptionInfo('hide_programming_progress', bool, False,
@@ -108,6 +133,9 @@ BUILTIN_OPTIONS = [
     OptionInfo('primary_core', int, 0,
         "Core number for the primary/boot core of an asymmetric multicore target. This is the core that "
         "will control system reset when 'enable_multicore' is set."),
+    OptionInfo('probeserver.lock_lease_timeout', float, 10.0,
+        "Seconds a debug probe server client may hold the probe lock without sending requests while "
+        "other clients are waiting, before its lock is revoked."),
     OptionInfo('probeserver.port', int, 5555,
         "TCP port for the debug probe server."),
     OptionInfo('project_dir', str, None,
@@ -131,6 +159,12 @@ BUILTIN_OPTIONS = [
         "Set to 0 to disable the core accessibility test. Default is 2.0 s."),
     OptionInfo('resume_on_disconnect', bool, True,
         "Whether to run target on disconnect."),
+    OptionInfo('rtt.address_cache.dir', str, None,
+        "Directory in which the RTT control block address cache is stored. The default is an 'rtt' "
+        "directory within the user's pyOCD cache directory."),
+    OptionInfo('rtt.address_cache.enable', bool, False,
+        "Whether to remember the address of the RTT control block for each ELF build ID, so the "
+        "control block can be found without searching the next time the same ELF is used."),
     OptionInfo('scan_all_aps', bool, False,
         "Controls whether all 256 ADIv5 AP addresses will be probed. Default is False."),
     OptionInfo('serve_local_only', bool, True,
@@ -180,6 +214,8 @@ BUILTIN_OPTIONS = [
         "Program command line string, used for the SYS_GET_CMDLINE semihosting request."),
     OptionInfo('step_into_interrupt', bool, False,
         "Enable interrupts when performing step operations."),
+    OptionInfo('swv_buffer_size', int, 1024 * 1024,
+        "Size in bytes of the buffers that hold captured SWO data until it is decoded. Default is 1 MB."),
     OptionInfo('swv_clock', int, 1000000,
         "Frequency in Hertz of the SWO baud rate. Default is 1 MHz."),
     OptionInfo('swv_system_clock', int, None,
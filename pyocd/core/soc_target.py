@@ -28,6 +28,7 @@ from ..debug.cache import CachingDebugContext
 from ..debug.context import DebugContext
 from ..debug.elf.elf import ELFBinaryFile
 from ..debug.elf.elf_reader import ElfReaderContext
+from ..utility.conversion import BytesLike
 from ..utility.sequencer import CallSequence
 
 if TYPE_CHECKING:
@@ -243,6 +244,12 @@ class SoCTarget(TargetGraphNode):
     def read_memory_block32(self, addr: int, size: int) -> Sequence[int]:
         return self.selected_core_or_raise.read_memory_block32(addr, size)
 
+    def write_memory_bytes(self, addr: int, data: BytesLike) -> None:
+        return self.selected_core_or_raise.write_memory_bytes(addr, data)
+
+    def read_memory_bytes(self, addr: int, size: int) -> bytes:
+        return self.selected_core_or_raise.read_memory_bytes(addr, size)
+
     def read_core_register(self, id: CoreRegisterNameOrNumberType) -> CoreRegisterValueType:
         return self.selected_core_or_raise.read_core_register(id)
 
@@ -26,6 +26,7 @@ from typing_extensions import Literal
 
 from ..core import (exceptions, memory_interface)
 from ..core.target import Target
+from ..utility import conversion
 from ..utility.concurrency import locked
 
 if TYPE_CHECKING:
@@ -611,11 +612,15 @@ class MEM_AP(AccessPort, memory_interface.MemoryInterface):
             self.read_memory_block32 = self._accelerated_read_memory_block32
             self.write_memory_block8 = self._accelerated_write_memory_block8
             self.read_memory_block8 = self._accelerated_read_memory_block8
+            self.write_memory_bytes = self._accelerated_write_memory_bytes
+            self.read_memory_bytes = self._accelerated_read_memory_bytes
         else:
             self.write_memory = self._write_memory
             self.read_memory = self._read_memory
             self.write_memory_block32 = self._write_memory_block32
             self.read_memory_block32 = self._read_memory_block32
+            self.write_memory_bytes = self._write_memory_bytes
+            self.read_memory_bytes = self._read_memory_bytes
 
         # Subscribe to reset events.
         self.dp.session.subscribe(self._reset_did_occur, (Target.Event.PRE_RESET, Target.Event.POST_RESET))
@@ -1213,6 +1218,80 @@ class MEM_AP(AccessPort, memory_interface.MemoryInterface):
             addr += n
         return resp
 
+    @locked
+    def read_memory_repeated32(self, addr: int, count: int, now: bool = True) \
+            -> Union[Sequence[int], Callable[[], Sequence[int]]]:
+        """@brief Read the same aligned word many times.
+
+        TAR auto-increment is disabled, so all reads go to the same address. This is intended for
+        sampling a register whose value changes on its own, such as DWT_PCSR. The reads are issued
+        as a single multiple-read transfer, which probes can pack many of into each packet.
+
+        If the probe provides an accelerated memory interface for this AP, which doesn't support
+        raw AP register accesses, each read is instead queued separately through it.
+
+        @param self
+        @param addr Address of the word to read.
+        @param count Number of times to read the word.
+        @param now If False, a callback is returned that must be called to get the values.
+        @return A list of `count` word values, or a callback returning it.
+        """
+        assert (addr & 0x3) == 0
+        if self._accelerated_memory_interface is not None:
+            callbacks = [self.read_memory(addr, 32, now=False) for _ in range(count)]
+
+            def read_queued_cb() -> Sequence[int]:
+                return [cb() for cb in callbacks]
+
+            return read_queued_cb() if now else read_queued_cb
+
+        addr &= self._address_mask
+        num = self.dp.next_access_number
+        TRACE.debug("read_repeated32:%06d (ap=0x%x; addr=0x%08x, count=%d)",
+            num, self.address.nominal_address, addr, count)
+        try:
+            self.write_reg(self._reg_offset + MEM_AP_CSW, (self._csw & ~CSW_ADDRINC) | CSW_NADDRINC | CSW_SIZE32)
+            self.write_reg(self._reg_offset + MEM_AP_TAR, addr)
+            result_cb = self.dp.read_ap_multiple(self.address.address + self._reg_offset + MEM_AP_DRW,
+                    count, now=False)
+        except exceptions.Error as error:
+            self._handle_error(error, num)
+            raise
+
+        def read_repeated_cb() -> Sequence[int]:
+            try:
+                return result_cb()
+            except exceptions.TransferFaultError as error:
+                self._handle_error(error, num)
+                error.fault_address = addr
+                error.fault_length = 4
+                raise
+            except exceptions.Error as error:
+                self._handle_error(error, num)
+                raise
+
+        return read_repeated_cb() if now else read_repeated_cb
+
+    @locked
+    def _write_memory_bytes(self, addr: int, data: conversion.BytesLike) -> None:
+        """@brief Write a block of unaligned bytes in memory.
+
+        Unaligned leading and trailing bytes use single transfers, while the aligned middle is
+        written with _write_memory_block32().
+        """
+        super().write_memory_bytes(addr, data)
+
+    @locked
+    def _read_memory_bytes(self, addr: int, size: int) -> bytes:
+        """@brief Read a block of unaligned bytes in memory.
+
+        Unaligned leading and trailing bytes use single transfers, while the aligned middle is
+        read with _read_memory_block32().
+
+        @return A bytes object.
+        """
+        return super().read_memory_bytes(addr, size)
+
     # Note: the "type: ignore"s below are ok because the accelerated memory interface accepts
     # attribute keyword args. The MemoryInterface class should be extended to accept attribute args
     # too, but that changes a lot of places. So for now just ignore the type error. This will be
@@ -1278,6 +1357,26 @@ class MEM_AP(AccessPort, memory_interface.MemoryInterface):
         return self._accelerated_memory_interface.read_memory_block8(addr, size,
                 csw=self._csw) # type: ignore
 
+    @locked
+    def _accelerated_write_memory_bytes(self, addr: int, data: conversion.BytesLike) -> None:
+        """@brief Write a memory block using the probe's accelerated memory interface.
+
+        The current CSW value is passed to the accelerted interface, primarily for STLink.
+        """
+        assert self._accelerated_memory_interface is not None
+        self._accelerated_memory_interface.write_memory_block8(addr, data,
+                csw=self._csw) # type: ignore
+
+    @locked
+    def _accelerated_read_memory_bytes(self, addr: int, size: int) -> bytes:
+        """@brief Read a memory block using the probe's accelerated memory interface.
+
+        The current CSW value is passed to the accelerted interface, primarily for STLink.
+        """
+        assert self._accelerated_memory_interface is not None
+        return bytes(self._accelerated_memory_interface.read_memory_block8(addr, size,
+                csw=self._csw)) # type: ignore
+
     def _handle_error(self, error: Exception, num: int) -> None:
         self.dp._handle_error(error, num)
         self._invalidate_cache()
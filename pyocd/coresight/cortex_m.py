@@ -26,7 +26,7 @@ from ..core.target import Target
 from ..core.core_target import CoreTarget
 from ..core import exceptions
 from ..core.core_registers import CoreRegistersIndex
-from ..utility import (cmdline, timeout)
+from ..utility import (cmdline, conversion, timeout)
 from .component import (CoreSightComponent, CoreSightCoreComponent)
 from .fpb import FPB
 from .dwt import DWT
@@ -629,6 +629,17 @@ class CortexM(CoreTarget, CoreSightCoreComponent): # lgtm[py/multiple-calls-to-i
         data = self.ap.read_memory_block32(addr, size)
         return self.bp_manager.filter_memory_aligned_32(addr, size, data)
 
+    def read_memory_bytes(self, addr: int, size: int) -> bytes:
+        """@brief Read a block of unaligned bytes in memory.
+        @return bytes object containing the data read from memory.
+        """
+        data = bytearray(self.ap.read_memory_bytes(addr, size))
+        return bytes(self.bp_manager.filter_memory_unaligned_8(addr, size, data))
+
+    def write_memory_bytes(self, addr: int, data: conversion.BytesLike) -> None:
+        """@brief Write a block of unaligned bytes in memory."""
+        self.ap.write_memory_bytes(addr, data)
+
     def halt(self) -> None:
         """@brief Halt the core
         """
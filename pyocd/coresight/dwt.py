@@ -184,6 +184,70 @@ class DWT(CoreSightComponent):
     def get_watchpoints(self):
         return [watch for watch in self.watchpoints if watch.func != 0]
 
+    @staticmethod
+    def pc_sampling_config(interval):
+        """@brief Compute the DWT_CTRL fields for the PC sampling interval closest to the requested one.
+
+        A PC sample is taken every time the POSTCNT counter underflows. POSTCNT is decremented each
+        time CYCCNT bit 6 (CYCTAP=0) or bit 10 (CYCTAP=1) toggles, and reloads from POSTPRESET. So
+        the possible intervals are 64 or 1024 cycles times 1 to 16.
+
+        @param interval Desired number of cycles between samples.
+        @return Tuple of (cyctap, postpreset, actual interval in cycles).
+        """
+        best = None
+        for cyctap, tap in ((0, 64), (1, 1024)):
+            postpreset = min(15, max(0, round(interval / tap) - 1))
+            actual = tap * (postpreset + 1)
+            if best is None or abs(actual - interval) < abs(best[2] - interval):
+                best = (cyctap, postpreset, actual)
+        return best
+
+    def enable_pc_sampling(self, interval):
+        """@brief Enable periodic PC sample packets.
+
+        The cycle counter is enabled as well, since it drives the sampling. The ITM must be enabled
+        with DWT packet forwarding (TXENA) for the samples to reach the trace output.
+
+        @param interval Desired number of cycles between samples.
+        @return The actual number of cycles between samples.
+        """
+        if self.dwt_configured is False:
+            self.init()
+
+        cyctap, postpreset, actual = self.pc_sampling_config(interval)
+        ctrl = self.ap.read32(self.address + self.DWT_CTRL)
+        ctrl &= ~(self.DWT_CTRL_PCSAMPLENA_MASK | self.DWT_CTRL_CYCTAP_MASK
+                | self.DWT_CTRL_POSTINIT_MASK | self.DWT_CTRL_POSTRESET_MASK)
+        ctrl |= ((cyctap * self.DWT_CTRL_CYCTAP_MASK)
+                | (postpreset << self.DWT_CTRL_POSTINIT_SHIFT)
+                | (postpreset << self.DWT_CTRL_POSTRESET_SHIFT)
+                | self.DWT_CTRL_CYCCNTENA_MASK)
+        # Change the counter configuration before enabling sampling.
+        self.ap.write32(self.address + self.DWT_CTRL, ctrl)
+        self.ap.write32(self.address + self.DWT_CTRL, ctrl | self.DWT_CTRL_PCSAMPLENA_MASK)
+        return actual
+
+    def disable_pc_sampling(self):
+        """@brief Stop periodic PC sample packets. The cycle counter is left running."""
+        ctrl = self.ap.read32(self.address + self.DWT_CTRL)
+        self.ap.write32(self.address + self.DWT_CTRL, ctrl & ~self.DWT_CTRL_PCSAMPLENA_MASK)
+
+    def read_pc_samples(self, count, now=True):
+        """@brief Sample the PC by reading DWT_PCSR repeatedly.
+
+        The reads are performed with the AP's read_memory_repeated32(), as one multiple-read
+        transfer of the same address where the probe supports it.
+
+        A value of 0xFFFFFFFF means no sample could be taken, for instance because the core is halted.
+
+        @param self
+        @param count Number of samples to read.
+        @param now If False, a callback is returned that must be called to get the samples.
+        @return A list of `count` sampled PC values, or a callback returning it.
+        """
+        return self.ap.read_memory_repeated32(self.address + self.DWT_PCSR, count, now)
+
     @property
     def cycle_count(self):
         return self.ap.read32(self.address + self.DWT_CYCCNT)
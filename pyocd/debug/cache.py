@@ -18,6 +18,7 @@
 from .context import DebugContext
 from ..cache.memory import MemoryCache
 from ..cache.register import RegisterCache
+from ..core.memory_map import MemoryType
 
 class CachingDebugContext(DebugContext):
     """@brief Debug context combining register and memory caches."""
@@ -27,7 +28,17 @@ class CachingDebugContext(DebugContext):
         self._enable_memory = enable_memory
         self._enable_register = enable_register
         self._regcache = RegisterCache(parent, self.core) if enable_register else parent
-        self._memcache = MemoryCache(parent, self.core) if enable_memory else parent
+        if enable_memory:
+            options = self.session.options
+            self._memcache = MemoryCache(parent, self.core,
+                    page_size=options.get('cache.memory_page_size'),
+                    read_ahead={
+                        MemoryType.FLASH: options.get('cache.read_ahead.flash'),
+                        MemoryType.RAM: options.get('cache.read_ahead.ram'),
+                        MemoryType.ROM: options.get('cache.read_ahead.rom'),
+                        })
+        else:
+            self._memcache = parent
 
     def write_memory(self, addr, value, transfer_size=32):
         return self._memcache.write_memory(addr, value, transfer_size)
@@ -47,6 +58,12 @@ class CachingDebugContext(DebugContext):
     def read_memory_block32(self, addr, size):
         return self._memcache.read_memory_block32(addr, size)
 
+    def write_memory_bytes(self, addr, data):
+        return self._memcache.write_memory_bytes(addr, data)
+
+    def read_memory_bytes(self, addr, size):
+        return self._memcache.read_memory_bytes(addr, size)
+
     def read_core_registers_raw(self, reg_list):
         return self._regcache.read_core_registers_raw(reg_list)
 
@@ -80,6 +80,12 @@ class DebugContext(MemoryInterface):
     def read_memory_block32(self, addr, size):
         return self._parent.read_memory_block32(addr, size)
 
+    def write_memory_bytes(self, addr, data):
+        return self._parent.write_memory_bytes(addr, data)
+
+    def read_memory_bytes(self, addr, size):
+        return self._parent.read_memory_bytes(addr, size)
+
     def read_core_register(self, reg):
         """@brief Read one core register.
 
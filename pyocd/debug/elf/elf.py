@@ -120,6 +120,7 @@ class ELFBinaryFile(object):
 
         self._symbol_decoder = None
         self._address_decoder = None
+        self._build_id = None
 
         self._extract_sections()
         self._compute_regions()
@@ -225,6 +226,20 @@ class ELFBinaryFile(object):
         """
         return self._unused
 
+    @property
+    def build_id(self):
+        """@brief GNU build ID of the ELF file.
+        @return Bytes of the build ID, or None if the file doesn't have a build ID note.
+        """
+        if self._build_id is None:
+            section = self._elf.get_section_by_name('.note.gnu.build-id')
+            if section is not None:
+                for note in section.iter_notes():
+                    if note['n_type'] == 'NT_GNU_BUILD_ID':
+                        self._build_id = bytes.fromhex(note['n_desc'])
+                        break
+        return self._build_id
+
     @property
     def symbol_decoder(self):
         if self._symbol_decoder is None:
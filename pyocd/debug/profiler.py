@@ -0,0 +1,417 @@
+# pyOCD debugger
+# Copyright (c) 2026 pyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""@brief Statistical PC sampling profiler.
+
+The profiler collects samples of the PC while the target runs, without halting it, and builds a
+histogram of the sampled PC values. The histogram is symbolized using the ELF file's symbol table
+and DWARF line information, then written as a flat profile or as collapsed stacks that can be fed to
+flamegraph tools such as `flamegraph.pl` or speedscope.
+"""
+
+import collections
+from itertools import compress
+import logging
+import os
+import threading
+import time
+from contextlib import nullcontext
+from typing import (Callable, Counter, Dict, Iterable, List, Optional, TextIO, Tuple, TYPE_CHECKING, Union)
+
+from ..core import exceptions
+from ..trace.events import (TraceEvent, TraceEventBatch, TraceOverflow, TracePeriodicPC)
+from ..trace.sink import TraceEventSink
+from ..trace.swv import SWVReader
+
+if TYPE_CHECKING:
+    from ..core.session import Session
+    from ..coresight.dwt import DWT
+    from ..debug.elf.elf import ELFBinaryFile
+
+LOG = logging.getLogger(__name__)
+
+## Name used for samples taken while the core was sleeping.
+SLEEP_NAME = "[sleep]"
+
+## Name used for samples whose PC doesn't belong to any known function.
+UNKNOWN_NAME = "[unknown]"
+
+def _to_str(name: Union[str, bytes]) -> str:
+    return name.decode('utf-8', 'replace') if isinstance(name, bytes) else name
+
+class ProfileSymbolizer:
+    """@brief Maps sampled PC values to function names and source lines.
+
+    Functions are looked up in the ELF symbol table first, which covers every function with a
+    symbol, then in the DWARF debug info. Results are cached per address, since a profile usually
+    contains many samples of a relatively small number of distinct PC values.
+    """
+
+    def __init__(self, elf: Optional["ELFBinaryFile"]) -> None:
+        """@brief Constructor.
+        @param self
+        @param elf The ELF file of the firmware running on the target. If None, functions are
+            reported as UNKNOWN_NAME.
+        """
+        self._elf = elf
+        self._functions: Dict[int, str] = {}
+        self._lines: Dict[int, Optional[str]] = {}
+
+    def function_for_address(self, addr: int) -> str:
+        """@brief Return the name of the function containing an address."""
+        try:
+            return self._functions[addr]
+        except KeyError:
+            pass
+
+        name = UNKNOWN_NAME
+        if self._elf is not None:
+            # Thumb function symbols have bit 0 set, so include it in the lookup. Otherwise the
+            # first instruction of a function would fall outside the symbol's range.
+            sym = self._elf.symbol_decoder.get_symbol_for_address(addr | 1)
+            if sym is not None and sym.type == 'STT_FUNC':
+                name = _to_str(sym.name)
+            else:
+                fn = self._elf.address_decoder.get_function_for_address(addr)
+                if fn is not None:
+                    name = _to_str(fn.name)
+        self._functions[addr] = name
+        return name
+
+    def line_for_address(self, addr: int) -> Optional[str]:
+        """@brief Return "file:line" for an address, or None if there is no line info for it."""
+        try:
+            return self._lines[addr]
+        except KeyError:
+            pass
+
+        result = None
+        if self._elf is not None:
+            info = self._elf.address_decoder.get_line_for_address(addr)
+            if info is not None:
+                result = f"{os.path.basename(_to_str(info.filename))}:{info.line}"
+        self._lines[addr] = result
+        return result
+
+class PCSampleProfile:
+    """@brief Histogram of sampled PC values.
+
+    Samples taken while the core was sleeping are counted separately in `sleep_count`. Samples that
+    are known to have been lost are counted in `lost_count`. For SWO this is the number of overflows,
+    since the number of samples lost in each is not known. For DWT_PCSR it is the number of reads
+    that returned no sample.
+    """
+
+    def __init__(self) -> None:
+        self.pc_counts: Counter[int] = collections.Counter()
+        self.sleep_count = 0
+        self.lost_count = 0
+        ## Time in seconds over which samples were collected.
+        self.duration = 0.0
+
+    @property
+    def sample_count(self) -> int:
+        """@brief Total number of samples, including sleep samples."""
+        return sum(self.pc_counts.values()) + self.sleep_count
+
+    @property
+    def samples_per_second(self) -> float:
+        return (self.sample_count / self.duration) if self.duration else 0.0
+
+    def add_samples(self, pcs: Iterable[int]) -> None:
+        """@brief Count a sequence of sampled PC values."""
+        self.pc_counts.update(pcs)
+
+    def clear(self) -> None:
+        self.pc_counts.clear()
+        self.sleep_count = 0
+        self.lost_count = 0
+        self.duration = 0.0
+
+    def function_counts(self, symbolizer: ProfileSymbolizer) -> List[Tuple[str, int]]:
+        """@brief Return the number of samples for each function, most sampled first."""
+        counts: Counter[str] = collections.Counter()
+        for pc, count in self.pc_counts.items():
+            counts[symbolizer.function_for_address(pc)] += count
+        if self.sleep_count:
+            counts[SLEEP_NAME] += self.sleep_count
+        return counts.most_common()
+
+    def write_flat(self, output: TextIO, symbolizer: ProfileSymbolizer, limit: Optional[int] = None) -> None:
+        """@brief Write a flat profile with the sample count and percentage of each function.
+        @param self
+        @param output Text stream to write to.
+        @param symbolizer Symbolizer for the sampled PCs.
+        @param limit Maximum number of functions to list. All functions are listed if None.
+        """
+        total = self.sample_count
+        output.write(f"{total} samples in {self.duration:.2f} s ({self.samples_per_second:.0f} samples/s)")
+        if self.lost_count:
+            output.write(f", {self.lost_count} lost")
+        output.write("\n")
+        if not total:
+            return
+        output.write(f"{'Samples':>10} {'%':>7}  Function\n")
+        for name, count in self.function_counts(symbolizer)[:limit]:
+            output.write(f"{count:>10} {count * 100 / total:>7.2f}  {name}\n")
+
+    def write_collapsed(self, output: TextIO, symbolizer: ProfileSymbolizer, lines: bool = False) -> None:
+        """@brief Write the profile in the collapsed stack format used by flamegraph tools.
+
+        Each line is a semicolon separated stack of frames followed by a space and a sample count.
+        Only the sampled function is known, so the stacks are a single frame deep unless `lines` is
+        set, in which case each function frame has a child frame per source line.
+
+        @param self
+        @param output Text stream to write to.
+        @param symbolizer Symbolizer for the sampled PCs.
+        @param lines Whether to add source line frames below the function frames.
+        """
+        stacks: Counter[str] = collections.Counter()
+        for pc, count in self.pc_counts.items():
+            stack = symbolizer.function_for_address(pc)
+            if lines:
+                line = symbolizer.line_for_address(pc)
+                if line is not None:
+                    stack += ";" + line
+            stacks[stack] += count
+        if self.sleep_count:
+            stacks[SLEEP_NAME] += self.sleep_count
+        for stack, count in sorted(stacks.items()):
+            output.write(f"{stack} {count}\n")
+
+class PCSampleSink(TraceEventSink):
+    """@brief Trace event sink that adds DWT periodic PC samples to a profile."""
+
+    def __init__(self, profile: PCSampleProfile) -> None:
+        self._profile = profile
+
+    def receive(self, event: TraceEvent) -> None:
+        if isinstance(event, TracePeriodicPC):
+            # A PC of 0 is a sleep packet.
+            if event.pc:
+                self._profile.pc_counts[event.pc] += 1
+            else:
+                self._profile.sleep_count += 1
+        elif isinstance(event, TraceOverflow):
+            self._profile.lost_count += 1
+
+    def receive_many(self, batch: TraceEventBatch) -> None:
+        count = batch.count
+        kinds = batch.kind[:count]
+        pc_mask = [k == TraceEventBatch.PERIODIC_PC for k in kinds]
+        pcs = list(compress(batch.value[:count], pc_mask))
+        if pcs:
+            sleeps = pcs.count(0)
+            if sleeps:
+                self._profile.sleep_count += sleeps
+                pcs = [pc for pc in pcs if pc]
+            self._profile.add_samples(pcs)
+        self._profile.lost_count += kinds.count(TraceEventBatch.OVERFLOW)
+
+class SWOProfiler:
+    """@brief Collects PC samples from DWT periodic PC packets sent over SWO.
+
+    The DWT is configured to emit a PC sample packet every `interval` cycles. The packets are read
+    and decoded by an SWVReader, so the `swv_system_clock` and `swv_clock` session options control
+    the SWO configuration just as for SWV. The sampling interval must be long enough for the SWO
+    bandwidth: each sample is 5 bytes, or 50 bits on the wire in UART mode.
+    """
+
+    ## Default number of cycles between samples.
+    DEFAULT_INTERVAL = 4096
+
+    def __init__(self, session: "Session", core_number: int = 0, interval: int = DEFAULT_INTERVAL,
+            lock: Optional[threading.Lock] = None) -> None:
+        """@brief Constructor.
+        @param self
+        @param session The Session.
+        @param core_number Number of the core to profile.
+        @param interval Requested number of cycles between samples.
+        @param lock Optional lock held while the probe is accessed, shared with other users.
+        """
+        self._session = session
+        self._core_number = core_number
+        self._requested_interval = interval
+        self._lock = lock
+        self._reader: Optional[SWVReader] = None
+        self._start_time = 0.0
+        self.profile = PCSampleProfile()
+        ## Actual number of cycles between samples, set by start().
+        self.interval = 0
+
+    def start(self) -> None:
+        """@brief Start sampling.
+        @exception TargetSupportError The probe or target doesn't support SWO PC sampling, or the
+            swv_system_clock option isn't set.
+        """
+        target = self._session.target
+        assert target
+        core = target.cores[self._core_number]
+        if getattr(core, 'dwt', None) is None:
+            raise exceptions.TargetSupportError("core has no DWT")
+        if self._session.options.get('swv_system_clock') is None:
+            raise exceptions.TargetSupportError("the swv_system_clock option must be set for SWO PC sampling")
+
+        self.profile.clear()
+        self._reader = SWVReader(self._session, self._core_number, self._lock)
+        if not self._reader.init(int(self._session.options.get('swv_system_clock')),
+                int(self._session.options.get('swv_clock')), None, PCSampleSink(self.profile)):
+            self._reader = None
+            raise exceptions.TargetSupportError("failed to start SWO")
+
+        self.interval = core.dwt.enable_pc_sampling(self._requested_interval)
+        LOG.info("Sampling PC every %d cycles", self.interval)
+        self._start_time = time.monotonic()
+
+    def stop(self) -> PCSampleProfile:
+        """@brief Stop sampling.
+        @return The collected profile.
+        """
+        if self._reader is not None:
+            target = self._session.target
+            assert target
+            core = target.cores[self._core_number]
+            core.dwt.disable_pc_sampling()
+            self._reader.stop()
+            self._reader = None
+            self.profile.duration = time.monotonic() - self._start_time
+        return self.profile
+
+    def run(self, duration: float, should_stop: Optional[Callable[[], bool]] = None) -> PCSampleProfile:
+        """@brief Collect samples for a period of time.
+        @param self
+        @param duration Time in seconds to sample for.
+        @param should_stop Optional function that is called periodically and returns True to stop
+            sampling early.
+        @return The collected profile.
+        """
+        self.start()
+        try:
+            end = time.monotonic() + duration
+            while time.monotonic() < end and not (should_stop and should_stop()):
+                time.sleep(min(0.1, max(0.0, end - time.monotonic())))
+        finally:
+            self.stop()
+        return self.profile
+
+class PCSRProfiler:
+    """@brief Collects PC samples by reading DWT_PCSR while the core runs.
+
+    This works on targets without SWO, as long as the DWT implements the optional PC sample
+    register. Each read of DWT_PCSR returns the address of a recently executed instruction. The
+    register is read `batch_size` times per multiple-read transfer, and `PIPELINE_DEPTH` transfers
+    are queued before waiting for any results, so the probe can pack many reads into each USB
+    packet. The achievable sample rate therefore depends mostly on the probe and the SWD clock.
+
+    Sampling runs on the calling thread, from run() or repeated calls to sample().
+    """
+
+    ## Default number of DWT_PCSR reads per transfer.
+    DEFAULT_BATCH_SIZE = 256
+
+    ## Number of transfers queued before waiting for their results.
+    PIPELINE_DEPTH = 4
+
+    ## Value read from DWT_PCSR when no sample is available.
+    NO_SAMPLE = 0xffffffff
+
+    def __init__(self, session: "Session", core_number: int = 0, batch_size: int = DEFAULT_BATCH_SIZE,
+            lock: Optional[threading.Lock] = None) -> None:
+        """@brief Constructor.
+        @param self
+        @param session The Session.
+        @param core_number Number of the core to profile.
+        @param batch_size Number of DWT_PCSR reads per transfer.
+        @param lock Optional lock held while the probe is accessed, shared with other users.
+        """
+        self._session = session
+        self._core_number = core_number
+        self._batch_size = batch_size
+        self._lock = lock
+        self._dwt: Optional["DWT"] = None
+        self._start_time = 0.0
+        self.profile = PCSampleProfile()
+        ## Total number of DWT_PCSR reads, including those that returned no sample.
+        self.read_count = 0
+
+    def _probe_lock(self):
+        return self._lock if self._lock else nullcontext()
+
+    def start(self) -> None:
+        """@brief Prepare for sampling.
+        @exception TargetSupportError The core has no DWT or the DWT doesn't implement DWT_PCSR.
+        """
+        target = self._session.target
+        assert target
+        dwt = getattr(target.cores[self._core_number], 'dwt', None)
+        if dwt is None:
+            raise exceptions.TargetSupportError("core has no DWT")
+
+        with self._probe_lock():
+            if not dwt.dwt_configured:
+                dwt.init()
+            # DWT_PCSR is RAZ if not implemented.
+            if dwt.read_pc_samples(1)[0] == 0:
+                raise exceptions.TargetSupportError("DWT does not implement DWT_PCSR")
+
+        self._dwt = dwt
+        self.profile.clear()
+        self.read_count = 0
+        self._start_time = time.monotonic()
+
+    def sample(self) -> int:
+        """@brief Read one pipeline's worth of samples and add them to the profile.
+        @return Number of DWT_PCSR reads performed.
+        """
+        assert self._dwt
+        with self._probe_lock():
+            callbacks = [self._dwt.read_pc_samples(self._batch_size, now=False)
+                    for _ in range(self.PIPELINE_DEPTH)]
+            samples = [pc for cb in callbacks for pc in cb()]
+
+        missing = samples.count(self.NO_SAMPLE)
+        if missing:
+            self.profile.lost_count += missing
+            samples = [pc for pc in samples if pc != self.NO_SAMPLE]
+        self.profile.add_samples(samples)
+        self.read_count += missing + len(samples)
+        self.profile.duration = time.monotonic() - self._start_time
+        return missing + len(samples)
+
+    def stop(self) -> PCSampleProfile:
+        """@brief Finish sampling.
+        @return The collected profile.
+        """
+        self._dwt = None
+        return self.profile
+
+    def run(self, duration: float, should_stop: Optional[Callable[[], bool]] = None) -> PCSampleProfile:
+        """@brief Collect samples for a period of time.
+        @param self
+        @param duration Time in seconds to sample for.
+        @param should_stop Optional function that is called between transfers and returns True to
+            stop sampling early.
+        @return The collected profile.
+        """
+        self.start()
+        try:
+            end = time.monotonic() + duration
+            while time.monotonic() < end and not (should_stop and should_stop()):
+                self.sample()
+        finally:
+            self.stop()
+        return self.profile
@@ -21,12 +21,22 @@
 
 from abc import ABC, abstractmethod
 from ctypes import Structure, c_char, c_int32, c_uint32, sizeof
+from dataclasses import dataclass
+import json
+import logging
+import os
+from pathlib import Path
 import struct
-from typing import Optional, Sequence
+import tempfile
+from time import sleep
+from typing import (Dict, Iterable, List, Mapping, Optional, Sequence, Tuple)
 
 from ..core.memory_map import MemoryMap, MemoryRegion, MemoryType
 from ..core.soc_target import SoCTarget
 from ..core import exceptions
+from ..utility.cache_dir import get_user_cache_dir
+
+LOG = logging.getLogger(__name__)
 
 
 class SEGGER_RTT_BUFFER_UP(Structure):
@@ -117,6 +127,28 @@ class RTTControlBlock(ABC):
         """
         pass
 
+    def transfer(self, up_channels: Iterable[int], down_data: Mapping[int, bytes]
+            ) -> Tuple[Dict[int, bytes], Dict[int, int]]:
+        """@brief Read from and write to several channels at once.
+
+        The default implementation simply reads and writes each channel in turn. Subclasses may
+        override it to reduce the number of target accesses.
+
+        @param up_channels Indices of the up channels to read.
+        @param down_data Map of down channel index to the data to be written to that channel.
+
+        @return Tuple of a map of up channel index to the data read, containing only channels that
+            had data available, and a map of down channel index to the number of bytes written.
+        """
+        up_data: Dict[int, bytes] = {}
+        for i in up_channels:
+            data = self.up_channels[i].read()
+            if data:
+                up_data[i] = data
+        bytes_written: Dict[int, int] = {i: self.down_channels[i].write(data)
+                for i, data in down_data.items() if data}
+        return up_data, bytes_written
+
     @classmethod
     def from_target(cls, target: SoCTarget, address: int = None,
                     size: int = None, control_block_id: bytes = b'SEGGER RTT'):
@@ -169,8 +201,9 @@ class GenericRTTUpChannel(RTTUpChannel):
         # Get buffer descriptor
         up_buffer_words = sizeof(SEGGER_RTT_BUFFER_UP) // 4
         data = self._target.read_memory_block32(self._desc_addr, up_buffer_words)
-        descriptor: SEGGER_RTT_BUFFER_UP = SEGGER_RTT_BUFFER_UP(*data)
+        self._parse_descriptor(SEGGER_RTT_BUFFER_UP(*data))
 
+    def _parse_descriptor(self, descriptor: SEGGER_RTT_BUFFER_UP):
         # Get name if there is one
         if descriptor.sName != 0:
             data = b''
@@ -190,6 +223,44 @@ class GenericRTTUpChannel(RTTUpChannel):
         self._buffer_address = descriptor.pBuffer
         self.size = descriptor.SizeOfBuffer
 
+    def _update_descriptor(self, descriptor: SEGGER_RTT_BUFFER_UP) -> bool:
+        """@brief Populate the channel from a descriptor read by the caller.
+        @return Whether the descriptor is populated.
+        """
+        if (self.size == 0) or (self._buffer_address == 0):
+            if (descriptor.SizeOfBuffer == 0) or (descriptor.pBuffer == 0):
+                # descriptor is still not populated
+                return False
+            self._parse_descriptor(descriptor)
+        return True
+
+    def _data_ranges(self, write_off: int, read_off: int) -> List[Tuple[int, int]]:
+        """@brief Compute the (address, length) ranges of unread data for the given offsets."""
+        if (write_off >= self.size) or (read_off >= self.size):
+            raise exceptions.RTTError("Invalid up buffer")
+        elif write_off == read_off:
+            # empty
+            return []
+        elif write_off > read_off:
+            """
+            |oooooo|xxxxxxxxxxxx|oooooo|
+            0    rdOff        WrOff    SizeOfBuffer
+            """
+            return [(self._buffer_address + read_off, write_off - read_off)]
+        else:
+            """
+            |xxxxxx|oooooooooooo|xxxxxx|
+            0    WrOff        RdOff    SizeOfBuffer
+            """
+            ranges = [(self._buffer_address + read_off, self.size - read_off)]
+            if write_off:
+                ranges.append((self._buffer_address, write_off))
+            return ranges
+
+    def _set_read_offset(self, read_off: int):
+        """@brief Queue a write of the read offset. The write is not flushed."""
+        self._target.write32(self._offsets_addr + 4, read_off)
+
     @property
     def bytes_available(self) -> int:
         """@brief Number of bytes available to be read from up channel. """
@@ -201,16 +272,8 @@ class GenericRTTUpChannel(RTTUpChannel):
                 return 0
 
         # Get offsets
-        write_off, read_off = self.target.read_memory_block32(self._offsets_addr, 2)
-
-        if (write_off >= self.size) or (read_off >= self.size):
-            raise exceptions.RTTError("Invalid up buffer")
-        elif write_off == self.read_off:
-            return 0
-        elif write_off > read_off:
-            return write_off - read_off
-        else:
-            return (self.size - read_off) + write_off
+        write_off, read_off = self._target.read_memory_block32(self._offsets_addr, 2)
+        return sum(length for _, length in self._data_ranges(write_off, read_off))
 
     def read(self) -> bytes:
         """@brief Read all available data from RTT channel. """
@@ -224,30 +287,14 @@ class GenericRTTUpChannel(RTTUpChannel):
         # Get offsets
         write_off, read_off = self._target.read_memory_block32(self._offsets_addr, 2)
 
-        if (write_off >= self.size) or (read_off >= self.size):
-            raise exceptions.RTTError("Invalid up buffer")
-        elif write_off == read_off:
-            # empty
+        ranges = self._data_ranges(write_off, read_off)
+        if not ranges:
             return b''
-        elif write_off > read_off:
-            """
-            |oooooo|xxxxxxxxxxxx|oooooo|
-            0    rdOff        WrOff    SizeOfBuffer
-            """
-            data = self._target.read_memory_block8(self._buffer_address + read_off,
-                                                   write_off - read_off)
-        else:
-            """
-            |xxxxxx|oooooooooooo|xxxxxx|
-            0    WrOff        RdOff    SizeOfBuffer
-            """
-            data = self._target.read_memory_block8(self._buffer_address + read_off,
-                                                   self.size - read_off)
-            data += self._target.read_memory_block8(self._buffer_address, write_off)
+        data = b''.join(bytes(self._target.read_memory_block8(addr, length)) for addr, length in ranges)
 
         # Update read offset
-        self._target.write32(self._offsets_addr + 4, write_off)
-        return bytes(data)
+        self._set_read_offset(write_off)
+        return data
 
 
 class GenericRTTDownChannel(RTTDownChannel):
@@ -277,8 +324,9 @@ class GenericRTTDownChannel(RTTDownChannel):
         # Get buffer descriptor
         up_buffer_words = sizeof(SEGGER_RTT_BUFFER_DOWN) // 4
         data = self._target.read_memory_block32(self._desc_addr, up_buffer_words)
-        descriptor: SEGGER_RTT_BUFFER_DOWN = SEGGER_RTT_BUFFER_DOWN(*data)
+        self._parse_descriptor(SEGGER_RTT_BUFFER_DOWN(*data))
 
+    def _parse_descriptor(self, descriptor: SEGGER_RTT_BUFFER_DOWN):
         # Get name if there is one
         if descriptor.sName != 0:
             data = b''
@@ -313,8 +361,8 @@ class GenericRTTDownChannel(RTTDownChannel):
 
         if (write_off >= self.size) or (read_off >= self.size):
             raise exceptions.RTTError("Invalid down buffer")
-        elif write_off == self.read_off:
-            return self.size
+        elif write_off == read_off:
+            return self.size - 1
         elif write_off > read_off:
             return (self.size - write_off) + (read_off - 1)
         else:
@@ -347,11 +395,29 @@ class GenericRTTDownChannel(RTTDownChannel):
 
         # Get offsets
         write_off, read_off = self._target.read_memory_block32(self._offsets_addr, 2)
+        return self._write_with_offsets(data, write_off, read_off)
 
+    def _update_descriptor(self, descriptor: SEGGER_RTT_BUFFER_DOWN) -> bool:
+        """@brief Populate the channel from a descriptor read by the caller.
+        @return Whether the descriptor is populated.
+        """
+        if (self.size == 0) or (self._buffer_address == 0):
+            if (descriptor.SizeOfBuffer == 0) or (descriptor.pBuffer == 0):
+                # descriptor is still not populated
+                return False
+            self._parse_descriptor(descriptor)
+        return True
+
+    def _write_with_offsets(self, data: bytes, write_off: int, read_off: int) -> int:
+        """@brief Queue writes of data and the new write offset given the current offsets.
+
+        The writes are not flushed.
+
+        @return The number of bytes written to the target.
+        """
         if (write_off >= self.size) or (read_off >= self.size):
             raise exceptions.RTTError("Invalid down buffer")
 
-
         bytes_written: int = 0
         if write_off >= read_off:
             # There is some space to fill at the top of the buffer
@@ -360,8 +426,9 @@ class GenericRTTDownChannel(RTTDownChannel):
                 # Can't use the last element in the buffer
                 free_space -= 1
             data_to_write: bytes = data[:free_space]
-            self._target.write_memory_block8(self._buffer_address + write_off,
-                                             data_to_write)
+            if data_to_write:
+                self._target.write_memory_block8(self._buffer_address + write_off,
+                                                 data_to_write)
             bytes_written = len(data_to_write)
             data = data[bytes_written:]
             write_off = (write_off + bytes_written) % self.size
@@ -371,13 +438,15 @@ class GenericRTTDownChannel(RTTDownChannel):
             free_space = 0
 
         bytes_to_write: int = min(free_space, len(data))
-        self._target.write_memory_block8(self._buffer_address + write_off,
-                                         data[:bytes_to_write])
+        if bytes_to_write:
+            self._target.write_memory_block8(self._buffer_address + write_off,
+                                             data[:bytes_to_write])
         bytes_written += bytes_to_write
         write_off += bytes_to_write
 
         # Store new write offset
-        self._target.write32(self._offsets_addr, write_off)
+        if bytes_written:
+            self._target.write32(self._offsets_addr, write_off)
         return bytes_written
 
 
@@ -386,10 +455,23 @@ class GenericRTTControlBlock(RTTControlBlock):
               require any support from interface.
     """
 
+    ## Largest gap between data ranges that are combined into a single memory read by transfer().
+    COALESCE_GAP = 64
+
+    ## Size and alignment of the memory reads used to search for the control block.
+    SEARCH_READ_SIZE = 4096
+
+    ## Name of the ELF symbol for the control block, checked before searching.
+    CONTROL_BLOCK_SYMBOL = "_SEGGER_RTT"
+
+    ## Maximum number of entries kept in the control block address cache file.
+    ADDRESS_CACHE_SIZE = 64
+
     target: SoCTarget
     _cb_search_address: int
     _cb_search_size_bytes: int
     _control_block_id: Sequence[int]
+    _desc_addr: Optional[int]
 
     def __init__(self, target: SoCTarget, address: int = None,
                  size: int = None, control_block_id: bytes = b'SEGGER RTT'):
@@ -405,6 +487,7 @@ class GenericRTTControlBlock(RTTControlBlock):
         self.target = target
         self.up_channels = list()
         self.down_channels = list()
+        self._desc_addr = None
 
         if address is None:
             memory_map: MemoryMap = self.target.get_memory_map()
@@ -424,37 +507,198 @@ class GenericRTTControlBlock(RTTControlBlock):
             self._cb_search_size_bytes = size
         self._control_block_id = control_block_id
 
+    def _check_control_block(self, addr: int) -> bool:
+        """@brief Test whether the control block ID is present at an address."""
+        try:
+            data = self.target.read_memory_block8(addr, len(self._control_block_id))
+        except exceptions.TransferError:
+            return False
+        return bytes(data) == bytes(self._control_block_id)
+
+    def _get_search_range(self) -> Tuple[int, int]:
+        """@brief Return the start and end addresses of the control block search range."""
+        start = self._cb_search_address & ~0x3
+        return start, start + max(self._cb_search_size_bytes, len(self._control_block_id))
+
+    def _is_in_search_range(self, addr: int) -> bool:
+        """@brief Whether a control block at the address lies entirely within the search range."""
+        start, end = self._get_search_range()
+        return start <= addr and addr + len(self._control_block_id) <= end
+
+    def _search_control_block(self) -> Optional[int]:
+        """@brief Scan the search range for the control block ID."""
+        addr, end = self._get_search_range()
+        id_len = len(self._control_block_id)
+        control_block_id = bytes(self._control_block_id)
+
+        # The end of each window is carried over to the next so an ID that straddles two reads is
+        # still found.
+        carry = b''
+        while addr < end:
+            # Read up to the next window boundary so that all but the first read are aligned.
+            read_size = min(self.SEARCH_READ_SIZE - (addr % self.SEARCH_READ_SIZE), end - addr)
+            data = carry + bytes(self.target.read_memory_block8(addr, read_size))
+            offset = data.find(control_block_id)
+            if offset != -1:
+                return addr - len(carry) + offset
+            carry = data[-(id_len - 1):] if id_len > 1 else b''
+            addr += read_size
+
+        return None
+
+    def _get_symbol_address(self) -> Optional[int]:
+        """@brief Look up the address of the control block symbol in the target's ELF file."""
+        elf = self.target.elf
+        if elf is None:
+            return None
+        symbol = elf.symbol_decoder.get_symbol_for_name(self.CONTROL_BLOCK_SYMBOL)
+        return symbol.address if symbol is not None else None
+
+    def _get_address_cache_path(self) -> Optional[Path]:
+        options = self.target.session.options
+        if not options.get('rtt.address_cache.enable'):
+            return None
+        cache_dir = options.get('rtt.address_cache.dir')
+        if cache_dir is None:
+            cache_dir = get_user_cache_dir() / 'rtt'
+        return Path(cache_dir, "control_blocks.json")
+
+    @staticmethod
+    def _read_address_cache(path: Path) -> Dict[str, int]:
+        try:
+            with path.open('r') as f:
+                cache = json.load(f)
+            return {str(key): int(addr) for key, addr in cache.items()}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError, AttributeError, TypeError) as err:
+            LOG.debug("ignoring invalid RTT address cache file %s: %s", path, err)
+            return {}
+
+    def _write_address_cache(self, path: Path, key: str, addr: int):
+        cache = self._read_address_cache(path)
+        cache.pop(key, None)
+        cache[key] = addr
+        # Keep only the most recently found entries.
+        cache = dict(list(cache.items())[-self.ADDRESS_CACHE_SIZE:])
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(cache, f)
+                os.replace(tmp_path, path)
+            except Exception:
+                os.unlink(tmp_path)
+                raise
+        except OSError as err:
+            LOG.debug("failed to write RTT address cache file %s: %s", path, err)
+
     def _find_control_block(self) -> Optional[int]:
-        addr: int = self._cb_search_address & ~0x3
-        search_size: int  = self._cb_search_size_bytes
-        if search_size < len(self._control_block_id):
-            search_size = len(self._control_block_id)
+        # Addresses are cached per ELF build ID and control block ID.
+        elf = self.target.elf
+        build_id = elf.build_id if elf is not None else None
+        cache_path = self._get_address_cache_path() if build_id is not None else None
+        cache_key = build_id.hex() + ":" + bytes(self._control_block_id).hex() if build_id else ""
+
+        # The cached and symbol addresses are only used if they are within the search range.
+        if cache_path is not None:
+            addr = self._read_address_cache(cache_path).get(cache_key)
+            if (addr is not None) and self._is_in_search_range(addr) and self._check_control_block(addr):
+                LOG.debug("RTT control block found at cached address 0x%08x", addr)
+                return addr
+
+        addr = self._get_symbol_address()
+        if (addr is not None) and self._is_in_search_range(addr) and self._check_control_block(addr):
+            LOG.debug("RTT control block found at %s (0x%08x)", self.CONTROL_BLOCK_SYMBOL, addr)
+        else:
+            addr = self._search_control_block()
 
-        id_len = len(self._control_block_id)
-        offset: int = 0
+        if (addr is not None) and (cache_path is not None):
+            self._write_address_cache(cache_path, cache_key, addr)
+        return addr
 
-        while search_size:
-            read_size = min(search_size, 32)
-            data = self.target.read_memory_block8(addr, read_size)
+    def _read_ranges(self, ranges: Iterable[Tuple[int, int]]) -> Dict[Tuple[int, int], bytes]:
+        """@brief Read memory ranges, combining ranges that are close together into one read.
+        @return Map of (address, length) to the data read for that range.
+        """
+        ranges = list(ranges)
+        merged: List[List[int]] = []
+        for addr, length in sorted(set(ranges)):
+            if merged and (addr <= merged[-1][1] + self.COALESCE_GAP):
+                merged[-1][1] = max(merged[-1][1], addr + length)
+            else:
+                merged.append([addr, addr + length])
+
+        blocks = [(start, bytes(self.target.read_memory_block8(start, end - start)))
+                for start, end in merged]
+
+        result: Dict[Tuple[int, int], bytes] = {}
+        for addr, length in ranges:
+            for start, data in blocks:
+                if start <= addr < start + len(data):
+                    offset = addr - start
+                    result[(addr, length)] = data[offset:offset + length]
+                    break
+        return result
 
-            if not data:
-                break
+    def transfer(self, up_channels: Iterable[int], down_data: Mapping[int, bytes]
+            ) -> Tuple[Dict[int, bytes], Dict[int, int]]:
+        """@brief Read from and write to several channels at once.
 
-            for byte in data:
-                if byte == self._control_block_id[offset]:
-                    offset += 1
-                    if offset == id_len:
-                        break
-                else:
-                    num_skip_words = (offset + 1)
-                    addr += (num_skip_words * 1)
-                    search_size -= num_skip_words
-                    offset = 0
+        The buffer descriptors of all channels are fetched with a single read of the descriptor
+        array. Unread up channel data is then read, with ranges that are near each other combined
+        into one read, and data is written to the down channels. The offset updates and down channel
+        writes are queued and flushed once at the end.
 
-            if offset == id_len:
-                break
+        @param up_channels Indices of the up channels to read.
+        @param down_data Map of down channel index to the data to be written to that channel.
 
-        return addr if offset == id_len else None
+        @return Tuple of a map of up channel index to the data read, containing only channels that
+            had data available, and a map of down channel index to the number of bytes written.
+        """
+        if self._desc_addr is None:
+            raise exceptions.RTTError("RTT is not yet started")
+
+        num_up_chans = len(self.up_channels)
+        up_words = sizeof(SEGGER_RTT_BUFFER_UP) // 4
+        down_words = sizeof(SEGGER_RTT_BUFFER_DOWN) // 4
+        words = self.target.read_memory_block32(self._desc_addr,
+                num_up_chans * up_words + len(self.down_channels) * down_words)
+
+        # Work out what to read from each up channel.
+        pending: List[Tuple[int, int, List[Tuple[int, int]]]] = []
+        for i in up_channels:
+            up_chan: GenericRTTUpChannel = self.up_channels[i]
+            up_desc = SEGGER_RTT_BUFFER_UP(*words[i * up_words:(i + 1) * up_words])
+            if not up_chan._update_descriptor(up_desc):
+                continue
+            ranges = up_chan._data_ranges(up_desc.WrOff, up_desc.RdOff)
+            if ranges:
+                pending.append((i, up_desc.WrOff, ranges))
+
+        segments = self._read_ranges(r for _, _, ranges in pending for r in ranges)
+
+        up_data: Dict[int, bytes] = {}
+        for i, write_off, ranges in pending:
+            up_data[i] = b''.join(segments[r] for r in ranges)
+            self.up_channels[i]._set_read_offset(write_off)
+
+        bytes_written: Dict[int, int] = {}
+        down_base = num_up_chans * up_words
+        for i, data in down_data.items():
+            if not data:
+                continue
+            down_chan: GenericRTTDownChannel = self.down_channels[i]
+            offset = down_base + i * down_words
+            down_desc = SEGGER_RTT_BUFFER_DOWN(*words[offset:offset + down_words])
+            if not down_chan._update_descriptor(down_desc):
+                bytes_written[i] = 0
+                continue
+            bytes_written[i] = down_chan._write_with_offsets(data, down_desc.WrOff, down_desc.RdOff)
+
+        self.target.flush()
+        return up_data, bytes_written
 
     def start(self):
         """@brief Find the RTT control block on the target.
@@ -475,6 +719,7 @@ class GenericRTTControlBlock(RTTControlBlock):
 
         # Setup up channels
         up_base = cb_addr + sizeof(SEGGER_RTT_CB)
+        self._desc_addr = up_base
         for i in range(num_up_buffs):
             addr = up_base + (i * sizeof(SEGGER_RTT_BUFFER_UP))
             self.up_channels.append(GenericRTTUpChannel(self.target, addr))
@@ -484,3 +729,106 @@ class GenericRTTControlBlock(RTTControlBlock):
         for i in range(num_down_buffs):
             addr = down_base + (i * sizeof(SEGGER_RTT_BUFFER_DOWN))
             self.down_channels.append(GenericRTTDownChannel(self.target, addr))
+
+
+@dataclass
+class RTTPollStatistics:
+    """@brief Statistics collected by RTTPollScheduler."""
+    poll_count: int = 0             # Number of polls
+    idle_poll_count: int = 0        # Number of polls that didn't read any data
+    byte_count: int = 0             # Total number of bytes read from up channels
+    overrun_count: int = 0          # Number of times an up buffer was found full, so the target may have dropped or blocked on data
+    max_fill: float = 0.0           # Highest up buffer fill level seen, as a fraction of the buffer size
+
+
+class RTTPollScheduler:
+    """@brief Adapts the RTT poll interval to the rate at which up channels fill.
+
+    After each poll, update() is passed the number of bytes read from each up channel along with the
+    channel's buffer size. When nothing was read, the interval backs off exponentially up to the
+    maximum. When data was read, the interval is scaled so that the fullest buffer is expected to
+    reach the target fill level by the next poll, growing by at most a factor of two per poll. A full
+    buffer is counted as an overrun and drops the interval straight to the minimum.
+    """
+
+    ## Default minimum poll interval in seconds.
+    MIN_INTERVAL = 0.0001
+
+    ## Default maximum poll interval in seconds.
+    MAX_INTERVAL = 0.05
+
+    ## Default fraction of the buffer size the fullest up buffer should reach between polls.
+    TARGET_FILL = 0.25
+
+    def __init__(self, min_interval: float = MIN_INTERVAL, max_interval: float = MAX_INTERVAL,
+            target_fill: float = TARGET_FILL):
+        """
+        @param min_interval Minimum poll interval in seconds.
+        @param max_interval Maximum poll interval in seconds.
+        @param target_fill Desired up buffer fill level at each poll, as a fraction of the buffer size.
+        """
+        assert 0 < min_interval <= max_interval
+        assert 0 < target_fill < 1
+        self._min_interval = min_interval
+        self._max_interval = max_interval
+        self._target_fill = target_fill
+        self._interval = min_interval
+        self._stats = RTTPollStatistics()
+
+    @property
+    def interval(self) -> float:
+        """@brief Current poll interval in seconds."""
+        return self._interval
+
+    @property
+    def stats(self) -> RTTPollStatistics:
+        """@brief Poll statistics."""
+        return self._stats
+
+    def reset(self):
+        """@brief Return to the minimum interval and clear statistics."""
+        self._interval = self._min_interval
+        self._stats = RTTPollStatistics()
+
+    def back_off(self) -> float:
+        """@brief Move to the maximum interval after a failed poll.
+        @return The new poll interval in seconds.
+        """
+        self._interval = self._max_interval
+        return self._interval
+
+    def update(self, fills: Iterable[Tuple[int, int]]) -> float:
+        """@brief Record the outcome of a poll and compute the next interval.
+
+        @param fills Pairs of (bytes read, buffer size) for each up channel that was polled.
+        @return The new poll interval in seconds.
+        """
+        max_fill = 0.0
+        byte_count = 0
+        for count, size in fills:
+            if size <= 0:
+                continue
+            byte_count += count
+            # An RTT ring buffer holds at most one byte less than its size.
+            if count >= size - 1:
+                self._stats.overrun_count += 1
+            max_fill = max(max_fill, count / size)
+
+        self._stats.poll_count += 1
+        self._stats.byte_count += byte_count
+        self._stats.max_fill = max(self._stats.max_fill, max_fill)
+
+        if byte_count == 0:
+            self._stats.idle_poll_count += 1
+            interval = self._interval * 2
+        elif max_fill >= self._target_fill * 3:
+            # Buffer is close to full; poll as fast as possible.
+            interval = self._min_interval
+        else:
+            interval = self._interval * min(2.0, self._target_fill / max_fill)
+        self._interval = min(max(interval, self._min_interval), self._max_interval)
+        return self._interval
+
+    def wait(self):
+        """@brief Sleep for the current poll interval."""
+        sleep(self._interval)
@@ -0,0 +1,269 @@
+# pyOCD debugger
+# Copyright (c) 2026 pyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""@brief Binary container for captured RTT data.
+
+A capture file starts with a header:
+
+| Offset | Type     | Description                                           |
+|--------|----------|-------------------------------------------------------|
+| 0      | char[8]  | Magic, `b"PYOCDRTT"`.                                 |
+| 8      | uint16   | Format version, currently 1.                          |
+| 10     | uint16   | Reserved, zero.                                       |
+| 12     | float64  | Host wall clock time when the capture started (UNIX). |
+
+It is followed by any number of records, each a 14-byte record header then the payload:
+
+| Offset | Type     | Description                                           |
+|--------|----------|-------------------------------------------------------|
+| 0      | uint8    | Record type: 0 for data, 1 for channel info.          |
+| 1      | uint8    | Up channel index.                                     |
+| 2      | uint32   | Payload length in bytes.                              |
+| 6      | uint64   | Host monotonic time since the capture started, in ns. |
+
+The payload of a data record is the data read from the channel. The payload of a channel info record
+is the channel's buffer size as a uint32 followed by its UTF-8 encoded name. All values are little
+endian.
+"""
+
+import logging
+import struct
+import time
+from typing import (BinaryIO, Dict, Iterator, NamedTuple, Optional, TextIO, Tuple, Union)
+
+from ..core import exceptions
+
+LOG = logging.getLogger(__name__)
+
+## Magic bytes at the start of a capture file.
+MAGIC = b"PYOCDRTT"
+
+## Version of the capture file format.
+VERSION = 1
+
+_HEADER = struct.Struct("<8sHHd")
+_RECORD_HEADER = struct.Struct("<BBIQ")
+_CHANNEL_INFO = struct.Struct("<I")
+
+RECORD_DATA = 0
+RECORD_CHANNEL_INFO = 1
+
+class RTTCaptureRecord(NamedTuple):
+    """@brief Data read from one RTT up channel in one poll."""
+    channel: int
+    timestamp: float    # Seconds since the start of the capture.
+    data: bytes
+
+class RTTChannelInfo(NamedTuple):
+    """@brief Description of an RTT up channel recorded in a capture file."""
+    name: Optional[str]
+    size: int
+
+class RTTCaptureWriter:
+    """@brief Writes RTT data to a capture file.
+
+    Records are written through a buffered stream, so writing is cheap enough to do from the RTT
+    polling loop. Call close(), or use the writer as a context manager, to flush the buffer.
+    """
+
+    ## Default size of the write buffer.
+    BUFFER_SIZE = 256 * 1024
+
+    def __init__(self, file: Union[str, BinaryIO], buffer_size: int = BUFFER_SIZE) -> None:
+        """@brief Constructor.
+
+        The file header is written immediately.
+
+        @param self
+        @param file Path of the file to create, or a binary file object to write to.
+        @param buffer_size Size of the write buffer used when a path is given.
+        """
+        if isinstance(file, str):
+            self._file: BinaryIO = open(file, 'wb', buffering=buffer_size)
+            self._owns_file = True
+        else:
+            self._file = file
+            self._owns_file = False
+        self._start = time.monotonic_ns()
+        self._file.write(_HEADER.pack(MAGIC, VERSION, 0, time.time()))
+        self.record_count = 0
+        self.byte_count = 0
+
+    def __enter__(self) -> "RTTCaptureWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def _write_record(self, record_type: int, channel: int, payload: bytes, timestamp_ns: Optional[int]) -> None:
+        if timestamp_ns is None:
+            timestamp_ns = time.monotonic_ns()
+        self._file.write(_RECORD_HEADER.pack(record_type, channel, len(payload),
+                max(0, timestamp_ns - self._start)))
+        self._file.write(payload)
+
+    def write_channel_info(self, channel: int, name: Optional[str], size: int) -> None:
+        """@brief Record the name and buffer size of an up channel."""
+        name_bytes = name.encode('utf-8') if name is not None else b''
+        self._write_record(RECORD_CHANNEL_INFO, channel, _CHANNEL_INFO.pack(size) + name_bytes, None)
+
+    def write(self, channel: int, data: bytes, timestamp_ns: Optional[int] = None) -> None:
+        """@brief Record data read from an up channel.
+
+        @param self
+        @param channel Index of the up channel.
+        @param data The data. Nothing is written if empty.
+        @param timestamp_ns Value of time.monotonic_ns() when the data was read. Defaults to now.
+        """
+        if not data:
+            return
+        self._write_record(RECORD_DATA, channel, data, timestamp_ns)
+        self.record_count += 1
+        self.byte_count += len(data)
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._owns_file:
+            self._file.close()
+        else:
+            self._file.flush()
+
+class RTTCaptureReader:
+    """@brief Reads RTT capture files.
+
+    Iterating over the reader yields an RTTCaptureRecord for each data record, in the order they
+    were captured. Channel info records are collected in the `channels` property as they are read.
+    A truncated final record, as left by a capture that was killed, ends iteration with a warning.
+    """
+
+    def __init__(self, file: Union[str, BinaryIO]) -> None:
+        """@brief Constructor.
+        @param self
+        @param file Path of the capture file, or a binary file object to read from.
+        @exception RTTError The file is not a supported capture file.
+        """
+        if isinstance(file, str):
+            self._file: BinaryIO = open(file, 'rb')
+            self._owns_file = True
+        else:
+            self._file = file
+            self._owns_file = False
+
+        try:
+            header = self._file.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                raise exceptions.RTTError("not an RTT capture file")
+            magic, version, _, self._start_time = _HEADER.unpack(header)
+            if magic != MAGIC:
+                raise exceptions.RTTError("not an RTT capture file")
+            if version != VERSION:
+                raise exceptions.RTTError(f"unsupported RTT capture file version {version}")
+        except Exception:
+            self.close()
+            raise
+        self._channels: Dict[int, RTTChannelInfo] = {}
+
+    def __enter__(self) -> "RTTCaptureReader":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    @property
+    def start_time(self) -> float:
+        """@brief Host wall clock time when the capture started, as a UNIX timestamp."""
+        return self._start_time
+
+    @property
+    def channels(self) -> Dict[int, RTTChannelInfo]:
+        """@brief Map of channel index to info for the channel info records read so far."""
+        return self._channels
+
+    def __iter__(self) -> Iterator[RTTCaptureRecord]:
+        while True:
+            header = self._file.read(_RECORD_HEADER.size)
+            if not header:
+                return
+            if len(header) < _RECORD_HEADER.size:
+                LOG.warning("RTT capture file ends with a truncated record")
+                return
+            record_type, channel, length, timestamp_ns = _RECORD_HEADER.unpack(header)
+            payload = self._file.read(length)
+            if len(payload) < length:
+                LOG.warning("RTT capture file ends with a truncated record")
+                return
+
+            if record_type == RECORD_DATA:
+                yield RTTCaptureRecord(channel, timestamp_ns / 1e9, payload)
+            elif record_type == RECORD_CHANNEL_INFO:
+                size, = _CHANNEL_INFO.unpack_from(payload)
+                name = payload[_CHANNEL_INFO.size:].decode('utf-8', 'backslashreplace') or None
+                self._channels[channel] = RTTChannelInfo(name, size)
+            else:
+                LOG.debug("skipping unknown RTT capture record type %d", record_type)
+
+    def close(self) -> None:
+        if self._owns_file:
+            self._file.close()
+
+def convert_to_raw(reader: RTTCaptureReader, output: BinaryIO, channel: int) -> int:
+    """@brief Write the data captured from one channel, without framing.
+
+    The output is the same as `pyocd rtt --log-file` would have produced for that channel.
+
+    @return Number of bytes written.
+    """
+    count = 0
+    for record in reader:
+        if record.channel == channel:
+            output.write(record.data)
+            count += len(record.data)
+    return count
+
+def convert_to_text(reader: RTTCaptureReader, output: TextIO) -> int:
+    """@brief Write captured data as text lines prefixed with a timestamp and channel.
+
+    Data is split into lines separately for each channel, so interleaved output from different
+    channels isn't mixed within a line. Each line is stamped with the time its first byte was read.
+    Data is decoded as UTF-8, with undecodable bytes escaped.
+
+    @return Number of lines written.
+    """
+    # Map of channel to (timestamp of the first byte, pending partial line).
+    pending: Dict[int, Tuple[float, bytes]] = {}
+    count = 0
+
+    def write_line(timestamp: float, channel: int, line: bytes) -> None:
+        text = line.rstrip(b'\r').decode('utf-8', 'backslashreplace')
+        output.write(f"{timestamp:12.6f} {channel:>2}: {text}\n")
+
+    for record in reader:
+        timestamp, data = pending.pop(record.channel, (record.timestamp, b''))
+        data += record.data
+        lines = data.split(b'\n')
+        for line in lines[:-1]:
+            write_line(timestamp, record.channel, line)
+            count += 1
+            timestamp = record.timestamp
+        if lines[-1]:
+            pending[record.channel] = (timestamp, lines[-1])
+
+    for channel, (timestamp, line) in sorted(pending.items()):
+        write_line(timestamp, channel, line)
+        count += 1
+    return count
@@ -0,0 +1,248 @@
+# pyOCD debugger
+# Copyright (c) 2026 pyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""@brief Function timing using the DWT cycle counter."""
+
+from dataclasses import (dataclass, field)
+import logging
+import statistics
+import time
+from typing import (Any, Dict, Iterable, List, Optional, Set, TextIO, Tuple, TYPE_CHECKING)
+
+from ..core import exceptions
+from ..core.target import Target
+
+if TYPE_CHECKING:
+    from ..coresight.cortex_m import CortexM
+    from ..debug.elf.elf import ELFBinaryFile
+
+LOG = logging.getLogger(__name__)
+
+@dataclass
+class FunctionTiming:
+    """@brief Cycle counts measured for calls of one function."""
+    name: str
+    address: int
+    ## Cycles taken by each timed call, in the order the calls completed.
+    cycles: List[int] = field(default_factory=list)
+    ## Number of calls that could not be timed.
+    skipped_count: int = 0
+
+    @property
+    def call_count(self) -> int:
+        return len(self.cycles)
+
+    def percentile(self, percent: float) -> int:
+        """@brief Return the nearest-rank percentile of the cycle counts."""
+        assert self.cycles
+        ordered = sorted(self.cycles)
+        rank = max(1, min(len(ordered), -(-len(ordered) * percent // 100)))
+        return ordered[int(rank) - 1]
+
+    def summary(self) -> Dict[str, Any]:
+        """@brief Return summary statistics of the cycle counts as a dict.
+
+        The keys are `name`, `address`, `calls`, `skipped`, and if any calls were timed, `min`,
+        `max`, `mean`, `median`, `stdev`, `p90`, and `p99`.
+        """
+        result: Dict[str, Any] = {
+            'name': self.name,
+            'address': self.address,
+            'calls': self.call_count,
+            'skipped': self.skipped_count,
+            }
+        if self.cycles:
+            result.update({
+                'min': min(self.cycles),
+                'max': max(self.cycles),
+                'mean': statistics.mean(self.cycles),
+                'median': statistics.median(self.cycles),
+                'stdev': statistics.pstdev(self.cycles),
+                'p90': self.percentile(90),
+                'p99': self.percentile(99),
+                })
+        return result
+
+def write_timing_table(timings: Iterable[FunctionTiming], output: TextIO) -> None:
+    """@brief Write summary statistics for a set of function timings as a text table."""
+    output.write(f"{'Function':<24} {'Calls':>7} {'Min':>10} {'Median':>10} {'Mean':>12} "
+            f"{'Max':>10} {'Stdev':>10} {'P99':>10}\n")
+    for timing in timings:
+        s = timing.summary()
+        if timing.cycles:
+            output.write(f"{s['name']:<24} {s['calls']:>7} {s['min']:>10} {s['median']:>10.0f} "
+                    f"{s['mean']:>12.1f} {s['max']:>10} {s['stdev']:>10.1f} {s['p99']:>10}\n")
+        else:
+            output.write(f"{s['name']:<24} {0:>7}\n")
+
+class FunctionTimer:
+    """@brief Measures the cycles taken by calls of firmware functions.
+
+    A hardware breakpoint is set on the entry of each function. When it is hit, DWT_CYCCNT and the
+    return address in LR are read, and the entry breakpoint is swapped for one on the return address.
+    When that is hit with the stack pointer back to its value on entry, DWT_CYCCNT is read again and
+    the breakpoints are swapped back. Each timed call therefore costs two halts, without any
+    instruction stepping, and needs one hardware breakpoint per function.
+
+    The cycle counter doesn't count while the core is halted, so the time spent by the debugger at
+    each halt isn't included, although the halts can add a few cycles of pipeline refill. Calls of
+    other timed functions made during a timed call are included in its cycles. Recursive calls made
+    during a timed call aren't timed separately. Calls whose return address is an exception return
+    value, such as interrupt handlers, can't be timed and are counted as skipped.
+
+    The core is left running when timing is finished.
+    """
+
+    ## Default maximum time in seconds that run() waits.
+    DEFAULT_TIMEOUT = 10.0
+
+    ## Time in seconds between checks of whether the core has halted. Cycle counts are measured by
+    # the DWT, so this only affects how quickly the next call is timed, not the results.
+    POLL_INTERVAL = 0.001
+
+    def __init__(self, core: "CortexM", functions: Iterable[Tuple[str, int]]) -> None:
+        """@brief Constructor.
+        @param self
+        @param core The core running the functions.
+        @param functions Pairs of function name and entry address.
+        @exception TargetSupportError The core has no DWT, or not enough hardware breakpoints.
+        """
+        self._core = core
+        self._dwt = getattr(core, 'dwt', None)
+        if self._dwt is None:
+            raise exceptions.TargetSupportError("core has no DWT")
+        self._timings = {(addr & ~1): FunctionTiming(name, addr & ~1) for name, addr in functions}
+        if len(self._timings) > core.available_breakpoint_count:
+            raise exceptions.TargetSupportError(f"timing {len(self._timings)} functions requires as many "
+                    f"hardware breakpoints, but only {core.available_breakpoint_count} are available")
+        # Map of function address to (start cycle count, SP on entry, return address) for calls
+        # being timed.
+        self._active: Dict[int, Tuple[int, int, int]] = {}
+        self._breakpoints: Set[int] = set()
+
+    @classmethod
+    def from_elf(cls, core: "CortexM", elf: "ELFBinaryFile", names: Iterable[str]) -> "FunctionTimer":
+        """@brief Create a timer for functions named in an ELF file's symbol table.
+        @exception ValueError A name is not a function symbol in the ELF.
+        """
+        functions = []
+        for name in names:
+            sym = elf.symbol_decoder.get_symbol_for_name(name)
+            if sym is None or sym.type != 'STT_FUNC':
+                raise ValueError(f"no function named '{name}'")
+            functions.append((name, sym.address))
+        return cls(core, functions)
+
+    @property
+    def timings(self) -> List[FunctionTiming]:
+        return list(self._timings.values())
+
+    def _desired_breakpoints(self, count: int) -> Set[int]:
+        result = set()
+        for addr, timing in self._timings.items():
+            if addr in self._active:
+                result.add(self._active[addr][2])
+            elif timing.call_count < count:
+                result.add(addr)
+        return result
+
+    def _update_breakpoints(self, desired: Set[int]) -> None:
+        for addr in self._breakpoints - desired:
+            self._core.remove_breakpoint(addr)
+        for addr in desired - self._breakpoints:
+            if not self._core.set_breakpoint(addr, Target.BreakpointType.HW):
+                raise exceptions.TargetSupportError(f"failed to set breakpoint at {addr:#010x}")
+        self._breakpoints = desired
+
+    def _step_over(self, pc: int, desired: Set[int]) -> None:
+        """@brief Execute the instruction at a breakpoint that must stay set."""
+        self._update_breakpoints(desired - {pc})
+        self._core.step()
+        self._update_breakpoints(desired)
+
+    def _handle_halt(self, count: int) -> bool:
+        """@brief Process a breakpoint hit.
+        @return Whether the halt was caused by one of the timer's breakpoints.
+        """
+        pc, sp, lr = self._core.read_core_registers_raw(['pc', 'sp', 'lr'])
+        cycles = self._dwt.cycle_count
+        if pc not in self._breakpoints:
+            return False
+
+        step = False
+        for addr, (start, entry_sp, ret) in list(self._active.items()):
+            if ret == pc and entry_sp == sp:
+                self._timings[addr].cycles.append((cycles - start) & 0xffffffff)
+                del self._active[addr]
+            elif ret == pc:
+                # A recursive call returning to the same address.
+                step = True
+
+        timing = self._timings.get(pc)
+        if timing is not None and pc not in self._active:
+            if (lr & 0xf0000000) == 0xf0000000:
+                # EXC_RETURN value, so the return can't be caught with a breakpoint.
+                timing.skipped_count += 1
+                step = True
+            else:
+                self._active[pc] = (cycles, sp, lr & ~1)
+
+        desired = self._desired_breakpoints(count)
+        if step and pc in desired:
+            self._step_over(pc, desired)
+        else:
+            self._update_breakpoints(desired)
+        return True
+
+    def run(self, count: int, timeout: Optional[float] = DEFAULT_TIMEOUT) -> List[FunctionTiming]:
+        """@brief Time calls until each function has been timed `count` times, or the timeout expires.
+
+        @param self
+        @param count Number of calls of each function to time.
+        @param timeout Maximum time in seconds to run for. None waits forever.
+        @return List of FunctionTiming for the functions, in the order they were passed to the
+            constructor.
+        @exception DebugError The core halted for a reason other than the timer's breakpoints.
+        """
+        core = self._core
+        if not self._dwt.dwt_configured:
+            self._dwt.init()
+
+        end = (time.monotonic() + timeout) if timeout is not None else None
+        try:
+            self._update_breakpoints(self._desired_breakpoints(count))
+            if core.is_halted():
+                core.resume()
+            else:
+                core.bp_manager.flush()
+
+            while self._breakpoints:
+                if core.is_halted():
+                    if not self._handle_halt(count):
+                        raise exceptions.DebugError(f"core halted unexpectedly, "
+                                f"reason {core.get_halt_reason()}")
+                    core.resume()
+                elif end is not None and time.monotonic() > end:
+                    LOG.warning("Function timing timed out")
+                    break
+                else:
+                    time.sleep(self.POLL_INTERVAL)
+        finally:
+            self._update_breakpoints(set())
+            core.bp_manager.flush()
+            self._active.clear()
+
+        return self.timings
@@ -18,15 +18,19 @@
 
 import logging
 import abc
+import queue
+import threading
 from dataclasses import dataclass
 from time import time
 from binascii import crc32
-from typing import (Any, List, Optional, Union)
+from typing import (Any, Iterable, Iterator, List, Optional, Tuple, Union)
 
 from ..core.target import Target
-from ..core.exceptions import (FlashFailure, FlashProgramFailure)
+from ..core.exceptions import (FlashFailure, FlashProgramFailure, FlashVerifyFailure)
 from ..core.memory_map import MemoryRegion
+from ..utility.cache_dir import get_user_cache_dir
 from ..utility.mask import same
+from .content_cache import FlashContentCache
 
 # Number of bytes in a page to read to quickly determine if the page has the same data
 PAGE_ESTIMATE_SIZE = 32
@@ -61,6 +65,15 @@ class ProgrammingInfo:
     erase_sector_count: int = 0
     skipped_byte_count: int = 0
     skipped_page_count: int = 0
+    page_program_time: float = 0.0          # Time spent loading and programming pages, excluding erase and analysis
+    page_program_byte_count: int = 0        # Number of bytes programmed during page_program_time
+    verify_type: Any = None                 # Type of verification performed - VERIFY_CRC, VERIFY_READ, or None
+    verify_time: float = 0.0                # Time to verify programmed flash contents
+
+    @property
+    def page_program_rate(self) -> float:
+        """@brief Achieved page programming throughput in bytes per second."""
+        return (self.page_program_byte_count / self.page_program_time) if self.page_program_time else 0.0
 
 class MemoryBuilder(abc.ABC):
     """@brief Abstract class for memory builders."""
@@ -161,6 +174,72 @@ class _FlashPage:
         return "<_FlashPage@%x addr=%x size=%x datalen=%x wgt=%g erased=%s same=%s>" % (
             id(self), self.addr, self.size, len(self.data), self.program_weight, self.erased, self.same)
 
+class _PagePipeline:
+    """@brief Prepares page data for programming on a background thread.
+
+    Converting page data to the form written to target RAM is done by a producer thread for up to
+    `depth` pages ahead of the page currently being programmed. This overlaps host processing with
+    USB transfers and target flash operations, which release the GIL. Iterating over the pipeline
+    returns tuples of each page and its prepared data, in order.
+
+    If `depth` is 0 then no thread is used and pages are prepared as they are iterated.
+    """
+
+    def __init__(self, flash, pages: Iterable["_FlashPage"], depth: int) -> None:
+        self._flash = flash
+        self._pages = pages
+        self._depth = depth
+        self._stop = threading.Event()
+        self._queue: "queue.Queue[Tuple[Optional[_FlashPage], Any]]" = queue.Queue(maxsize=max(depth, 1))
+        self._thread: Optional[threading.Thread] = None
+        if depth > 0:
+            self._thread = threading.Thread(target=self._run, name="flash page pipeline", daemon=True)
+            self._thread.start()
+
+    def __enter__(self) -> "_PagePipeline":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def _put(self, item: Tuple[Optional["_FlashPage"], Any]) -> bool:
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _run(self) -> None:
+        try:
+            for page in self._pages:
+                if not self._put((page, self._flash.prepare_page_data(page.addr, page.data))):
+                    return
+            self._put((None, None))
+        except Exception as err:
+            self._put((None, err))
+
+    def __iter__(self) -> Iterator[Tuple["_FlashPage", bytes]]:
+        if self._thread is None:
+            for page in self._pages:
+                yield page, self._flash.prepare_page_data(page.addr, page.data)
+            return
+        while True:
+            page, data = self._queue.get()
+            if page is None:
+                if data is not None:
+                    raise data
+                return
+            yield page, data
+
+    def close(self) -> None:
+        """@brief Stop the producer thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
 class _FlashOperation:
     """@brief Holds requested data to be programmed at a given address."""
     def __init__(self, addr, data):
@@ -192,6 +271,12 @@ class FlashBuilder(MemoryBuilder):
     # Type of flash analysis
     FLASH_ANALYSIS_CRC32 = "CRC32"
     FLASH_ANALYSIS_PARTIAL_PAGE_READ = "PAGE_READ"
+    FLASH_ANALYSIS_CONTENT_CACHE = "CONTENT_CACHE"
+
+    # Type of verification
+    VERIFY_NONE = "none"
+    VERIFY_CRC = "crc"
+    VERIFY_READ = "read"
 
     def __init__(self, flash):
         super().__init__()
@@ -417,7 +502,8 @@ class FlashBuilder(MemoryBuilder):
                 page = add_page_with_existing_data()
                 sector_page_addr += page.size
 
-    def program(self, chip_erase=None, progress_cb=None, smart_flash=True, fast_verify=False, keep_unwritten=True, no_reset=False):
+    def program(self, chip_erase=None, progress_cb=None, smart_flash=True, fast_verify=False, keep_unwritten=True,
+            no_reset=False, verify=None):
         """@brief Determine fastest method of flashing and then run flash programming.
 
         Data must have already been added with add_data().
@@ -444,8 +530,20 @@ class FlashBuilder(MemoryBuilder):
             be read from memory and restored while programming.
         @param no_reset Boolean indicating whether if the device should not be reset after the
             programming process has finished.
+        @param verify How to verify flash contents after programming. "crc" computes CRCs of the
+            programmed pages on the target with the CRC analyzer, falling back to "read" if the
+            analyzer isn't supported. "read" reads back and compares the programmed pages. "none"
+            disables verification. If not specified, the 'flash.verify' session option is used.
+
+        @exception FlashVerifyFailure Flash contents don't match the programmed data.
         """
 
+        # Convert verify.
+        if verify is None:
+            verify = self.flash.target.session.options.get('flash.verify')
+        if verify not in (FlashBuilder.VERIFY_NONE, FlashBuilder.VERIFY_CRC, FlashBuilder.VERIFY_READ):
+            raise ValueError("invalid verify value '{}'".format(verify))
+
         # Send notification that we're about to program flash.
         self.flash.target.session.notify(Target.Event.PRE_FLASH_PROGRAM, self)
 
@@ -489,6 +587,11 @@ class FlashBuilder(MemoryBuilder):
         if not smart_flash:
             self._mark_all_pages_for_programming()
 
+        # Identify unchanged pages from the persistent content cache.
+        content_cache = self._get_content_cache() if smart_flash else None
+        if content_cache is not None:
+            self._analyze_pages_with_content_cache(content_cache)
+
         # If the flash algo doesn't support erase all, disable chip erase.
         if not self.flash.is_erase_all_supported:
             chip_erase = False
@@ -535,6 +638,14 @@ class FlashBuilder(MemoryBuilder):
             else:
                 flash_operation = self._sector_erase_program(progress_cb)
 
+        # Verify the new flash contents before the flash algo is removed.
+        if verify != FlashBuilder.VERIFY_NONE:
+            self._verify_pages(verify, chip_erase)
+
+        # Record the new flash contents before the flash algo is removed.
+        if content_cache is not None:
+            self._update_content_cache(content_cache, chip_erase)
+
         # Cleanup flash algo and reset target after programming.
         self.flash.cleanup()
 
@@ -678,6 +789,141 @@ class FlashBuilder(MemoryBuilder):
                 elif page_same is False:
                     page.same = False
 
+    def _verify_pages(self, verify: str, chip_erase: bool) -> None:
+        """@brief Verify that flash contains the data of the programmed pages.
+
+        Pages already confirmed to be unchanged are skipped, unless a chip erase was performed.
+
+        For CRC verification, the CRCs of all pages are computed by the CRC analyzer on the target in
+        a single invocation and compared with CRCs of the page data computed on the host. Otherwise
+        the pages are read back and compared.
+
+        @exception FlashVerifyFailure
+        """
+        verify_start = time()
+        pages = self.page_list if chip_erase else [page for page in self.page_list if not page.same]
+        if not pages:
+            return
+
+        # The algo has been uninited by programming, so it must be inited again for reading.
+        self.algo_inited_for_read = False
+        self._enable_read_access()
+
+        ranges = [(page.addr, page.size) for page in pages]
+        if (verify == FlashBuilder.VERIFY_CRC) and not self.flash.can_compute_range_crcs(ranges):
+            LOG.debug("CRC analyzer unavailable for region '%s'; verifying by reading flash", self.region.name)
+            verify = FlashBuilder.VERIFY_READ
+        if (verify == FlashBuilder.VERIFY_READ) and not self.region.is_readable:
+            LOG.warning("Unable to verify flash region '%s' because it is not readable", self.region.name)
+            return
+
+        if verify == FlashBuilder.VERIFY_CRC:
+            crc_list = self.flash.compute_range_crcs(ranges)
+            for page, crc in zip(pages, crc_list):
+                if self._compute_page_crc(page) != crc:
+                    raise FlashVerifyFailure('flash verify failure (CRC mismatch)', address=page.addr)
+        else:
+            for page in pages:
+                data = self.flash.target.read_memory_block8(page.addr, page.size)
+                if not same(data, page.data):
+                    raise FlashVerifyFailure('flash verify failure (data mismatch)', address=page.addr)
+
+        self.perf.verify_type = verify
+        self.perf.verify_time = time() - verify_start
+        LOG.debug("Verified %s using %s in %.3f s", get_page_count(len(pages)), verify, self.perf.verify_time)
+
+    def _get_content_cache(self) -> Optional[FlashContentCache]:
+        """@brief Create the persistent content cache for this flash region, if enabled and supported."""
+        session = self.flash.target.session
+        if not session.options.get('flash.content_cache.enable'):
+            return None
+        if not self.flash.get_flash_info().crc_supported:
+            LOG.debug("flash content cache unavailable for region '%s': no CRC analyzer", self.region.name)
+            return None
+        if session.probe is None:
+            return None
+
+        cache_dir = session.options.get('flash.content_cache.dir')
+        if cache_dir is None:
+            cache_dir = get_user_cache_dir() / 'flash'
+        target_name = getattr(self.flash.target, 'part_number', self.flash.target.__class__.__name__)
+        cache = FlashContentCache(cache_dir, session.probe.unique_id, target_name, self.region.name,
+                self.region.start, self.region.length)
+        if not cache.is_analyzer_compatible:
+            LOG.debug("flash content cache unavailable for region '%s': region cannot be analyzed",
+                    self.region.name)
+            return None
+        return cache
+
+    @staticmethod
+    def _compute_page_crc(page: _FlashPage) -> int:
+        """@brief Compute the CRC32 of a page's data, padded with 0xFF to the page size."""
+        data = bytes(page.data)
+        pad_size = page.size - len(data)
+        if pad_size > 0:
+            data += b'\xff' * pad_size
+        return crc32(data) & 0xFFFFFFFF
+
+    def _analyze_pages_with_content_cache(self, content_cache: FlashContentCache) -> None:
+        """@brief Determine which pages are unchanged using the persistent content cache.
+
+        A single CRC analyzer run over the whole region is compared with the CRCs recorded by the
+        last load. If they match, then pages with a recorded CRC are marked as same or not same by
+        comparing against the CRC of the new data. Pages without a recorded CRC are left for the
+        usual analysis.
+        """
+        analyze_start = time()
+        if not content_cache.load():
+            return
+
+        self._enable_read_access()
+        block_crcs = self.flash.compute_crcs(content_cache.blocks)
+        if not content_cache.is_valid(block_crcs):
+            LOG.debug("flash content cache for region '%s' is out of date", self.region.name)
+            content_cache.invalidate()
+            return
+
+        known_count = 0
+        for page in self.page_list:
+            if page.same is not None:
+                continue
+            recorded = content_cache.page_crcs.get(page.addr)
+            if (recorded is None) or (recorded[0] != page.size):
+                continue
+            page.crc = self._compute_page_crc(page)
+            page.same = (page.crc == recorded[1])
+            known_count += 1
+
+        self.perf.analyze_type = FlashBuilder.FLASH_ANALYSIS_CONTENT_CACHE
+        self.perf.analyze_time = time() - analyze_start
+        LOG.debug("Flash content cache resolved %d of %d pages", known_count, len(self.page_list))
+
+    def _update_content_cache(self, content_cache: FlashContentCache, chip_erase: bool) -> None:
+        """@brief Record the flash contents after programming in the persistent content cache.
+
+        Recorded CRCs from the previous load are kept for pages that were not modified, as long as
+        the previous record was valid. The CRC analyzer is then run over the whole region so the next
+        load can validate the record.
+        """
+        page_crcs = {}
+        if content_cache.page_crcs and not chip_erase:
+            erased_ranges = [(sector.addr, sector.addr + sector.size) for sector in self.sector_list
+                    if sector.are_any_pages_not_same()]
+            for addr, (size, crc) in content_cache.page_crcs.items():
+                if not any((addr < end) and (addr + size > start) for start, end in erased_ranges):
+                    page_crcs[addr] = (size, crc)
+        for page in self.page_list:
+            page_crcs[page.addr] = (page.size, self._compute_page_crc(page))
+
+        try:
+            # The algo has been uninited by programming, so it must be inited again for reading.
+            self.algo_inited_for_read = False
+            self._enable_read_access()
+            block_crcs = self.flash.compute_crcs(content_cache.blocks)
+            content_cache.save(block_crcs, page_crcs)
+        except (FlashFailure, OSError) as err:
+            LOG.warning("Failed to update flash content cache for region '%s': %s", self.region.name, err)
+
     def _compute_sector_erase_pages_and_weight(self, fast_verify):
         """@brief Quickly analyze flash contents and compute weights for sector erase.
 
@@ -741,26 +987,104 @@ class FlashBuilder(MemoryBuilder):
         progress += self.flash.get_flash_info().erase_weight
         progress_cb(float(progress) / float(self.chip_erase_weight))
 
+        program_start = time()
+        program_byte_count = 0
         self.flash.init(self.flash.Operation.PROGRAM)
         for page in self.page_list:
             if not page.erased:
                 self.flash.program_page(page.addr, page.data)
+                program_byte_count += page.size
                 progress += page.get_program_weight()
                 progress_cb(float(progress) / float(self.chip_erase_weight))
         self.flash.uninit()
+        self._record_page_program_time(program_byte_count, time() - program_start)
         progress_cb(1.0)
         return FlashBuilder.FLASH_CHIP_ERASE
 
-    def _next_unerased_page(self, i):
-        if i >= len(self.page_list):
-            return None, i
-        page = self.page_list[i]
-        while page.erased:
-            i += 1
-            if i >= len(self.page_list):
-                return None, i
-            page = self.page_list[i]
-        return page, i + 1
+    def _program_pages_double_buffer(self, pages: Iterable[_FlashPage], progress: float, total_weight: float,
+            progress_cb=_stub_progress, init_before_load: bool = False) -> Tuple[int, float]:
+        """@brief Program pages using the flash algo's page buffers.
+
+        While the target programs one page buffer, the next page is loaded into the other buffer.
+        Page data is prepared ahead of time by a _PagePipeline with depth set by the
+        'flash.pipeline_depth' session option.
+
+        @param self
+        @param pages Iterable of the pages to program, in order.
+        @param progress Progress weight completed before programming pages.
+        @param total_weight Total weight used to compute the progress fraction.
+        @param progress_cb Progress callback.
+        @param init_before_load Whether to init the flash algo for programming before loading the
+            first page buffer instead of after.
+        @return Tuple of the number of pages programmed and the updated progress weight.
+        """
+        program_timeout = self.flash.target.session.options.get('flash.timeout.program')
+        depth = self.flash.target.session.options.get('flash.pipeline_depth')
+        page_count = 0
+        byte_count = 0
+        start_time = time()
+
+        with _PagePipeline(self.flash, pages, depth) as pipeline:
+            prepared_pages = iter(pipeline)
+            next_page = next(prepared_pages, None)
+
+            # Make sure there are actually pages to program.
+            if next_page is None:
+                return 0, progress
+
+            # Set up page and buffer info.
+            current_buf = 0
+            next_buf = 1
+
+            if init_before_load:
+                self.flash.init(self.flash.Operation.PROGRAM)
+
+            # Load first page buffer
+            self.flash.load_page_buffer(current_buf, next_page[0].addr, next_page[1], prepared=True)
+
+            if not init_before_load:
+                self.flash.init(self.flash.Operation.PROGRAM)
+            while next_page is not None:
+                page = next_page[0]
+
+                # Kick off this page program.
+                self.flash.start_program_page_with_buffer(current_buf, page.addr)
+
+                # Get next page and load it.
+                next_page = next(prepared_pages, None)
+                if next_page is not None:
+                    self.flash.load_page_buffer(next_buf, next_page[0].addr, next_page[1], prepared=True)
+
+                # Wait for the program to complete.
+                result = self.flash.wait_for_completion(timeout=program_timeout)
+                if result == self.flash.TIMEOUT_ERROR:
+                    raise FlashProgramFailure('flash program page timeout', address=page.addr, result_code=result)
+                elif result != 0:
+                    raise FlashProgramFailure('flash program page failure', address=page.addr, result_code=result)
+
+                # Swap buffers.
+                current_buf, next_buf = next_buf, current_buf
+
+                page_count += 1
+                byte_count += page.size
+
+                # Update progress
+                progress += page.get_program_weight()
+                if total_weight > 0:
+                    progress_cb(float(progress) / float(total_weight))
+
+            self.flash.uninit()
+
+        self._record_page_program_time(byte_count, time() - start_time)
+        return page_count, progress
+
+    def _record_page_program_time(self, byte_count: int, elapsed: float) -> None:
+        """@brief Accumulate page programming throughput statistics."""
+        self.perf.page_program_byte_count += byte_count
+        self.perf.page_program_time += elapsed
+        if elapsed > 0:
+            LOG.debug("Programmed %d bytes in %.3f s (%.02f kB/s)", byte_count, elapsed,
+                    (byte_count / 1024) / elapsed)
 
     def _chip_erase_program_double_buffer(self, progress_cb=_stub_progress):
         """@brief Double-buffered program by first performing an erase all."""
@@ -768,8 +1092,6 @@ class FlashBuilder(MemoryBuilder):
         progress_cb(0.0)
         progress = 0
 
-        program_timeout = self.flash.target.session.options.get('flash.timeout.program')
-
         self.flash.init(self.flash.Operation.ERASE)
         self.flash.erase_all()
         self.flash.uninit()
@@ -777,42 +1099,9 @@ class FlashBuilder(MemoryBuilder):
         progress += self.flash.get_flash_info().erase_weight
         progress_cb(float(progress) / float(self.chip_erase_weight))
 
-        # Set up page and buffer info.
-        current_buf = 0
-        next_buf = 1
-        page, i = self._next_unerased_page(0)
-        assert page is not None
+        self._program_pages_double_buffer((page for page in self.page_list if not page.erased),
+                progress, self.chip_erase_weight, progress_cb)
 
-        # Load first page buffer
-        self.flash.load_page_buffer(current_buf, page.addr, page.data)
-
-        self.flash.init(self.flash.Operation.PROGRAM)
-        while page is not None:
-            # Kick off this page program.
-            current_addr = page.addr
-            current_weight = page.get_program_weight()
-            self.flash.start_program_page_with_buffer(current_buf, current_addr)
-
-            # Get next page and load it.
-            page, i = self._next_unerased_page(i)
-            if page is not None:
-                self.flash.load_page_buffer(next_buf, page.addr, page.data)
-
-            # Wait for the program to complete.
-            result = self.flash.wait_for_completion(timeout=program_timeout)
-            if result == self.flash.TIMEOUT_ERROR:
-                raise FlashProgramFailure('flash program page timeout', address=current_addr, result_code=result)
-            elif result != 0:
-                raise FlashProgramFailure('flash program page failure', address=current_addr, result_code=result)
-
-            # Swap buffers.
-            current_buf, next_buf = next_buf, current_buf
-
-            # Update progress.
-            progress += current_weight
-            progress_cb(float(progress) / float(self.chip_erase_weight))
-
-        self.flash.uninit()
         progress_cb(1.0)
         return FlashBuilder.FLASH_CHIP_ERASE
 
@@ -821,6 +1110,8 @@ class FlashBuilder(MemoryBuilder):
         actual_sector_erase_count = 0
         actual_sector_erase_weight = 0
         progress = 0
+        program_time = 0.0
+        program_byte_count = 0
 
         progress_cb(0.0)
 
@@ -849,9 +1140,12 @@ class FlashBuilder(MemoryBuilder):
 
                     progress += page.get_program_weight()
 
+                    program_start = time()
                     self.flash.init(self.flash.Operation.PROGRAM)
                     self.flash.program_page(page.addr, page.data)
                     self.flash.uninit()
+                    program_time += time() - program_start
+                    program_byte_count += page.size
 
                     actual_sector_erase_count += 1
                     actual_sector_erase_weight += page.get_program_weight()
@@ -860,6 +1154,7 @@ class FlashBuilder(MemoryBuilder):
                     if self.sector_erase_weight > 0:
                         progress_cb(float(progress) / float(self.sector_erase_weight))
 
+        self._record_page_program_time(program_byte_count, program_time)
         progress_cb(1.0)
 
         LOG.debug("Estimated sector erase programmed page count: %i", self.sector_erase_count)
@@ -907,27 +1202,12 @@ class FlashBuilder(MemoryBuilder):
 
         return progress
 
-    def _next_nonsame_page(self, i):
-        if i >= len(self.page_list):
-            return None, i
-        page = self.page_list[i]
-        while page.same:
-            i += 1
-            if i >= len(self.page_list):
-                return None, i
-            page = self.page_list[i]
-        return page, i + 1
-
     def _sector_erase_program_double_buffer(self, progress_cb=_stub_progress):
         """@brief Double-buffered program by performing sector erases."""
-        actual_sector_erase_count = 0
-        actual_sector_erase_weight = 0
         progress = 0
 
         progress_cb(0.0)
 
-        program_timeout = self.flash.target.session.options.get('flash.timeout.program')
-
         # Fill in same flag for all pages. This is done up front so we're not trying
         # to read from flash while simultaneously programming it.
         progress = self._scan_pages_for_same(progress_cb)
@@ -947,51 +1227,9 @@ class FlashBuilder(MemoryBuilder):
                         progress_cb(float(progress) / float(self.sector_erase_weight))
             self.flash.uninit()
 
-        # Set up page and buffer info.
-        current_buf = 0
-        next_buf = 1
-        page, i = self._next_nonsame_page(0)
-
-        # Make sure there are actually pages to program differently from current flash contents.
-        if page is not None:
-            self.flash.init(self.flash.Operation.PROGRAM)
-
-            # Load first page buffer
-            self.flash.load_page_buffer(current_buf, page.addr, page.data)
-
-            while page is not None:
-                assert page.same is not None
-
-                # Kick off this page program.
-                current_addr = page.addr
-                current_weight = page.get_program_weight()
-
-                self.flash.start_program_page_with_buffer(current_buf, current_addr)
-
-                actual_sector_erase_count += 1
-                actual_sector_erase_weight += page.get_program_weight()
-
-                # Get next page and load it.
-                page, i = self._next_nonsame_page(i)
-                if page is not None:
-                    self.flash.load_page_buffer(next_buf, page.addr, page.data)
-
-                # Wait for the program to complete.
-                result = self.flash.wait_for_completion(timeout=program_timeout)
-                if result == self.flash.TIMEOUT_ERROR:
-                    raise FlashProgramFailure('flash program page timeout', address=current_addr, result_code=result)
-                elif result != 0:
-                    raise FlashProgramFailure('flash program page failure', address=current_addr, result_code=result)
-
-                # Swap buffers.
-                current_buf, next_buf = next_buf, current_buf
-
-                # Update progress
-                progress += current_weight
-                if self.sector_erase_weight > 0:
-                    progress_cb(float(progress) / float(self.sector_erase_weight))
-
-            self.flash.uninit()
+        actual_sector_erase_count, progress = self._program_pages_double_buffer(
+                (page for page in self.page_list if not page.same), progress, self.sector_erase_weight,
+                progress_cb, init_before_load=True)
 
         progress_cb(1.0)
 
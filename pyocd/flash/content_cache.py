@@ -0,0 +1,166 @@
+# pyOCD debugger
+# Copyright (c) 2026 pyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import (Dict, List, Optional, Sequence, Tuple)
+
+LOG = logging.getLogger(__name__)
+
+## Largest address divided by block size that the CRC analyzer can encode.
+_ANALYZER_MAX_BLOCK_INDEX = 0xffff
+
+def compute_region_blocks(start: int, length: int) -> List[Tuple[int, int]]:
+    """@brief Split an address range into the fewest naturally aligned power of two sized blocks.
+
+    The CRC analyzer only accepts blocks whose size is a power of two and whose address is a
+    multiple of the size, so this is the decomposition used to compute a CRC over a whole region.
+
+    @return List of (address, size) tuples sorted by address.
+    """
+    blocks: List[Tuple[int, int]] = []
+    addr = start
+    end = start + length
+    while addr < end:
+        # Largest power of two that the address is aligned to, or the whole address space for 0.
+        size = (addr & -addr) if addr else (1 << max(end.bit_length(), 1))
+        while addr + size > end:
+            size >>= 1
+        blocks.append((addr, size))
+        addr += size
+    return blocks
+
+def are_blocks_analyzable(blocks: Sequence[Tuple[int, int]]) -> bool:
+    """@brief Whether all (address, size) blocks can be encoded for the CRC analyzer."""
+    return all((addr // size) <= _ANALYZER_MAX_BLOCK_INDEX for addr, size in blocks)
+
+class FlashContentCache:
+    """@brief Persistent record of flash contents last programmed by pyOCD.
+
+    One cache file exists for each combination of debug probe unique ID, target type, and flash
+    region. It records the CRC32 of every page programmed (or found unchanged) by the last load, plus
+    the CRC32s computed by the target's CRC analyzer for the entire region after programming.
+
+    On the next load, the analyzer is run once over the whole region. If the region CRCs match the
+    recorded values then flash hasn't been modified since it was recorded, and the recorded page CRCs
+    can be compared with the CRCs of new page data to determine which pages are unchanged. This
+    avoids both a per-page analyzer run and reading back pages with matching CRCs.
+    """
+
+    ## Version of the cache file format.
+    VERSION = 1
+
+    def __init__(self, cache_dir: Path, probe_uid: str, target_name: str, region_name: str,
+            start: int, length: int) -> None:
+        self._key = {
+                'probe': probe_uid,
+                'target': target_name,
+                'region': region_name,
+                'start': start,
+                'length': length,
+            }
+        digest = hashlib.sha1(json.dumps(self._key, sort_keys=True).encode()).hexdigest()
+        self._path = Path(cache_dir, digest + ".json")
+        self._blocks = compute_region_blocks(start, length)
+        self._block_crcs: Optional[List[int]] = None
+        self._page_crcs: Dict[int, Tuple[int, int]] = {}
+
+    @property
+    def path(self) -> Path:
+        """@brief Path of the cache file."""
+        return self._path
+
+    @property
+    def blocks(self) -> List[Tuple[int, int]]:
+        """@brief List of (address, size) blocks to pass to the CRC analyzer."""
+        return self._blocks
+
+    @property
+    def is_analyzer_compatible(self) -> bool:
+        """@brief Whether all region blocks can be encoded for the CRC analyzer."""
+        return are_blocks_analyzable(self._blocks)
+
+    @property
+    def page_crcs(self) -> Dict[int, Tuple[int, int]]:
+        """@brief Map of page address to (size, crc) for pages whose contents are recorded."""
+        return self._page_crcs
+
+    def load(self) -> bool:
+        """@brief Read the cache file.
+        @return Boolean indicating whether a compatible cache file was read.
+        """
+        self._block_crcs = None
+        self._page_crcs = {}
+        try:
+            with self._path.open('r') as f:
+                info = json.load(f)
+            if info.get('version') != self.VERSION or info.get('key') != self._key:
+                return False
+            block_crcs = [int(crc) for crc in info['blocks']]
+            if len(block_crcs) != len(self._blocks):
+                return False
+            self._page_crcs = {int(addr): (int(size), int(crc)) for addr, size, crc in info['pages']}
+            self._block_crcs = block_crcs
+            return True
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError, KeyError, TypeError) as err:
+            LOG.debug("ignoring invalid flash content cache file %s: %s", self._path, err)
+            return False
+
+    def is_valid(self, block_crcs: Sequence[int]) -> bool:
+        """@brief Check whether the loaded page CRCs describe the current flash contents.
+        @param self
+        @param block_crcs CRCs of the blocks returned by the `blocks` property, as computed by the
+            CRC analyzer from the current flash contents.
+        """
+        return (self._block_crcs is not None) and (list(block_crcs) == self._block_crcs)
+
+    def save(self, block_crcs: Sequence[int], page_crcs: Dict[int, Tuple[int, int]]) -> None:
+        """@brief Write the cache file.
+
+        The file is written to a temporary file and then renamed, so concurrent loads never see a
+        partially written cache file.
+
+        @exception OSError
+        """
+        assert len(block_crcs) == len(self._blocks)
+        info = {
+                'version': self.VERSION,
+                'key': self._key,
+                'blocks': list(block_crcs),
+                'pages': [[addr, size, crc] for addr, (size, crc) in sorted(page_crcs.items())],
+            }
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self._path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(info, f)
+            os.replace(tmp_path, self._path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+        self._block_crcs = list(block_crcs)
+        self._page_crcs = dict(page_crcs)
+
+    def invalidate(self) -> None:
+        """@brief Discard the loaded record because it no longer describes the flash contents."""
+        self._block_crcs = None
+        self._page_crcs = {}
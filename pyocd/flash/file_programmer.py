@@ -43,6 +43,37 @@ def ranges(i: List[int]) -> Iterator[Tuple[int, int]]:
         b = list(b)
         yield b[0][1], b[-1][1]
 
+class FileImage:
+    """@brief Data extracted from a file to be programmed.
+
+    A file image is independent of any session, so a file can be read once and then programmed
+    into any number of targets with FileProgrammer.program_image().
+    """
+
+    def __init__(self, name: str, ignore_invalid: bool = False) -> None:
+        """@brief Constructor.
+
+        @param self
+        @param name Name of the file the data was read from, used for log messages.
+        @param ignore_invalid Whether chunks that cannot be programmed into the target, for instance
+            because the address is not within a flash region, are skipped with a warning rather than
+            raising an exception.
+        """
+        self.name = name
+        self.ignore_invalid = ignore_invalid
+        ## List of (address, data) tuples. An address of None means the start of the target's
+        # boot memory.
+        self.chunks: List[Tuple[Optional[int], bytes]] = []
+
+    def add_chunk(self, address: Optional[int], data: bytes) -> None:
+        """@brief Add a chunk of data to the image."""
+        self.chunks.append((address, bytes(data)))
+
+    @property
+    def byte_count(self) -> int:
+        """@brief Total number of bytes in the image."""
+        return sum(len(data) for _, data in self.chunks)
+
 class FileProgrammer(object):
     """@brief Class to manage programming a file in any supported format with many options.
 
@@ -55,6 +86,10 @@ class FileProgrammer(object):
     - Binary (.bin)
     - Intel Hex (.hex)
     - ELF (.elf or .axf)
+
+    Reading a file and programming it are separate steps, available through the read_file() and
+    program_image() methods, so the same file can be programmed into multiple targets without
+    parsing it again. The program() method performs both steps.
     """
     def __init__(self,
             session: "Session",
@@ -96,12 +131,8 @@ class FileProgrammer(object):
         self._progress = progress
         self._loader = None
 
-        self._format_handlers: Dict[str, Callable[..., None]] = {
-            'axf': self._program_elf,
-            'bin': self._program_bin,
-            'elf': self._program_elf,
-            'hex': self._program_hex,
-            }
+    ## Map of file format name to the method that reads that format.
+    _FORMAT_READERS: Dict[str, Callable[..., FileImage]] = {}
 
     def program(self, file_or_path: Union[str, IO[bytes]], file_format: Optional[str] = None, **kwargs: Any):
         """@brief Program a file into flash.
@@ -119,6 +150,21 @@ class FileProgrammer(object):
         - `skip`: Number of bytes to skip at the start of the binary file. Does not affect the
             base address.
 
+        @exception FileNotFoundError Provided file_or_path string does not reference a file.
+        @exception ValueError Invalid argument value, for instance providing a file object but
+            not setting file_format.
+        """
+        self.program_image(self.read_file(file_or_path, file_format, **kwargs))
+
+    @classmethod
+    def read_file(cls, file_or_path: Union[str, IO[bytes]], file_format: Optional[str] = None,
+            **kwargs: Any) -> FileImage:
+        """@brief Read the data to be programmed from a file.
+
+        The parameters are the same as for program().
+
+        @return A FileImage instance that can be passed to program_image().
+
         @exception FileNotFoundError Provided file_or_path string does not reference a file.
         @exception ValueError Invalid argument value, for instance providing a file object but
             not setting file_format.
@@ -143,18 +189,9 @@ class FileProgrammer(object):
                 raise ValueError("file object provided but no format is set")
 
         # Check the format is one we understand.
-        if file_format is None or file_format not in self._format_handlers:
+        if file_format is None or file_format not in cls._FORMAT_READERS:
             raise ValueError("unknown file format '%s'" % file_format)
 
-        self._loader = FlashLoader(self._session,
-                                    progress=self._progress,
-                                    chip_erase=self._chip_erase,
-                                    smart_flash=self._smart_flash,
-                                    trust_crc=self._trust_crc,
-                                    keep_unwritten=self._keep_unwritten,
-                                    no_reset=self._no_reset)
-
-        # file_obj = None
         # Open the file if a path was provided.
         if is_path:
             mode = 'rb'
@@ -163,43 +200,72 @@ class FileProgrammer(object):
                 mode = 'r'
             assert isinstance(file_or_path, str)
             file_obj = open(file_or_path, mode)
+            name = file_or_path
         else:
             assert not isinstance(file_or_path, str)
             file_obj = file_or_path
+            name = getattr(file_obj, 'name', "<file>")
         try:
-
-            # Pass to the format-specific programmer.
-            self._format_handlers[file_format](file_obj, **kwargs)
-            self._loader.commit()
+            # Pass to the format-specific reader.
+            return cls._FORMAT_READERS[file_format](file_obj, name, **kwargs)
         finally:
             if is_path and file_obj is not None:
                 file_obj.close()
 
-    def _program_bin(self, file_obj: IO[bytes], **kwargs: Any) -> None:
-        """@brief Binary file format loader"""
-        assert self._loader
+    def program_image(self, image: FileImage) -> None:
+        """@brief Program a file image previously read with read_file() into flash.
+
+        @exception TargetSupportError No address was specified for a binary file, and the target does
+            not have a boot memory.
+        """
+        self._loader = FlashLoader(self._session,
+                                    progress=self._progress,
+                                    chip_erase=self._chip_erase,
+                                    smart_flash=self._smart_flash,
+                                    trust_crc=self._trust_crc,
+                                    keep_unwritten=self._keep_unwritten,
+                                    no_reset=self._no_reset)
+
+        for address, data in image.chunks:
+            # If no base address is specified use the start of the boot memory.
+            if address is None:
+                assert self._session.target
+                boot_memory = self._session.target.memory_map.get_boot_memory()
+                if boot_memory is None:
+                    raise exceptions.TargetSupportError("No boot memory is defined for this device")
+                address = boot_memory.start
+
+            try:
+                self._loader.add_data(address, data)
+            except ValueError as e:
+                if not image.ignore_invalid:
+                    raise
+                LOG.warning("Failed to add data chunk: %s", e)
 
-        # If no base address is specified use the start of the boot memory.
+        self._loader.commit()
+
+    @staticmethod
+    def _read_bin(file_obj: IO[bytes], name: str, **kwargs: Any) -> FileImage:
+        """@brief Binary file format loader"""
+        image = FileImage(name)
         address = kwargs.get('base_address', None)
-        if address is None:
-            assert self._session.target
-            boot_memory = self._session.target.memory_map.get_boot_memory()
-            if boot_memory is None:
-                raise exceptions.TargetSupportError("No boot memory is defined for this device")
-            address = boot_memory.start
-        assert isinstance(address, int)
+        assert (address is None) or isinstance(address, int)
 
         skip_offset = kwargs.get('skip', 0)
         if not isinstance(skip_offset, int):
             raise TypeError("skip argument must be an integer")
         file_obj.seek(skip_offset, os.SEEK_SET)
-        data = list(bytearray(file_obj.read()))
-
-        self._loader.add_data(address, data)
+        image.add_chunk(address, file_obj.read())
+        return image
 
-    def _program_hex(self, file_obj: IO[bytes], **kwargs: Any) -> None:
+    @staticmethod
+    def _read_hex(file_obj: IO[bytes], name: str, **kwargs: Any) -> FileImage:
         """Intel hex file format loader"""
-        assert self._loader
+        # Ignore invalid addresses for HEX files only
+        # Binary files (obviously) don't contain addresses
+        # For ELF files, any metadata that's not part of the application code
+        # will be held in a section that doesn't have the SHF_WRITE flag set
+        image = FileImage(name, ignore_invalid=True)
 
         hexfile = IntelHex(file_obj)
         addresses = hexfile.addresses()
@@ -208,30 +274,28 @@ class FileProgrammer(object):
         data_list = list(ranges(addresses))
         for start, end in data_list:
             size = end - start + 1
-            data = list(hexfile.tobinarray(start=start, size=size))
-            # Ignore invalid addresses for HEX files only
-            # Binary files (obviously) don't contain addresses
-            # For ELF files, any metadata that's not part of the application code
-            # will be held in a section that doesn't have the SHF_WRITE flag set
-            try:
-                self._loader.add_data(start, data)
-            except ValueError as e:
-                LOG.warning("Failed to add data chunk: %s", e)
+            image.add_chunk(start, hexfile.tobinarray(start=start, size=size).tobytes())
+        return image
 
-    def _program_elf(self, file_obj: IO[bytes], **kwargs: Any) -> None:
-        assert self._loader
+    @staticmethod
+    def _read_elf(file_obj: IO[bytes], name: str, **kwargs: Any) -> FileImage:
+        image = FileImage(name, ignore_invalid=True)
 
         elf = ELFFile(file_obj)
         for segment in elf.iter_segments():
             addr = segment['p_paddr']
             if segment.header.p_type == 'PT_LOAD' and segment.header.p_filesz != 0:
-                data = bytearray(segment.data())
                 LOG.debug("Writing segment LMA:0x%08x, VMA:0x%08x, size %d", addr,
                           segment['p_vaddr'], segment.header.p_filesz)
-                try:
-                    self._loader.add_data(addr, data)
-                except ValueError as e:
-                    LOG.warning("Failed to add data chunk: %s", e)
+                image.add_chunk(addr, segment.data())
             else:
                 LOG.debug("Skipping segment LMA:0x%08x, VMA:0x%08x, size %d", addr,
                           segment['p_vaddr'], segment.header.p_filesz)
+        return image
+
+FileProgrammer._FORMAT_READERS.update({
+    'axf': FileProgrammer._read_elf,
+    'bin': FileProgrammer._read_bin,
+    'elf': FileProgrammer._read_elf,
+    'hex': FileProgrammer._read_hex,
+    })
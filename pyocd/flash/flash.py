@@ -19,13 +19,16 @@
 from dataclasses import dataclass
 import logging
 from enum import Enum
+from time import (monotonic, sleep)
 
 from ..core import exceptions
 from ..core.target import Target
 from ..core.exceptions import (FlashFailure, FlashEraseFailure, FlashProgramFailure)
+from ..utility.crc import crc32_combine
 from ..utility.mask import (align_down, msb)
 from ..utility.timeout import Timeout
 from .builder import FlashBuilder
+from .content_cache import (are_blocks_analyzable, compute_region_blocks)
 
 LOG = logging.getLogger(__name__)
 TRACE = LOG.getChild("trace")
@@ -127,6 +130,15 @@ class Flash:
     ## Canary value used for checking stack overflow.
     _STACK_CANARY = 0xdeadf00d
 
+    ## Time in seconds that target state is polled without delay while waiting for a flash algo
+    # function to complete.
+    _POLL_BUSY_TIME = 0.02
+
+    ## Initial and maximum delays in seconds between polls of target state after _POLL_BUSY_TIME has
+    # passed. The delay doubles after each poll that finds the target running.
+    _POLL_INTERVAL_MIN = 0.0001
+    _POLL_INTERVAL_MAX = 0.005
+
     def __init__(self, target, flash_algo):
         self.target = target
         self.flash_algo = flash_algo
@@ -341,6 +353,37 @@ class Flash:
         data = self.target.read_memory_block32(self.begin_data, len(data))
         return data
 
+    def can_compute_range_crcs(self, ranges):
+        """@brief Whether compute_range_crcs() supports all of the given (address, length) ranges."""
+        return self.use_analyzer and all(are_blocks_analyzable(compute_region_blocks(addr, length))
+                for addr, length in ranges)
+
+    def compute_range_crcs(self, ranges):
+        """@brief Compute the CRC32 of arbitrary address ranges using the CRC analyzer.
+
+        The analyzer only supports naturally aligned, power of two sized blocks. So each range is
+        split into such blocks, the CRCs of the blocks for all ranges are computed in a single analyzer
+        invocation, and then the block CRCs are combined on the host into a CRC for each range.
+
+        @param self
+        @param ranges Sequence of (address, length) tuples.
+        @return List of CRC32 values, one for each range.
+        @exception FlashFailure A range cannot be encoded for the analyzer.
+        """
+        range_blocks = [compute_region_blocks(addr, length) for addr, length in ranges]
+        all_blocks = [block for blocks in range_blocks for block in blocks]
+        if not are_blocks_analyzable(all_blocks):
+            raise FlashFailure("address range cannot be analyzed by the CRC analyzer")
+
+        block_crcs = iter(self.compute_crcs(all_blocks) if all_blocks else [])
+        crcs = []
+        for blocks in range_blocks:
+            crc = 0
+            for _, size in blocks:
+                crc = crc32_combine(crc, next(block_crcs), size)
+            crcs.append(crc)
+        return crcs
+
     def erase_all(self):
         """@brief Erase all the flash.
 
@@ -419,14 +462,37 @@ class Flash:
                 self.page_buffers[buffer_number])
         self._call_function(self.flash_algo['pc_program_page'], address, page_info.size, self.page_buffers[buffer_number])
 
-    def load_page_buffer(self, buffer_number, address, bytes):
+    def prepare_page_data(self, address, data):
+        """@brief Convert page data to the bytes that will be written to target RAM.
+
+        This applies override_security_bits() and converts the data to a bytes object. It doesn't
+        access the target, so it may be called from a different thread than is performing flash
+        operations, ahead of loading the data with load_page_buffer() and `prepared=True`.
+
+        @return Bytes object with the data to program.
+        """
+        return bytes(self.override_security_bits(address, data))
+
+    def load_page_buffer(self, buffer_number, address, bytes, prepared=False):
         """@brief Load data to a numbered page buffer.
 
         This method is used in conjunction with start_program_page_with_buffer() to implement
         double buffered programming.
+
+        @param self
+        @param buffer_number Index of the page buffer to load.
+        @param address Flash address the data will be programmed to.
+        @param bytes Page data.
+        @param prepared If True, _bytes_ was returned by prepare_page_data() and is written to the
+            buffer as is.
         """
         assert buffer_number < len(self.page_buffers), "Invalid buffer number"
 
+        if prepared:
+            # transfer the prepared buffer to device RAM without further conversion
+            self.target.write_memory_bytes(self.page_buffers[buffer_number], bytes)
+            return
+
         # prevent security settings from locking the device
         bytes = self.override_security_bits(address, bytes)
 
@@ -637,6 +703,8 @@ class Flash:
         # This setting of state isn't strictly necessary, but pyright sees it as possibly unbound when used
         # below. Otoh, lgtm sees it as unnecessary! So we disable the lgtm warning.
         state = Target.State.RUNNING # lgtm[py/multiple-definition]
+        poll_interval = self._POLL_INTERVAL_MIN
+        start_time = monotonic()
         with Timeout(timeout) as time_out:
             while time_out.check():
                 try:
@@ -647,6 +715,13 @@ class Flash:
                     LOG.debug("target.get_state probe timeout")
                 except exceptions.TransferFaultError:
                     LOG.debug("target.get_state probe fault")
+
+                # Poll without sleeping for short operations, as a sleep may take much longer than
+                # requested on some platforms. Then back off polling so long operations don't flood
+                # the probe with status reads.
+                if (monotonic() - start_time) >= self._POLL_BUSY_TIME:
+                    sleep(poll_interval)
+                    poll_interval = min(poll_interval * 2, self._POLL_INTERVAL_MAX)
             else:
                 # Operation timed out.
                 self.target.halt()
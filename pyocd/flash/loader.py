@@ -339,6 +339,13 @@ class MemoryLoader:
                 skipped_byte_count, get_page_count(skipped_page_count),
                 kbps)
 
+        page_program_time = sum(perf.page_program_time for perf in perf_list)
+        if page_program_time > 0:
+            page_program_byte_count = sum(perf.page_program_byte_count for perf in perf_list)
+            LOG.debug("Page programming throughput %.02f kB/s (%d bytes in %.3f s)",
+                (page_program_byte_count / 1024) / page_program_time, page_program_byte_count,
+                page_program_time)
+
     def _progress_cb(self, amount):
         if self._progress is not None:
             self._progress((amount * self._current_progress_fraction) + self._progress_offset)
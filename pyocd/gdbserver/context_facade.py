@@ -16,11 +16,12 @@
 # limitations under the License.
 
 import logging
+import struct
 from xml.etree import ElementTree
 from itertools import groupby
 
 from ..utility import conversion
-from ..utility.mask import (align_up, round_up_div)
+from ..utility.mask import round_up_div
 from ..core import exceptions
 from ..core.target import Target
 from ..core.memory_map import MemoryType
@@ -55,6 +56,14 @@ GDB_TYPE_MAP = {
     MemoryType.FLASH: 'flash',
     }
 
+## @brief Map from register size in bits to the struct format character used to encode it.
+STRUCT_FORMAT_MAP = {
+    8: 'B',
+    16: 'H',
+    32: 'I',
+    64: 'Q',
+    }
+
 class GDBDebugContextFacade(object):
     """@brief Provides GDB specific transformations to a DebugContext."""
 
@@ -79,6 +88,33 @@ class GDBDebugContextFacade(object):
         ## Map of gdb regnum to register info.
         self._gdb_regnum_map = {reg.gdb_regnum: reg for reg in self._register_list}
 
+        ## List of (start, end) offsets of each register's hex digits in the g/G register context.
+        self._register_hex_spans = []
+        offset = 0
+        for reg in self._register_list:
+            hex_size = round_up_div(reg.bitsize, 8) * 2
+            self._register_hex_spans.append((offset, offset + hex_size))
+            offset += hex_size
+
+        ## Map of gdb regnum to the offsets of the register's hex digits in the register context.
+        self._gdb_regnum_hex_spans = {reg.gdb_regnum: span
+                for reg, span in zip(self._register_list, self._register_hex_spans)}
+
+        ## Struct format characters for each register, in g/G order, or None if any register
+        # has a size that struct can't encode.
+        try:
+            self._register_formats = [STRUCT_FORMAT_MAP[reg.bitsize] for reg in self._register_list]
+            self._register_struct = struct.Struct('<' + ''.join(self._register_formats))
+        except KeyError:
+            self._register_formats = None
+            self._register_struct = None
+
+        ## Encoded register contexts, keyed by (context, run token).
+        #
+        # The cache only holds entries for the run token it was last used with.
+        self._register_context_cache = {}
+        self._register_context_cache_token = None
+
         ## String of XML target description for gdb.
         self._target_xml = self._build_target_xml()
 
@@ -89,28 +125,75 @@ class GDBDebugContextFacade(object):
     def set_context(self, new_context):
         self._context = new_context
 
+    def invalidate_register_cache(self):
+        """@brief Discard cached register contexts.
+
+        Must be called when registers may have changed without the core's run token changing, such
+        as after memory writes that can modify the stacked registers of RTOS threads.
+        """
+        self._register_context_cache.clear()
+
+    def _get_cached_register_context(self):
+        """@brief Return the cached register context for the current context, or None."""
+        token = self._context.core.run_token
+        if token != self._register_context_cache_token:
+            self._register_context_cache.clear()
+            self._register_context_cache_token = token
+            return None
+        return self._register_context_cache.get(self._context)
+
+    def _encode_register_context(self, values):
+        """@brief Encode register values in g/G order as GDB hexadecimal.
+
+        Values of None are encoded as x's to indicate an unavailable register.
+        """
+        missing = [i for i, value in enumerate(values) if value is None]
+        if missing:
+            values = [0 if (value is None) else value for value in values]
+        if self._register_struct is not None:
+            data = self._register_struct.pack(*values)
+        else:
+            data = b''.join(value.to_bytes(round_up_div(reg.bitsize, 8), 'little')
+                    for reg, value in zip(self._register_list, values))
+        encoded = data.hex().encode()
+        if missing:
+            result = bytearray(encoded)
+            for i in missing:
+                start, end = self._register_hex_spans[i]
+                result[start:end] = b"x" * (end - start)
+            encoded = bytes(result)
+        return encoded
+
     def get_register_context(self):
         """@brief Return hexadecimal dump of registers as expected by GDB.
 
+        The result is cached until the core's run token changes, so repeated requests while the
+        core is halted don't access the target.
+
         @exception CoreRegisterAccessError
         """
+        resp = self._get_cached_register_context()
+        if resp is not None:
+            LOG.debug("GDB getting register context (cached)")
+            return resp
+
         LOG.debug("GDB getting register context")
-        resp = b''
         try:
             vals = self._context.read_core_registers_raw(self._full_reg_num_list)
+            is_valid = True
         except exceptions.CoreRegisterAccessError:
             vals = [None] * len(self._full_reg_num_list)
+            is_valid = False
 
-        for reg, reg_value in zip(self._register_list, vals):
-            # Return x's to indicate unavailable register value.
-            if reg_value is None:
-                r = b"xx" * round_up_div(reg.bitsize, 8)
-            else:
-                r = conversion.uint_to_hex_le(reg_value, reg.bitsize).encode()
-            resp += r
-            LOG.debug("GDB get_reg_context: %s = %s -> %s", reg.name,
-                    "None" if (reg_value is None) else ("0x%08X" % reg_value), r)
+        resp = self._encode_register_context(vals)
+        if LOG.isEnabledFor(logging.DEBUG):
+            for reg, reg_value, (start, end) in zip(self._register_list, vals, self._register_hex_spans):
+                LOG.debug("GDB get_reg_context: %s = %s -> %s", reg.name,
+                        "None" if (reg_value is None) else ("0x%08X" % reg_value), resp[start:end])
 
+        # Don't cache a failed read, so the registers are read again on the next request.
+        if is_valid:
+            self._register_context_cache[self._context] = resp
         return resp
 
     def set_register_context(self, data):
@@ -119,20 +202,22 @@ class GDBDebugContextFacade(object):
         @exception CoreRegisterAccessError
         """
         LOG.debug("GDB setting register context")
-        reg_num_list = []
-        reg_data_list = []
-        offset = 0
-        for reg in self._register_list:
-            if offset >= len(data):
-                break
-            hex_byte_count = align_up(reg.bitsize // 4, 2)
-            reg_data = data[offset:(offset + hex_byte_count)]
-            reg_value = conversion.hex_le_to_uint(reg_data, reg.bitsize)
-            offset += hex_byte_count
-            reg_num_list.append(reg.index)
-            reg_data_list.append(reg_value)
-            LOG.debug("GDB reg: %s = 0x%X", reg.name, reg_value)
-        self._context.write_core_registers_raw(reg_num_list, reg_data_list)
+        self.invalidate_register_cache()
+        raw = bytes.fromhex(data.decode())
+
+        # Only write the registers fully present in the data.
+        count = sum(1 for _, end in self._register_hex_spans if end <= len(raw) * 2)
+        regs = self._register_list[:count]
+        if self._register_formats is not None:
+            reg_data_list = list(struct.unpack_from('<' + ''.join(self._register_formats[:count]), raw))
+        else:
+            reg_data_list = [int.from_bytes(raw[start // 2:end // 2], 'little')
+                    for start, end in self._register_hex_spans[:count]]
+
+        if LOG.isEnabledFor(logging.DEBUG):
+            for reg, reg_value in zip(regs, reg_data_list):
+                LOG.debug("GDB reg: %s = 0x%X", reg.name, reg_value)
+        self._context.write_core_registers_raw([reg.index for reg in regs], reg_data_list)
 
     def set_register(self, gdb_regnum, data):
         """@brief Set single register from GDB hexadecimal string.
@@ -145,6 +230,7 @@ class GDBDebugContextFacade(object):
         """
         reg = self._gdb_regnum_map.get(gdb_regnum, None)
         if reg is not None:
+            self.invalidate_register_cache()
             value = conversion.hex_le_to_uint(data, reg.bitsize)
             LOG.debug("GDB: write reg %s: 0x%X", reg.name, value)
             self._context.write_core_register_raw(reg.name, value)
@@ -164,6 +250,12 @@ class GDBDebugContextFacade(object):
         if reg is None:
             return b''
 
+        # Extract the register from the cached register context if there is one.
+        context = self._get_cached_register_context()
+        if context is not None:
+            start, end = self._gdb_regnum_hex_spans[gdb_regnum]
+            return context[start:end]
+
         try:
             reg_value = self._context.read_core_register_raw(reg.name)
             resp = conversion.uint_to_hex_le(reg_value, reg.bitsize).encode()
@@ -18,7 +18,7 @@
 
 import logging
 import threading
-from time import sleep
+from time import (monotonic, sleep)
 import sys
 import io
 from xml.etree.ElementTree import (Element, SubElement, tostring)
@@ -28,7 +28,7 @@ from ..core import exceptions
 from ..core.target import Target
 from ..flash.loader import FlashLoader
 from ..utility.cmdline import convert_vector_catch
-from ..utility.conversion import (hex_to_byte_list, hex_encode, hex_decode, hex8_to_u32le)
+from ..utility.conversion import (hex_encode, hex_decode, hex8_to_u32le)
 from ..utility.compatibility import (to_bytes_safe, to_str_safe)
 from ..utility.server import StreamServer
 from ..utility.timeout import Timeout
@@ -108,6 +108,9 @@ class GDBServer(threading.Thread):
     ## Timer delay for sending the notification that the server is listening.
     START_LISTENING_NOTIFY_DELAY = 0.03 # 30 ms
 
+    ## Interval between checks of the target's state while it is running.
+    STATE_POLL_INTERVAL = 0.01 # 10 ms
+
     def __init__(self, session, core=None):
         super().__init__()
         self.session = session
@@ -597,6 +600,10 @@ class GDBServer(threading.Thread):
         # also serves as a flag that a fault occurred and we're attempting to retry.
         fault_retry_timeout = Timeout(self.session.options.get('debug.status_fault_retry_timeout'))
 
+        # The target state is checked at a fixed interval. RTT may be polled more often than that,
+        # when its data is arriving quickly.
+        next_state_check = monotonic() + self.STATE_POLL_INTERVAL
+
         while fault_retry_timeout.check():
             if self.shutdown_event.is_set():
                 self.packet_io.interrupt_event.clear()
@@ -604,8 +611,11 @@ class GDBServer(threading.Thread):
 
             self.lock.release()
 
-            # Wait for a ctrl-c to be received.
-            if self.packet_io.interrupt_event.wait(0.01):
+            # Wait for a ctrl-c to be received, until it is time to check the target state or poll RTT.
+            poll_interval = max(0.0, next_state_check - monotonic())
+            if self.rtt_server and self.rtt_server.running:
+                poll_interval = min(poll_interval, self.rtt_server.poll_interval)
+            if self.packet_io.interrupt_event.wait(poll_interval):
                 self.lock.acquire()
                 LOG.debug("receive CTRL-C")
                 self.packet_io.interrupt_event.clear()
@@ -626,6 +636,13 @@ class GDBServer(threading.Thread):
             self.lock.acquire()
 
             try:
+                # Only poll RTT if it isn't yet time to check the target state.
+                if monotonic() < next_state_check:
+                    if self.rtt_server:
+                        self.rtt_server.poll()
+                    continue
+                next_state_check = monotonic() + self.STATE_POLL_INTERVAL
+
                 state = self.target.get_state()
 
                 if self.rtt_server:
@@ -851,10 +868,10 @@ class GDBServer(threading.Thread):
         TRACE_MEM.debug("GDB getMem: addr=%x len=%x", addr, length)
 
         try:
-            mem = self.target_context.read_memory_block8(addr, length)
+            mem = self.target_context.read_memory_bytes(addr, length)
             # Flush so an exception is thrown now if invalid memory was accesses
             self.target_context.flush()
-            val = hex_encode(bytearray(mem))
+            val = hex_encode(mem)
         except exceptions.TransferError as e:
             LOG.debug("get_memory failed at 0x%x: %s", addr, str(e))
             val = b'E01' #EPERM
@@ -868,13 +885,16 @@ class GDBServer(threading.Thread):
         length = int(split[0], 16)
 
         split = split[1].split(b'#')
-        data = hex_to_byte_list(split[0])
+        data = hex_decode(split[0])
 
         TRACE_MEM.debug("GDB writeMemHex: addr=%x len=%x", addr, length)
 
+        # Memory writes may change the stacked registers of RTOS threads.
+        self.target_facade.invalidate_register_cache()
+
         try:
             if length > 0:
-                self.target_context.write_memory_block8(addr, data)
+                self.target_context.write_memory_bytes(addr, data)
                 # Flush so an exception is thrown now if invalid memory was accessed
                 self.target_context.flush()
             resp = b"OK"
@@ -893,11 +913,14 @@ class GDBServer(threading.Thread):
 
         idx_begin = data.index(b':') + 1
         data = data[idx_begin:len(data) - 3]
-        data = unescape(data)
+        data = bytes(unescape(data))
+
+        # Memory writes may change the stacked registers of RTOS threads.
+        self.target_facade.invalidate_register_cache()
 
         try:
             if length > 0:
-                self.target_context.write_memory_block8(addr, data)
+                self.target_context.write_memory_bytes(addr, data)
                 # Flush so an exception is thrown now if invalid memory was accessed
                 self.target_context.flush()
             resp = b"OK"
@@ -920,7 +943,7 @@ class GDBServer(threading.Thread):
         return self.create_rsp_packet(self.target_facade.get_register_context())
 
     def set_registers(self, data):
-        self.target_facade.set_register_context(data)
+        self.target_facade.set_register_context(data.split(b'#')[0])
         return self.create_rsp_packet(b"OK")
 
     def handle_query(self, msg):
@@ -1076,6 +1099,9 @@ class GDBServer(threading.Thread):
             LOG.error("Error while executing remote command '%s': %s", cmd, err,
                     exc_info=self.session.log_tracebacks)
 
+        # The command may have modified registers or memory.
+        self.target_facade.invalidate_register_cache()
+
         # Convert back to bytes, hex encode, then return the response packet.
         output = stream.getvalue()
         if not output:
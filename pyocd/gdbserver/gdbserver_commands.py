@@ -133,7 +133,7 @@ class RTTCommand(CommandBase):
             'group': 'gdbserver',
             'category': 'rtt',
             'nargs': "*",
-            'usage': "rtt {setup,start,stop,channels,server}",
+            'usage': "rtt {setup,start,stop,channels,stats,server}",
             'help': "Control SEGGER RTT compatible interface.",
             }
 
@@ -151,7 +151,7 @@ class RTTCommand(CommandBase):
                 self.id = " ".join(args[3:]).encode("utf-8")
             except ValueError as e:
                 raise exceptions.CommandError("invalid action") from e
-        elif args[0] == 'start' or args[0] == 'stop' or args[0] == 'channels':
+        elif args[0] in ('start', 'stop', 'channels', 'stats'):
             if len(args) > 1:
                 raise exceptions.CommandError("too many arguments")
         elif args[0] == 'server':
@@ -234,6 +234,15 @@ class RTTCommand(CommandBase):
             for i, chan in enumerate(control_block.up_channels):
                 name = chan.name if chan.name is not None else ""
                 self.context.write(f"{i}: {name} {chan.size}")
+        elif self.action == "stats":
+            if gdbserver.rtt_server is None:
+                raise exceptions.CommandError("rtt is not configured")
+            stats = gdbserver.rtt_server.scheduler.stats
+            self.context.write(f"Polls: {stats.poll_count} ({stats.idle_poll_count} idle)")
+            self.context.write(f"Bytes received: {stats.byte_count}")
+            self.context.write(f"Peak buffer fill: {stats.max_fill:.0%}")
+            self.context.write(f"Overruns: {stats.overrun_count}")
+            self.context.write(f"Poll interval: {gdbserver.rtt_server.poll_interval * 1000:.1f} ms")
         elif self.action == "server":
             if gdbserver.rtt_server is None:
                 raise exceptions.CommandError("rtt is not configured")
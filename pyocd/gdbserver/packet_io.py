@@ -19,9 +19,13 @@ import logging
 import threading
 import queue
 import socket
+from time import monotonic
 
 CTRL_C = b'\x03'
 
+## @brief Character that escapes the following byte in packet data.
+ESCAPE_CHAR = ord('}')
+
 LOG = logging.getLogger(__name__)
 
 TRACE_ACK = LOG.getChild("trace.ack")
@@ -44,11 +48,22 @@ class GDBServerPacketIOThread(threading.Thread):
     handles verifying checksums, acking, and receiving Ctrl-C interrupts. There is a queue
     for received packets. The interface to this queue is the receive() method. The send()
     method writes outgoing packets to the socket immediately.
+
+    Received data is appended to a bytearray buffer. A read position marks the start of data not
+    yet consumed, and a scan position marks how far the current packet has been searched for its
+    end, so large packets arriving in many pieces are only scanned once. Consumed data is removed
+    from the buffer once per batch of received data.
+
+    Send and receive throughput is logged through the `trace.packet` logger about every
+    THROUGHPUT_LOG_INTERVAL seconds while packets are transferred.
     """
 
     ## 100 ms timeout for socket and receive queue reads.
     RECEIVE_TIMEOUT = 0.1
 
+    ## Minimum interval in seconds between throughput trace messages.
+    THROUGHPUT_LOG_INTERVAL = 1.0
+
     def __init__(self, abstract_socket):
         super().__init__()
         self.name = "gdb-packet-thread-port%d" % abstract_socket.port
@@ -58,12 +73,16 @@ class GDBServerPacketIOThread(threading.Thread):
         self.interrupt_event = threading.Event()
         self.send_acks = True
         self._clear_send_acks = False
-        self._buffer = b''
+        self._buffer = bytearray()
+        self._read_pos = 0
+        self._scan_pos = 0
+        self._rx_stats = _ThroughputStats("received", self.THROUGHPUT_LOG_INTERVAL)
+        self._tx_stats = _ThroughputStats("sent", self.THROUGHPUT_LOG_INTERVAL)
         self._expecting_ack = False
         self.drop_reply = False
         self._last_packet = b''
         self._closed = False
-        self.setDaemon(True)
+        self.daemon = True
         self.start()
 
     def set_send_acks(self, ack):
@@ -134,6 +153,8 @@ class GDBServerPacketIOThread(threading.Thread):
 
             self._process_data()
 
+        self._rx_stats.log(force=True)
+        self._tx_stats.log(force=True)
         LOG.debug("GDB packet thread stopping")
 
     def _write_packet(self, packet):
@@ -141,24 +162,24 @@ class GDBServerPacketIOThread(threading.Thread):
 
         # Make sure the entire packet is sent.
         try:
-            remaining = len(packet)
-            while remaining:
-                written = self._abstract_socket.write(packet)
-                remaining -= written
-                if remaining:
-                    packet = packet[written:]
+            data = memoryview(packet)
+            while len(data):
+                written = self._abstract_socket.write(data)
+                data = data[written:]
         except (ConnectionAbortedError, ConnectionResetError) as err:
             LOG.warning("GDB packet thread: connection unexpectedly closed during send (%s)", err)
             self._closed = True
+        else:
+            self._tx_stats.add(len(packet))
 
         if self.send_acks:
             self._expecting_ack = True
 
     def _check_expected_ack(self):
         # Handle expected ack.
-        c = self._buffer[0:1]
+        c = self._buffer[self._read_pos:self._read_pos + 1]
         if c in (b'+', b'-'):
-            self._buffer = self._buffer[1:]
+            self._read_pos += 1
             TRACE_ACK.debug('got ack: %s', c)
             if c == b'-':
                 # Handle nack from gdb
@@ -174,33 +195,82 @@ class GDBServerPacketIOThread(threading.Thread):
 
     def _process_data(self):
         """@brief Process all incoming data until there are no more complete packets."""
-        while len(self._buffer):
+        while self._read_pos < len(self._buffer):
             if self._expecting_ack:
                 self._expecting_ack = False
                 self._check_expected_ack()
+                continue
 
             # Check for a ctrl-c.
-            if len(self._buffer) and self._buffer[0:1] == CTRL_C:
+            if self._buffer[self._read_pos:self._read_pos + 1] == CTRL_C:
                 self.interrupt_event.set()
-                self._buffer = self._buffer[1:]
-
-            try:
-                # Look for complete packet and extract from buffer.
-                pkt_begin = self._buffer.index(b"$")
-                pkt_end = self._buffer.index(b"#") + 2
-                if pkt_begin >= 0 and pkt_end < len(self._buffer):
-                    pkt = self._buffer[pkt_begin:pkt_end + 1]
-                    self._buffer = self._buffer[pkt_end + 1:]
-                    self._handling_incoming_packet(pkt)
-                else:
-                    break
-            except ValueError:
+                self._read_pos += 1
+                continue
+
+            # Skip any data before the next packet or ctrl-c.
+            pkt_begin = self._buffer.find(b"$", self._read_pos)
+            junk_end = pkt_begin if (pkt_begin >= 0) else len(self._buffer)
+            ctrl_c_pos = self._buffer.find(CTRL_C, self._read_pos, junk_end)
+            if ctrl_c_pos >= 0:
+                junk_end = ctrl_c_pos
+            if junk_end > self._read_pos:
+                LOG.debug("GDB: discarding unexpected data '%s'",
+                        bytes(self._buffer[self._read_pos:junk_end]))
+                self._read_pos = junk_end
+                continue
+
+            # Look for a complete packet and extract it from the buffer.
+            pkt_end = self._find_packet_end(pkt_begin)
+            if pkt_end < 0:
                 # No complete packet received yet.
                 break
+            pkt = bytes(self._buffer[pkt_begin:pkt_end])
+            self._read_pos = pkt_end
+            self._handling_incoming_packet(pkt)
+
+        # Drop consumed data from the buffer.
+        if self._read_pos:
+            del self._buffer[:self._read_pos]
+            self._scan_pos = max(0, self._scan_pos - self._read_pos)
+            self._read_pos = 0
+
+        self._rx_stats.log()
+
+    def _find_packet_end(self, pkt_begin):
+        """@brief Search for the end of the packet starting at _pkt_begin_.
+
+        The search resumes from where the previous search of the same packet stopped.
+
+        @return Offset just past the packet's checksum, or -1 if the packet is not complete yet.
+        """
+        pos = max(self._scan_pos, pkt_begin + 1)
+        while True:
+            hash_pos = self._buffer.find(b"#", pos)
+            if hash_pos < 0:
+                self._scan_pos = len(self._buffer)
+                return -1
+            # A '#' following an unescaped escape character is escaped data, not the end of
+            # the packet. Count the run of escape characters before the '#' to tell.
+            escape_count = 0
+            while (hash_pos - escape_count - 1 > pkt_begin
+                    and self._buffer[hash_pos - escape_count - 1] == ESCAPE_CHAR):
+                escape_count += 1
+            if escape_count % 2:
+                pos = hash_pos + 1
+                continue
+            # Wait for both checksum characters.
+            if hash_pos + 2 >= len(self._buffer):
+                self._scan_pos = hash_pos
+                return -1
+            self._scan_pos = 0
+            return hash_pos + 3
 
     def _handling_incoming_packet(self, packet):
+        self._rx_stats.add(len(packet))
+
         # Compute checksum
-        data, cksum = packet[1:].split(b'#')
+        data = packet[1:-3]
+        cksum = packet[-2:]
         computedCksum = checksum(data)
         goodPacket = (computedCksum.lower() == cksum.lower())
 
@@ -212,3 +282,36 @@ class GDBServerPacketIOThread(threading.Thread):
         if goodPacket:
             self._receive_queue.put(packet)
 
+
+class _ThroughputStats:
+    """@brief Packet throughput accounting for one direction of the packet I/O thread."""
+
+    def __init__(self, direction, interval):
+        self._direction = direction
+        self._interval = interval
+        self._reset(monotonic())
+
+    def _reset(self, now):
+        self._start = now
+        self._packet_count = 0
+        self._byte_count = 0
+
+    def add(self, length):
+        if self._packet_count == 0:
+            self._start = monotonic()
+        self._packet_count += 1
+        self._byte_count += length
+        self.log()
+
+    def log(self, force=False):
+        """@brief Log and reset the stats if the log interval has passed or _force_ is set."""
+        if self._packet_count == 0 or not TRACE_PACKETS.isEnabledFor(logging.DEBUG):
+            return
+        now = monotonic()
+        elapsed = now - self._start
+        if not force and elapsed < self._interval:
+            return
+        TRACE_PACKETS.debug("GDB %s %d packets, %d bytes in %.3f s (%.1f kB/s)", self._direction,
+                self._packet_count, self._byte_count, elapsed,
+                self._byte_count / elapsed / 1000 if elapsed > 0 else 0.0)
+        self._reset(now)
@@ -274,6 +274,8 @@ class CMSISDAPProbe(DebugProbe):
         try:
             TRACE.debug("trace: open")
 
+            # Options used while opening the link must come from this probe's session.
+            self._link.session = self.session
             self._link.open()
             self._is_open = True
             self._link.set_deferred_transfer(self.session.options.get('cmsis_dap.deferred_transfers'))
@@ -749,4 +751,6 @@ class CMSISDAPProbePlugin(Plugin):
                 "Whether the CMSIS-DAP probe backend will use deferred transfers for improved performance."),
             OptionInfo('cmsis_dap.limit_packets', bool, False,
                 "Restrict CMSIS-DAP backend to using a single in-flight command at a time."),
+            OptionInfo('cmsis_dap.pipelined_transfers', bool, False,
+                "Read command responses on a background thread so the probe's packet queue is kept full."),
             ]
@@ -19,6 +19,8 @@
 import re
 import logging
 import collections
+import queue
+import struct
 import threading
 from typing import (Any, Dict, Optional, Tuple, Union)
 
@@ -124,6 +126,13 @@ class _Transfer(object):
             self._size_bytes = transfer_count * 4
         self._result = None
         self._error = None
+        # UID of the command holding the final part of this transfer.
+        self.command_uid = -1
+
+    @property
+    def is_complete(self):
+        """@brief Whether either a result or an error has been attached to this transfer."""
+        return (self._result is not None) or (self._error is not None)
 
     def get_data_size(self):
         """@brief Get the size in bytes of the return value of this transfer
@@ -137,12 +146,7 @@ class _Transfer(object):
         that get_data_size returns.
         """
         assert len(data) == self._size_bytes
-        result = []
-        for i in range(0, self._size_bytes, 4):
-            word = ((data[0 + i] << 0) | (data[1 + i] << 8) |
-                    (data[2 + i] << 16) | (data[3 + i] << 24))
-            result.append(word)
-        self._result = result
+        self._result = list(struct.unpack(f"<{self.transfer_count}I", data))
 
     def add_error(self, error):
         """@brief Attach an exception to this transfer rather than data.
@@ -153,12 +157,16 @@ class _Transfer(object):
     def get_result(self):
         """@brief Get the result of this transfer.
         """
-        while self._result is None:
-            if len(self.daplink._commands_to_read) > 0:
-                self.daplink._read_packet()
-            else:
-                assert not self.daplink._crnt_cmd.get_empty()
-                self.daplink.flush()
+        if self.daplink._response_reader is not None:
+            # Responses are being completed by the reader thread, so just wait for this transfer.
+            self.daplink._wait_for_transfer(self)
+        else:
+            while self._result is None:
+                if len(self.daplink._commands_to_read) > 0:
+                    self.daplink._read_packet()
+                else:
+                    assert not self.daplink._crnt_cmd.get_empty()
+                    self.daplink.flush()
 
         if self._error is not None:
             # Pylint is confused and thinks self._error is None
@@ -484,6 +492,105 @@ class _Command(object):
             data = self._decode_transfer_data(data)
         return data
 
+class _ResponseReader(object):
+    """@brief Background thread that completes sent commands as their responses arrive.
+
+    When pipelining is enabled, _send_packet() hands each encoded command to this object instead of
+    reading the response of the oldest outstanding command itself. The command is written to the
+    interface on the caller's thread, then queued for the reader thread, which blocks on the interface
+    read and attaches the decoded response data to the waiting transfers. Up to the probe's packet
+    count commands are kept in flight, so the caller can continue filling the next command while
+    earlier ones are executed by the probe.
+
+    The reader thread never takes the DAPAccessCMSISDAP lock. If an error occurs, it is recorded and then
+    raised on the caller's thread by the next flush or wait, which also aborts all pending transfers.
+    """
+
+    def __init__(self, daplink, interface, packet_count):
+        self._daplink = daplink
+        self._interface = interface
+        self._pending: "queue.SimpleQueue[Optional[_Command]]" = queue.SimpleQueue()
+        self._slots = threading.Semaphore(packet_count)
+        self._cond = threading.Condition()
+        self._outstanding = 0
+        self._error: Optional[Exception] = None
+        self._thread = threading.Thread(target=self._run,
+                name="CMSIS-DAP responses (%s)" % daplink.get_unique_id())
+        self._thread.daemon = True
+        self._thread.start()
+
+    @property
+    def error(self) -> Optional[Exception]:
+        return self._error
+
+    @property
+    def outstanding(self) -> int:
+        return self._outstanding
+
+    def submit(self, cmd, data):
+        """@brief Write an encoded command and queue it for the reader thread.
+
+        Blocks until there is room for another in-flight packet.
+        """
+        self._slots.acquire()
+        with self._cond:
+            self._outstanding += 1
+        try:
+            self._interface.write(data)
+        except Exception:
+            with self._cond:
+                self._outstanding -= 1
+                self._cond.notify_all()
+            self._slots.release()
+            raise
+        self._pending.put(cmd)
+
+    def wait_for(self, transfer):
+        """@brief Wait until the transfer is complete, an error occurs, or no commands are in flight."""
+        with self._cond:
+            self._cond.wait_for(lambda: transfer.is_complete
+                    or (self._error is not None)
+                    or (self._outstanding == 0))
+
+    def wait_idle(self):
+        """@brief Wait for all in-flight commands to complete.
+
+        @return The first error reported by the reader thread since the last call, or None.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._outstanding == 0)
+            error, self._error = self._error, None
+        return error
+
+    def stop(self):
+        """@brief Terminate the reader thread. All in-flight commands must already be complete."""
+        self._pending.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            cmd = self._pending.get()
+            if cmd is None:
+                break
+            try:
+                # After an error, keep reading responses for commands the probe has accepted so
+                # the interface stays in sync, but only if the error was a transfer error. Otherwise
+                # the read could raise another exception (same as _abort_all_transfers()).
+                if self._error is None:
+                    self._daplink._process_response(cmd, self._interface.read())
+                elif isinstance(self._error, DAPAccessIntf.TransferError):
+                    self._interface.read()
+            except Exception as exception:
+                TRACE.debug("[cmd:%d] response reader: got exception %r", cmd.uid, exception)
+                with self._cond:
+                    if self._error is None:
+                        self._error = exception
+            finally:
+                with self._cond:
+                    self._outstanding -= 1
+                    self._cond.notify_all()
+                self._slots.release()
+
 class DAPAccessCMSISDAP(DAPAccessIntf):
     """@brief An implementation of the DAPAccessIntf layer for DAPLink boards
 
@@ -591,12 +698,32 @@ class DAPAccessCMSISDAP(DAPAccessIntf):
         self._packet_size = None
         self._commands_to_read = collections.deque()
         self._command_response_buf = bytearray()
+        self._response_reader: Optional[_ResponseReader] = None
         self._swo_status = None
         self._cmsis_dap_version: VersionTuple = CMSISDAPVersion.V1_0_0
         self._fw_version: Optional[str] = None
         self._has_opened_once = False
         self._is_open: bool = False
         self._cached_info: Dict[DAPAccessIntf.ID, Any] = {}
+        self._session: Optional["session.Session"] = None
+
+    @property
+    def session(self) -> Optional["session.Session"]:
+        """@brief Session whose options are used by this probe.
+
+        If not set, options are read from the current session. This must be set when multiple
+        sessions are in use at the same time, such as when programming several boards at once.
+        """
+        return self._session
+
+    @session.setter
+    def session(self, the_session: Optional["session.Session"]) -> None:
+        self._session = the_session
+
+    def _get_options(self):
+        """@brief Return the options of this probe's session, or of the current session if unset."""
+        the_session = self._session if (self._session is not None) else session.Session.get_current()
+        return the_session.options
 
     @property
     def protocol_version(self) -> VersionTuple:
@@ -752,13 +879,14 @@ class DAPAccessCMSISDAP(DAPAccessIntf):
         # If this probe has already been opened and examined previously, we don't need to examine it again.
         if self._has_opened_once:
             self._init_deferred_buffers()
+            self._start_response_reader()
             if self._has_swo_uart:
                 self._swo_disable()
                 self._swo_status = SWOStatus.DISABLED
             self._is_open = True
             return
 
-        if session.Session.get_current().options['cmsis_dap.limit_packets'] or DAPSettings.limit_packets:
+        if self._get_options()['cmsis_dap.limit_packets'] or DAPSettings.limit_packets:
             self._packet_count = 1
             LOG.debug("Limiting packet count to %d", self._packet_count)
         else:
@@ -807,6 +935,7 @@ class DAPAccessCMSISDAP(DAPAccessIntf):
         self._swo_status = SWOStatus.DISABLED
 
         self._init_deferred_buffers()
+        self._start_response_reader()
 
         self._has_opened_once = True
         self._is_open = True
@@ -816,7 +945,10 @@ class DAPAccessCMSISDAP(DAPAccessIntf):
         assert self._interface is not None
         if not self._is_open:
             return
-        self.flush()
+        try:
+            self.flush()
+        finally:
+            self._stop_response_reader()
         self._interface.close()
         self._is_open = False
         self._crnt_cmd = _Command(0)
@@ -881,8 +1013,11 @@ class DAPAccessCMSISDAP(DAPAccessIntf):
         # Send current packet
         self._send_packet()
         # Read all backlogged
-        for _ in range(len(self._commands_to_read)):
-            self._read_packet()
+        if self._response_reader is not None:
+            self._check_response_reader()
+        else:
+            for _ in range(len(self._commands_to_read)):
+                self._read_packet()
 
     @locked
     def identify(self, item: DAPAccessIntf.ID) -> Union[int, str, None]:
@@ -894,7 +1029,8 @@ class DAPAccessCMSISDAP(DAPAccessIntf):
 
         # Check if buffers are inited before calling flush, so identify() can be called from open(), before
         # the initing the deferred buffers.
-        if not self._crnt_cmd.get_empty() or len(self._commands_to_read):
+        if (not self._crnt_cmd.get_empty() or len(self._commands_to_read)
+                or (self._response_reader is not None and self._response_reader.outstanding)):
             self.flush()
         value = self._protocol.dap_info(item)
         self._cached_info[item] = value
@@ -1162,37 +1298,57 @@ class DAPAccessCMSISDAP(DAPAccessIntf):
         TRACE.debug("[cmd:%d] _read_packet: reading", cmd.uid)
         try:
             raw_data = self._interface.read()
-            raw_data = bytearray(raw_data)
-            decoded_data = cmd.decode_data(raw_data)
+            self._process_response(cmd, raw_data)
         except Exception as exception:
             TRACE.debug("[cmd:%d] _read_packet: got exception %r; aborting all transfers!", cmd.uid, exception)
             self._abort_all_transfers(exception)
             raise
 
-        decoded_data = bytearray(decoded_data)
-        self._command_response_buf.extend(decoded_data)
+    def _process_response(self, cmd, raw_data):
+        """@brief Decode a command's response and attach the data to completed transfers.
 
-        # Attach data to transfers
+        Not locked, because this is also called from the response reader thread. Only the response
+        buffer and the head of the transfer list are touched, and these are never accessed by the
+        caller's thread while a response reader is active.
+
+        The decoded response data is passed to transfers as memoryview slices of the raw packet.
+        Data is only copied into the response buffer when a transfer spans more than one packet.
+        """
+        if not isinstance(raw_data, (bytes, bytearray)):
+            raw_data = bytes(raw_data)
+        decoded_data = cmd.decode_data(memoryview(raw_data))
+
+        if self._command_response_buf:
+            # Complete a transfer that was started by a previous packet.
+            self._command_response_buf += decoded_data
+            with memoryview(self._command_response_buf) as view:
+                pos = self._attach_response_data(view)
+            # Deleting from the start of a bytearray only adjusts its start offset.
+            del self._command_response_buf[:pos]
+        else:
+            pos = self._attach_response_data(decoded_data)
+            if pos < len(decoded_data):
+                self._command_response_buf += decoded_data[pos:]
+
+    def _attach_response_data(self, data):
+        """@brief Attach as many complete transfers as possible from the response data.
+        @return Number of bytes of data consumed.
+        """
         pos = 0
-        while True:
-            size_left = len(self._command_response_buf) - pos
-            if size_left == 0:
-                # If size left is 0 then the transfer list might
-                # be empty, so don't try to access element 0
-                break
+        size_left = len(data)
+        # If size left is 0 then the transfer list might
+        # be empty, so don't try to access element 0
+        while size_left:
             transfer = self._transfer_list[0]
             size = transfer.get_data_size()
             if size > size_left:
                 break
 
             self._transfer_list.popleft()
-            data = self._command_response_buf[pos:pos + size]
+            transfer.add_response(data[pos:pos + size])
             pos += size
-            transfer.add_response(data)
-
-        # Remove used data from _command_response_buf
-        if pos > 0:
-            self._command_response_buf = self._command_response_buf[pos:]
+            size_left -= size
+        return pos
 
     @locked
     def _send_packet(self):
@@ -1207,6 +1363,22 @@ class DAPAccessCMSISDAP(DAPAccessIntf):
         if cmd.get_empty():
             return
 
+        if self._response_reader is not None:
+            # Report an error from a previous command before sending any more.
+            if self._response_reader.error is not None:
+                self._check_response_reader()
+            TRACE.debug("[cmd:%d] _send_packet: submitting; outstanding=%d",
+                    cmd.uid, self._response_reader.outstanding)
+            data = cmd.encode_data()
+            try:
+                self._response_reader.submit(cmd, list(data))
+            except Exception as exception:
+                self._response_reader.wait_idle()
+                self._abort_all_transfers(exception)
+                raise
+            self._crnt_cmd = _Command(self._packet_size)
+            return
+
         max_packets = self._interface.get_packet_count()
         if len(self._commands_to_read) >= max_packets:
             TRACE.debug("[cmd:%d] _send_packet: reading packet; outstanding=%d >= max=%d",
@@ -1260,6 +1432,8 @@ class DAPAccessCMSISDAP(DAPAccessIntf):
             else:
                 data = transfer_data[trans_data_pos:trans_data_pos + size]
             cmd.add(size, transfer_request, data, dap_index)
+            if transfer is not None:
+                transfer.command_uid = cmd.uid
             size_to_transfer -= size
             trans_data_pos += size
 
@@ -1291,3 +1465,44 @@ class DAPAccessCMSISDAP(DAPAccessIntf):
         if isinstance(exception, DAPAccessIntf.TransferError):
             for _ in range(pending_reads):
                 self._interface.read()
+
+    def _start_response_reader(self):
+        """@brief Start the response reader thread if pipelined transfers are enabled."""
+        assert self._response_reader is None
+        if self._get_options().get('cmsis_dap.pipelined_transfers'):
+            LOG.debug("Using pipelined transfers with %d packets in flight", self._packet_count)
+            self._response_reader = _ResponseReader(self, self._interface, self._packet_count)
+
+    def _stop_response_reader(self):
+        """@brief Stop the response reader thread, if it is running."""
+        if self._response_reader is not None:
+            self._response_reader.wait_idle()
+            self._response_reader.stop()
+            self._response_reader = None
+
+    @locked
+    def _wait_for_transfer(self, transfer):
+        """@brief Wait for the response reader to complete a transfer.
+
+        The command containing the transfer is sent first if it is still being built. Other
+        commands remain in flight.
+        """
+        assert self._response_reader is not None
+        if not transfer.is_complete and transfer.command_uid == self._crnt_cmd.uid:
+            self._send_packet()
+        self._response_reader.wait_for(transfer)
+        if not transfer.is_complete:
+            self._check_response_reader()
+
+    @locked
+    def _check_response_reader(self):
+        """@brief Wait for all in-flight commands and raise any error reported by the reader thread."""
+        assert self._response_reader is not None
+        exception = self._response_reader.wait_idle()
+        if exception is not None:
+            TRACE.debug("response reader reported exception %r; aborting all transfers!", exception)
+            for transfer in self._transfer_list:
+                transfer.add_error(exception)
+            # The reader has already consumed the responses of all sent commands, so just clear buffers.
+            self._init_deferred_buffers()
+            raise exception
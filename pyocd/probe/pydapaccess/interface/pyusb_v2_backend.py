@@ -247,20 +247,24 @@ class PyUSBv2(Interface):
 
     def read_swo(self):
         # Accumulate all available SWO data.
-        data = bytearray()
         if not self.is_swo_running:
-            return data
-        elif self._swo_thread_did_exit:
-            raise DAPAccessIntf.DeviceError(f"Probe {self.serial_number} read thread exited unexpectedly") \
-                from self._read_thread_exception
+            return bytearray()
 
+        # Check for the thread exit before draining the queue, so that data received before the
+        # thread exited is returned before the error is raised.
+        did_exit = self._swo_thread_did_exit
+        chunks = []
         while True:
             try:
-                data += self.swo_data.get(block=False)
+                chunks.append(self.swo_data.get(block=False))
             except queue.Empty:
                 break
 
-        return data
+        if not chunks and did_exit:
+            raise DAPAccessIntf.DeviceError(f"Probe {self.serial_number} SWO read thread exited unexpectedly") \
+                from self._swo_thread_exception
+
+        return bytearray(b''.join(chunks))
 
     def close(self):
         """@brief Close the USB interface."""
@@ -0,0 +1,347 @@
+# pyOCD debugger
+# Copyright (c) 2026 pyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""@brief Scheduling of probe accesses from multiple probe server clients."""
+
+import collections
+import logging
+import threading
+from time import monotonic
+from typing import (Any, Callable, Deque, Dict, List, Optional, TYPE_CHECKING)
+
+from ..core import exceptions
+
+if TYPE_CHECKING:
+    from .debug_probe import DebugProbe
+
+LOG = logging.getLogger(__name__)
+
+class ClientStatistics:
+    """@brief Latency metrics for one client of a ProbeRequestScheduler.
+
+    The latency of a request is the time from when it was submitted to when it completed. It is
+    split into the wait time, while requests from other clients were served, and the service time
+    spent accessing the probe.
+    """
+
+    ## Number of recent latencies kept for percentiles.
+    LATENCY_HISTORY = 1024
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.request_count = 0
+        self.coalesced_count = 0
+        self.wait_time = 0.0
+        self.service_time = 0.0
+        self.max_latency = 0.0
+        self._latencies: Deque[float] = collections.deque(maxlen=self.LATENCY_HISTORY)
+
+    def record(self, wait: float, service: float, coalesced: bool) -> None:
+        latency = wait + service
+        self.request_count += 1
+        if coalesced:
+            self.coalesced_count += 1
+        self.wait_time += wait
+        self.service_time += service
+        self.max_latency = max(self.max_latency, latency)
+        self._latencies.append(latency)
+
+    @property
+    def mean_latency(self) -> float:
+        if not self.request_count:
+            return 0.0
+        return (self.wait_time + self.service_time) / self.request_count
+
+    def percentile_latency(self, percent: float) -> float:
+        """@brief Return a percentile of the recent latencies, in seconds."""
+        if not self._latencies:
+            return 0.0
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+    def summary(self) -> Dict[str, Any]:
+        """@brief Return the metrics as a dict. Times are in seconds."""
+        return {
+            'name': self.name,
+            'requests': self.request_count,
+            'coalesced': self.coalesced_count,
+            'wait_time': self.wait_time,
+            'service_time': self.service_time,
+            'mean_latency': self.mean_latency,
+            'p50_latency': self.percentile_latency(50),
+            'p99_latency': self.percentile_latency(99),
+            'max_latency': self.max_latency,
+            }
+
+    def __str__(self) -> str:
+        return (f"{self.name}: {self.request_count} requests ({self.coalesced_count} coalesced), latency "
+                f"mean {self.mean_latency * 1000:.2f} ms, p50 {self.percentile_latency(50) * 1000:.2f} ms, "
+                f"p99 {self.percentile_latency(99) * 1000:.2f} ms, max {self.max_latency * 1000:.2f} ms")
+
+class ScheduledClient:
+    """@brief A client registered with a ProbeRequestScheduler."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.statistics = ClientStatistics(name)
+        self._pending: Optional[_WorkItem] = None
+        self._lease_count = 0
+        self._lease_revoked = False
+
+class _WorkItem:
+    __slots__ = ('client', 'fn', 'is_read', 'submitted', 'done', 'result', 'exc')
+
+    def __init__(self, client: ScheduledClient, fn: Callable[[], Any], is_read: bool) -> None:
+        self.client = client
+        self.fn = fn
+        self.is_read = is_read
+        self.submitted = monotonic()
+        self.done = threading.Event()
+        self.result: Any = None
+        self.exc: Optional[BaseException] = None
+
+class ProbeRequestScheduler:
+    """@brief Serializes probe accesses from the clients of a probe server.
+
+    All probe accesses are performed on the scheduler's worker thread, with the probe locked. Each
+    client submits one request at a time and waits for it to complete. Clients with pending requests
+    are served in round-robin order, so a busy client can't starve the others.
+
+    A client takes a lock lease with acquire_lease() to make a sequence of requests atomic. While a
+    lease is held, only the holder's requests are performed. Each request from the holder renews the
+    lease. If the holder doesn't send a request for `lease_timeout` seconds while other clients are
+    waiting, or disconnects, the lease is revoked, and the holder's next request fails.
+
+    Reads submitted with perform_read() from different clients that are pending at the same time
+    are coalesced: they are issued to the probe together with `now=False`, so a probe that queues
+    transfers can perform them in a single transaction.
+    """
+
+    ## Default time in seconds that an idle lease is kept while other clients are waiting.
+    DEFAULT_LEASE_TIMEOUT = 10.0
+
+    def __init__(self, probe: "DebugProbe", lease_timeout: float = DEFAULT_LEASE_TIMEOUT) -> None:
+        self._probe = probe
+        self._lease_timeout = lease_timeout
+        self._clients: List[ScheduledClient] = []
+        self._next_index = 0
+        self._lease_holder: Optional[ScheduledClient] = None
+        self._lease_renewed = 0.0
+        self._cond = threading.Condition()
+        self._shutdown = False
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def statistics(self) -> List[ClientStatistics]:
+        """@brief Latency metrics for the connected clients."""
+        with self._cond:
+            return [client.statistics for client in self._clients]
+
+    def start(self, name: str = "probe scheduler") -> None:
+        """@brief Start the worker thread."""
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """@brief Stop the worker thread after the request being performed completes."""
+        with self._cond:
+            self._shutdown = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def add_client(self, name: str) -> ScheduledClient:
+        client = ScheduledClient(name)
+        with self._cond:
+            self._clients.append(client)
+        return client
+
+    def remove_client(self, client: ScheduledClient) -> None:
+        """@brief Unregister a client, revoking its lease if it holds one."""
+        with self._cond:
+            client._lease_revoked = False
+        try:
+            self.perform(client, lambda: self._end_lease(client))
+        finally:
+            with self._cond:
+                self._clients.remove(client)
+
+    def perform(self, client: ScheduledClient, fn: Callable, *args: Any) -> Any:
+        """@brief Call a function on the worker thread and return its result.
+
+        Any exception raised by the function is raised by this method.
+        """
+        return self._submit(_WorkItem(client, lambda: fn(*args), False))
+
+    def perform_read(self, client: ScheduledClient, deferred_fn: Callable[[], Callable[[], Any]]) -> Any:
+        """@brief Perform a read that can be coalesced with reads from other clients.
+
+        @param self
+        @param client The client submitting the read.
+        @param deferred_fn Function that starts the read with `now=False` and returns the callback
+            for its result.
+        @return The result of the read.
+        """
+        return self._submit(_WorkItem(client, deferred_fn, True))
+
+    def acquire_lease(self, client: ScheduledClient) -> None:
+        """@brief Take the lock lease. Must be called from a function performed by the scheduler.
+
+        Because only the holder's requests are performed while a lease is held, the lease is always
+        available to a request that is being performed.
+        """
+        assert self._lease_holder in (None, client)
+        if self._lease_holder is None:
+            self._probe.lock()
+            self._lease_holder = client
+        client._lease_count += 1
+
+    def release_lease(self, client: ScheduledClient) -> None:
+        """@brief Release the lock lease. Must be called from a function performed by the scheduler."""
+        if self._lease_holder is not client:
+            LOG.debug("%s released a lock lease it doesn't hold", client.name)
+            return
+        client._lease_count -= 1
+        if client._lease_count == 0:
+            self._end_lease(client)
+
+    def _end_lease(self, client: ScheduledClient) -> None:
+        if self._lease_holder is client:
+            self._lease_holder = None
+            client._lease_count = 0
+            self._probe.unlock()
+
+    def _submit(self, item: _WorkItem) -> Any:
+        with self._cond:
+            if self._shutdown:
+                raise exceptions.ProbeError("probe server is shutting down")
+            assert item.client._pending is None
+            item.client._pending = item
+            self._cond.notify()
+        item.done.wait()
+        if item.exc is not None:
+            raise item.exc
+        return item.result
+
+    def _select(self) -> List[_WorkItem]:
+        """@brief Choose the next work items to perform. Must be called with the condition locked."""
+        holder = self._lease_holder
+        if holder is not None:
+            if holder._pending is not None:
+                return [self._take(holder)]
+            if (any(c._pending is not None for c in self._clients)
+                    and (monotonic() - self._lease_renewed) >= self._lease_timeout):
+                LOG.warning("Revoking probe lock lease held by idle client %s", holder.name)
+                self._end_lease(holder)
+                holder._lease_revoked = True
+            else:
+                return []
+
+        # Round-robin through the clients, starting after the last one served.
+        count = len(self._clients)
+        for offset in range(count):
+            index = (self._next_index + offset) % count
+            client = self._clients[index]
+            if client._pending is None:
+                continue
+            self._next_index = index + 1
+            items = [self._take(client)]
+            if items[0].is_read:
+                items += [self._take(c) for c in self._clients
+                        if c._pending is not None and c._pending.is_read]
+            return items
+        return []
+
+    @staticmethod
+    def _take(client: ScheduledClient) -> _WorkItem:
+        item = client._pending
+        assert item is not None
+        client._pending = None
+        return item
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    if self._shutdown:
+                        self._fail_pending()
+                        return
+                    items = self._select()
+                    if items:
+                        break
+                    self._cond.wait(self._get_wait_time())
+            self._execute(items)
+
+    def _get_wait_time(self) -> Optional[float]:
+        """@brief Return how long the worker should wait for a request, or None to wait forever.
+
+        While a lease is held, the worker wakes up when the lease expires so it can be revoked if
+        other clients are waiting. An expired lease is only revoked when another request arrives,
+        which notifies the worker, so there is no need to wake up after expiry.
+        """
+        if self._lease_holder is None:
+            return None
+        remaining = self._lease_renewed + self._lease_timeout - monotonic()
+        return remaining if remaining > 0 else None
+
+    def _fail_pending(self) -> None:
+        for client in self._clients:
+            if client._pending is not None:
+                item = self._take(client)
+                item.exc = exceptions.ProbeError("probe server is shutting down")
+                item.done.set()
+        if self._lease_holder is not None:
+            self._end_lease(self._lease_holder)
+
+    def _execute(self, items: List[_WorkItem]) -> None:
+        start = monotonic()
+        self._probe.lock()
+        try:
+            if len(items) == 1 and not items[0].is_read:
+                self._call(items[0])
+            else:
+                # Start all reads, then collect the results.
+                callbacks = [(item, self._call(item)) for item in items]
+                for item, callback in callbacks:
+                    if callback is not None:
+                        try:
+                            item.result = callback()
+                        except Exception as err:
+                            item.exc = err
+        finally:
+            self._probe.unlock()
+        end = monotonic()
+
+        if self._lease_holder is items[0].client:
+            self._lease_renewed = end
+        for item in items:
+            item.client.statistics.record(start - item.submitted, end - start, len(items) > 1)
+            item.done.set()
+
+    def _call(self, item: _WorkItem) -> Any:
+        """@brief Call an item's function, storing the result or exception in the item."""
+        if item.client._lease_revoked:
+            item.client._lease_revoked = False
+            item.exc = exceptions.ProbeError(f"probe lock lease of {item.client.name} was revoked "
+                    f"after {self._lease_timeout:g} s without requests")
+            return None
+        try:
+            item.result = item.fn()
+            return item.result if item.is_read else None
+        except Exception as err:
+            item.exc = err
+            return None
@@ -15,10 +15,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import base64
+import collections
 import logging
 import json
+import struct
 import threading
-from typing import (Any, Optional, Tuple)
+from typing import (Any, Deque, Dict, List, Optional, Tuple)
 
 from .debug_probe import DebugProbe
 from ..core import exceptions
@@ -56,11 +59,30 @@ class TCPClientProbe(DebugProbe):
         ["result": <value>]
     }
     ````
+
+    A request may carry a block of bytes, its payload, such as data for a block memory write. Block
+    results, such as data from a block memory read, are returned the same way. With protocol version
+    3, the payload is sent as raw bytes directly after the line, and the request or response has a
+    `"binary": <int>` key giving the payload length. With version 2 the payload is sent as a base64
+    string argument or result, and with version 1 as an array of integers.
+
+    If the server supports protocol version 2, writes and reads with `now=False` are not sent right
+    away. They are queued and sent as a single batch line when a result is needed, when flush() or
+    another request is called, or when the queue reaches MAX_BATCH_SIZE requests. Full batches are
+    sent without waiting for the responses to earlier batches, up to MAX_PENDING_BATCHES. Like with
+    local probes, an error from a queued write is raised by the next request that waits for a
+    response. Version 1 servers are used with one round trip per request.
     """
 
     DEFAULT_PORT = 5555
 
-    PROTOCOL_VERSION = 1
+    PROTOCOL_VERSION = 3
+
+    ## Number of queued requests at which a batch is sent.
+    MAX_BATCH_SIZE = 256
+
+    ## Number of batches sent before waiting for responses.
+    MAX_PENDING_BATCHES = 4
 
     class StatusCode:
         """@brief Constants for errors reported from the server."""
@@ -111,6 +133,14 @@ class TCPClientProbe(DebugProbe):
         self._request_id = 0
         self._lock_count = 0
         self._lock_count_lock = threading.RLock()
+        self._protocol_version = 1
+        # Requests waiting to be sent, with the holder for the response or None to discard it, and
+        # the binary payload.
+        self._queue: List[Tuple[Dict[str, Any], Optional[_Response], Optional[bytes]]] = []
+        # Request names and holders for batches sent to the server whose responses haven't been read.
+        self._pending: Deque[List[Tuple[str, Optional[_Response]]]] = collections.deque()
+        # First error returned for a queued request whose response was discarded.
+        self._deferred_error: Optional[BaseException] = None
 
     @property
     def vendor_name(self):
@@ -147,58 +177,189 @@ class TCPClientProbe(DebugProbe):
         self._request_id += 1
         return rid
 
-    def _perform_request_without_raise(self, request: str, *args: Any) -> Tuple[Any, Optional[BaseException]]:
+    def _build_request(self, request: str, args: Tuple[Any, ...], payload: Optional[bytes]) \
+            -> Tuple[Dict[str, Any], Optional[bytes]]:
+        """@brief Create a request dict.
+        @return Pair of the request dict and the payload to send after it in binary form, if any.
+        """
+        rq: Dict[str, Any] = {
+                "id": self.request_id,
+                "request": request,
+            }
+        if payload is not None:
+            if self._protocol_version >= 3:
+                rq["binary"] = len(payload)
+            else:
+                args = args + (self._encode_data(payload),)
+                payload = None
+        if len(args):
+            rq["arguments"] = args
+        return rq, payload
+
+    def _decode_response(self, request: str, decoded_response: Any) -> Tuple[Any, Optional[BaseException]]:
+        """@brief Extract the result and error from a response dict."""
+        # Check for required keys.
+        if (not isinstance(decoded_response, dict)
+                or ('id' not in decoded_response) or ('status' not in decoded_response)):
+            raise exceptions.ProbeError("malformed response from server; missing required field")
+
+        # Check response status.
+        exc = None
+        status = decoded_response['status']
+        if status != 0:
+            # Get the error message.
+            error = decoded_response.get('error', "(missing error message key)")
+            LOG.debug("error received from server for command %s (status code %i): %s",
+                    request, status, error)
+
+            # Create an appropriate local exception based on the status code.
+            exc = self.STATUS_CODE_CLASS_MAP.get(status, exceptions.ProbeError)(
+                    "error received from server for command %s (status code %i): %s"
+                    % (request, status, error))
+
+        # Get response value. If not present then there was no return value from the command
+        result = decoded_response.get('result', None)
+
+        # Read a binary result that follows the response line.
+        if 'binary' in decoded_response:
+            result = self._socket.read_exact(decoded_response['binary'])
+            TRACE.debug("binary result: %i bytes", len(result))
+
+        return result, exc
+
+    def _read_response_line(self) -> Any:
+        response_data = self._socket.readline().decode('utf-8').strip()
+        decoded_response = json.loads(response_data)
+        TRACE.debug("decoded_response = %s", decoded_response)
+        return decoded_response
+
+    def _send_line(self, request_value: Any, payloads: List[bytes]) -> None:
+        """@brief Send a request or batch line followed by any binary payloads."""
+        formatted_request = json.dumps(request_value)
+        TRACE.debug("Request: %s", formatted_request)
+        self._socket.write(b"".join([formatted_request.encode('utf-8'), b"\n"] + payloads))
+
+    def _send_batch(self) -> None:
+        """@brief Send the queued requests as a batch without waiting for the response."""
+        if not self._queue:
+            return
+        self._send_line([rq for rq, _, _ in self._queue],
+                [payload for _, _, payload in self._queue if payload is not None])
+        self._pending.append([(rq['request'], holder) for rq, holder, _ in self._queue])
+        self._queue = []
+
+    def _receive_batch(self) -> None:
+        """@brief Read the response to the oldest batch that was sent."""
+        holders = self._pending.popleft()
+        decoded_response = self._read_response_line()
+        if not isinstance(decoded_response, list) or len(decoded_response) != len(holders):
+            raise exceptions.ProbeError("malformed batch response from server")
+        # Binary results follow the line in the order of the responses, so every response is
+        # decoded before any error can be raised.
+        for (request, holder), response_dict in zip(holders, decoded_response):
+            result, exc = self._decode_response(request, response_dict)
+            if holder is not None:
+                holder.result = result
+                holder.exc = exc
+                holder.done = True
+            elif exc is not None and self._deferred_error is None:
+                self._deferred_error = exc
+
+    def _complete_requests(self) -> None:
+        """@brief Send any queued requests and wait for the responses to all sent batches."""
+        self._send_batch()
+        while self._pending:
+            self._receive_batch()
+
+    def _take_deferred_error(self) -> Optional[BaseException]:
+        exc = self._deferred_error
+        self._deferred_error = None
+        return exc
+
+    def _queue_request(self, request: str, args: Tuple[Any, ...], want_response: bool,
+            payload: Optional[bytes] = None) -> Optional["_Response"]:
+        """@brief Add a request to the queue, sending the queue if it is full.
+
+        Must only be called when using protocol version 2 or later, with the local lock held.
+        @return A _Response holder if _want_response_ is True, else None.
+        """
+        holder = _Response() if want_response else None
+        rq, payload = self._build_request(request, args, payload)
+        self._queue.append((rq, holder, payload))
+        if len(self._queue) >= self.MAX_BATCH_SIZE:
+            self._send_batch()
+            if len(self._pending) > self.MAX_PENDING_BATCHES:
+                self._receive_batch()
+        return holder
+
+    def _perform_deferrable(self, request: str, *args: Any, payload: Optional[bytes] = None) -> None:
+        """@brief Queue a request whose response is not needed, if supported, else perform it."""
+        with self._lock:
+            if self._protocol_version >= 2:
+                self._queue_request(request, args, want_response=False, payload=payload)
+                return
+        self._perform_request(request, *args, payload=payload)
+
+    def _perform_read(self, request: str, now: bool, *args: Any) -> Any:
+        """@brief Perform a read request that may be deferred.
+        @return The result if _now_ is True, otherwise a callable that returns the result.
+        """
+        if now or self._protocol_version < 2:
+            result, exc = self._perform_request_without_raise(request, *args)
+
+            def read_cb():
+                # Raise any exception here so the traceback includes the actual caller.
+                if exc is not None:
+                    raise exc
+                return result
+        else:
+            with self._lock:
+                holder = self._queue_request(request, args, want_response=True)
+            assert holder is not None
+
+            def read_cb():
+                with self._lock:
+                    if not holder.done:
+                        self._complete_requests()
+                    exc = self._take_deferred_error() or holder.exc
+                # Raise any exception here so the traceback includes the actual caller.
+                if exc is not None:
+                    raise exc
+                return holder.result
+
+        return read_cb() if now else read_cb
+
+    def _perform_request_without_raise(self, request: str, *args: Any, payload: Optional[bytes] = None) \
+            -> Tuple[Any, Optional[BaseException]]:
         """Execute a request-reply transaction with the server.
 
         The return value is a 2-tuple consisting of the optional result from the request and an optional
         exception object. The latter is only non-None if the request failed and a non-zero status code was
-        returned.
+        returned, or if a queued request failed.
+
+        If _payload_ is provided, it is sent as the request's final argument, in binary form if the
+        protocol version supports it.
         """
         # Protect requests with the local lock.
         with self._lock:
-            rq = {
-                    "id": self.request_id,
-                    "request": request,
-                }
-            if len(args):
-                rq["arguments"] = args
-            formatted_request = json.dumps(rq)
-            TRACE.debug("Request: %s", formatted_request)
+            # Send the request with any queued requests.
+            if self._queue or self._pending:
+                holder = self._queue_request(request, args, want_response=True, payload=payload)
+                assert holder is not None
+                self._complete_requests()
+                return holder.result, self._take_deferred_error() or holder.exc
 
             # Send request to server.
-            self._socket.write(formatted_request.encode('utf-8') + b"\n")
+            rq, payload = self._build_request(request, args, payload)
+            self._send_line(rq, [payload] if payload is not None else [])
 
             # Read response.
-            response_data = self._socket.readline().decode('utf-8').strip()
-            decoded_response = json.loads(response_data)
-            TRACE.debug("decoded_response = %s", decoded_response)
-
-            # Check for required keys.
-            if ('id' not in decoded_response) or ('status' not in decoded_response):
-                raise exceptions.ProbeError("malformed response from server; missing required field")
-
-            # Check response status.
-            exc = None
-            status = decoded_response['status']
-            if status != 0:
-                # Get the error message.
-                error = decoded_response.get('error', "(missing error message key)")
-                LOG.debug("error received from server for command %s (status code %i): %s",
-                        request, status, error)
-
-                # Create an appropriate local exception based on the status code.
-                exc = self.STATUS_CODE_CLASS_MAP.get(status, exceptions.ProbeError)(
-                        "error received from server for command %s (status code %i): %s"
-                        % (request, status, error))
-
-            # Get response value. If not present then there was no return value from the command
-            result = decoded_response.get('result', None)
-
-            return result, exc
-
-    def _perform_request(self, request: str, *args: Any) -> Any:
+            result, exc = self._decode_response(request, self._read_response_line())
+            return result, self._take_deferred_error() or exc
+
+    def _perform_request(self, request: str, *args: Any, payload: Optional[bytes] = None) -> Any:
         """@brief Perform the request and immediately raise any errors."""
-        result, exc = self._perform_request_without_raise(request, *args)
+        result, exc = self._perform_request_without_raise(request, *args, payload=payload)
         if exc is not None:
             raise exc
         return result
@@ -223,8 +384,17 @@ class TCPClientProbe(DebugProbe):
             self._is_open = True
             self._socket.set_timeout(0.1)
 
-        # Send hello message.
-        self._perform_request('hello', self.PROTOCOL_VERSION)
+        # Send hello message to negotiate the protocol version. Servers that only support version 1
+        # return an error for any other version.
+        try:
+            version = self._perform_request('hello', self.PROTOCOL_VERSION)
+        except exceptions.ProbeDisconnected:
+            raise
+        except exceptions.Error as err:
+            LOG.debug("server rejected protocol version %i (%s); using version 1", self.PROTOCOL_VERSION, err)
+            version = self._perform_request('hello', 1)
+        self._protocol_version = version if isinstance(version, int) else 1
+        LOG.debug("using remote probe protocol version %i", self._protocol_version)
 
         self._perform_request('open')
 
@@ -233,12 +403,14 @@ class TCPClientProbe(DebugProbe):
             self._perform_request('close')
             self._socket.close()
             self._is_open = False
+            self._protocol_version = 1
 
     def lock(self):
-        # The lock count is then used to only send the remote lock request once.
+        # The lock count is then used to only send the remote lock request once. The server performs
+        # a client's requests in order, so the lock request can be queued with the requests it guards.
         with self._lock_count_lock:
             if self._lock_count == 0:
-                self._perform_request('lock')
+                self._perform_deferrable('lock')
             self._lock_count += 1
 
     def unlock(self):
@@ -290,46 +462,22 @@ class TCPClientProbe(DebugProbe):
     ##@{
 
     def read_dp(self, addr, now=True):
-        result, exc = self._perform_request_without_raise('read_dp', addr)
-
-        def read_dp_cb():
-            # Raise any exception here so the traceback includes the actual caller.
-            if exc is not None:
-                raise exc
-            return result
-
-        return read_dp_cb() if now else read_dp_cb
+        return self._perform_read('read_dp', now, addr)
 
     def write_dp(self, addr, data):
-        self._perform_request('write_dp', addr, data)
+        self._perform_deferrable('write_dp', addr, data)
 
     def read_ap(self, addr, now=True):
-        result, exc = self._perform_request_without_raise('read_ap', addr)
-
-        def read_ap_cb():
-            # Raise any exception here so the traceback includes the actual caller.
-            if exc is not None:
-                raise exc
-            return result
-
-        return read_ap_cb() if now else read_ap_cb
+        return self._perform_read('read_ap', now, addr)
 
     def write_ap(self, addr, data):
-        self._perform_request('write_ap', addr, data)
+        self._perform_deferrable('write_ap', addr, data)
 
     def read_ap_multiple(self, addr, count=1, now=True):
-        results, exc = self._perform_request_without_raise('read_ap_multiple', addr, count)
-
-        def read_ap_multiple_cb():
-            # Raise any exception here so the traceback includes the actual caller.
-            if exc is not None:
-                raise exc
-            return results
-
-        return read_ap_multiple_cb() if now else read_ap_multiple_cb
+        return self._perform_read('read_ap_multiple', now, addr, count)
 
     def write_ap_multiple(self, addr, values):
-        self._perform_request('write_ap_multiple', addr, values)
+        self._perform_deferrable('write_ap_multiple', addr, list(values))
 
     def get_memory_interface_for_ap(self, ap_address):
         handle = self._perform_request('get_memory_interface_for_ap',
@@ -353,10 +501,39 @@ class TCPClientProbe(DebugProbe):
         self._perform_request('swo_stop')
 
     def swo_read(self):
-        return self._perform_request('swo_read')
+        return self._decode_data(self._perform_request('swo_read'))
 
     ##@}
 
+    @staticmethod
+    def _encode_data(data: bytes) -> str:
+        """@brief Encode a payload as a string argument for protocol version 2."""
+        return base64.b64encode(data).decode('ascii')
+
+    @staticmethod
+    def _decode_data(data: Any) -> bytes:
+        """@brief Convert a block result to bytes.
+
+        The result is bytes if it was received in binary form, a base64 string for protocol version
+        2, or a list of byte values for version 1.
+        """
+        if isinstance(data, bytes):
+            return data
+        elif isinstance(data, str):
+            return base64.b64decode(data)
+        else:
+            return bytes(data)
+
+class _Response:
+    """@brief Holder for the response to a queued request."""
+
+    __slots__ = ('result', 'exc', 'done')
+
+    def __init__(self) -> None:
+        self.result: Any = None
+        self.exc: Optional[BaseException] = None
+        self.done = False
+
 class RemoteMemoryInterface(MemoryInterface):
     """@brief Local proxy for a remote memory interface."""
 
@@ -366,30 +543,38 @@ class RemoteMemoryInterface(MemoryInterface):
 
     def write_memory(self, addr, data, transfer_size=32, **attrs):
         assert transfer_size in (8, 16, 32)
-        self._remote_probe._perform_request('write_mem', self._handle, addr, data, transfer_size)
+        self._remote_probe._perform_deferrable('write_mem', self._handle, addr, data, transfer_size)
 
     def read_memory(self, addr, transfer_size=32, now=True, **attrs):
         assert transfer_size in (8, 16, 32)
-        result, exc = self._remote_probe._perform_request_without_raise('read_mem', self._handle, addr, transfer_size)
-
-        def read_callback():
-            # Raise any exception here so the traceback includes the actual caller.
-            if exc is not None:
-                raise exc
-            return result
-        return read_callback() if now else read_callback
+        return self._remote_probe._perform_read('read_mem', now, self._handle, addr, transfer_size)
 
     def write_memory_block32(self, addr, data, **attrs):
-        self._remote_probe._perform_request('write_block32', self._handle, addr, data)
+        probe = self._remote_probe
+        if probe._protocol_version >= 2:
+            probe._perform_deferrable('write_block32', self._handle, addr,
+                    payload=struct.pack(f"<{len(data)}I", *data))
+        else:
+            probe._perform_deferrable('write_block32', self._handle, addr, list(data))
 
     def read_memory_block32(self, addr, size, **attrs):
-        return self._remote_probe._perform_request('read_block32', self._handle, addr, size)
+        probe = self._remote_probe
+        result = probe._perform_request('read_block32', self._handle, addr, size)
+        if probe._protocol_version >= 2:
+            data = probe._decode_data(result)
+            return list(struct.unpack(f"<{len(data) // 4}I", data))
+        return result
 
     def write_memory_block8(self, addr, data, **attrs):
-        self._remote_probe._perform_request('write_block8', self._handle, addr, data)
+        probe = self._remote_probe
+        if probe._protocol_version >= 2:
+            probe._perform_deferrable('write_block8', self._handle, addr, payload=bytes(data))
+        else:
+            probe._perform_deferrable('write_block8', self._handle, addr, list(data))
 
     def read_memory_block8(self, addr, size, **attrs):
-        return self._remote_probe._perform_request('read_block8', self._handle, addr, size)
+        probe = self._remote_probe
+        return list(probe._decode_data(probe._perform_request('read_block8', self._handle, addr, size)))
 
 class TCPClientProbePlugin(Plugin):
     """@brief Plugin class for TCPClientProbePlugin."""
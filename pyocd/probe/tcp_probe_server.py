@@ -15,15 +15,18 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import base64
 import logging
 import threading
 import json
 import socket
 from socketserver import (ThreadingTCPServer, StreamRequestHandler)
+import struct
 from time import sleep
-from typing import (Callable, Dict, Optional, TYPE_CHECKING, Tuple, cast)
+from typing import (Any, Callable, Dict, List, Optional, Sequence, TYPE_CHECKING, Tuple, cast)
 
 from .shared_probe_proxy import SharedDebugProbeProxy
+from .request_scheduler import (ClientStatistics, ProbeRequestScheduler)
 from ..core import exceptions
 from .debug_probe import DebugProbe
 from ..coresight.ap import (APVersion, APv1Address, APv2Address)
@@ -42,6 +45,9 @@ class DebugProbeServer(threading.Thread):
 
     When the start() method is called, a new daemon thread is created to run the server. The server
     can be terminated by calling the stop() method, which will also kill the server thread.
+
+    Any number of clients can connect at once. Their probe accesses are arbitrated by a
+    @ref pyocd.probe.request_scheduler.ProbeRequestScheduler "ProbeRequestScheduler".
     """
 
     def __init__(
@@ -98,7 +104,8 @@ class DebugProbeServer(threading.Thread):
         address = (host, self._port)
 
         # Create the server and bind to the address, but don't start running yet.
-        self._server = TCPProbeServer(address, session, cast(DebugProbe, self._proxy))
+        self._server = TCPProbeServer(address, session, cast(DebugProbe, self._proxy),
+                session.options.get('probeserver.lock_lease_timeout'))
         self._server.server_bind()
 
     def start(self) -> None:
@@ -107,6 +114,7 @@ class DebugProbeServer(threading.Thread):
         Returns once the server thread has begun executing.
         """
         self._server.server_activate()
+        self._server.scheduler.start("debug probe %s scheduler" % self._probe.unique_id)
         super().start()
         while not self._did_start:
             sleep(0.005)
@@ -119,12 +127,18 @@ class DebugProbeServer(threading.Thread):
         """
         self._server.shutdown()
         self.join()
+        self._server.scheduler.stop()
 
     @property
     def is_running(self) -> bool:
         """@brief Whether the server thread is running."""
         return self._is_running
 
+    @property
+    def client_statistics(self) -> Sequence[ClientStatistics]:
+        """@brief Request latency metrics for each connected client."""
+        return self._server.scheduler.statistics
+
     @property
     def port(self) -> int:
         """@brief The server's port.
@@ -136,30 +150,38 @@ class DebugProbeServer(threading.Thread):
 
     def run(self) -> None:
         """@brief The server thread implementation."""
-        self._did_start = True
-        self._is_running = True
-
-        # Read back the actual port if 0 was specified.
+        # Read back the actual port if 0 was specified. This is done before setting _did_start so
+        # the port is valid when start() returns.
         if self._port == 0:
             self._port = self._server.socket.getsockname()[1]
 
+        self._did_start = True
+        self._is_running = True
+
         LOG.info("Serving debug probe %s (%s) on port %i",
                 self._probe.description, self._probe.unique_id, self._port)
         self._server.serve_forever()
         self._is_running = False
 
 class TCPProbeServer(ThreadingTCPServer):
-    """@brief TCP server subclass that carries the session and probe being served."""
+    """@brief TCP server subclass that carries the session, probe, and scheduler being served."""
 
     # Change the default SO_REUSEADDR setting.
     allow_reuse_address = True
 
-    def __init__(self, server_address: Tuple[str, int], session: "Session", probe: DebugProbe):
+    def __init__(self, server_address: Tuple[str, int], session: "Session", probe: DebugProbe,
+            lease_timeout: Optional[float] = None):
         self._session = session
         self._probe = probe
+        self._scheduler = ProbeRequestScheduler(probe,
+                lease_timeout if lease_timeout is not None else ProbeRequestScheduler.DEFAULT_LEASE_TIMEOUT)
         super().__init__(server_address, DebugProbeRequestHandler,
             bind_and_activate=False)
 
+    @property
+    def scheduler(self) -> ProbeRequestScheduler:
+        return self._scheduler
+
     @property
     def session(self) -> "Session":
         return self._session
@@ -195,10 +217,26 @@ class DebugProbeRequestHandler(StreamRequestHandler):
       ["response": <value>]
     }
     ````
+
+    The protocol version used by a connection is negotiated by the `hello` request, which returns the
+    highest version supported by both sides. Version 2 adds these features:
+
+    - A line may hold a JSON array of requests, called a batch, which is answered with one line
+        holding a JSON array of the responses in the same order. The batch is performed without
+        interruption by other clients, and reads in it are queued on the probe and resolved at the
+        end, so a probe that can batch transfers performs them together. If a request fails, the requests after it
+        in the batch are not performed and return the same status.
+    - Block and SWO data is sent as a base64 string of the little endian bytes instead of an array
+        of integers.
+
+    Version 3 sends block and SWO data as a binary payload. A request or response with a payload has
+    a `"binary": <int>` key giving the payload's length in bytes, and the payload follows directly
+    after the line. For a request, the payload is passed to the handler as the last argument. The
+    payloads of a batch follow the batch line in the order of the requests or responses.
     """
 
     ## Current version of the remote probe protocol.
-    PROTOCOL_VERSION = 1
+    PROTOCOL_VERSION = 3
 
     class StatusCode:
         """@brief Constants for errors reported from the server."""
@@ -217,9 +255,11 @@ class DebugProbeRequestHandler(StreamRequestHandler):
         except socket.herror:
             self._client_domain = self.client_address[0]
 
-        # Get the session and probe we're serving from the server.
+        # Get the session, probe, and scheduler we're serving from the server.
         self._session = cast(TCPProbeServer, self.server).session
         self._probe = cast(TCPProbeServer, self.server).probe
+        self._scheduler = cast(TCPProbeServer, self.server).scheduler
+        self._client = self._scheduler.add_client(f"{self._client_domain}:{self.client_address[1]}")
 
         LOG.info("Client %s (port %i) connected to probe %s",
                 self._client_domain, self.client_address[1], self._probe.unique_id)
@@ -229,6 +269,9 @@ class DebugProbeRequestHandler(StreamRequestHandler):
         if self._probe.session is None:
             self._probe.session = self._session
 
+        # Protocol version negotiated by the 'hello' request.
+        self._protocol_version: int = 1
+
         # Dict to store handles for AP memory interfaces.
         self._next_ap_memif_handle: int = 0
         self._ap_memif_handles: Dict[int, "MemoryInterface"] = {}
@@ -240,8 +283,8 @@ class DebugProbeRequestHandler(StreamRequestHandler):
                 'readprop':             (self._request__read_property,      1   ),
                 'open':                 (self._probe.open,                  0   ), # 'open'
                 'close':                (self._probe.close,                 0   ), # 'close'
-                'lock':                 (self._probe.lock,                  0   ), # 'lock'
-                'unlock':               (self._probe.unlock,                0   ), # 'unlock'
+                'lock':                 (self._request__lock,               0   ), # 'lock'
+                'unlock':               (self._request__unlock,             0   ), # 'unlock'
                 'connect':              (self._request__connect,            1   ), # 'connect', protocol:str
                 'disconnect':           (self._probe.disconnect,            0   ), # 'disconnect'
                 'swj_sequence':         (self._probe.swj_sequence,          2   ), # 'swj_sequence', length:int, bits:int
@@ -270,6 +313,15 @@ class DebugProbeRequestHandler(StreamRequestHandler):
                 'write_block8':         (self._request__write_block8,       3   ), # 'write_block8', handle:int, addr:int, data:List[int]
             }
 
+        # Reads that are queued on the probe, when in a batch or coalesced with other clients' reads,
+        # mapped to a handler that returns a callback for the result.
+        self._DEFERRED_REQUEST_HANDLERS: Dict[str, Callable] = {
+                'read_dp':              lambda addr: self._probe.read_dp(addr, now=False),
+                'read_ap':              lambda addr: self._probe.read_ap(addr, now=False),
+                'read_ap_multiple':     lambda addr, count: self._probe.read_ap_multiple(addr, count, now=False),
+                'read_mem':             self._request__read_mem_deferred,
+            }
+
         # Let superclass do its thing.
         super().setup()
 
@@ -279,34 +331,85 @@ class DebugProbeRequestHandler(StreamRequestHandler):
 
         # Flush the probe and ignore any lingering errors.
         try:
-            self._probe.flush()
+            self._scheduler.perform(self._client, self._probe.flush)
         except exceptions.Error as err:
             LOG.debug("exception while flushing probe on disconnect: %s", err)
 
+        # Release the client's lock lease, if it still holds one.
+        try:
+            self._scheduler.remove_client(self._client)
+        except exceptions.Error as err:
+            LOG.debug("exception while removing client from scheduler: %s", err)
+        LOG.info("Client %s", self._client.statistics)
+
         super().finish()
 
-    def _send_error_response(self, status=1, message=""):
-        response_dict = {
-                "id": self._current_request_id,
+    @staticmethod
+    def _error_response_dict(request_id, status=1, message=""):
+        return {
+                "id": request_id,
                 "status": status,
                 "error": message,
             }
-        response = json.dumps(response_dict)
-        TRACE.debug("response: %s", response)
-        response_encoded = response.encode('utf-8')
-        self.wfile.write(response_encoded + b"\n")
 
-    def _send_response(self, result):
+    @staticmethod
+    def _response_dict(request_id, result):
         response_dict = {
-                "id": self._current_request_id,
+                "id": request_id,
                 "status": 0,
             }
         if result is not None:
             response_dict["result"] = result
-        response = json.dumps(response_dict)
+        return response_dict
+
+    def _encode_result(self, response_dict, payloads):
+        """@brief Convert a bytes result to a form that can be sent.
+
+        With protocol version 3 the result is moved to the payloads list, otherwise it's encoded
+        as a base64 string.
+        """
+        result = response_dict.get("result")
+        if isinstance(result, (bytes, bytearray)):
+            if self._protocol_version >= 3:
+                del response_dict["result"]
+                response_dict["binary"] = len(result)
+                payloads.append(result)
+            else:
+                response_dict["result"] = base64.b64encode(result).decode('ascii')
+
+    def _send(self, response_value):
+        payloads: List[bytes] = []
+        if isinstance(response_value, list):
+            for response_dict in response_value:
+                self._encode_result(response_dict, payloads)
+        else:
+            self._encode_result(response_value, payloads)
+        response = json.dumps(response_value)
         TRACE.debug("response: %s", response)
         response_encoded = response.encode('utf-8')
-        self.wfile.write(response_encoded + b"\n")
+        self.wfile.write(b"".join([response_encoded, b"\n"] + payloads))
+
+    def _read_payload(self, request_dict):
+        """@brief Read the binary payload of a request, if it has one, and add it to the arguments."""
+        if not isinstance(request_dict, dict) or 'binary' not in request_dict:
+            return
+        length = request_dict['binary']
+        if not isinstance(length, int) or length < 0:
+            # The rest of the stream can't be parsed, so give up on the connection.
+            raise ValueError("invalid binary payload length")
+        payload = self.rfile.read(length)
+        if len(payload) < length:
+            raise EOFError("connection closed while reading binary payload")
+        TRACE.debug("binary payload: %i bytes", length)
+        args = request_dict.get('arguments', [])
+        if isinstance(args, list):
+            request_dict['arguments'] = args + [payload]
+
+    def _send_error_response(self, status=1, message=""):
+        self._send(self._error_response_dict(self._current_request_id, status, message))
+
+    def _send_response(self, result):
+        self._send(self._response_dict(self._current_request_id, result))
 
     def handle(self):
         # Process requests until the connection is closed.
@@ -330,6 +433,14 @@ class DebugProbeRequestHandler(StreamRequestHandler):
                     self._send_error_response(message="invalid request format")
                     continue
 
+                if isinstance(request_dict, list) and self._protocol_version >= 2:
+                    for item in request_dict:
+                        self._read_payload(item)
+                    self._handle_batch(request_dict)
+                    continue
+
+                self._read_payload(request_dict)
+
                 if not isinstance(request_dict, dict):
                     self._send_error_response(message="invalid request format")
                     continue
@@ -356,7 +467,11 @@ class DebugProbeRequestHandler(StreamRequestHandler):
                     continue
                 handler, arg_count = self._REQUEST_HANDLERS[request_type]
                 self._check_args(request_args, arg_count)
-                result = handler(*request_args)
+                if request_type in self._DEFERRED_REQUEST_HANDLERS:
+                    deferred_handler = self._DEFERRED_REQUEST_HANDLERS[request_type]
+                    result = self._scheduler.perform_read(self._client, lambda: deferred_handler(*request_args))
+                else:
+                    result = self._scheduler.perform(self._client, handler, *request_args)
 
                 # Send a success response.
                 self._send_response(result)
@@ -377,6 +492,82 @@ class DebugProbeRequestHandler(StreamRequestHandler):
                 if not isinstance(err, exceptions.Error):
                     raise
 
+    def _handle_batch(self, requests: List[Any]) -> None:
+        """@brief Perform a batch of requests and send the array of responses."""
+        TRACE.debug("batch of %i requests", len(requests))
+        responses, reraise = self._scheduler.perform(self._client, self._perform_batch, requests)
+        self._send(responses)
+        if reraise is not None:
+            raise reraise
+
+    def _perform_batch(self, requests: List[Any]) -> Tuple[List[Dict[str, Any]], Optional[Exception]]:
+        """@brief Perform a batch of requests on the scheduler's thread.
+        @return Pair of the list of response dicts and an optional non-pyOCD exception to reraise.
+        """
+        responses: List[Dict[str, Any]] = []
+        # Pairs of response dict index and callback for deferred reads.
+        deferred: List[Tuple[int, Callable]] = []
+        failure: Optional[Tuple[int, str]] = None
+        reraise: Optional[Exception] = None
+
+        def perform(request_dict: Any) -> None:
+            nonlocal failure, reraise
+            request_id = request_dict.get('id', -1) if isinstance(request_dict, dict) else -1
+            request_type = "<missing>"
+            if failure is not None:
+                responses.append(self._error_response_dict(request_id, failure[0],
+                        "not performed because of an earlier error in the batch: " + failure[1]))
+                return
+            try:
+                if not isinstance(request_dict, dict) or 'request' not in request_dict:
+                    raise exceptions.Error("invalid request format")
+                request_type = request_dict['request']
+                request_args = request_dict.get('arguments', [])
+                if not isinstance(request_args, list):
+                    raise exceptions.Error("invalid request arguments format")
+
+                if request_type in self._DEFERRED_REQUEST_HANDLERS:
+                    handler = self._DEFERRED_REQUEST_HANDLERS[request_type]
+                    self._check_args(request_args, self._REQUEST_HANDLERS[request_type][1])
+                    deferred.append((len(responses), handler(*request_args)))
+                    responses.append(self._response_dict(request_id, None))
+                elif request_type in self._REQUEST_HANDLERS:
+                    handler, arg_count = self._REQUEST_HANDLERS[request_type]
+                    self._check_args(request_args, arg_count)
+                    responses.append(self._response_dict(request_id, handler(*request_args)))
+                else:
+                    raise exceptions.Error("unknown request type")
+            except Exception as err:
+                LOG.error("Error processing '%s' request (ID %i, client %s, probe %s): %s",
+                        request_type, request_id, self._client_domain, self._probe.unique_id, err,
+                        exc_info=self._session.log_tracebacks)
+                status = self._get_exception_status_code(err)
+                responses.append(self._error_response_dict(request_id, status, str(err)))
+                failure = (status, str(err))
+                if not isinstance(err, exceptions.Error) and reraise is None:
+                    reraise = err
+
+        for request_dict in requests:
+            perform(request_dict)
+
+        # Resolve the deferred reads in order.
+        for index, callback in deferred:
+            response_dict = responses[index]
+            try:
+                result = callback()
+                if result is not None:
+                    response_dict["result"] = result
+            except Exception as err:
+                LOG.error("Error processing deferred read (ID %i, client %s, probe %s): %s",
+                        response_dict["id"], self._client_domain, self._probe.unique_id, err,
+                        exc_info=self._session.log_tracebacks)
+                responses[index] = self._error_response_dict(response_dict["id"],
+                        self._get_exception_status_code(err), str(err))
+                if not isinstance(err, exceptions.Error) and reraise is None:
+                    reraise = err
+
+        return responses, reraise
+
     def _get_exception_status_code(self, err):
         """@brief Convert an exception class into a status code."""
         # Must test the exception class in order of specific to general.
@@ -398,10 +589,39 @@ class DebugProbeRequestHandler(StreamRequestHandler):
             raise exceptions.Error("malformed request; invalid number of arguments")
 
     def _request__hello(self, version):
-        # 'hello', protocol-version:int
-        if version != self.PROTOCOL_VERSION:
-            raise exceptions.Error("client requested unsupported protocol version %i (expected %i)" %
+        # 'hello', protocol-version:int -> negotiated-version:int
+        if not isinstance(version, int) or version < 1:
+            raise exceptions.Error("client requested unsupported protocol version %s (expected 1 to %i)" %
                     (version, self.PROTOCOL_VERSION))
+        self._protocol_version = min(version, self.PROTOCOL_VERSION)
+        LOG.debug("client %s using protocol version %i", self._client_domain, self._protocol_version)
+        return self._protocol_version
+
+    def _decode_data(self, data):
+        """@brief Convert a block argument to bytes.
+
+        The argument is bytes if it was received as a binary payload, a base64 string for protocol
+        version 2, or a list of byte values for version 1.
+        """
+        if isinstance(data, (bytes, bytearray)):
+            return data
+        elif isinstance(data, str):
+            return base64.b64decode(data)
+        else:
+            return bytes(data)
+
+    def _get_memif(self, handle):
+        if handle not in self._ap_memif_handles:
+            raise exceptions.Error("invalid handle received from remote memory access")
+        return self._ap_memif_handles[handle]
+
+    def _request__lock(self):
+        # 'lock'
+        self._scheduler.acquire_lease(self._client)
+
+    def _request__unlock(self):
+        # 'unlock'
+        self._scheduler.release_lease(self._client)
 
     def _request__read_property(self, name):
         # 'readprop', name:str
@@ -442,47 +662,43 @@ class DebugProbeRequestHandler(StreamRequestHandler):
         return handle
 
     def _request__swo_read(self):
-        return list(self._probe.swo_read())
+        # 'swo_read' -> List[int]|bytes
+        data = self._probe.swo_read()
+        return bytes(data) if (self._protocol_version >= 2) else list(data)
 
     def _request__read_mem(self, handle, addr, xfer_size):
         # 'read_mem', handle:int, addr:int, xfer_size:int -> int
-        if handle not in self._ap_memif_handles:
-            raise exceptions.Error("invalid handle received from remote memory access")
-        return self._ap_memif_handles[handle].read_memory(addr, xfer_size, now=True)
+        return self._get_memif(handle).read_memory(addr, xfer_size, now=True)
+
+    def _request__read_mem_deferred(self, handle, addr, xfer_size):
+        return self._get_memif(handle).read_memory(addr, xfer_size, now=False)
 
     def _request__write_mem(self, handle, addr, value, xfer_size):
         # 'write_mem', handle:int, addr:int, value:int, xfer_size:int
-        if handle not in self._ap_memif_handles:
-            raise exceptions.Error("invalid handle received from remote memory access")
-        self._ap_memif_handles[handle].write_memory(addr, value, xfer_size)
+        self._get_memif(handle).write_memory(addr, value, xfer_size)
 
     def _request__read_block32(self, handle, addr, word_count):
-        # 'read_block32', handle:int, addr:int, word_count:int -> List[int]
-        # TODO use base64 data
-        if handle not in self._ap_memif_handles:
-            raise exceptions.Error("invalid handle received from remote memory access")
-        return self._ap_memif_handles[handle].read_memory_block32(addr, word_count)
+        # 'read_block32', handle:int, addr:int, word_count:int -> List[int]|bytes
+        data = self._get_memif(handle).read_memory_block32(addr, word_count)
+        if self._protocol_version >= 2:
+            return struct.pack(f"<{len(data)}I", *data)
+        return data
 
     def _request__write_block32(self, handle, addr, data):
-        # 'write_block32', handle:int, addr:int, data:List[int]
-        # TODO use base64 data
-        if handle not in self._ap_memif_handles:
-            raise exceptions.Error("invalid handle received from remote memory access")
-        self._ap_memif_handles[handle].write_memory_block32(addr, data)
+        # 'write_block32', handle:int, addr:int, data:List[int]|base64:str|bytes
+        if not isinstance(data, list):
+            data_bytes = self._decode_data(data)
+            data = list(struct.unpack(f"<{len(data_bytes) // 4}I", data_bytes))
+        self._get_memif(handle).write_memory_block32(addr, data)
 
     def _request__read_block8(self, handle, addr, word_count):
-        # 'read_block8', handle:int, addr:int, word_count:int -> List[int]
-        # TODO use base64 data
-        if handle not in self._ap_memif_handles:
-            raise exceptions.Error("invalid handle received from remote memory access")
-        return self._ap_memif_handles[handle].read_memory_block8(addr, word_count)
+        # 'read_block8', handle:int, addr:int, word_count:int -> List[int]|bytes
+        data = self._get_memif(handle).read_memory_block8(addr, word_count)
+        return bytes(data) if (self._protocol_version >= 2) else data
 
     def _request__write_block8(self, handle, addr, data):
-        # 'write_block8', handle:int, addr:int, data:List[int]
-        # TODO use base64 data
-        if handle not in self._ap_memif_handles:
-            raise exceptions.Error("invalid handle received from remote memory access")
-        self._ap_memif_handles[handle].write_memory_block8(addr, data)
+        # 'write_block8', handle:int, addr:int, data:List[int]|base64:str|bytes
+        self._get_memif(handle).write_memory_block8(addr, list(self._decode_data(data)))
 
     _PROPERTY_CONVERTERS = {
             'capabilities':                 lambda value: [v.name for v in value],
@@ -15,20 +15,48 @@
 # limitations under the License.
 
 import argparse
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from typing import (Callable, List, Optional, TYPE_CHECKING)
 import logging
+import threading
 from pathlib import Path
+from time import time
 
 from .base import SubcommandBase
 from ..core.helpers import ConnectHelper
-from ..flash.file_programmer import FileProgrammer
+from ..core.session import Session
+from ..flash.file_programmer import (FileImage, FileProgrammer)
+from ..utility.progress import print_progress
 from ..utility.cmdline import (
     convert_session_options,
     int_base_0,
 )
 
+if TYPE_CHECKING:
+    from ..probe.debug_probe import DebugProbe
+
 LOG = logging.getLogger(__name__)
 
+class _AggregateProgress:
+    """@brief Combines progress reports from boards being programmed concurrently into one report."""
+
+    def __init__(self, board_count: int, image_count: int, report: Optional[Callable[[float], None]]) -> None:
+        self._lock = threading.Lock()
+        self._progress = [0.0] * board_count
+        self._image_count = image_count
+        self._report = report
+
+    def update(self, board: int, image: int, progress: float) -> None:
+        """@brief Set the progress of programming one image into one board."""
+        with self._lock:
+            self._progress[board] = (image + progress) / self._image_count
+            if self._report is not None:
+                self._report(sum(self._progress) / len(self._progress))
+
+    def get_callback(self, board: int, image: int) -> Callable[[float], None]:
+        """@brief Return a progress callback for programming one image into one board."""
+        return lambda progress: self.update(board, image, progress)
+
 class LoadSubcommand(SubcommandBase):
     """@brief `pyocd load` and `flash` subcommand."""
 
@@ -64,6 +92,12 @@ class LoadSubcommand(SubcommandBase):
             help="Skip programming the first N bytes. Binary files only.")
         parser_options.add_argument("--no-reset", action="store_true",
             help="Specify to prevent resetting device after programming has finished.")
+        parser_options.add_argument("--probes", metavar="UIDS",
+            help="Program the same files into multiple boards concurrently. Either a comma-separated list "
+                 "of full or partial debug probe unique IDs, or 'all' for all connected probes.")
+        parser_options.add_argument("--jobs", metavar="N", type=int,
+            help="Maximum number of boards to program concurrently when --probes is used. Defaults to "
+                 "the number of probes.")
 
         parser.add_argument("file", metavar="<file-path>", nargs="+",
             help="File to write to memory. Binary files can have an optional base address appended to the file "
@@ -79,6 +113,19 @@ class LoadSubcommand(SubcommandBase):
         if (self._args.base_address is not None) and (len(self._args.file) > 1):
             raise ValueError("--base-address cannot be set when loading more than one file; "
                     "use a base address suffix instead")
+        if (self._args.probes is not None) and (self._args.unique_id is not None):
+            raise ValueError("--probes and --uid cannot both be set")
+        if (self._args.jobs is not None) and (self._args.jobs < 1):
+            raise ValueError("--jobs must be at least 1")
+
+        # Read all files before connecting, so they are only read once no matter how many boards
+        # are programmed.
+        images = self._read_files()
+        if images is None:
+            return 1
+
+        if self._args.probes is not None:
+            return self._load_multiple(images)
 
         session = ConnectHelper.session_with_chosen_probe(
                             project_dir=self._args.project_dir,
@@ -102,36 +149,132 @@ class LoadSubcommand(SubcommandBase):
                             chip_erase=self._args.erase,
                             trust_crc=self._args.trust_crc,
                             no_reset=self._args.no_reset)
-            for filename in self._args.file:
-                # Get an initial path with the argument as-is.
-                file_path = Path(filename).expanduser()
-
-                # Look for a base address suffix. If the supplied argument including an address suffix
-                # references an existing file, then the address suffix is not extracted.
-                if "@" in filename and not file_path.exists():
-                    filename, suffix = filename.rsplit("@", 1)
-                    try:
-                        base_address = int_base_0(suffix)
-                    except ValueError:
-                        LOG.error(f'Base address suffix "{suffix}" on file "{filename}" is not a valid integer address')
-                        return 1
-                else:
-                    base_address = self._args.base_address
-
-                # Resolve our path.
-                file_path = Path(filename).expanduser().resolve()
-                filename = str(file_path)
-
-                if base_address is None:
-                    LOG.info("Loading %s", filename)
-                else:
-                    LOG.info("Loading %s at %#010x", filename, base_address)
-
-                programmer.program(filename,
-                                base_address=base_address,
-                                skip=self._args.skip,
-                                file_format=self._args.format)
+            for image in images:
+                programmer.program_image(image)
 
         return 0
 
+    def _read_files(self) -> Optional[List[FileImage]]:
+        """@brief Read the data from all files passed on the command line.
+        @return List of file images, or None if an argument was invalid.
+        """
+        images = []
+        for filename in self._args.file:
+            # Get an initial path with the argument as-is.
+            file_path = Path(filename).expanduser()
+
+            # Look for a base address suffix. If the supplied argument including an address suffix
+            # references an existing file, then the address suffix is not extracted.
+            if "@" in filename and not file_path.exists():
+                filename, suffix = filename.rsplit("@", 1)
+                try:
+                    base_address = int_base_0(suffix)
+                except ValueError:
+                    LOG.error(f'Base address suffix "{suffix}" on file "{filename}" is not a valid integer address')
+                    return None
+            else:
+                base_address = self._args.base_address
+
+            # Resolve our path.
+            file_path = Path(filename).expanduser().resolve()
+            filename = str(file_path)
+
+            if base_address is None:
+                LOG.info("Loading %s", filename)
+            else:
+                LOG.info("Loading %s at %#010x", filename, base_address)
+
+            images.append(FileProgrammer.read_file(filename,
+                            base_address=base_address,
+                            skip=self._args.skip,
+                            file_format=self._args.format))
+        return images
+
+    def _get_probes(self) -> Optional[List["DebugProbe"]]:
+        """@brief Look up the probes selected with the --probes argument.
+        @return List of probes, or None if a unique ID doesn't match exactly one probe.
+        """
+        if self._args.probes.strip().lower() == 'all':
+            return ConnectHelper.get_all_connected_probes(blocking=(not self._args.no_wait))
+
+        probes: List["DebugProbe"] = []
+        for uid in (u.strip() for u in self._args.probes.split(',')):
+            if not uid:
+                continue
+            matches = ConnectHelper.get_all_connected_probes(blocking=False, unique_id=uid,
+                            print_wait_message=False)
+            if len(matches) != 1:
+                LOG.error("Unique ID '%s' matches %s",
+                        uid, "no debug probes" if not matches else f"{len(matches)} debug probes")
+                return None
+            if any(p.unique_id == matches[0].unique_id for p in probes):
+                LOG.error("Debug probe %s is selected more than once", matches[0].unique_id)
+                return None
+            probes.append(matches[0])
+        return probes
+
+    def _load_multiple(self, images: List[FileImage]) -> int:
+        """@brief Program the file images into all boards selected with --probes concurrently."""
+        probes = self._get_probes()
+        if probes is None:
+            return 1
+        if not probes:
+            LOG.error("No target device available")
+            return 1
+
+        # An options-only session provides the value of the progress option from config files.
+        options_session = Session(None,
+                            project_dir=self._args.project_dir,
+                            config_file=self._args.config,
+                            no_config=self._args.no_config,
+                            options=convert_session_options(self._args.options))
+        if options_session.options.get('hide_programming_progress'):
+            report = None
+        else:
+            report = print_progress()
+            report(0.0)
+        progress = _AggregateProgress(len(probes), len(images), report)
+
+        def program_board(board: int) -> Optional[Exception]:
+            try:
+                session = Session(probes[board],
+                                project_dir=self._args.project_dir,
+                                config_file=self._args.config,
+                                user_script=self._args.script,
+                                no_config=self._args.no_config,
+                                pack=self._args.pack,
+                                target_override=self._args.target_override,
+                                frequency=self._args.frequency,
+                                connect_mode=self._args.connect_mode,
+                                options=convert_session_options(self._args.options),
+                                option_defaults=self._modified_option_defaults(),
+                                )
+                with session:
+                    for image_index, image in enumerate(images):
+                        programmer = FileProgrammer(session,
+                                        progress=progress.get_callback(board, image_index),
+                                        chip_erase=self._args.erase,
+                                        trust_crc=self._args.trust_crc,
+                                        no_reset=self._args.no_reset)
+                        programmer.program_image(image)
+                return None
+            except Exception as err:
+                LOG.error("Failed to program board with probe %s: %s", probes[board].unique_id, err,
+                        exc_info=options_session.options.get('debug.traceback'))
+                return err
+            finally:
+                progress.update(board, len(images), 0.0)
+
+        start_time = time()
+        with ThreadPoolExecutor(max_workers=(self._args.jobs or len(probes))) as executor:
+            results = list(executor.map(program_board, range(len(probes))))
+        elapsed = time() - start_time
+
+        pt = self._get_pretty_table(["Unique ID", "Description", "Result"])
+        for probe, result in zip(probes, results):
+            pt.add_row([probe.unique_id, probe.description, "OK" if result is None else f"FAILED: {result}"])
+        print(pt)
 
+        failure_count = sum(1 for result in results if result is not None)
+        print(f"Programmed {len(probes) - failure_count} of {len(probes)} boards in {elapsed:.2f} s")
+        return 1 if failure_count else 0
@@ -0,0 +1,178 @@
+# pyOCD debugger
+# Copyright (c) 2026 pyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import argparse
+import json
+import logging
+import os
+import sys
+from typing import (List, TextIO, Union)
+
+from .base import SubcommandBase
+from ..core.helpers import ConnectHelper
+from ..core import exceptions
+from ..debug.profiler import (PCSampleProfile, PCSRProfiler, ProfileSymbolizer, SWOProfiler)
+from ..debug.timing import (FunctionTimer, FunctionTiming, write_timing_table)
+from ..utility.cmdline import (convert_session_options, int_base_0)
+
+LOG = logging.getLogger(__name__)
+
+class ProfileSubcommand(SubcommandBase):
+    """@brief `pyocd profile` subcommand."""
+
+    NAMES = ['profile']
+    HELP = "Statistical PC sampling profiler and function timer."
+
+    @classmethod
+    def get_args(cls) -> List[argparse.ArgumentParser]:
+        """@brief Add this subcommand to the subparsers object."""
+        profile_parser = argparse.ArgumentParser(description=cls.HELP, add_help=False)
+
+        profile_options = profile_parser.add_argument_group("profile options")
+        profile_options.add_argument("--elf", metavar="PATH",
+            help="ELF file running on the target, used to map samples to functions and source lines.")
+        profile_options.add_argument("-m", "--method", choices=("swo", "pcsr"), default="swo",
+            help="How to sample the PC. 'swo' enables DWT periodic PC sample packets over SWO and requires "
+                 "the swv_system_clock option. 'pcsr' reads the DWT_PCSR register through the debug port "
+                 "as fast as the probe allows, and works without SWO. Default is 'swo'.")
+        profile_options.add_argument("-c", "--core", default=0, type=int_base_0,
+            help="Core number to profile. Default is core 0.")
+        profile_options.add_argument("-d", "--duration", type=float, default=5.0, metavar="SECONDS",
+            help="Time to sample for. Default is 5 seconds. Press Ctrl-C to stop early.")
+        profile_options.add_argument("-i", "--interval", type=int_base_0, default=SWOProfiler.DEFAULT_INTERVAL,
+            metavar="CYCLES",
+            help="Number of CPU cycles between PC samples for the 'swo' method. The nearest interval "
+                 f"supported by the DWT is used. Default is {SWOProfiler.DEFAULT_INTERVAL}.")
+        profile_options.add_argument("--batch-size", type=int_base_0, default=PCSRProfiler.DEFAULT_BATCH_SIZE,
+            help="Number of DWT_PCSR reads per transfer for the 'pcsr' method. Default is "
+                 f"{PCSRProfiler.DEFAULT_BATCH_SIZE}.")
+        profile_options.add_argument("--function", action="append", metavar="NAME",
+            help="Instead of sampling, time calls of the named function in CPU cycles using hardware "
+                 "breakpoints and the DWT cycle counter. Requires --elf. May be given once per available "
+                 "hardware breakpoint.")
+        profile_options.add_argument("--calls", type=int_base_0, default=100, metavar="COUNT",
+            help="Number of calls of each function to time. Default is 100. When timing functions, "
+                 "--duration is the maximum time to wait for the calls.")
+        profile_options.add_argument("--format", choices=("flat", "collapsed", "json"), default="flat",
+            help="Output format. 'flat' lists the samples per function, most sampled first, or the cycle "
+                 "statistics for timed functions. 'collapsed' writes collapsed stacks for flamegraph tools. "
+                 "'json' writes the cycle statistics of timed functions as JSON. Default is 'flat'.")
+        profile_options.add_argument("--lines", action="store_true",
+            help="For collapsed output, add a source line frame below each function.")
+        profile_options.add_argument("-n", "--limit", type=int, default=None,
+            help="Maximum number of functions listed in flat output.")
+        profile_options.add_argument("-o", "--output", metavar="PATH", default=None,
+            help="Write the profile to a file instead of stdout.")
+
+        return [cls.CommonOptions.COMMON, cls.CommonOptions.CONNECT, profile_parser]
+
+    def invoke(self) -> int:
+        """@brief Handle 'profile' subcommand."""
+        session = ConnectHelper.session_with_chosen_probe(
+                            project_dir=self._args.project_dir,
+                            config_file=self._args.config,
+                            user_script=self._args.script,
+                            no_config=self._args.no_config,
+                            pack=self._args.pack,
+                            unique_id=self._args.unique_id,
+                            target_override=self._args.target_override,
+                            frequency=self._args.frequency,
+                            blocking=(not self._args.no_wait),
+                            connect_mode=self._args.connect_mode,
+                            options=convert_session_options(self._args.options),
+                            option_defaults=self._modified_option_defaults(),
+                            )
+        if session is None:
+            LOG.error("No target device available")
+            return 1
+
+        with session:
+            target = session.board.target
+            if self._args.elf:
+                target.elf = os.path.expanduser(self._args.elf)
+
+            if self._args.function:
+                return self._time_functions(target)
+            if self._args.format == 'json':
+                LOG.error("The json format is only supported when timing functions")
+                return 1
+
+            profiler: Union[SWOProfiler, PCSRProfiler]
+            if self._args.method == 'pcsr':
+                profiler = PCSRProfiler(session, self._args.core, self._args.batch_size)
+            else:
+                profiler = SWOProfiler(session, self._args.core, self._args.interval)
+
+            LOG.info("Sampling for %g seconds", self._args.duration)
+            try:
+                profiler.run(self._args.duration)
+            except exceptions.TargetSupportError as err:
+                LOG.error("Cannot start profiling: %s", err)
+                return 1
+            except KeyboardInterrupt:
+                pass
+            profile = profiler.profile
+            LOG.info("%d samples in %.2f s (%.0f samples/s), %d lost", profile.sample_count,
+                    profile.duration, profile.samples_per_second, profile.lost_count)
+
+            symbolizer = ProfileSymbolizer(target.elf)
+            if self._args.output is not None:
+                with open(self._args.output, 'w') as output:
+                    self._write_profile(profile, symbolizer, output)
+            else:
+                self._write_profile(profile, symbolizer, sys.stdout)
+        return 0
+
+    def _time_functions(self, target) -> int:
+        if target.elf is None:
+            LOG.error("Timing functions requires an ELF file (--elf)")
+            return 1
+        if self._args.format == 'collapsed':
+            LOG.error("The collapsed format is not supported when timing functions")
+            return 1
+
+        try:
+            timer = FunctionTimer.from_elf(target.cores[self._args.core], target.elf, self._args.function)
+        except (ValueError, exceptions.TargetSupportError) as err:
+            LOG.error("Cannot time functions: %s", err)
+            return 1
+
+        LOG.info("Timing %d calls of %s", self._args.calls, ", ".join(self._args.function))
+        try:
+            timer.run(self._args.calls, self._args.duration)
+        except KeyboardInterrupt:
+            pass
+        timings = timer.timings
+
+        if self._args.output is not None:
+            with open(self._args.output, 'w') as output:
+                self._write_timings(timings, output)
+        else:
+            self._write_timings(timings, sys.stdout)
+        return 0
+
+    def _write_timings(self, timings: List[FunctionTiming], output: TextIO) -> None:
+        if self._args.format == 'json':
+            json.dump([timing.summary() for timing in timings], output, indent=2)
+            output.write("\n")
+        else:
+            write_timing_table(timings, output)
+
+    def _write_profile(self, profile: PCSampleProfile, symbolizer: ProfileSymbolizer, output: TextIO) -> None:
+        if self._args.format == 'collapsed':
+            profile.write_collapsed(output, symbolizer, lines=self._args.lines)
+        else:
+            profile.write_flat(output, symbolizer, limit=self._args.limit)
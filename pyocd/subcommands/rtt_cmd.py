@@ -21,17 +21,23 @@
 
 import argparse
 import logging
+import os
 import sys
-from time import sleep
+import threading
 import time
 from typing import List
 
 from pyocd.core.helpers import ConnectHelper
 from pyocd.core.soc_target import SoCTarget
-from pyocd.debug.rtt import RTTControlBlock, RTTUpChannel, RTTDownChannel
+from pyocd.core.exceptions import RTTError
+from pyocd.debug.rtt import (RTTControlBlock, RTTDownChannel, RTTPollScheduler, RTTUpChannel)
+from pyocd.debug.rtt_capture import (RTTCaptureReader, RTTCaptureWriter, convert_to_raw, convert_to_text)
 from pyocd.subcommands.base import SubcommandBase
+from pyocd.trace.swv import SWVReader
+from pyocd.utility.async_stream_server import AsyncStreamServer
 from pyocd.utility.cmdline import convert_session_options, int_base_0
 from pyocd.utility.kbhit import KBHit
+from pyocd.utility.rtt_server import AsyncRTTServer
 
 
 LOG = logging.getLogger(__name__)
@@ -54,17 +60,40 @@ class RTTSubcommand(SubcommandBase):
                                  help="Start address of RTT control block search range.")
         rtt_options.add_argument("-s", "--size", type=int_base_0, default=None,
                                  help="Size of RTT control block search range.")
+        rtt_options.add_argument("--elf", metavar="PATH",
+                                 help="ELF file running on the target. Used to locate the RTT control block "
+                                      "from the _SEGGER_RTT symbol and to cache its address.")
         rtt_options.add_argument("--up-channel-id", type=int, default=0,
                                  help="Up channel ID.")
         rtt_options.add_argument("--down-channel-id", type=int, default=0,
                                  help="Down channel ID.")
         rtt_options.add_argument("-d", "--log-file", type=str, default=None,
                                  help="Log file name. When specified, logging mode is enabled.")
+        rtt_options.add_argument("-p", "--port", type=int, default=None,
+                                 help="Serve all RTT channels over TCP instead of running the viewer. Channel N "
+                                      "is served on this port plus N, or on an unused port if 0. Any number of "
+                                      "clients can connect to each channel.")
+        rtt_options.add_argument("--swv-port", type=int, default=None,
+                                 help="In server mode, also serve SWV ITM port 0 data on this TCP port. Requires "
+                                      "the swv_system_clock session option.")
+
+        rtt_options.add_argument("-c", "--capture", metavar="PATH", default=None,
+                                 help="Record all up channels with timestamps to a binary capture file.")
+        rtt_options.add_argument("--convert", metavar="PATH", default=None,
+                                 help="Convert a capture file instead of connecting to a target. The output is "
+                                      "written to stdout unless --log-file is given.")
+        rtt_options.add_argument("--convert-format", choices=("text", "raw"), default="text",
+                                 help="Output format for --convert. 'text' produces timestamped lines from all "
+                                      "channels; 'raw' produces the data of the channel selected with "
+                                      "--up-channel-id. Default is 'text'.")
 
         return [cls.CommonOptions.COMMON, cls.CommonOptions.CONNECT, rtt_parser]
 
     def invoke(self) -> int:
 
+        if self._args.convert is not None:
+            return self.convert()
+
         session = None
         kb = None
 
@@ -92,6 +121,9 @@ class RTTSubcommand(SubcommandBase):
 
                 target: SoCTarget = session.board.target
 
+                if self._args.elf:
+                    target.elf = os.path.expanduser(self._args.elf)
+
                 control_block = RTTControlBlock.from_target(target,
                             address = self._args.address,
                             size = self._args.size)
@@ -116,7 +148,11 @@ class RTTSubcommand(SubcommandBase):
                 # set up terminal input
                 kb = KBHit()
 
-                if self._args.log_file is None:
+                if self._args.port is not None:
+                    self.server_loop(session, control_block, kb)
+                elif self._args.capture is not None:
+                    self.capture_loop(control_block, kb)
+                elif self._args.log_file is None:
                     if len(control_block.down_channels) < 1:
                         LOG.error("No down channels.")
                         return 1
@@ -145,23 +181,26 @@ class RTTSubcommand(SubcommandBase):
         total_size = 0
         block_size = 0
         last_time = time.time()
+        scheduler = RTTPollScheduler()
 
         with open(self._args.log_file, 'wb') as log_file:
 
             while True:
-                # poll at most 1000 times per second to limit CPU use
-                sleep(0.001)
+                # poll less often while the channel is idle to limit CPU use
+                scheduler.wait()
 
                 # read data from up buffer
                 data = up_chan.read()
                 log_file.write(data)
 
                 s = len(data)
+                scheduler.update([(s, up_chan.size)])
                 block_size += s
                 total_size += s
                 diff = time.time() - last_time
                 if diff > 1.0:
-                    print(f"Transfer rate: {block_size / 1000:.1f} KByte/s; Bytes written: {total_size / 1000:.0f} KByte", end="\r")
+                    print(f"Transfer rate: {block_size / 1000:.1f} KByte/s; Bytes written: {total_size / 1000:.0f} KByte; "
+                          f"Overruns: {scheduler.stats.overrun_count}", end="\r")
                     block_size = 0
                     last_time = time.time()
 
@@ -169,17 +208,21 @@ class RTTSubcommand(SubcommandBase):
                 if kb.kbhit():
                     break
 
+        self._log_poll_stats(scheduler)
+
     def viewer_loop(self, up_chan, down_chan, kb):
         # byte array to send via RTT
         cmd = bytes()
+        scheduler = RTTPollScheduler()
 
         while True:
-            # poll at most 1000 times per second to limit CPU use
-            sleep(0.001)
+            # poll less often while the channel is idle to limit CPU use
+            scheduler.wait()
 
             # read data from up buffer 0 (target -> host) and write to
             # stdout
             up_data: bytes = up_chan.read()
+            scheduler.update([(len(up_data), up_chan.size)])
             sys.stdout.buffer.write(up_data)
             sys.stdout.buffer.flush()
 
@@ -202,3 +245,104 @@ class RTTSubcommand(SubcommandBase):
             # write cmd buffer to down buffer 0 (host -> target)
             bytes_out = down_chan.write(cmd)
             cmd = cmd[bytes_out:]
+
+        self._log_poll_stats(scheduler)
+
+    def capture_loop(self, control_block, kb):
+
+        LOG.info(f"start capturing {len(control_block.up_channels)} up channels ... Press any key to stop")
+        up_chans = range(len(control_block.up_channels))
+        scheduler = RTTPollScheduler()
+        last_time = time.time()
+        block_size = 0
+
+        with RTTCaptureWriter(self._args.capture) as capture:
+            for i, chan in enumerate(control_block.up_channels):
+                capture.write_channel_info(i, chan.name, chan.size)
+
+            while True:
+                scheduler.wait()
+
+                up_data, _ = control_block.transfer(up_chans, {})
+                timestamp = time.monotonic_ns()
+                for i, data in up_data.items():
+                    capture.write(i, data, timestamp)
+                    block_size += len(data)
+                scheduler.update((len(up_data.get(i, b'')), control_block.up_channels[i].size)
+                                 for i in up_chans)
+
+                diff = time.time() - last_time
+                if diff > 1.0:
+                    print(f"Transfer rate: {block_size / 1000:.1f} KByte/s; Bytes captured: "
+                          f"{capture.byte_count / 1000:.0f} KByte; Overruns: {scheduler.stats.overrun_count}",
+                          end="\r")
+                    block_size = 0
+                    last_time = time.time()
+
+                if kb.kbhit():
+                    break
+
+        self._log_poll_stats(scheduler)
+
+    def convert(self) -> int:
+        try:
+            with RTTCaptureReader(self._args.convert) as reader:
+                if self._args.convert_format == "raw":
+                    if self._args.log_file is None:
+                        convert_to_raw(reader, sys.stdout.buffer, self._args.up_channel_id)
+                    else:
+                        with open(self._args.log_file, 'wb') as output:
+                            convert_to_raw(reader, output, self._args.up_channel_id)
+                else:
+                    if self._args.log_file is None:
+                        convert_to_text(reader, sys.stdout)
+                    else:
+                        with open(self._args.log_file, 'w') as output:
+                            convert_to_text(reader, output)
+        except (OSError, RTTError) as err:
+            LOG.error("Failed to convert RTT capture: %s", err)
+            return 1
+        return 0
+
+    def server_loop(self, session, control_block, kb):
+        # Serializes target accesses between the RTT poll thread and the SWV reader.
+        lock = threading.Lock()
+        server = AsyncStreamServer(serve_local_only=session.options.get('serve_local_only'))
+        rtt_server = AsyncRTTServer(control_block, server, lock)
+        swv_reader = None
+
+        try:
+            num_chans = max(len(control_block.up_channels), len(control_block.down_channels))
+            for i in range(num_chans):
+                port = (self._args.port + i) if self._args.port else 0
+                stream = rtt_server.add_channel(port, i)
+                LOG.info(f"Serving RTT channel {i} on port {stream.port}")
+
+            if self._args.swv_port is not None:
+                if "swv_system_clock" not in session.options:
+                    LOG.warning("Cannot enable SWV due to missing swv_system_clock option")
+                else:
+                    stream = server.add_stream(self._args.swv_port, "SWV")
+                    swv_reader = SWVReader(session, 0, lock)
+                    if swv_reader.init(int(session.options.get("swv_system_clock")),
+                                       int(session.options.get("swv_clock")), stream):
+                        LOG.info(f"Serving SWV on port {stream.port}")
+
+            rtt_server.start()
+            LOG.info("Press any key to stop")
+            while not kb.kbhit():
+                time.sleep(0.1)
+        finally:
+            rtt_server.stop()
+            if swv_reader is not None:
+                swv_reader.stop()
+            server.stop()
+
+        self._log_poll_stats(rtt_server.scheduler)
+
+    def _log_poll_stats(self, scheduler: RTTPollScheduler) -> None:
+        stats = scheduler.stats
+        LOG.info(f"{stats.byte_count} bytes received in {stats.poll_count} polls "
+                 f"({stats.idle_poll_count} idle); peak buffer fill {stats.max_fill:.0%}")
+        if stats.overrun_count:
+            LOG.warning(f"Up buffer was full {stats.overrun_count} times; target data may have been lost")
@@ -15,7 +15,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Optional
+from array import array
+from typing import (Callable, Iterator, Optional, Tuple)
 
 class TraceEvent:
     """@brief Base trace event class."""
@@ -244,3 +245,126 @@ class TraceDataTraceEvent(TraceEvent):
                 msg += " Value={}:{:#010x}".format(rnw, self.value)
         return "[{}] DWT: Data Trace {}".format(self.timestamp, msg.strip())
 
+
+class TraceEventBatch:
+    """@brief Decoded trace events stored in columns.
+
+    The SWO parser stores events in arrays, one per field, instead of creating an object for each
+    event. The arrays are reused for every batch, so their storage is only allocated when the
+    number of events exceeds any previous batch. Sinks that only care about some fields can process
+    a batch by scanning the arrays directly. TraceEvent objects are only created when a batch is
+    indexed or iterated.
+
+    Columns, of which the first `count` entries are valid:
+    - `kind`: One of the event kind constants defined by this class.
+    - `port`: ITM stimulus port number, exception number, or data trace comparator number.
+    - `value`: ITM payload, event counter mask, periodic PC, or data trace value.
+    - `address`: Data trace PC or data address, depending on the flags.
+    - `flags`: ITM payload width, exception action, or data trace flags.
+    - `timestamp`: Local timestamp.
+
+    A batch passed to TraceEventSink.receive_many() is reused by the parser once the call returns, so
+    sinks must copy any data they want to keep.
+    """
+
+    ## @name Event kinds
+    ##@{
+    OVERFLOW = 1
+    ITM = 2
+    EVENT_COUNTER = 3
+    EXCEPTION = 4
+    PERIODIC_PC = 5
+    DATA_TRACE = 6
+    ##@}
+
+    ## @name Data trace flags
+    ##@{
+    DATA_TRACE_SIZE_MASK = 0x0f     # Transfer size in bytes, valid if DATA_TRACE_HAS_VALUE is set.
+    DATA_TRACE_HAS_PC = 0x10        # The address column holds a PC value.
+    DATA_TRACE_HAS_ADDR = 0x20      # The address column holds bits [15:0] of a data address.
+    DATA_TRACE_HAS_VALUE = 0x40     # The value column holds a data value.
+    DATA_TRACE_RNW = 0x80           # Data value was read rather than written.
+    ##@}
+
+    def __init__(self, exception_namer: Optional[Callable[[int], Optional[str]]] = None) -> None:
+        """@brief Constructor.
+        @param self
+        @param exception_namer Optional callable returning the name of an exception number, used when
+            creating TraceExceptionEvent objects.
+        """
+        self._exception_namer = exception_namer
+        self.kind = array('B')
+        self.port = array('H')
+        self.value = array('L')
+        self.address = array('L')
+        self.flags = array('B')
+        self.timestamp = array('Q')
+        ## Number of valid events. The columns may hold further events that are not yet complete.
+        self.count = 0
+
+    @property
+    def columns(self) -> Tuple[array, array, array, array, array, array]:
+        return (self.kind, self.port, self.value, self.address, self.flags, self.timestamp)
+
+    @property
+    def size(self) -> int:
+        """@brief Total number of events in the columns, including those beyond `count`."""
+        return len(self.kind)
+
+    def append(self, kind: int, port: int, value: int, address: int, flags: int, timestamp: int) -> None:
+        """@brief Add an event to the end of the columns."""
+        self.kind.append(kind)
+        self.port.append(port)
+        self.value.append(value)
+        self.address.append(address)
+        self.flags.append(flags)
+        self.timestamp.append(timestamp)
+
+    def remove_first(self, count: int) -> None:
+        """@brief Discard the first events, moving the remainder to the start of the columns."""
+        for column in self.columns:
+            del column[:count]
+        self.count = max(self.count - count, 0)
+
+    def clear(self) -> None:
+        for column in self.columns:
+            del column[:]
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, i: int) -> TraceEvent:
+        """@brief Create a TraceEvent object for the event at the given index."""
+        if not (0 <= i < self.count):
+            raise IndexError(i)
+        kind = self.kind[i]
+        ts = self.timestamp[i]
+        if kind == TraceEventBatch.ITM:
+            return TraceITMEvent(self.port[i], self.value[i], self.flags[i], ts)
+        elif kind == TraceEventBatch.OVERFLOW:
+            return TraceOverflow(ts)
+        elif kind == TraceEventBatch.EVENT_COUNTER:
+            return TraceEventCounter(self.value[i], ts)
+        elif kind == TraceEventBatch.EXCEPTION:
+            number = self.port[i]
+            name = self._exception_namer(number) if (self._exception_namer is not None) else None
+            return TraceExceptionEvent(number, name, self.flags[i], ts)
+        elif kind == TraceEventBatch.PERIODIC_PC:
+            return TracePeriodicPC(self.value[i], ts)
+        elif kind == TraceEventBatch.DATA_TRACE:
+            flags = self.flags[i]
+            has_value = bool(flags & TraceEventBatch.DATA_TRACE_HAS_VALUE)
+            return TraceDataTraceEvent(cmpn=self.port[i],
+                    pc=self.address[i] if (flags & TraceEventBatch.DATA_TRACE_HAS_PC) else None,
+                    addr=self.address[i] if (flags & TraceEventBatch.DATA_TRACE_HAS_ADDR) else None,
+                    value=self.value[i] if has_value else None,
+                    rnw=bool(flags & TraceEventBatch.DATA_TRACE_RNW) if has_value else None,
+                    sz=(flags & TraceEventBatch.DATA_TRACE_SIZE_MASK) if has_value else None,
+                    ts=ts)
+        else:
+            raise ValueError(f"invalid trace event kind {kind}")
+
+    def __iter__(self) -> Iterator[TraceEvent]:
+        for i in range(self.count):
+            yield self[i]
@@ -19,7 +19,7 @@ import collections.abc
 from typing import (TYPE_CHECKING, Iterable, List, Optional, Sequence, Union)
 
 if TYPE_CHECKING:
-    from .events import TraceEvent
+    from .events import (TraceEvent, TraceEventBatch)
 
 class TraceEventSink:
     """@brief Abstract interface for a trace event sink."""
@@ -30,6 +30,19 @@ class TraceEventSink:
         """
         raise NotImplementedError()
 
+    def receive_many(self, batch: "TraceEventBatch") -> None:
+        """@brief Handle a batch of trace events.
+
+        The default implementation creates a TraceEvent object for each event in the batch and
+        passes it to receive(). Subclasses can override this method to process the batch's columns
+        directly.
+
+        @param self
+        @param batch A TraceEventBatch. It is only valid until this method returns.
+        """
+        for event in batch:
+            self.receive(event)
+
 class TraceEventFilter(TraceEventSink):
     """@brief Abstract interface for a trace event filter."""
 
@@ -94,3 +107,12 @@ class TraceEventTee(TraceEventSink):
         for sink in self._sinks:
             sink.receive(event)
 
+    def receive_many(self, batch: "TraceEventBatch") -> None:
+        """@brief Pass a batch of trace events to all connected downstream trace event sinks.
+
+        @param self
+        @param batch A TraceEventBatch.
+        """
+        for sink in self._sinks:
+            sink.receive_many(batch)
+
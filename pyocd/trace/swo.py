@@ -15,40 +15,70 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import (TYPE_CHECKING, Generator, Iterable, List, Optional)
+from array import array
+from itertools import repeat
+import re
+from typing import (TYPE_CHECKING, Iterable, Optional, Tuple)
 
-from . import events
+from .events import TraceEventBatch
 
 if TYPE_CHECKING:
     from ..core.core_target import CoreTarget
     from .sink import TraceEventSink
 
+## Matches the first byte that isn't zero, to skip over sync packets.
+_NONZERO_RE = re.compile(b'[^\x00]')
+
+## Number of zero bytes that must precede the final byte of a sync packet.
+_SYNC_ZEROS = 5
+
+## Matches a run of instrumentation packets with a one byte payload.
+_ITM8_RUN_RE = re.compile(b'(?:[' + b''.join(re.escape(bytes([h])) for h in range(0x01, 0x100, 8)) + b'].)+',
+        re.DOTALL)
+
+## Translation table from a source packet header to its address field.
+_ITM_ADDRESS_TABLE = bytes((h >> 3) & 0x1f for h in range(256))
+
+_ITM_KIND_BYTE = bytes([TraceEventBatch.ITM])
+
 class SWOParser:
     """@brief SWO data stream parser.
 
-    Processes a stream of SWO data and generates TraceEvent objects. SWO data is passed to the
-    parse() method. It processes the data and creates TraceEvent objects which are passed to an
-    event sink object that is a subclass of TraceEventSink. The event sink must either be provided
-    when the SWOParser is constructed, or can be set using the connect() method.
+    Processes a stream of SWO data and generates trace events. SWO data is passed to the parse()
+    method. Decoded events are stored in a TraceEventBatch, which is passed to the receive_many()
+    method of the event sink at the end of each parse() call. The event sink must either be provided
+    when the SWOParser is constructed, or can be set using the connect() method. If the sink doesn't
+    have a receive_many() method, TraceEvent objects are created and passed to its receive() method
+    one at a time.
+
+    The parser works on whole buffers. Packets are decoded directly from the buffer by index, runs
+    of sync bytes are skipped in one step, and an incomplete packet at the end of a buffer is kept
+    until the next call to parse().
+
+    Events are held back until a local timestamp packet arrives, so the timestamp can be applied to
+    them, or an overflow packet is seen. Pairs of DWT data trace packets from the same comparator
+    are merged into one event.
 
     A SWOParser instance can be reused for multiple SWO sessions. If a break in SWO data streaming
-    occurs, the reset() method should be called before passing further data to parse().
+    occurs, the reset() method should be called before passing further data to parse(). If only some
+    data was lost while streaming, call overflow() instead.
     """
     def __init__(self, core: "CoreTarget", sink: Optional["TraceEventSink"] = None) -> None:
-        self.reset()
         self._core = core
         self._sink = sink
+        self._batch = TraceEventBatch(exception_namer=core.exception_number_to_name)
+        self.reset()
 
     def reset(self) -> None:
         self._bytes_parsed = 0
         self._itm_page = 0
         self._timestamp = 0
-        self._pending_events: List[events.TraceEvent] = []
-        self._pending_data_trace = None
-
-        # Get generator instance and prime it.
-        self._parser = self._parse()
-        next(self._parser)
+        self._carry = b''
+        self._batch.clear()
+        # Number of events in the batch that are ready to be sent to the sink.
+        self._ready = 0
+        # First of a possible pair of data trace packets, as (cmpn, flags, address, value, timestamp).
+        self._pending_data_trace: Optional[Tuple[int, int, int, int, int]] = None
 
     def connect(self, sink: "TraceEventSink") -> None:
         """@brief Connect the downstream trace sink or filter."""
@@ -64,201 +94,216 @@ class SWOParser:
 
         This method will return once the provided data is consumed, and can be called again when
         more data is available. There is no minimum or maximum limit on the size of the provided
-        data. As trace events are identified during parsing, they will be passed to the event
-        sink object passed into the constructor or connect().
+        data. Trace events identified during parsing are passed to the event sink object passed into
+        the constructor or connect() before this method returns, except for events still waiting for
+        a timestamp.
 
         @param self
-        @param data A sequence of integer byte values, usually a bytearray.
+        @param data A sequence of integer byte values, usually a bytes or bytearray.
         """
-        for value in data:
-            self._parser.send(value)
-            self._bytes_parsed += 1
+        data = bytes(data)
+        self._bytes_parsed += len(data)
+        buf = (self._carry + data) if self._carry else data
+        consumed = self._parse_buffer(buf)
+        self._carry = buf[consumed:]
+        self._flush_events()
 
-    def _flush_events(self) -> None:
-        """@brief Send all pending events to event sink."""
-        if self._sink is not None:
-            for event in self._pending_events:
-                self._sink.receive(event)
-        self._pending_events = []
+    def overflow(self) -> None:
+        """@brief Report that SWO data was lost before the data next passed to parse().
 
-    def _merge_data_trace_events(self, event: events.TraceEvent) -> bool:
-        """@brief Look for pairs of data trace events and merge."""
-        if isinstance(event, events.TraceDataTraceEvent):
-            # Record the first data trace event.
-            if self._pending_data_trace is None:
-                self._pending_data_trace = event
-            else:
-                # We've got the second in a pair. If the comparator numbers are the same, then
-                # we can merge the two events. Otherwise we just add them to the pending event
-                # queue separately.
-                if event.comparator == self._pending_data_trace.comparator:
-                    # Merge the two data trace events.
-                    ev = events.TraceDataTraceEvent(cmpn=event.comparator,
-                        pc=(event.pc or self._pending_data_trace.pc),
-                        addr=(event.address or self._pending_data_trace.address),
-                        value=(event.value or self._pending_data_trace.value),
-                        rnw=(event.is_read or self._pending_data_trace.is_read),
-                        sz=(event.transfer_size or self._pending_data_trace.transfer_size),
-                        ts=self._pending_data_trace.timestamp)
-                else:
-                    ev = self._pending_data_trace
-                self._pending_events.append(ev)
-                self._pending_data_trace = None
-            return True
-        # If we get a non-data-trace event while waiting for a second data trace event, then
-        # just place the pending data trace event in the pending event queue.
-        elif self._pending_data_trace is not None:
-            self._pending_events.append(self._pending_data_trace)
-            self._pending_data_trace = None
-        return False
-
-    def _send_event(self, event: events.TraceEvent) -> None:
-        """@brief Process event objects and decide when to send to event sink.
-
-        This method handles the logic to associate a timestamp event with the prior other
-        event. A list of pending events is built up until either a timestamp or overflow event
-        is generated, at which point all pending events are flushed to the event sink. If a
-        timestamp is seen, the timestamp of all pending events is set prior to flushing.
+        Any partial packet is discarded, and the loss is reported to the sink as a TraceOverflow
+        event, just like an overflow packet from the target. Events still waiting for a timestamp
+        are sent ahead of it.
         """
-        flush = False
+        self._carry = b''
+        self._add_event(TraceEventBatch.OVERFLOW, 0, 0, 0, 0)
+        self._ready = self._batch.size
+        self._flush_events()
 
-        # Handle merging data trace events.
-        if self._merge_data_trace_events(event):
+    def _flush_events(self) -> None:
+        """@brief Send all ready events to the event sink."""
+        ready = self._ready
+        if not ready:
             return
+        batch = self._batch
+        batch.count = ready
+        if self._sink is not None:
+            receive_many = getattr(self._sink, 'receive_many', None)
+            if receive_many is not None:
+                receive_many(batch)
+            else:
+                for event in batch:
+                    self._sink.receive(event)
+        batch.remove_first(ready)
+        self._ready = 0
 
-        if isinstance(event, events.TraceTimestamp):
-            for ev in self._pending_events:
-                ev.timestamp = event.timestamp
-            flush = True
-        else:
-            self._pending_events.append(event)
-            if isinstance(event, events.TraceOverflow):
-                flush = True
+    def _add_event(self, kind: int, port: int, value: int, address: int, flags: int) -> None:
+        # Any event other than data trace ends a possible pair of data trace packets.
+        if self._pending_data_trace is not None:
+            self._add_pending_data_trace()
+        self._batch.append(kind, port, value, address, flags, self._timestamp)
 
-        if flush:
-            self._flush_events()
+    def _add_pending_data_trace(self) -> None:
+        assert self._pending_data_trace is not None
+        cmpn, flags, address, value, ts = self._pending_data_trace
+        self._batch.append(TraceEventBatch.DATA_TRACE, cmpn, value, address, flags, ts)
+        self._pending_data_trace = None
 
-    def _parse(self) -> Generator[None, int, None]:
-        """@brief SWO parser as generator function coroutine.
+    def _add_data_trace(self, cmpn: int, flags: int, address: int, value: int) -> None:
+        """@brief Record a data trace packet, merging it with the previous one if they're a pair."""
+        pending = self._pending_data_trace
+        if pending is None:
+            self._pending_data_trace = (cmpn, flags, address, value, self._timestamp)
+        elif pending[0] == cmpn:
+            # Merge the two packets. Fields from the second packet take precedence.
+            _, pending_flags, pending_address, pending_value, ts = pending
+            merged_flags = flags | pending_flags
+            if not (flags & (TraceEventBatch.DATA_TRACE_HAS_PC | TraceEventBatch.DATA_TRACE_HAS_ADDR)):
+                address = pending_address
+            if not (flags & TraceEventBatch.DATA_TRACE_HAS_VALUE):
+                value = pending_value
+            else:
+                # Size and direction come only from the value packet.
+                merged_flags = (merged_flags & ~(TraceEventBatch.DATA_TRACE_SIZE_MASK | TraceEventBatch.DATA_TRACE_RNW)) \
+                        | (flags & (TraceEventBatch.DATA_TRACE_SIZE_MASK | TraceEventBatch.DATA_TRACE_RNW))
+            self._batch.append(TraceEventBatch.DATA_TRACE, cmpn, value, address, merged_flags, ts)
+            self._pending_data_trace = None
+        else:
+            # Different comparators, so the first packet stands alone. The second may still be
+            # the first of a new pair.
+            self._add_pending_data_trace()
+            self._pending_data_trace = (cmpn, flags, address, value, self._timestamp)
 
-        The generator yields every time it needs a byte of SWO data. The caller must use the
-        generator's send() method to provide the next byte.
+    def _parse_buffer(self, buf: bytes) -> int:
+        """@brief Decode all complete packets in a buffer.
+        @return Number of bytes consumed. Any remaining bytes are the start of an incomplete packet.
         """
-        timestamp = 0
-        invalid = False
-        while True:
-            byte = yield
-            hdr = byte
+        n = len(buf)
+        i = 0
+        batch = self._batch
+        while i < n:
+            hdr = buf[i]
 
-            # Sync packet.
+            # Sync packet: at least 5 zero bytes followed by 0x80.
             if hdr == 0:
-                packets = 0
-                while True:
-                    # Check for final 1 bit after at least 5 all-zero sync packets
-                    if (packets >= 5) and (byte == 0x80):
-                        break
-                    elif byte == 0:
-                        packets += 1
-                    else:
-                        # Get early non-zero packet, reset sync packet counter.
-                        #packets = 0
-                        invalid = True
-                        break
-                    byte = yield
+                match = _NONZERO_RE.search(buf, i)
+                if match is None:
+                    # Keep enough zeros to recognise the end of the sync packet.
+                    return max(i, n - _SYNC_ZEROS)
+                j = match.start()
+                # Whether or not the sync packet was valid, the byte that ended it is consumed.
+                i = j + 1
                 self._itm_page = 0
             # Overflow packet.
             elif hdr == 0x70:
-                self._send_event(events.TraceOverflow(timestamp))
+                self._add_event(TraceEventBatch.OVERFLOW, 0, 0, 0, 0)
+                self._ready = batch.size
+                i += 1
             # Protocol packet.
             elif (hdr & 0x3) == 0:
-                c = (hdr >> 7) & 0x1
+                c = hdr & 0x80
                 d = (hdr >> 4) & 0b111
                 # Local timestamp.
                 if (hdr & 0xf) == 0 and d not in (0x0, 0x3):
-                    ts = 0
-                    tc = 0
                     # Local timestamp packet format 1.
-                    if c == 1:
-                        tc = (hdr >> 4) & 0x3
-                        while c == 1:
-                            byte = yield
+                    if c:
+                        j = i + 1
+                        ts = 0
+                        while True:
+                            if j >= n:
+                                return i
+                            byte = buf[j]
+                            j += 1
                             ts = (ts << 7) | (byte & 0x7f)
-                            c = (byte >> 7) & 0x1
+                            if not (byte & 0x80):
+                                break
                     # Local timestamp packet format 2.
                     else:
-                        ts = (hdr >> 4) & 0x7
-                    timestamp += ts
-                    self._send_event(events.TraceTimestamp(tc, timestamp))
+                        ts = d
+                        j = i + 1
+                    i = j
+                    self._timestamp += ts
+                    if self._pending_data_trace is not None:
+                        self._add_pending_data_trace()
+                    # Apply the timestamp to all events waiting for one.
+                    waiting = batch.size - self._ready
+                    if waiting:
+                        batch.timestamp[self._ready:] = array('Q', (self._timestamp,)) * waiting
+                    self._ready = batch.size
                 # Global timestamp.
                 elif hdr in (0b10010100, 0b10110100):
                     # TODO handle global timestamp
-                    # t = (hdr >> 5) & 0x1
-                    pass
+                    i += 1
                 # Extension.
                 elif (hdr & 0x8) == 0x8:
-                    sh = (hdr >> 2) & 0x1
-                    if c == 0:
-                        ex = (hdr >> 4) & 0x7
+                    j = i + 1
+                    if not c:
+                        ex = d
                     else:
                         ex = 0
-                        while c == 1:
-                            byte = yield
+                        while True:
+                            if j >= n:
+                                return i
+                            byte = buf[j]
+                            j += 1
                             ex = (ex << 7) | (byte & 0x7f)
-                            c = (byte >> 7) & 0x1
-                    if sh == 0:
+                            if not (byte & 0x80):
+                                break
+                    i = j
+                    if (hdr & 0x4) == 0:
                         # Extension packet with sh==0 sets ITM stimulus page.
-                        self._itm_page = ex
-                    else:
-                        #self._send_event(events.TraceEvent("Extension: SH={:d} EX={:#x}\n".format(sh, ex), timestamp))
-                        invalid = True
+                        self._itm_page = ex & 0x7ff
                 # Reserved packet.
                 else:
-                    invalid = True
+                    i += 1
+            # Run of single byte instrumentation packets, the most common case for console output.
+            elif (hdr & 0x7) == 0x1 and _ITM8_RUN_RE.match(buf, i):
+                match = _ITM8_RUN_RE.match(buf, i)
+                if self._pending_data_trace is not None:
+                    self._add_pending_data_trace()
+                i = match.end()
+                run = match.group()
+                count = len(run) // 2
+                ports = run[0::2].translate(_ITM_ADDRESS_TABLE)
+                if self._itm_page:
+                    base = self._itm_page * 32
+                    batch.port.extend(p + base for p in ports)
+                else:
+                    batch.port.extend(ports)
+                batch.value.extend(run[1::2])
+                batch.kind.frombytes(_ITM_KIND_BYTE * count)
+                batch.flags.frombytes(b'\x01' * count)
+                batch.address.extend(repeat(0, count))
+                batch.timestamp.extend(repeat(self._timestamp, count))
             # Source packet.
             else:
-                ss = hdr & 0x3
-                l = 1 << (ss - 1)
+                l = 1 << ((hdr & 0x3) - 1)
+                if i + l >= n:
+                    return i
+                payload = int.from_bytes(buf[i + 1:i + 1 + l], 'little')
+                i += 1 + l
                 a = (hdr >> 3) & 0x1f
-                if l == 1:
-                    payload = yield
-                elif l == 2:
-                    byte1 = yield
-                    byte2 = yield
-                    payload = (byte1 |
-                                (byte2 << 8))
-                else:
-                    byte1 = yield
-                    byte2 = yield
-                    byte3 = yield
-                    byte4 = yield
-                    payload = (byte1 |
-                                (byte2 << 8) |
-                                (byte3 << 16) |
-                                (byte4 << 24))
 
                 # Instrumentation packet.
                 if (hdr & 0x4) == 0:
-                    port = (self._itm_page * 32) + a
-                    self._send_event(events.TraceITMEvent(port, payload, l, timestamp))
+                    if self._pending_data_trace is None:
+                        batch.append(TraceEventBatch.ITM, self._itm_page * 32 + a, payload, 0, l,
+                                self._timestamp)
+                    else:
+                        self._add_event(TraceEventBatch.ITM, self._itm_page * 32 + a, payload, 0, l)
                 # Hardware source packets...
                 # Event counter
                 elif a == 0:
-                    self._send_event(events.TraceEventCounter(payload, timestamp))
+                    self._add_event(TraceEventBatch.EVENT_COUNTER, 0, payload, 0, 0)
                 # Exception trace
                 elif a == 1:
-                    exception_number = payload & 0x1ff
-                    # TODO remove exception name and dependency on core
-                    exception_name = self._core.exception_number_to_name(exception_number)
                     fn = (payload >> 12) & 0x3
-                    if 1 <= fn <= 3:
-                        self._send_event(events.TraceExceptionEvent(
-                                exception_number, exception_name, fn, timestamp))
-                    else:
-                        invalid = True
+                    if fn:
+                        self._add_event(TraceEventBatch.EXCEPTION, payload & 0x1ff, 0, 0, fn)
                 # Periodic PC
                 elif a == 2:
                     # A payload of 0 indicates a period PC sleep event.
-                    self._send_event(events.TracePeriodicPC(payload, timestamp))
+                    self._add_event(TraceEventBatch.PERIODIC_PC, 0, payload, 0, 0)
                 # Data trace
                 elif 8 <= a <= 23:
                     type = (hdr >> 6) & 0x3
@@ -266,19 +311,14 @@ class SWOParser:
                     bit3 = (hdr >> 3) & 0x1
                     # PC value
                     if type == 0b01 and bit3 == 0:
-                        self._send_event(events.TraceDataTraceEvent(cmpn=cmpn, pc=payload, ts=timestamp))
+                        self._add_data_trace(cmpn, TraceEventBatch.DATA_TRACE_HAS_PC, payload, 0)
                     # Address
                     elif type == 0b01 and bit3 == 1:
-                        self._send_event(events.TraceDataTraceEvent(cmpn=cmpn, addr=payload, ts=timestamp))
+                        self._add_data_trace(cmpn, TraceEventBatch.DATA_TRACE_HAS_ADDR, payload, 0)
                     # Data value
                     elif type == 0b10:
-                        self._send_event(events.TraceDataTraceEvent(
-                                cmpn=cmpn, value=payload, rnw=(bit3 == 0), sz=l, ts=timestamp))
-                    else:
-                        invalid = True
-                # Invalid DWT 'a' value.
-                else:
-                    invalid = True
-
-
-
+                        flags = TraceEventBatch.DATA_TRACE_HAS_VALUE | l
+                        if bit3 == 0:
+                            flags |= TraceEventBatch.DATA_TRACE_RNW
+                        self._add_data_trace(cmpn, flags, 0, payload)
+        return i
@@ -16,13 +16,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
+from contextlib import nullcontext
 import logging
 import threading
-from time import sleep
-from typing import (Optional, TextIO, TYPE_CHECKING)
+from typing import (Callable, Deque, List, Optional, TextIO, Tuple, TYPE_CHECKING)
 
-from .sink import TraceEventSink
-from .events import (TraceEvent, TraceITMEvent)
+from .sink import (TraceEventSink, TraceEventTee)
+from .events import (TraceEvent, TraceEventBatch, TraceITMEvent)
 from .swo import SWOParser
 from ..coresight.itm import ITM
 from ..coresight.tpiu import TPIU
@@ -72,14 +73,161 @@ class SWVEventSink(TraceEventSink):
 
         self._console.write(data)
 
+    def receive_many(self, batch: TraceEventBatch) -> None:
+        """@brief Handle a batch of SWV trace events.
+
+        ITM events are picked out of the batch's columns and their bytes written to the console
+        with a single write, without creating event objects.
+
+        @param self
+        @param batch A TraceEventBatch.
+        """
+        count = batch.count
+        kinds = batch.kind[:count]
+        values = batch.value[:count]
+        widths = batch.flags[:count]
+        if kinds.count(TraceEventBatch.ITM) == count and widths.count(1) == count:
+            # All single byte ITM events.
+            data = bytes(values.tolist())
+        else:
+            data = bytearray()
+            for i in range(count):
+                if kinds[i] == TraceEventBatch.ITM:
+                    width = widths[i]
+                    if width in (1, 2, 4):
+                        data += values[i].to_bytes(width, 'little')
+        if data:
+            self._console.write(data.decode('latin-1'))
+
+class SWOCaptureBuffer:
+    """@brief Bounded ring buffer that passes SWO data from a capture thread to a decoder thread.
+
+    There must be a single writer and a single reader. The lock only guards the read and write
+    counters; data is copied into and out of the ring outside of it, since the writer never touches
+    the unread region and the reader never touches the free region.
+
+    When a write doesn't fit in the free space, the whole write is discarded rather than blocking the
+    capture thread, and is counted in `overflow_count` and `dropped_byte_count`. The reader is told
+    about the discontinuity by read() so it can resynchronise its decoder.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        """@brief Constructor.
+        @param self
+        @param capacity Size of the buffer in bytes.
+        """
+        assert capacity > 0
+        self._buffer = bytearray(capacity)
+        self._capacity = capacity
+        # Total bytes written and read since creation. Offsets into the ring are taken modulo capacity.
+        self._write_count = 0
+        self._read_count = 0
+        # Write counts at which data was discarded.
+        self._gaps: Deque[int] = collections.deque()
+        self._is_closed = False
+        self._cond = threading.Condition()
+        self.overflow_count = 0
+        self.dropped_byte_count = 0
+        self.max_fill = 0
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def fill(self) -> int:
+        """@brief Number of bytes waiting to be read."""
+        return self._write_count - self._read_count
+
+    @property
+    def is_closed(self) -> bool:
+        return self._is_closed
+
+    def write(self, data: bytes) -> bool:
+        """@brief Add data to the buffer. Never blocks.
+        @return Whether the data was stored. If False, it was discarded because the buffer is full.
+        """
+        size = len(data)
+        if not size:
+            return True
+        if size > self._capacity - (self._write_count - self._read_count):
+            with self._cond:
+                self.overflow_count += 1
+                self.dropped_byte_count += size
+                if not self._gaps or self._gaps[-1] != self._write_count:
+                    self._gaps.append(self._write_count)
+            return False
+
+        data = memoryview(data)
+        offset = self._write_count % self._capacity
+        first = min(size, self._capacity - offset)
+        self._buffer[offset:offset + first] = data[:first]
+        if first < size:
+            self._buffer[:size - first] = data[first:]
+
+        with self._cond:
+            self._write_count += size
+            self.max_fill = max(self.max_fill, self._write_count - self._read_count)
+            self._cond.notify()
+        return True
+
+    def read(self, timeout: Optional[float] = None) -> Tuple[bytes, bool]:
+        """@brief Remove all contiguous data from the buffer.
+
+        Waits until data is available, the buffer is closed, or the timeout expires.
+
+        @param self
+        @param timeout Maximum time in seconds to wait for data. None waits forever.
+        @return Tuple of the data, which may be empty, and a bool that is True if data was discarded
+            between the previously returned data and this data.
+        """
+        with self._cond:
+            if self._read_count == self._write_count and not self._is_closed:
+                self._cond.wait(timeout)
+            lost = False
+            if self._gaps and self._gaps[0] == self._read_count:
+                self._gaps.popleft()
+                lost = True
+            end = self._gaps[0] if self._gaps else self._write_count
+        size = end - self._read_count
+        if not size:
+            return b'', lost
+
+        offset = self._read_count % self._capacity
+        first = min(size, self._capacity - offset)
+        data = bytes(self._buffer[offset:offset + first])
+        if first < size:
+            data += self._buffer[:size - first]
+
+        with self._cond:
+            self._read_count += size
+        return data, lost
+
+    def close(self) -> None:
+        """@brief Wake up the reader and make it return immediately once the buffer is empty."""
+        with self._cond:
+            self._is_closed = True
+            self._cond.notify_all()
+
 class SWVReader(threading.Thread):
-    """@brief Sets up SWV and processes data in a background thread."""
+    """@brief Sets up SWV and processes data in background threads.
+
+    The SWVReader thread itself only captures SWO data. It drains the probe as fast as the probe
+    produces data and copies it into a SWOCaptureBuffer for each consumer. Each consumer, the SWO
+    parser feeding the console and, if enabled, the raw SWV server, runs on its own decoder thread.
+    So a slow console or raw client no longer holds up reading from the probe, and if a consumer
+    falls too far behind the data it misses is accounted for instead of silently lost on the probe.
+    """
+
+    ## Time in seconds to wait before polling the probe again when no SWO data was available.
+    POLL_INTERVAL = 0.001
 
     def __init__(self, session: "Session", core_number: int = 0, lock: Optional[threading.Lock] = None) -> None:
         """@brief Constructor.
         @param self
         @param session The Session instance.
         @param core_number The number of the core being traced. Default is core 0.
+        @param lock Optional lock held while the probe is accessed.
         """
         super().__init__(name="SWVReader", daemon=True)
         self._session = session
@@ -87,6 +235,8 @@ class SWVReader(threading.Thread):
         self._shutdown_event = threading.Event()
         self._swo_clock = 0
         self._lock = lock
+        self._buffers: List[SWOCaptureBuffer] = []
+        self._decoders: List[threading.Thread] = []
 
         target = self._session.target
         assert target
@@ -95,7 +245,13 @@ class SWVReader(threading.Thread):
 
         self._session.subscribe(self._reset_handler, Target.Event.POST_RESET, self._core)
 
-    def init(self, sys_clock: int, swo_clock: int, console: TextIO) -> bool:
+    @property
+    def buffers(self) -> List[SWOCaptureBuffer]:
+        """@brief The capture buffers of the running consumers."""
+        return self._buffers
+
+    def init(self, sys_clock: int, swo_clock: int, console: Optional[TextIO],
+            sink: Optional[TraceEventSink] = None) -> bool:
         """@brief Configures trace graph and starts thread.
 
         This method performs all steps required to start up SWV. It first calls the target's
@@ -109,7 +265,9 @@ class SWVReader(threading.Thread):
         @param self
         @param sys_clock System clock frequency in Hertz, from which the SWO clock is derived.
         @param swo_clock Desired SWO output frequency in Hertz.
-        @param console File-like object to which SWV data will be written.
+        @param console File-like object to which SWV data will be written. May be None if only
+            `sink` should receive trace events.
+        @param sink Optional additional sink that receives all decoded trace events.
 
         @return Boolean indicating whether the SWV reader was successfully started.
         """
@@ -141,8 +299,17 @@ class SWVReader(threading.Thread):
             LOG.warning("SWV not initalized: Failed to set SWO clock rate")
             return False
 
+        sinks: List[TraceEventSink] = []
+        if console is not None:
+            sinks.append(SWVEventSink(console))
+        if sink is not None:
+            sinks.append(sink)
+        if len(sinks) == 1:
+            self._sink = sinks[0]
+        else:
+            self._sink = TraceEventTee()
+            self._sink.connect(sinks)
         self._parser = SWOParser(self._core)
-        self._sink = SWVEventSink(console)
         self._parser.connect(self._sink)
 
         self.start()
@@ -170,17 +337,57 @@ class SWVReader(threading.Thread):
 
         self._target.trace_stop()
 
-    def run(self) -> None:
-        """@brief SWV reader thread routine.
+    def _add_consumer(self, name: str, handler: Callable[[bytes, bool], None]) -> None:
+        """@brief Create a capture buffer and a decoder thread that passes its data to a handler.
 
-        Starts the probe receiving SWO data by calling DebugProbe.swo_start(). For as long as the
-        thread runs, it reads SWO data from the probe and passes it to the SWO parser created in
-        init(). When the thread is signaled to stop, it calls DebugProbe.swo_stop() before exiting.
+        The handler is called with each chunk of data and a flag that is True if data was discarded
+        before the chunk.
         """
+        buffer = SWOCaptureBuffer(self._session.options.get('swv_buffer_size'))
+
+        def decode_task() -> None:
+            while True:
+                data, lost = buffer.read()
+                if data or lost:
+                    try:
+                        handler(data, lost)
+                    except Exception as err:
+                        LOG.error("Error in %s: %s", name, err, exc_info=self._session.log_tracebacks)
+                elif buffer.is_closed:
+                    break
+
+        self._buffers.append(buffer)
+        self._decoders.append(threading.Thread(target=decode_task, name=name, daemon=True))
+
+    def _decode(self, data: bytes, lost: bool) -> None:
+        if lost:
+            self._parser.overflow()
+        self._parser.parse(data)
+
+    def _probe_lock(self):
+        return self._lock if self._lock else nullcontext()
+
+    def _read_swo(self) -> bytearray:
         assert self._session.probe
+        with self._probe_lock():
+            return self._session.probe.swo_read()
+
+    def _capture(self, data: bytes) -> None:
+        for buffer in self._buffers:
+            if not buffer.write(data) and buffer.overflow_count == 1:
+                LOG.warning("SWV data is arriving faster than it can be processed; some will be discarded")
 
-        if self._lock:
-            self._lock.acquire()
+    def run(self) -> None:
+        """@brief SWV capture thread routine.
+
+        Starts the decoder threads, then starts the probe receiving SWO data by calling
+        DebugProbe.swo_start(). For as long as the thread runs, it reads SWO data from the probe and
+        copies it into the capture buffers. The probe is read repeatedly until it has no more data,
+        then polled every POLL_INTERVAL seconds. When the thread is signaled to stop, it reads any
+        remaining data, calls DebugProbe.swo_stop(), and waits for the decoder threads to finish
+        processing the captured data before exiting.
+        """
+        assert self._session.probe
 
         swv_raw_server = StreamServer(
                             self._session.options.get('swv_raw_port'),
@@ -189,35 +396,47 @@ class SWVReader(threading.Thread):
                             is_read_only=True) \
                          if self._session.options.get('swv_raw_enable') else None
 
-        # Stop SWO first in case the probe already had it started. Ignore if this fails.
-        try:
-            self._session.probe.swo_stop()
-        except exceptions.ProbeError:
-            pass
-        self._session.probe.swo_start(self._swo_clock)
-
-        while not self._shutdown_event.is_set():
-            data = self._session.probe.swo_read()
-            if data:
-                if swv_raw_server:
-                    swv_raw_server.write(data)
-                self._parser.parse(data)
-
-            if self._lock:
-                self._lock.release()
-
-            sleep(0.001)
-
-            if self._lock:
-                self._lock.acquire()
-
-        self._session.probe.swo_stop()
-
+        self._add_consumer("SWVDecoder", self._decode)
         if swv_raw_server:
-            swv_raw_server.stop()
+            self._add_consumer("SWVRawServer", lambda data, lost: swv_raw_server.write(data))
+        for decoder in self._decoders:
+            decoder.start()
 
-        if self._lock:
-            self._lock.release()
+        try:
+            with self._probe_lock():
+                # Stop SWO first in case the probe already had it started. Ignore if this fails.
+                try:
+                    self._session.probe.swo_stop()
+                except exceptions.ProbeError:
+                    pass
+                self._session.probe.swo_start(self._swo_clock)
+
+            while not self._shutdown_event.is_set():
+                data = self._read_swo()
+                if data:
+                    self._capture(data)
+                else:
+                    self._shutdown_event.wait(self.POLL_INTERVAL)
+
+            # Drain data the probe has already received.
+            self._capture(self._read_swo())
+            with self._probe_lock():
+                self._session.probe.swo_stop()
+        finally:
+            for buffer in self._buffers:
+                buffer.close()
+            for decoder in self._decoders:
+                decoder.join()
+
+            for buffer, decoder in zip(self._buffers, self._decoders):
+                if buffer.overflow_count:
+                    LOG.warning("%s discarded %d bytes of SWV data in %d overflows (buffer size %d)",
+                            decoder.name, buffer.dropped_byte_count, buffer.overflow_count, buffer.capacity)
+            self._buffers = []
+            self._decoders = []
+
+            if swv_raw_server:
+                swv_raw_server.stop()
 
     def _reset_handler(self, notification: "Notification") -> None:
         """@brief Reset notification handler.
@@ -0,0 +1,235 @@
+# pyOCD debugger
+# Copyright (c) 2026 pyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import logging
+import threading
+from typing import (Any, Coroutine, Dict, Optional, Set, Union)
+
+LOG = logging.getLogger(__name__)
+
+class AsyncStream:
+    """@brief One TCP port served by an AsyncStreamServer.
+
+    Any number of clients can connect to the stream's port at the same time. Data passed to write()
+    is sent to every connected client. A client that stops reading is not allowed to hold up the
+    others: once more than `client_buffer_limit` bytes are queued for it, further data for that
+    client is discarded and counted in `dropped_byte_count`.
+
+    If the stream is writable, data received from all clients is collected in a single buffer that
+    the producer drains with get_received_data() and consume_received_data(). When the buffer holds
+    `receive_buffer_limit` bytes or more, the stream stops reading from its clients until the buffer
+    is drained, so TCP flow control pushes back on the clients instead of data being dropped.
+
+    Except for write(), which may be called from any thread, the methods of this class must only be
+    called on the server's event loop thread.
+    """
+
+    def __init__(self, server: "AsyncStreamServer", name: str, writable: bool,
+            client_buffer_limit: int, receive_buffer_limit: int) -> None:
+        self._server = server
+        self._name = name
+        self._writable = writable
+        self._client_buffer_limit = client_buffer_limit
+        self._receive_buffer_limit = receive_buffer_limit
+        self._clients: Set[asyncio.StreamWriter] = set()
+        self._received = bytearray()
+        self._drained = asyncio.Event()
+        self._drained.set()
+        self._tcp_server: Optional[asyncio.AbstractServer] = None
+        self._port = 0
+        self.sent_byte_count = 0
+        self.dropped_byte_count = 0
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def port(self) -> int:
+        """@brief TCP port number the stream is listening on."""
+        return self._port
+
+    @property
+    def client_count(self) -> int:
+        """@brief Number of connected clients."""
+        return len(self._clients)
+
+    async def _start(self, host: str, port: int) -> None:
+        self._tcp_server = await asyncio.start_server(self._handle_client, host, port)
+        self._port = self._tcp_server.sockets[0].getsockname()[1]
+        LOG.info("%s server listening on port %d", self._name, self._port)
+
+    async def _stop(self) -> None:
+        assert self._tcp_server
+        self._tcp_server.close()
+        await self._tcp_server.wait_closed()
+        for writer in list(self._clients):
+            writer.close()
+        self._clients.clear()
+        # Release any clients waiting for the receive buffer to drain.
+        self._drained.set()
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        LOG.info("Client connected to %s server port %d", self._name, self._port)
+        self._clients.add(writer)
+        try:
+            while True:
+                data = await reader.read(4096)
+                if not data:
+                    break
+                if not self._writable:
+                    continue
+                self._received += data
+                if len(self._received) >= self._receive_buffer_limit:
+                    # Stop reading from this client until the producer drains the buffer.
+                    self._drained.clear()
+                    await self._drained.wait()
+        except ConnectionError:
+            pass
+        finally:
+            self._clients.discard(writer)
+            writer.close()
+            LOG.info("Client disconnected from %s server port %d", self._name, self._port)
+
+    def publish(self, data: bytes) -> None:
+        """@brief Send data to all connected clients. Must be called on the event loop thread."""
+        if not data:
+            return
+        for writer in self._clients:
+            if writer.transport.get_write_buffer_size() > self._client_buffer_limit:
+                self.dropped_byte_count += len(data)
+                continue
+            writer.write(data)
+            self.sent_byte_count += len(data)
+
+    def write(self, data: Union[bytes, str]) -> None:
+        """@brief Send data to all connected clients from any thread.
+
+        Strings are encoded as Latin-1 so that each character is sent as one byte, which is how
+        SWVEventSink produces characters from ITM data.
+        """
+        if isinstance(data, str):
+            data = data.encode('latin-1', 'replace')
+        self._server.call_soon(self.publish, bytes(data))
+
+    def flush(self) -> None:
+        """@brief Does nothing. Allows the stream to be used as a console for SWVEventSink."""
+        pass
+
+    def get_received_data(self) -> bytes:
+        """@brief Return data received from clients, without removing it from the buffer."""
+        return bytes(self._received)
+
+    def consume_received_data(self, count: int) -> None:
+        """@brief Remove data from the start of the receive buffer.
+
+        Clients that were paused because the buffer was full resume once it drops below the limit.
+        """
+        del self._received[:count]
+        if len(self._received) < self._receive_buffer_limit:
+            self._drained.set()
+
+class AsyncStreamServer:
+    """@brief Serves any number of data streams over TCP from an asyncio event loop.
+
+    The event loop runs in its own daemon thread, which is started by the constructor. Streams
+    are created with add_stream(). Work that needs the event loop, such as target polling
+    coroutines, can be scheduled on it with run_coroutine().
+    """
+
+    ## Default maximum number of bytes queued for a single client before data is dropped.
+    CLIENT_BUFFER_LIMIT = 256 * 1024
+
+    ## Default number of received bytes at which clients of a writable stream are paused.
+    RECEIVE_BUFFER_LIMIT = 4096
+
+    def __init__(self, serve_local_only: bool = True) -> None:
+        """@brief Constructor.
+        @param self
+        @param serve_local_only Whether to only accept connections from localhost.
+        """
+        self._host = 'localhost' if serve_local_only else None
+        self._streams: Dict[int, AsyncStream] = {}
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name="AsyncStreamServer", daemon=True)
+        self._thread.start()
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+        self._loop.close()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return self._loop
+
+    @property
+    def streams(self) -> Dict[int, AsyncStream]:
+        """@brief Map of port number to stream."""
+        return self._streams
+
+    def call_soon(self, callback, *args) -> None:
+        """@brief Schedule a callback on the event loop from any thread."""
+        if not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(callback, *args)
+
+    def run_coroutine(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """@brief Run a coroutine on the event loop and wait for its result from another thread."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    def submit(self, coro: Coroutine) -> "asyncio.Future":
+        """@brief Start a coroutine on the event loop without waiting for it.
+        @return A concurrent.futures.Future for the coroutine's result.
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def add_stream(self, port: int, name: str, writable: bool = False,
+            client_buffer_limit: int = CLIENT_BUFFER_LIMIT,
+            receive_buffer_limit: int = RECEIVE_BUFFER_LIMIT) -> AsyncStream:
+        """@brief Start serving a new stream.
+
+        @param self
+        @param port TCP port to listen on. If 0, an unused port is chosen; read it from the
+            returned stream's `port` property.
+        @param name Name of the stream used in log messages.
+        @param writable Whether data sent by clients is collected for the producer.
+        @param client_buffer_limit Bytes queued for a client beyond which data for it is dropped.
+        @param receive_buffer_limit Received bytes at which reading from clients is paused.
+        @return The new AsyncStream.
+        @exception OSError Failed to listen on the port.
+        """
+        async def start() -> AsyncStream:
+            stream = AsyncStream(self, name, writable, client_buffer_limit, receive_buffer_limit)
+            await stream._start(self._host, port)
+            return stream
+
+        stream = self.run_coroutine(start())
+        self._streams[stream.port] = stream
+        return stream
+
+    def remove_stream(self, port: int) -> None:
+        """@brief Stop serving the stream on the given port."""
+        stream = self._streams.pop(port, None)
+        if stream is not None:
+            self.run_coroutine(stream._stop())
+
+    def stop(self) -> None:
+        """@brief Stop all streams and the event loop thread."""
+        for port in list(self._streams):
+            self.remove_stream(port)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
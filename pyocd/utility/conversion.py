@@ -17,10 +17,90 @@
 
 import struct
 import binascii
-from typing import (Any, Iterator, List, Sequence, Tuple, cast)
+import sys
+from array import array
+from typing import (Any, Dict, Iterator, List, Sequence, Tuple, Union, cast)
 
 from .mask import align_up
 
+def _get_array_typecodes() -> Dict[int, str]:
+    """@brief Map the sizes 1, 2, 4, and 8 bytes to array type codes for unsigned integers.
+
+    The item sizes of array type codes are platform dependent, so they are looked up rather than
+    hardcoded.
+    """
+    typecodes: Dict[int, str] = {}
+    for typecode in "BHILQ":
+        typecodes.setdefault(array(typecode).itemsize, typecode)
+    return typecodes
+
+_ARRAY_TYPECODES = _get_array_typecodes()
+
+# Arrays hold values in native byte order, so they must be swapped on big endian hosts.
+_NEEDS_BYTESWAP = (sys.byteorder == 'big')
+
+BytesLike = Union[bytes, bytearray, memoryview]
+
+def bytes_to_uint_le_array(data: BytesLike, bytewidth: int, pad: int = 0x00) -> "array[int]":
+    """@brief Convert a buffer of bytes to an array of little endian unsigned integers.
+
+    If the length of the data is not a multiple of `bytewidth`, then the pad value is used
+    for the additional required bytes.
+
+    @param data Buffer of bytes.
+    @param bytewidth Width in bytes of the resulting values. Must be one of 1, 2, 4, or 8.
+    @param pad Optional value used to pad input data if not aligned to the bytewidth.
+    @result An `array.array` of unsigned integers that are `bytewidth` bytes wide.
+    """
+    remainder = len(data) % bytewidth
+    if remainder != 0:
+        data = bytes(data) + bytes((pad,)) * (bytewidth - remainder)
+    result = array(_ARRAY_TYPECODES[bytewidth])
+    result.frombytes(data)
+    if _NEEDS_BYTESWAP:
+        result.byteswap()
+    return result
+
+def uint_le_array_to_bytes(data: Sequence[int], bytewidth: int) -> bytes:
+    """@brief Convert a sequence of unsigned integers to little endian bytes.
+
+    @param data Sequence of integer values, each of which must fit within `bytewidth` bytes. May also be
+        an `array.array` with the matching item size, in which case no per-element conversion is
+        performed.
+    @param bytewidth Width in bytes of the input values. Must be one of 1, 2, 4, or 8.
+    @result Bytes object containing the values in little endian order.
+    @exception OverflowError A value is negative or too large for `bytewidth` bytes.
+    """
+    typecode = _ARRAY_TYPECODES[bytewidth]
+    # A copy is required to byteswap, so the caller's array isn't modified.
+    if _NEEDS_BYTESWAP or not (isinstance(data, array) and data.typecode == typecode):
+        data = array(typecode, data)
+    if _NEEDS_BYTESWAP:
+        data.byteswap()
+    return data.tobytes()
+
+def bytes_to_u32le(data: BytesLike, pad: int = 0x00) -> "array[int]":
+    """@brief Convert a buffer of bytes to an array of 32-bit integers (little endian)."""
+    return bytes_to_uint_le_array(data, 4, pad)
+
+def u32le_to_bytes(data: Sequence[int]) -> bytes:
+    """@brief Convert a sequence of 32-bit integers to bytes (little endian)."""
+    return uint_le_array_to_bytes(data, 4)
+
+def bytes_to_u16le(data: BytesLike, pad: int = 0x00) -> "array[int]":
+    """@brief Convert a buffer of bytes to an array of 16-bit integers (little endian)."""
+    return bytes_to_uint_le_array(data, 2, pad)
+
+def u16le_to_bytes(data: Sequence[int]) -> bytes:
+    """@brief Convert a sequence of 16-bit integers to bytes (little endian)."""
+    return uint_le_array_to_bytes(data, 2)
+
+def _as_bytes(data: Sequence[int]) -> BytesLike:
+    """@brief Return a buffer for a list of bytes, without copying if it is already a buffer."""
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return data
+    return bytes(data)
+
 def byte_list_to_nbit_le_list(data: Sequence[int], bitwidth: int, pad: int = 0x00) -> List[int]:
     """@brief Convert a list of bytes to a list of n-bit integers (little endian)
 
@@ -33,15 +113,17 @@ def byte_list_to_nbit_le_list(data: Sequence[int], bitwidth: int, pad: int = 0x0
     @result List of integer values that are `bitwidth` bits wide.
     """
     bytewidth = bitwidth // 8
+    if bytewidth in _ARRAY_TYPECODES:
+        return bytes_to_uint_le_array(_as_bytes(data), bytewidth, pad).tolist()
     datalen = len(data) // bytewidth * bytewidth
-    res = [sum((data[offset + i] << (i * 8)) for i in range(bytewidth))
+    buf = _as_bytes(data)
+    res = [int.from_bytes(buf[offset:offset + bytewidth], 'little')
             for offset in range(0, datalen, bytewidth)
             ]
     remainder = len(data) % bytewidth
     if remainder != 0:
         pad_count = bytewidth - remainder
-        padded_data = list(data[-remainder:]) + [pad] * pad_count
-        res.append(sum((padded_data[i] << (i * 8)) for i in range(bytewidth)))
+        res.append(int.from_bytes(bytes(buf[-remainder:]) + bytes((pad,)) * pad_count, 'little'))
     return res
 
 def nbit_le_list_to_byte_list(data: Sequence[int], bitwidth: int) -> List[int]:
@@ -51,6 +133,13 @@ def nbit_le_list_to_byte_list(data: Sequence[int], bitwidth: int) -> List[int]:
     @param bitwidth Width in bits of the input vales.
     @result List of integer bytes.
     """
+    bytewidth = bitwidth // 8
+    if bytewidth in _ARRAY_TYPECODES:
+        try:
+            return list(uint_le_array_to_bytes(data, bytewidth))
+        except OverflowError:
+            # Fall back to truncating out of range values.
+            pass
     return [(x >> shift) & 0xff for x in data for shift in range(0, bitwidth, 8)]
 
 def byte_list_to_u32le_list(data: Sequence[int], pad: int = 0x00) -> List[int]:
@@ -58,42 +147,30 @@ def byte_list_to_u32le_list(data: Sequence[int], pad: int = 0x00) -> List[int]:
 
     If the length of the data list is not a multiple of 4, then the pad value is used
     for the additional required bytes.
+
+    @note Use bytes_to_u32le() to avoid creating a list.
     """
-    res = []
-    for i in range(len(data) // 4):
-        res.append(data[i * 4 + 0] |
-                   data[i * 4 + 1] << 8 |
-                   data[i * 4 + 2] << 16 |
-                   data[i * 4 + 3] << 24)
-    remainder = (len(data) % 4)
-    if remainder != 0:
-        pad_count = 4 - remainder
-        res += byte_list_to_u32le_list(list(data[-remainder:]) + [pad] * pad_count)
-    return res
+    return bytes_to_u32le(_as_bytes(data), pad).tolist()
 
 def u32le_list_to_byte_list(data: Sequence[int]) -> List[int]:
-    """@brief Convert a word array into a byte array"""
-    res = []
-    for x in data:
-        res.append((x >> 0) & 0xff)
-        res.append((x >> 8) & 0xff)
-        res.append((x >> 16) & 0xff)
-        res.append((x >> 24) & 0xff)
-    return res
+    """@brief Convert a word array into a byte array
+
+    @note Use u32le_to_bytes() to avoid creating a list.
+    """
+    return nbit_le_list_to_byte_list(data, 32)
 
 def u16le_list_to_byte_list(data: Sequence[int]) -> List[int]:
     """@brief Convert a halfword array into a byte array"""
-    byte_data = []
-    for h in data:
-        byte_data.extend([h & 0xff, (h >> 8) & 0xff])
-    return byte_data
+    return nbit_le_list_to_byte_list(data, 16)
 
 def byte_list_to_u16le_list(byte_data: Sequence[int]) -> List[int]:
-    """@brief Convert a byte array into a halfword array"""
-    data = []
-    for i in range(0, len(byte_data), 2):
-        data.append(byte_data[i] | (byte_data[i + 1] << 8))
-    return data
+    """@brief Convert a byte array into a halfword array
+
+    @exception IndexError The length of the byte array is not a multiple of 2.
+    """
+    if len(byte_data) % 2:
+        raise IndexError("byte array length is not a multiple of 2")
+    return bytes_to_u16le(_as_bytes(byte_data)).tolist()
 
 def u32_to_float32(data: int) -> float:
     """@brief Convert a 32-bit int to an IEEE754 float"""
@@ -0,0 +1,72 @@
+# pyOCD debugger
+# Copyright (c) 2026 pyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import List
+
+## Reflected CRC-32 polynomial, as used by zlib.
+_CRC32_POLY = 0xedb88320
+
+def _gf2_matrix_times(mat: List[int], vec: int) -> int:
+    result = 0
+    i = 0
+    while vec:
+        if vec & 1:
+            result ^= mat[i]
+        vec >>= 1
+        i += 1
+    return result
+
+def _gf2_matrix_square(mat: List[int]) -> List[int]:
+    return [_gf2_matrix_times(mat, mat[n]) for n in range(32)]
+
+def crc32_combine(crc1: int, crc2: int, len2: int) -> int:
+    """@brief Combine the CRC32s of two consecutive blocks of data.
+
+    This is the same algorithm as zlib's crc32_combine(), which isn't exposed by Python's zlib module.
+
+    @param crc1 CRC32 of the first block.
+    @param crc2 CRC32 of the second block.
+    @param len2 Length in bytes of the second block.
+    @return CRC32 of the concatenation of the two blocks.
+    """
+    if len2 <= 0:
+        return crc1
+
+    # Operator for one zero bit.
+    odd = [_CRC32_POLY] + [1 << n for n in range(31)]
+    # Operator for two zero bits.
+    even = _gf2_matrix_square(odd)
+    # Operator for four zero bits.
+    odd = _gf2_matrix_square(even)
+
+    # Apply len2 zero bytes to crc1. The first square below puts the operator for one zero byte
+    # in even.
+    while True:
+        even = _gf2_matrix_square(odd)
+        if len2 & 1:
+            crc1 = _gf2_matrix_times(even, crc1)
+        len2 >>= 1
+        if not len2:
+            break
+
+        odd = _gf2_matrix_square(even)
+        if len2 & 1:
+            crc1 = _gf2_matrix_times(odd, crc1)
+        len2 >>= 1
+        if not len2:
+            break
+
+    return (crc1 ^ crc2) & 0xffffffff
@@ -15,13 +15,20 @@
 # limitations under the License.
 
 from abc import ABC, abstractmethod
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import logging
 import selectors
 import socket
-from typing import Optional, Sequence
+import threading
+from typing import (Dict, List, Mapping, Optional, Sequence, Tuple)
 
 from ..core.soc_target import SoCTarget
 from ..core import exceptions
-from ..debug.rtt import RTTControlBlock, RTTUpChannel, RTTDownChannel
+from ..debug.rtt import (RTTControlBlock, RTTPollScheduler)
+from .async_stream_server import (AsyncStream, AsyncStreamServer)
+
+LOG = logging.getLogger(__name__)
 
 
 class RTTChanWorker(ABC):
@@ -136,6 +143,7 @@ class RTTServer:
     """@brief Keeps track of polling for multiple active RTT channels and the
               sources and sinks of data for each channel. """
     control_block: RTTControlBlock
+    scheduler: RTTPollScheduler
     workers: Optional[Sequence[Optional[RTTChanWorker]]]
     up_buffers: Optional[Sequence[bytes]]
     down_buffers: Optional[Sequence[bytes]]
@@ -154,43 +162,53 @@ class RTTServer:
         self.control_block = RTTControlBlock.from_target(target, address = address,
                                     size = size, control_block_id = control_block_id)
 
+        self.scheduler = RTTPollScheduler()
         self.workers = None
         self.up_buffers = None
         self.down_buffers = None
 
     def poll(self):
-        """@brief Reads from and writes to active RTT channels. """
+        """@brief Reads from and writes to active RTT channels.
+
+        All active channels are serviced with a single batched transfer, so the number of target
+        accesses doesn't grow with the number of channels.
+        """
         if not self.running:
             # not yet started
             return
 
+        num_up_chans: int = len(self.up_buffers)
+        num_down_chans: int = len(self.down_buffers)
+
+        # Read from workers
+        up_chans = []
+        down_data = {}
         for i, worker in enumerate(self.workers):
             if worker is None:
                 continue
-
-            # Read from up channel
-            try:
-                up_chan: RTTUpChannel = self.control_block.up_channels[i]
-            except IndexError:
-                pass
-            else:
-                self.up_buffers[i] += up_chan.read()
-
-            # Write to worker
-            bytes_written = worker.write_up_data(self.up_buffers[i])
-            self.up_buffers[i] = self.up_buffers[i][bytes_written:]
-
-            # Read from worker
-            self.down_buffers[i] += worker.get_down_data()
-
-            # Write data to down channel
-            try:
-                down_chan: RTTDownChannel = self.control_block.down_channels[i]
-            except IndexError:
-                pass
-            else:
-                bytes_out: int = down_chan.write(self.down_buffers[i])
-                self.down_buffers[i] = self.down_buffers[i][bytes_out:]
+            if i < num_up_chans:
+                up_chans.append(i)
+            data = worker.get_down_data()
+            if i < num_down_chans:
+                self.down_buffers[i] += data
+                if self.down_buffers[i]:
+                    down_data[i] = self.down_buffers[i]
+
+        # Read from up channels and write to down channels
+        up_data, bytes_out = self.control_block.transfer(up_chans, down_data)
+
+        for i, count in bytes_out.items():
+            self.down_buffers[i] = self.down_buffers[i][count:]
+
+        self.scheduler.update((len(up_data.get(i, b'')), self.control_block.up_channels[i].size)
+                for i in up_chans)
+
+        # Write to workers
+        for i in up_chans:
+            self.up_buffers[i] += up_data.get(i, b'')
+            if self.up_buffers[i]:
+                bytes_written = self.workers[i].write_up_data(self.up_buffers[i])
+                self.up_buffers[i] = self.up_buffers[i][bytes_written:]
 
     def start(self):
         """@brief Find and parse RTT control block. """
@@ -203,6 +221,7 @@ class RTTServer:
         self.workers = [None] * num_chans
         self.up_buffers = [bytes()] * num_up_chans
         self.down_buffers = [bytes()] * num_down_chans
+        self.scheduler.reset()
 
     def stop(self):
         """@brief Close all RTT workers. """
@@ -222,6 +241,11 @@ class RTTServer:
         """@brief True if RTT is started. """
         return self.workers is not None
 
+    @property
+    def poll_interval(self) -> float:
+        """@brief Recommended time in seconds until the next call to poll(). """
+        return self.scheduler.interval
+
     def add_server(self, port: int, channel: int):
         """@brief Start a new TCP server to communicate with a given RTT channel.
 
@@ -249,3 +273,161 @@ class RTTServer:
                 if worker.port == port:
                     worker.close()
                     self.workers[i] = None
+
+
+class AsyncRTTServer:
+    """@brief Serves RTT channels over TCP using an AsyncStreamServer.
+
+    Each channel added with add_channel() gets its own stream, which any number of clients may
+    connect to at once. Up channel data is sent to all of a channel's clients, and data from the
+    clients is written to the down channel with the same index. If the target doesn't drain the
+    down channel, the stream stops reading from its clients until it does.
+
+    Target memory is only accessed from a dedicated executor thread, so the event loop and its
+    clients are never blocked by probe transfers. All channels are serviced with one batched
+    RTTControlBlock.transfer() call per poll, and the poll interval is set by an RTTPollScheduler.
+    """
+
+    def __init__(self, control_block: RTTControlBlock, server: AsyncStreamServer,
+            lock: Optional[threading.Lock] = None) -> None:
+        """@brief Constructor.
+        @param self
+        @param control_block Started RTT control block.
+        @param server The stream server used to serve channels.
+        @param lock Optional lock held while accessing the target, for sharing the target with other
+            threads such as a gdbserver or SWV reader.
+        """
+        self.control_block = control_block
+        self.scheduler = RTTPollScheduler()
+        self._server = server
+        self._lock = lock
+        self._channels: Dict[int, AsyncStream] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._poll_future = None
+        self._running = False
+
+    @property
+    def channels(self) -> Dict[int, AsyncStream]:
+        """@brief Map of RTT channel index to the stream serving it."""
+        return self._channels
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def add_channel(self, port: int, channel: int) -> AsyncStream:
+        """@brief Serve an RTT channel on a TCP port.
+
+        @param self
+        @param port TCP port to listen on, or 0 for an unused port.
+        @param channel Index of the RTT channel. The up channel is served, plus the down channel of
+            the same index if it exists.
+        @return The stream serving the channel.
+        @exception RTTError The channel doesn't exist or is already served.
+        """
+        if channel in self._channels:
+            raise exceptions.RTTError(f"RTT channel {channel} is already served")
+        if not (0 <= channel < max(len(self.control_block.up_channels),
+                len(self.control_block.down_channels))):
+            raise exceptions.RTTError(f"RTT channel {channel} does not exist")
+        writable = channel < len(self.control_block.down_channels)
+        stream = self._server.add_stream(port, f"RTT channel {channel}", writable=writable)
+        # Only modified on the event loop thread, so the poller sees a consistent map.
+        self._server.run_coroutine(self._set_channel(channel, stream))
+        return stream
+
+    def remove_channel(self, channel: int) -> None:
+        """@brief Stop serving an RTT channel."""
+        stream = self._channels.get(channel)
+        if stream is None:
+            return
+        self._server.run_coroutine(self._set_channel(channel, None))
+        self._server.remove_stream(stream.port)
+
+    async def _set_channel(self, channel: int, stream: Optional[AsyncStream]) -> None:
+        if stream is None:
+            self._channels.pop(channel, None)
+        else:
+            self._channels[channel] = stream
+
+    def start(self) -> None:
+        """@brief Start polling the target."""
+        if self._running:
+            return
+        self._running = True
+        self.scheduler.reset()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="RTTPoll")
+        self._poll_future = self._server.submit(self._poll_loop())
+
+    def stop(self) -> None:
+        """@brief Stop polling the target and serving all channels."""
+        if not self._running:
+            return
+        self._running = False
+        assert self._poll_future and self._executor
+        try:
+            self._poll_future.result()
+        except exceptions.Error as err:
+            LOG.debug("RTT poll loop stopped with error: %s", err)
+        except Exception:
+            LOG.error("RTT poll loop stopped with unexpected error", exc_info=True)
+        self._executor.shutdown()
+        for channel in list(self._channels):
+            self.remove_channel(channel)
+
+    def _transfer(self, up_chans: List[int], down_data: Mapping[int, bytes]
+            ) -> Tuple[Dict[int, bytes], Dict[int, int]]:
+        """@brief Runs on the executor thread."""
+        if self._lock:
+            with self._lock:
+                return self.control_block.transfer(up_chans, down_data)
+        return self.control_block.transfer(up_chans, down_data)
+
+    async def _poll_loop(self) -> None:
+        loop = asyncio.get_event_loop()
+        num_up_chans = len(self.control_block.up_channels)
+        num_down_chans = len(self.control_block.down_channels)
+
+        failing = False
+        while self._running:
+            up_chans = [i for i in self._channels if i < num_up_chans]
+            down_data = {}
+            for i, stream in self._channels.items():
+                if i < num_down_chans:
+                    data = stream.get_received_data()
+                    if data:
+                        down_data[i] = data
+
+            if up_chans or down_data:
+                try:
+                    up_data, bytes_out = await loop.run_in_executor(self._executor, self._transfer,
+                            up_chans, down_data)
+                except exceptions.Error as err:
+                    # Only the first of a run of failures is reported, for instance while the target
+                    # is held in reset, and polling slows down until the target is accessible again.
+                    if failing:
+                        LOG.debug("RTT poll failed: %s", err)
+                    else:
+                        LOG.warning("RTT poll failed: %s", err)
+                    failing = True
+                    await asyncio.sleep(self.scheduler.back_off())
+                    continue
+                except Exception:
+                    # Stop polling rather than letting the error go unreported until stop().
+                    LOG.error("Unexpected error polling RTT; RTT polling stopped", exc_info=True)
+                    return
+                failing = False
+
+                for i, count in bytes_out.items():
+                    stream = self._channels.get(i)
+                    if stream is not None:
+                        stream.consume_received_data(count)
+                for i, data in up_data.items():
+                    stream = self._channels.get(i)
+                    if stream is not None:
+                        stream.publish(data)
+
+                self.scheduler.update((len(up_data.get(i, b'')), self.control_block.up_channels[i].size)
+                        for i in up_chans)
+
+            await asyncio.sleep(self.scheduler.interval)
@@ -123,6 +123,22 @@ class ClientSocket(object):
     def write(self, data):
         return self._socket.sendall(data)
 
+    def read_exact(self, length):
+        """@brief Read exactly _length_ bytes, waiting as long as necessary.
+        @exception EOFError The connection was closed before all the data was received.
+        """
+        while len(self._buffer) < length:
+            try:
+                data = self.read(max(self._packet_size, length - len(self._buffer)))
+            except socket.timeout:
+                continue
+            if not data:
+                raise EOFError("connection closed")
+            self._buffer += data
+        data = bytes(self._buffer[:length])
+        del self._buffer[:length]
+        return data
+
     def readline(self):
         while True:
             # Try to extract a line from the buffer.
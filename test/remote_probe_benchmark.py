@@ -0,0 +1,86 @@
+# pyOCD debugger
+# Copyright (c) 2026 pyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""@brief Remote probe protocol throughput benchmark.
+
+Serves a stand-in probe, backed only by host memory, over a local probe server and measures block
+memory transfer throughput with each remote probe protocol version. Because no real probe is
+involved, the results show the overhead of the protocol and its encoding alone.
+"""
+
+import argparse
+import logging
+from time import perf_counter
+from unittest import mock
+
+from pyocd.coresight.ap import APv1Address
+from pyocd.probe.tcp_client_probe import TCPClientProbe
+from pyocd.probe.tcp_probe_server import DebugProbeServer
+from unit.mockprobe import MockProbe
+
+def measure(memif, memory_size: int, block_words: int, total_bytes: int, write: bool, width: int) -> float:
+    """@brief Transfer _total_bytes_ and return the throughput in bytes per second."""
+    block_bytes = block_words * 4
+    count = max(1, total_bytes // block_bytes)
+    words = list(range(block_words))
+    data = [i & 0xff for i in range(block_bytes)]
+    start = perf_counter()
+    for i in range(count):
+        addr = (i * block_bytes) % (memory_size - block_bytes)
+        if write and width == 32:
+            memif.write_memory_block32(addr, words)
+        elif write:
+            memif.write_memory_block8(addr, data)
+        elif width == 32:
+            memif.read_memory_block32(addr, block_words)
+        else:
+            memif.read_memory_block8(addr, block_bytes)
+    # Queued writes are only complete once flushed.
+    memif._remote_probe.flush()
+    return count * block_bytes / (perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description="Remote probe protocol throughput benchmark")
+    parser.add_argument("-s", "--size", type=int, default=4 * 1024 * 1024,
+        help="Bytes to transfer per measurement. Default 4 MB.")
+    parser.add_argument("-b", "--block", type=int, default=1024,
+        help="Words per block transfer. Default 1024.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    probe = MockProbe()
+    probe.memory.data = bytearray(1024 * 1024)
+    session = mock.Mock(log_tracebacks=False, options={'probeserver.lock_lease_timeout': 10.0})
+    server = DebugProbeServer(session, probe, port=0, serve_local_only=True)
+    server.start()
+
+    print(f"{'Version':>7} {'Transfer':<14} {'MB/s':>8}")
+    try:
+        for version in range(1, TCPClientProbe.PROTOCOL_VERSION + 1):
+            with mock.patch.object(TCPClientProbe, 'PROTOCOL_VERSION', version):
+                client = TCPClientProbe(f"localhost:{server.port}")
+                client.open()
+            memif = client.get_memory_interface_for_ap(APv1Address(0))
+            for name, write, width in (("read block32", False, 32), ("write block32", True, 32),
+                    ("read block8", False, 8), ("write block8", True, 8)):
+                rate = measure(memif, len(probe.memory.data), args.block, args.size, write, width)
+                print(f"{version:>7} {name:<14} {rate / 1e6:>8.2f}")
+            client.close()
+    finally:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
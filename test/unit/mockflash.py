@@ -0,0 +1,94 @@
+# pyOCD debugger
+# Copyright (c) 2026 pyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from binascii import crc32
+from unittest import mock
+
+from pyocd.flash.flash import Flash
+
+class MockFlash(Flash):
+    """@brief Flash backed by a bytearray, with a host implementation of the CRC analyzer."""
+
+    def __init__(self, region, options, double_buffer=False, erase_all=False):
+        session = mock.Mock()
+        session.options = options
+        session.probe.unique_id = "probe0"
+        target = mock.Mock(spec=['session', 'part_number', 'reset_and_halt', 'read_memory_block8',
+                'write_memory_bytes'])
+        target.session = session
+        target.part_number = "target0"
+        target.read_memory_block8.side_effect = self._read
+        target.write_memory_bytes.side_effect = self._write_buffer
+        super().__init__(target, None)
+        self.use_analyzer = True
+        self.double_buffer_supported = double_buffer
+        self.erase_all_supported = erase_all
+        self.page_buffers = [0x20000000, 0x20001000]
+        self.region = region
+        self.memory = bytearray([0xff]) * region.length
+        self.crc_calls = []
+        self.read_count = 0
+        self.programmed = []
+        self.buffers = [None, None]
+        self.calls = []
+        self._pending = None
+
+    @property
+    def is_erase_all_supported(self):
+        return self.erase_all_supported
+
+    def _read(self, addr, size):
+        self.read_count += size
+        offset = addr - self.region.start
+        return list(self.memory[offset:offset + size])
+
+    def _write_buffer(self, addr, data):
+        self.calls.append('load')
+        self.buffers[self.page_buffers.index(addr)] = bytes(data)
+
+    def init(self, operation, address=None, clock=0, reset=True):
+        self.calls.append(operation)
+
+    def uninit(self):
+        pass
+
+    def cleanup(self):
+        pass
+
+    def compute_crcs(self, sectors):
+        self.crc_calls.append(list(sectors))
+        return [crc32(self.memory[addr - self.region.start:addr - self.region.start + size])
+                for addr, size in sectors]
+
+    def erase_all(self):
+        self.memory[:] = b'\xff' * len(self.memory)
+
+    def erase_sector(self, address):
+        offset = address - self.region.start
+        self.memory[offset:offset + self.region.sector_size] = b'\xff' * self.region.sector_size
+
+    def program_page(self, address, bytes):
+        offset = address - self.region.start
+        self.memory[offset:offset + len(bytes)] = bytearray(bytes)
+        self.programmed.append(address)
+
+    def start_program_page_with_buffer(self, buffer_number, address):
+        self._pending = (address, self.buffers[buffer_number])
+
+    def wait_for_completion(self, timeout=None):
+        address, data = self._pending
+        self.program_page(address, data)
+        return 0
@@ -0,0 +1,170 @@
+# pyOCD debugger
+# Copyright (c) 2026 pyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from pyocd.core import exceptions
+from pyocd.core.memory_interface import MemoryInterface
+from pyocd.probe.debug_probe import DebugProbe
+from pyocd.utility import conversion
+
+class MockMemoryInterface(MemoryInterface):
+    """@brief Memory interface backed by a bytearray, starting at address 0."""
+
+    def __init__(self, size=0x10000):
+        self.data = bytearray(size)
+
+    def _check(self, addr, size):
+        if addr < 0 or addr + size > len(self.data):
+            raise exceptions.TransferFaultError("mock fault", fault_address=addr)
+
+    def write_memory(self, addr, data, transfer_size=32, **attrs):
+        size = transfer_size // 8
+        self._check(addr, size)
+        self.data[addr:addr + size] = data.to_bytes(size, 'little')
+
+    def read_memory(self, addr, transfer_size=32, now=True, **attrs):
+        size = transfer_size // 8
+        self._check(addr, size)
+        value = int.from_bytes(self.data[addr:addr + size], 'little')
+        return value if now else (lambda: value)
+
+    def write_memory_block8(self, addr, data, **attrs):
+        self._check(addr, len(data))
+        self.data[addr:addr + len(data)] = bytes(data)
+
+    def read_memory_block8(self, addr, size, **attrs):
+        self._check(addr, size)
+        return list(self.data[addr:addr + size])
+
+    def write_memory_block32(self, addr, data, **attrs):
+        self.write_memory_block8(addr, conversion.u32le_list_to_byte_list(data))
+
+    def read_memory_block32(self, addr, size, **attrs):
+        return conversion.byte_list_to_u32le_list(self.read_memory_block8(addr, size * 4))
+
+class MockProbe(DebugProbe):
+    """@brief Stand-in debug probe with DP and AP registers held in dicts.
+
+    Reads with `now=False` are queued until flush() or the result is needed, like a probe that
+    batches transfers. `transfer_count` counts how many times queued transfers were performed.
+    Accessing an address in `fault_addresses` raises a TransferFaultError.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.dp = {}
+        self.ap = {}
+        self.memory = MockMemoryInterface()
+        self.fault_addresses = set()
+        self.transfer_count = 0
+        self._queued = []
+        self._is_open = False
+
+    @property
+    def vendor_name(self):
+        return "Mock"
+
+    @property
+    def product_name(self):
+        return "Probe"
+
+    @property
+    def supported_wire_protocols(self):
+        return [DebugProbe.Protocol.DEFAULT, DebugProbe.Protocol.SWD]
+
+    @property
+    def unique_id(self):
+        return "mock"
+
+    @property
+    def wire_protocol(self):
+        return DebugProbe.Protocol.SWD
+
+    @property
+    def is_open(self):
+        return self._is_open
+
+    @property
+    def capabilities(self):
+        return {DebugProbe.Capability.MANAGED_AP_SELECTION}
+
+    def open(self):
+        self._is_open = True
+
+    def close(self):
+        self._is_open = False
+
+    def connect(self, protocol=None):
+        pass
+
+    def disconnect(self):
+        pass
+
+    def flush(self):
+        if self._queued:
+            self.transfer_count += 1
+            self._queued = []
+
+    def _access(self, regs, addr):
+        if addr in self.fault_addresses:
+            raise exceptions.TransferFaultError("mock fault")
+        return regs.get(addr, 0)
+
+    def _read(self, regs, addr, now):
+        value = self._access(regs, addr)
+        self._queued.append(addr)
+        if now:
+            self.flush()
+            return value
+
+        def read_cb():
+            self.flush()
+            return value
+        return read_cb
+
+    def read_dp(self, addr, now=True):
+        return self._read(self.dp, addr, now)
+
+    def write_dp(self, addr, data):
+        self._access(self.dp, addr)
+        self.dp[addr] = data
+        self._queued.append(addr)
+
+    def read_ap(self, addr, now=True):
+        return self._read(self.ap, addr, now)
+
+    def write_ap(self, addr, data):
+        self._access(self.ap, addr)
+        self.ap[addr] = data
+        self._queued.append(addr)
+
+    def read_ap_multiple(self, addr, count=1, now=True):
+        values = [self._access(self.ap, addr)] * count
+        self._queued.append(addr)
+        if now:
+            self.flush()
+            return values
+
+        def read_cb():
+            self.flush()
+            return values
+        return read_cb
+
+    def write_ap_multiple(self, addr, values):
+        for value in values:
+            self.write_ap(addr, value)
+
+    def get_memory_interface_for_ap(self, ap_address):
+        return self.memory
@@ -0,0 +1,170 @@
+# pyOCD debugger
+# Copyright (c) 2026 pyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import socket
+import time
+import pytest
+from unittest import mock
+
+from pyocd.core import exceptions
+from pyocd.debug.rtt import (GenericRTTControlBlock, RTTPollScheduler)
+from pyocd.utility.async_stream_server import AsyncStreamServer
+from pyocd.utility.rtt_server import AsyncRTTServer
+
+from .test_rtt import (down_buf_addr, down_desc_addr, make_target, target_write_up, CB_ADDR)
+
+def wait_for(predicate, timeout=2.0):
+    end = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > end:
+            return False
+        time.sleep(0.005)
+    return True
+
+def connect(stream):
+    sock = socket.create_connection(('localhost', stream.port), timeout=2.0)
+    return sock
+
+def recv_exactly(sock, count):
+    data = b''
+    while len(data) < count:
+        chunk = sock.recv(count - len(data))
+        if not chunk:
+            break
+        data += chunk
+    return data
+
+@pytest.fixture(scope='function')
+def server():
+    server = AsyncStreamServer()
+    yield server
+    server.stop()
+
+class TestAsyncStreamServer:
+    def test_fan_out(self, server):
+        stream = server.add_stream(0, "test")
+        assert stream.port != 0
+        clients = [connect(stream) for _ in range(3)]
+        assert wait_for(lambda: stream.client_count == 3)
+        stream.write(b'hello')
+        stream.write("\xe9")
+        for sock in clients:
+            assert recv_exactly(sock, 6) == b'hello\xe9'
+            sock.close()
+        assert wait_for(lambda: stream.client_count == 0)
+
+    def test_read_only(self, server):
+        stream = server.add_stream(0, "test")
+        sock = connect(stream)
+        sock.sendall(b'ignored')
+        time.sleep(0.05)
+        assert server.run_coroutine(self._get(stream)) == b''
+        sock.close()
+
+    async def _get(self, stream):
+        return stream.get_received_data()
+
+    async def _consume(self, stream, count):
+        stream.consume_received_data(count)
+
+    def test_back_pressure(self, server):
+        stream = server.add_stream(0, "test", writable=True, receive_buffer_limit=16)
+        sock = connect(stream)
+        sock.setblocking(False)
+        # Send much more than the limit; the stream stops reading once it holds 16 bytes.
+        sent = 0
+        try:
+            for _ in range(1000):
+                sent += sock.send(b'x' * 4096)
+        except BlockingIOError:
+            pass
+        assert wait_for(lambda: len(server.run_coroutine(self._get(stream))) >= 16)
+        time.sleep(0.05)
+        received = len(server.run_coroutine(self._get(stream)))
+        assert received < sent
+
+        # Draining the buffer resumes reading.
+        server.run_coroutine(self._consume(stream, received))
+        assert wait_for(lambda: len(server.run_coroutine(self._get(stream))) > 0)
+        sock.close()
+
+    def test_remove_stream(self, server):
+        stream = server.add_stream(0, "test")
+        port = stream.port
+        server.remove_stream(port)
+        assert port not in server.streams
+        with pytest.raises(OSError):
+            socket.create_connection(('localhost', port), timeout=1.0)
+
+class TestAsyncRTTServer:
+    def test_channels(self, server):
+        target = make_target()
+        cb = GenericRTTControlBlock(target, address=CB_ADDR, size=0)
+        cb.start()
+        rtt = AsyncRTTServer(cb, server)
+        streams = [rtt.add_channel(0, i) for i in range(2)]
+        clients = [connect(streams[0]), connect(streams[0]), connect(streams[1])]
+        assert wait_for(lambda: streams[0].client_count == 2 and streams[1].client_count == 1)
+        rtt.start()
+        try:
+            target_write_up(target, 0, b'abc')
+            target_write_up(target, 1, b'xyz')
+            assert recv_exactly(clients[0], 3) == b'abc'
+            assert recv_exactly(clients[1], 3) == b'abc'
+            assert recv_exactly(clients[2], 3) == b'xyz'
+
+            clients[2].sendall(b'cmd')
+            assert wait_for(lambda: target.get32(down_desc_addr(1) + 12) == 3)
+            assert bytes(target.read_memory_block8(down_buf_addr(1), 3)) == b'cmd'
+        finally:
+            rtt.stop()
+            for sock in clients:
+                sock.close()
+        assert rtt.channels == {}
+
+    def test_unexpected_poll_error(self, server, caplog):
+        target = make_target()
+        cb = GenericRTTControlBlock(target, address=CB_ADDR, size=0)
+        cb.start()
+        rtt = AsyncRTTServer(cb, server)
+        rtt.add_channel(0, 0)
+        with mock.patch.object(cb, 'transfer', side_effect=RuntimeError("boom")):
+            rtt.start()
+            assert wait_for(lambda: any(r.exc_info for r in caplog.records))
+            rtt.stop()
+        record = next(r for r in caplog.records if r.exc_info)
+        assert record.levelname == 'ERROR'
+        assert isinstance(record.exc_info[1], RuntimeError)
+        assert rtt.channels == {}
+
+    def test_poll_errors_back_off(self, server, caplog):
+        target = make_target()
+        cb = GenericRTTControlBlock(target, address=CB_ADDR, size=0)
+        cb.start()
+        rtt = AsyncRTTServer(cb, server)
+        rtt.add_channel(0, 0)
+        caplog.set_level(logging.DEBUG, logger='pyocd.utility.rtt_server')
+        with mock.patch.object(cb, 'transfer', side_effect=exceptions.TransferError("in reset")) as transfer:
+            rtt.start()
+            assert wait_for(lambda: transfer.call_count >= 3)
+            rtt.stop()
+        assert rtt.scheduler.interval == RTTPollScheduler.MAX_INTERVAL
+        # Each poll after the first failure waits for the maximum interval.
+        assert transfer.call_count < 20
+        failures = [r for r in caplog.records if r.getMessage().startswith("RTT poll failed")]
+        assert [r.levelname for r in failures].count('WARNING') == 1
+        assert all(r.levelname == 'DEBUG' for r in failures[1:])
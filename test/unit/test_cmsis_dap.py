@@ -0,0 +1,277 @@
+# pyOCD debugger
+# Copyright (c) 2026 pyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import struct
+import threading
+import pytest
+from unittest import mock
+
+from pyocd.core.session import Session
+from pyocd.probe.pydapaccess.cmsis_dap_core import (Command, DAPTransferResponse)
+from pyocd.probe.pydapaccess.dap_access_api import DAPAccessIntf
+from pyocd.probe.pydapaccess.dap_access_cmsis_dap import (DAPAccessCMSISDAP, READ, _Transfer)
+from pyocd.probe.pydapaccess.interface.interface import Interface
+
+class FakeInterface(Interface):
+    """@brief CMSIS-DAP interface that answers transfer commands with generated read data.
+
+    Responses are queued when a command is written. They can be held back to keep commands in
+    flight, and a command can be made to fail with an ACK fault.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.serial_number = "fake0"
+        self.open_count = 0
+        self.close_count = 0
+        self.commands = []
+        self.responses = []
+        self.read_words = []
+        self.fault_commands = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.release = threading.Event()
+        self.release.set()
+        self._queue = collections.deque()
+        self._cond = threading.Condition()
+
+    def open(self):
+        self.open_count += 1
+
+    def close(self):
+        self.close_count += 1
+
+    def _next_word(self):
+        word = (0x9e3779b9 * (len(self.read_words) + 1)) & 0xffffffff
+        self.read_words.append(word)
+        return word
+
+    def _respond(self, data):
+        fault = len(self.commands) in self.fault_commands
+        if data[0] == Command.DAP_TRANSFER:
+            count = data[2]
+            requests = []
+            pos = 3
+            for _ in range(count):
+                requests.append(data[pos])
+                pos += 1 if (data[pos] & READ) else 5
+            header = bytes([Command.DAP_TRANSFER])
+        else:
+            assert data[0] == Command.DAP_TRANSFER_BLOCK
+            count = data[2] | (data[3] << 8)
+            requests = [data[4]] * count
+            header = bytes([Command.DAP_TRANSFER_BLOCK])
+        if fault:
+            count, ack, words = 0, DAPTransferResponse.ACK_FAULT, []
+        else:
+            ack = DAPTransferResponse.ACK_OK
+            words = [self._next_word() for request in requests if request & READ]
+        if data[0] == Command.DAP_TRANSFER:
+            header += bytes([count, ack])
+        else:
+            header += struct.pack('<HB', count, ack)
+        return header + struct.pack(f'<{len(words)}I', *words)
+
+    def write(self, data):
+        response = self._respond(data)
+        with self._cond:
+            self.commands.append(bytes(data))
+            self.responses.append(response)
+            self._queue.append(response)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            self._cond.notify_all()
+
+    def read(self):
+        # Time out rather than hang the test if a response is never released.
+        assert self.release.wait(5)
+        with self._cond:
+            assert self._cond.wait_for(lambda: self._queue, 5)
+            self.in_flight -= 1
+            return self._queue.popleft()
+
+def make_daplink(interface, pipelined=True, packet_count=3):
+    """@brief Create and open a DAPAccessCMSISDAP as if it had already been examined."""
+    daplink = DAPAccessCMSISDAP(None, interface=interface)
+    daplink._has_opened_once = True
+    daplink._has_swo_uart = False
+    daplink._packet_count = packet_count
+    daplink._packet_size = 64
+    interface.set_packet_count(packet_count)
+    interface.set_packet_size(64)
+    daplink.set_deferred_transfer(True)
+    options_session = mock.Mock(options={'cmsis_dap.pipelined_transfers': pipelined})
+    with mock.patch.object(Session, 'get_current', return_value=options_session):
+        daplink.open()
+    return daplink
+
+def queue_reads_until(daplink, interface, command_count):
+    """@brief Queue single register reads until the given number of commands have been sent.
+    @return List of (command index, read callback) pairs.
+    """
+    reads = []
+    while len(interface.commands) < command_count:
+        index = len(interface.commands)
+        reads.append((index, daplink.read_reg(DAPAccessIntf.REG.AP_0xC, now=False)))
+    return reads
+
+class TestResponseReader:
+    def test_in_order_completion(self):
+        interface = FakeInterface()
+        daplink = make_daplink(interface, packet_count=3)
+        interface.release.clear()
+        reads = queue_reads_until(daplink, interface, 3)
+        # All packets are in flight and nothing has been read yet.
+        assert daplink._response_reader.outstanding == 3
+        assert interface.in_flight == 3
+        interface.release.set()
+        assert [cb() for _, cb in reads] == interface.read_words
+        daplink.flush()
+        assert daplink._response_reader.outstanding == 0
+
+        # Keep the pipeline full with more traffic; the packet count is never exceeded.
+        reads = queue_reads_until(daplink, interface, 12)
+        start = len(interface.read_words) - len(reads)
+        assert [cb() for _, cb in reads] == interface.read_words[start:]
+        assert interface.max_in_flight == 3
+        daplink.close()
+
+    def test_error_aborts_pending_transfers(self):
+        interface = FakeInterface()
+        daplink = make_daplink(interface, packet_count=3)
+        interface.fault_commands = {1}
+        interface.release.clear()
+        reads = queue_reads_until(daplink, interface, 3)
+        interface.release.set()
+        with pytest.raises(DAPAccessIntf.TransferFaultError):
+            daplink.flush()
+
+        # Transfers completed before the fault keep their data; all later ones get the error.
+        first = [cb for index, cb in reads if index == 0]
+        assert [cb() for cb in first] == interface.read_words[:len(first)]
+        for index, cb in reads:
+            if index > 0:
+                with pytest.raises(DAPAccessIntf.TransferFaultError):
+                    cb()
+
+        # Responses to commands after the faulting one were drained, so the link keeps working.
+        assert interface.in_flight == 0
+        assert daplink._response_reader.error is None
+        assert daplink.read_reg(DAPAccessIntf.REG.AP_0xC) == interface.read_words[-1]
+        daplink.close()
+
+    def test_wait_for_transfer_being_built(self):
+        interface = FakeInterface()
+        daplink = make_daplink(interface)
+        cb = daplink.read_reg(DAPAccessIntf.REG.AP_0xC, now=False)
+        assert interface.commands == []
+        # Waiting for the result sends the command that contains it.
+        assert cb() == interface.read_words[0]
+        assert len(interface.commands) == 1
+        assert daplink._response_reader.outstanding == 0
+        daplink.close()
+
+    def test_stop_restart(self):
+        interface = FakeInterface()
+        daplink = make_daplink(interface)
+        reader = daplink._response_reader
+        cb = daplink.read_reg(DAPAccessIntf.REG.AP_0xC, now=False)
+        daplink.close()
+        # Closing flushes the pending read and stops the reader thread.
+        assert cb() == interface.read_words[0]
+        assert not reader._thread.is_alive()
+        assert daplink._response_reader is None
+        assert interface.close_count == 1
+
+        options_session = mock.Mock(options={'cmsis_dap.pipelined_transfers': True})
+        with mock.patch.object(Session, 'get_current', return_value=options_session):
+            daplink.open()
+        assert interface.open_count == 2
+        assert daplink._response_reader is not None
+        assert daplink._response_reader is not reader
+        assert daplink.read_reg(DAPAccessIntf.REG.AP_0xC) == interface.read_words[1]
+        daplink.close()
+        assert daplink._response_reader is None
+
+def per_byte_decode(data):
+    """@brief Reference decoder: the original byte by byte word assembly of transfer responses."""
+    result = []
+    for i in range(0, len(data), 4):
+        word = ((data[0 + i] << 0) | (data[1 + i] << 8) |
+                (data[2 + i] << 16) | (data[3 + i] << 24))
+        result.append(word)
+    return result
+
+def response_payload(response):
+    """@brief Read data of a DAP_Transfer or DAP_TransferBlock response."""
+    return response[3:] if response[0] == Command.DAP_TRANSFER else response[4:]
+
+class TestResponseDecoding:
+    @pytest.fixture(params=[False, True], ids=['sync', 'pipelined'])
+    def pipelined(self, request):
+        return request.param
+
+    @pytest.mark.parametrize("data_type", [bytes, bytearray, memoryview])
+    @pytest.mark.parametrize("count", [1, 2, 15, 256])
+    def test_add_response(self, data_type, count):
+        data = bytes((i * 37 + 11) & 0xff for i in range(count * 4))
+        transfer = _Transfer(None, 0, count, READ, None)
+        transfer.add_response(data_type(data))
+        assert transfer._result == per_byte_decode(data)
+
+    @pytest.mark.parametrize("with_writes", [False, True], ids=['block', 'transfer'])
+    def test_split_and_multi_transfer_packets(self, pipelined, with_writes):
+        interface = FakeInterface()
+        daplink = make_daplink(interface, pipelined)
+        # Several transfers share packets, and the long ones are split across two or more packets.
+        counts = [1, 3, 40, 2, 7, 1, 20, 16]
+        reads = []
+        for count in counts:
+            if with_writes:
+                # Interleaved writes force DAP_Transfer rather than DAP_TransferBlock commands.
+                daplink.write_reg(DAPAccessIntf.REG.AP_0x4, count)
+            reads.append(daplink.reg_read_repeat(count, DAPAccessIntf.REG.AP_0xC, now=False))
+        results = [cb() for cb in reads]
+        daplink.close()
+
+        command = Command.DAP_TRANSFER if with_writes else Command.DAP_TRANSFER_BLOCK
+        assert command in set(response[0] for response in interface.responses)
+        assert len(interface.responses) > 1
+
+        # Compare against the per-byte decoder run on the concatenated response data.
+        payload = b''.join(response_payload(response) for response in interface.responses)
+        expected = []
+        pos = 0
+        for count in counts:
+            expected.append(per_byte_decode(payload[pos:pos + count * 4]))
+            pos += count * 4
+        assert pos == len(payload)
+        assert results == expected
+        assert [word for result in results for word in result] == interface.read_words
+
+class TestSessionOptions:
+    def test_probe_session_options(self):
+        # Options come from the probe's own session rather than the most recently created one.
+        interface = FakeInterface()
+        daplink = make_daplink(interface, pipelined=False)
+        daplink.close()
+        daplink.session = mock.Mock(options={'cmsis_dap.pipelined_transfers': True})
+        other_session = mock.Mock(options={'cmsis_dap.pipelined_transfers': False})
+        with mock.patch.object(Session, 'get_current', return_value=other_session):
+            daplink.open()
+        assert daplink._response_reader is not None
+        daplink.close()
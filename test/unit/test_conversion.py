@@ -19,6 +19,12 @@ import pytest
 import six
 
 from pyocd.utility.conversion import (
+    bytes_to_uint_le_array,
+    uint_le_array_to_bytes,
+    bytes_to_u32le,
+    u32le_to_bytes,
+    bytes_to_u16le,
+    u16le_to_bytes,
     byte_list_to_nbit_le_list,
     nbit_le_list_to_byte_list,
     byte_list_to_u32le_list,
@@ -154,6 +160,34 @@ class TestConversionUtilities(object):
         ]
         assert u32le_list_to_byte_list(data) == list(range(32))
 
+    def test_bytes_to_u32le(self):
+        result = bytes_to_u32le(bytes(range(8)))
+        assert result.itemsize == 4
+        assert list(result) == [0x03020100, 0x07060504]
+        assert list(bytes_to_u32le(memoryview(b'abcde'), pad=0xff)) == [0x64636261, 0xffffff65]
+        assert list(bytes_to_u32le(b'')) == []
+
+    def test_u32le_to_bytes(self):
+        assert u32le_to_bytes([0x03020100, 0x07060504]) == bytes(range(8))
+        assert u32le_to_bytes(bytes_to_u32le(bytes(range(32)))) == bytes(range(32))
+        with pytest.raises(OverflowError):
+            u32le_to_bytes([0x1_0000_0000])
+
+    def test_u16le_bytes_round_trip(self):
+        assert list(bytes_to_u16le(b'\x12\x34\xab\xfe')) == [0x3412, 0xfeab]
+        assert u16le_to_bytes([0x3412, 0xfeab]) == b'\x12\x34\xab\xfe'
+
+    @pytest.mark.parametrize(("w",), [(1,), (2,), (4,), (8,)])
+    def test_uint_le_array_round_trip(self, w):
+        data = bytes(range(64))
+        values = bytes_to_uint_le_array(data, w)
+        assert list(values) == [int.from_bytes(data[i:i + w], 'little') for i in range(0, 64, w)]
+        assert uint_le_array_to_bytes(values, w) == data
+        assert uint_le_array_to_bytes(list(values), w) == data
+
+    def test_u32le_list_to_byte_list_truncates(self):
+        assert u32le_list_to_byte_list([0x1_0403_0201]) == [1, 2, 3, 4]
+
     def test_u16leListToByteList(self):
         data = [0x3412, 0xFEAB]
         assert u16le_list_to_byte_list(data) == [
@@ -170,6 +204,10 @@ class TestConversionUtilities(object):
             0xCDAB,
         ]
 
+    def test_byteListToU16leListOddLength(self):
+        with pytest.raises(IndexError):
+            byte_list_to_u16le_list([0x01, 0x00, 0xAB])
+
     def test_u32BEToFloat32BE(self):
         assert u32_to_float32(0x012345678) == 5.690456613903524e-28
 
@@ -0,0 +1,34 @@
+# pyOCD debugger
+# Copyright (c) 2026 pyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import pytest
+from zlib import crc32
+
+from pyocd.utility.crc import crc32_combine
+
+@pytest.mark.parametrize(("len1", "len2"), [
+        (0, 0),
+        (0, 5),
+        (1, 1),
+        (7, 3),
+        (100, 256),
+        (4096, 65536),
+    ])
+def test_crc32_combine(len1, len2):
+    data1 = os.urandom(len1)
+    data2 = os.urandom(len2)
+    assert crc32_combine(crc32(data1), crc32(data2), len2) == crc32(data1 + data2)
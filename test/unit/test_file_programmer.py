@@ -0,0 +1,96 @@
+# pyOCD debugger
+# Copyright (c) 2026 pyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import pytest
+from intelhex import IntelHex
+from unittest import mock
+
+from pyocd.core.memory_map import (FlashRegion, MemoryMap)
+from pyocd.flash.file_programmer import FileProgrammer
+
+@pytest.fixture(scope='function')
+def bin_path(tmp_path):
+    path = tmp_path / "image.bin"
+    path.write_bytes(bytes(range(16)))
+    return str(path)
+
+class TestReadFile:
+    def test_bin(self, bin_path):
+        image = FileProgrammer.read_file(bin_path)
+        assert image.chunks == [(None, bytes(range(16)))]
+        assert image.byte_count == 16
+        assert not image.ignore_invalid
+
+    def test_bin_address_and_skip(self, bin_path):
+        image = FileProgrammer.read_file(bin_path, base_address=0x1000, skip=4)
+        assert image.chunks == [(0x1000, bytes(range(4, 16)))]
+
+    def test_hex(self, tmp_path):
+        hexfile = IntelHex()
+        hexfile.puts(0x100, b'\x01\x02\x03')
+        hexfile.puts(0x200, b'\x04')
+        path = tmp_path / "image.hex"
+        hexfile.write_hex_file(str(path))
+        image = FileProgrammer.read_file(str(path))
+        assert image.chunks == [(0x100, b'\x01\x02\x03'), (0x200, b'\x04')]
+        assert image.ignore_invalid
+
+    def test_file_object(self):
+        image = FileProgrammer.read_file(io.BytesIO(b'\xaa\xbb'), file_format='bin', base_address=0)
+        assert image.chunks == [(0, b'\xaa\xbb')]
+
+    def test_errors(self, tmp_path, bin_path):
+        with pytest.raises(FileNotFoundError):
+            FileProgrammer.read_file(str(tmp_path / "missing.bin"))
+        with pytest.raises(ValueError):
+            FileProgrammer.read_file(bin_path, file_format='srec')
+        with pytest.raises(ValueError):
+            FileProgrammer.read_file(io.BytesIO(b''))
+
+class TestProgramImage:
+    @pytest.fixture(scope='function')
+    def session(self):
+        session = mock.Mock()
+        session.target.memory_map = MemoryMap(
+                FlashRegion(start=0x8000, length=0x1000, blocksize=0x100, is_boot_memory=True))
+        return session
+
+    def test_same_image_multiple_times(self, session, bin_path):
+        image = FileProgrammer.read_file(bin_path)
+        with mock.patch('pyocd.flash.file_programmer.FlashLoader') as loader_class:
+            programmer = FileProgrammer(session)
+            programmer.program_image(image)
+            programmer.program_image(image)
+        loader = loader_class.return_value
+        assert loader.add_data.call_args_list == [mock.call(0x8000, bytes(range(16)))] * 2
+        assert loader.commit.call_count == 2
+
+    def test_invalid_chunk(self, session, tmp_path):
+        hexfile = IntelHex()
+        hexfile.puts(0x100, b'\x01')
+        path = tmp_path / "image.hex"
+        hexfile.write_hex_file(str(path))
+        image = FileProgrammer.read_file(str(path))
+        with mock.patch('pyocd.flash.file_programmer.FlashLoader') as loader_class:
+            loader_class.return_value.add_data.side_effect = ValueError("no region")
+            FileProgrammer(session).program_image(image)
+            assert loader_class.return_value.commit.called
+
+            # Binary images don't ignore invalid data.
+            with pytest.raises(ValueError):
+                FileProgrammer(session).program_image(FileProgrammer.read_file(str(path), file_format='bin',
+                        base_address=0))
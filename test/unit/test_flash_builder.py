@@ -0,0 +1,177 @@
+# pyOCD debugger
+# Copyright (c) 2026 pyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+from binascii import crc32
+from unittest import mock
+
+from pyocd.core.memory_map import FlashRegion
+from pyocd.core.options_manager import OptionsManager
+from pyocd.core.exceptions import FlashVerifyFailure
+from pyocd.core.target import Target
+from pyocd.flash.builder import FlashBuilder
+from pyocd.flash.flash import Flash
+
+from .mockflash import MockFlash
+
+def make_flash(depth, verify="none", **kwargs):
+    options = OptionsManager()
+    options.add_front({'flash.pipeline_depth': depth, 'flash.verify': verify})
+    region = FlashRegion(start=0, length=0x2000, blocksize=0x400, page_size=0x100, name='flash')
+    return MockFlash(region, options, **kwargs)
+
+def program(flash, data, **kwargs):
+    builder = FlashBuilder(flash)
+    builder.log_performance = False
+    builder.add_data(0, data)
+    builder.program(no_reset=True, **kwargs)
+    return builder
+
+class TestDoubleBufferPipeline:
+    @pytest.mark.parametrize("depth", [0, 1, 4])
+    def test_sector_erase(self, depth):
+        flash = make_flash(depth, double_buffer=True)
+        data = [(i * 7) & 0xff for i in range(0x1800)]
+        builder = program(flash, data)
+        assert flash.memory[:0x1800] == bytes(data)
+        assert flash.programmed == list(range(0, 0x1800, 0x100))
+        assert builder.perf.page_program_byte_count == 0x1800
+        assert builder.perf.page_program_rate > 0
+
+        # Change one page; only its sector is reprogrammed.
+        data[0x500] ^= 0xff
+        flash.programmed = []
+        program(flash, data)
+        assert flash.memory[:0x1800] == bytes(data)
+        assert flash.programmed == [0x400, 0x500, 0x600, 0x700]
+
+    @pytest.mark.parametrize("depth", [0, 4])
+    def test_chip_erase(self, depth):
+        flash = make_flash(depth, double_buffer=True, erase_all=True)
+        flash.memory[0x1f00] = 0
+        data = [0xff] * 0x100 + list(range(256)) * 3
+        program(flash, data, chip_erase="chip")
+        assert flash.memory == bytes(data) + b'\xff' * (0x2000 - len(data))
+        # The first page is erased data, so it isn't programmed.
+        assert flash.programmed == [0x100, 0x200, 0x300]
+
+    def test_nothing_to_program(self):
+        flash = make_flash(4, double_buffer=True)
+        builder = program(flash, [0xff] * 0x400)
+        assert flash.programmed == []
+        assert builder.perf.page_program_byte_count == 0
+
+    def test_prepare_error(self):
+        flash = make_flash(2, double_buffer=True)
+        with mock.patch.object(flash, 'override_security_bits', side_effect=RuntimeError("bad page")):
+            with pytest.raises(RuntimeError):
+                program(flash, list(range(256)) * 8)
+
+    def test_security_bits_overridden_once(self):
+        flash = make_flash(2, double_buffer=True)
+        with mock.patch.object(flash, 'override_security_bits', wraps=flash.override_security_bits) as override:
+            program(flash, list(range(256)) * 4)
+        assert override.call_count == 4
+        assert flash.memory[:0x400] == bytes(range(256)) * 4
+
+    def test_sector_erase_init_before_load(self):
+        flash = make_flash(2, double_buffer=True)
+        program(flash, list(range(256)) * 2)
+        assert flash.calls.index(Flash.Operation.PROGRAM) < flash.calls.index('load')
+
+    def test_chip_erase_load_before_init(self):
+        flash = make_flash(2, double_buffer=True, erase_all=True)
+        program(flash, list(range(256)) * 2, chip_erase="chip")
+        assert flash.calls.index('load') < flash.calls.index(Flash.Operation.PROGRAM)
+
+class TestRangeCrcs:
+    @pytest.mark.parametrize(("addr", "length"), [
+            (0, 0x100),
+            (0x100, 0x300),
+            (0x10, 0x1234),
+            (0x1ffc, 4),
+        ])
+    def test_range(self, addr, length):
+        flash = make_flash(0)
+        flash.memory[:] = bytes((i * 13) & 0xff for i in range(len(flash.memory)))
+        assert flash.compute_range_crcs([(addr, length)]) == [crc32(flash.memory[addr:addr + length])]
+
+    def test_batched(self):
+        flash = make_flash(0)
+        ranges = [(0, 0x100), (0x100, 0x80), (0x300, 0x500)]
+        assert flash.compute_range_crcs(ranges) == [crc32(flash.memory[a:a + l]) for a, l in ranges]
+        assert len(flash.crc_calls) == 1
+
+class TestVerify:
+    @pytest.mark.parametrize("verify", ["crc", "read"])
+    def test_verify(self, verify):
+        flash = make_flash(4, verify=verify, double_buffer=True)
+        builder = program(flash, list(range(256)) * 4)
+        assert builder.perf.verify_type == verify
+        if verify == "crc":
+            # One analyzer run for all four pages.
+            assert flash.crc_calls[-1] == [(0, 0x100), (0x100, 0x100), (0x200, 0x100), (0x300, 0x100)]
+
+    @pytest.mark.parametrize("verify", ["crc", "read"])
+    def test_mismatch(self, verify):
+        flash = make_flash(0, verify=verify)
+        program_page = flash.program_page
+        def bad_program_page(address, data):
+            program_page(address, bytes([data[0] ^ 1]) + bytes(data[1:]))
+        flash.program_page = bad_program_page
+        with pytest.raises(FlashVerifyFailure) as excinfo:
+            program(flash, list(range(256)) * 4)
+        assert excinfo.value.address == 0
+
+    def test_crc_fallback(self):
+        flash = make_flash(0, verify="crc")
+        flash.use_analyzer = False
+        builder = program(flash, list(range(256)) * 4)
+        assert builder.perf.verify_type == "read"
+
+    def test_none(self):
+        flash = make_flash(0)
+        builder = program(flash, list(range(256)) * 4)
+        assert builder.perf.verify_type is None
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            program(make_flash(0, verify="bogus"), [0] * 4)
+
+class TestWaitForCompletion:
+    def test_backoff(self):
+        target = mock.Mock()
+        target.get_state.side_effect = [Target.State.RUNNING] * 10 + [Target.State.HALTED]
+        target.read_core_register.return_value = 0
+        flash = Flash(target, None)
+        flash.end_stack = None
+        with mock.patch.object(Flash, '_POLL_BUSY_TIME', 0), mock.patch('pyocd.flash.flash.sleep') as sleep:
+            assert flash.wait_for_completion(timeout=5) == 0
+        delays = [c.args[0] for c in sleep.call_args_list]
+        assert len(delays) == 10
+        assert delays[0] == Flash._POLL_INTERVAL_MIN
+        assert all(b >= a for a, b in zip(delays, delays[1:]))
+        assert max(delays) == Flash._POLL_INTERVAL_MAX
+
+    def test_short_operation_not_delayed(self):
+        target = mock.Mock()
+        target.get_state.side_effect = [Target.State.RUNNING] * 5 + [Target.State.HALTED]
+        target.read_core_register.return_value = 0
+        flash = Flash(target, None)
+        flash.end_stack = None
+        with mock.patch('pyocd.flash.flash.sleep') as sleep:
+            assert flash.wait_for_completion(timeout=5) == 0
+        sleep.assert_not_called()
@@ -0,0 +1,137 @@
+# pyOCD debugger
+# Copyright (c) 2026 pyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from pyocd.core.memory_map import FlashRegion
+from pyocd.core.options_manager import OptionsManager
+from pyocd.flash.builder import FlashBuilder
+from pyocd.flash.content_cache import (FlashContentCache, compute_region_blocks)
+
+from .mockflash import MockFlash
+
+@pytest.fixture(scope='function')
+def cache(tmp_path):
+    return FlashContentCache(tmp_path, "probe0", "target0", "flash", 0, 0x1000)
+
+class TestRegionBlocks:
+    @pytest.mark.parametrize(("start", "length", "expected"), [
+            (0, 0x1000, [(0, 0x1000)]),
+            (0x08000000, 0x80000, [(0x08000000, 0x80000)]),
+            (0, 0x3000, [(0, 0x2000), (0x2000, 0x1000)]),
+            (0x1000, 0x3000, [(0x1000, 0x1000), (0x2000, 0x2000)]),
+            (0x10, 0x30, [(0x10, 0x10), (0x20, 0x20)]),
+        ])
+    def test_blocks(self, start, length, expected):
+        assert compute_region_blocks(start, length) == expected
+
+class TestFlashContentCache:
+    def test_missing(self, cache):
+        assert not cache.load()
+        assert not cache.is_valid([0])
+
+    def test_roundtrip(self, tmp_path, cache):
+        cache.save([0x1234], {0x100: (0x100, 0xabcd), 0: (0x100, 0x5678)})
+        other = FlashContentCache(tmp_path, "probe0", "target0", "flash", 0, 0x1000)
+        assert other.path == cache.path
+        assert other.load()
+        assert other.is_valid([0x1234])
+        assert not other.is_valid([0x1235])
+        assert other.page_crcs == {0: (0x100, 0x5678), 0x100: (0x100, 0xabcd)}
+
+    def test_key(self, tmp_path, cache):
+        cache.save([0x1234], {})
+        assert not FlashContentCache(tmp_path, "probe1", "target0", "flash", 0, 0x1000).load()
+        assert not FlashContentCache(tmp_path, "probe0", "target1", "flash", 0, 0x1000).load()
+        assert not FlashContentCache(tmp_path, "probe0", "target0", "flash", 0, 0x2000).load()
+
+    def test_corrupt(self, cache):
+        cache.path.parent.mkdir(parents=True, exist_ok=True)
+        cache.path.write_text("{not json")
+        assert not cache.load()
+
+    def test_invalidate(self, cache):
+        cache.save([0x1234], {0: (0x100, 0x5678)})
+        cache.invalidate()
+        assert not cache.is_valid([0x1234])
+        assert cache.page_crcs == {}
+
+class TestFlashBuilderContentCache:
+    @pytest.fixture(scope='function')
+    def flash(self, tmp_path):
+        options = OptionsManager()
+        options.add_front({
+                'flash.content_cache.enable': True,
+                'flash.content_cache.dir': str(tmp_path),
+            })
+        region = FlashRegion(start=0x1000, length=0x2000, blocksize=0x400, page_size=0x100, name='flash')
+        return MockFlash(region, options)
+
+    def load(self, flash, data, addr=0x1000):
+        builder = FlashBuilder(flash)
+        builder.log_performance = False
+        builder.add_data(addr, data)
+        builder.program(no_reset=True)
+        return builder
+
+    def test_unchanged(self, flash):
+        data = list(range(256)) * 8
+        self.load(flash, data)
+        assert len(flash.programmed) == 8
+
+        flash.programmed = []
+        flash.read_count = 0
+        builder = self.load(flash, data)
+        assert flash.programmed == []
+        assert flash.read_count == 0
+        assert builder.perf.analyze_type == FlashBuilder.FLASH_ANALYSIS_CONTENT_CACHE
+        # One whole region analysis before and one after programming.
+        assert flash.crc_calls[-2:] == [[(0x1000, 0x1000), (0x2000, 0x1000)]] * 2
+
+    def test_changed_page(self, flash):
+        data = list(range(256)) * 8
+        self.load(flash, data)
+
+        data[0x300] ^= 0xff
+        flash.programmed = []
+        self.load(flash, data)
+        # Only the sector containing the modified page is erased and programmed.
+        assert flash.programmed == [0x1000, 0x1100, 0x1200, 0x1300]
+
+        flash.programmed = []
+        flash.read_count = 0
+        self.load(flash, data)
+        assert flash.programmed == []
+        assert flash.read_count == 0
+
+    def test_modified_outside_pyocd(self, flash):
+        data = list(range(256)) * 4
+        self.load(flash, data)
+
+        # Modify a page that wasn't loaded; the record no longer validates.
+        flash.memory[0x1800] = 0
+        flash.programmed = []
+        builder = self.load(flash, data)
+        assert flash.programmed == []
+        assert builder.perf.analyze_type == FlashBuilder.FLASH_ANALYSIS_CRC32
+        assert flash.read_count > 0
+
+    def test_disabled(self, flash):
+        flash.target.session.options.set('flash.content_cache.enable', False)
+        data = list(range(256)) * 4
+        self.load(flash, data)
+        self.load(flash, data)
+        assert all(len(call) == 4 for call in flash.crc_calls)
@@ -14,10 +14,24 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import pytest
+import queue
+import socket
+from unittest import mock
+
+from pyocd.core import exceptions
+from pyocd.debug.context import DebugContext
+from pyocd.gdbserver.context_facade import GDBDebugContextFacade
 from pyocd.gdbserver.gdbserver import (
     escape,
     unescape,
 )
+from pyocd.gdbserver.packet_io import (
+    CTRL_C,
+    GDBServerPacketIOThread,
+    checksum,
+)
+from pyocd.utility import conversion
 
 # escaped chars: '#$}*'
 # escaped by prefixing with '}' and xor'ing the char with 0x20
@@ -65,3 +79,193 @@ class TestGdbServerEscaping:
     def test_unescape_combined(self):
         assert unescape(b"}\x03}\x04}]}\x0a") == list(b"#$}*")
         assert unescape(b"}]}]}]") == list(b"}}}")
+
+@pytest.fixture
+def facade(mockcore):
+    mockcore.session = mock.Mock(options={'xpsr_control_fields': False})
+    for i, index in enumerate(sorted(mockcore.regs)):
+        mockcore.regs[index] = 0x01020304 * (i + 1)
+    for reg in mockcore.core_registers.iter_matching(lambda r: r.bitsize == 64):
+        mockcore.regs[reg.index] = 0x1122334455667788 + reg.index
+    context = DebugContext(mockcore)
+    context.read_core_registers_raw = mock.Mock(wraps=context.read_core_registers_raw)
+    context.read_core_register_raw = mock.Mock(wraps=context.read_core_register_raw)
+    return GDBDebugContextFacade(context)
+
+def encode_registers(facade, values):
+    # Reference per-register encoding.
+    return b''.join(conversion.uint_to_hex_le(value, reg.bitsize).encode()
+            for reg, value in zip(facade._register_list, values))
+
+class TestGdbRegisterContext:
+    def test_encoding(self, facade):
+        values = facade.context.core.read_core_registers_raw(facade._full_reg_num_list)
+        assert any(reg.bitsize == 64 for reg in facade._register_list)
+        assert facade.get_register_context() == encode_registers(facade, values)
+
+    def test_unavailable_registers(self, facade):
+        facade.context.read_core_registers_raw.side_effect = exceptions.CoreRegisterAccessError
+        context = facade.get_register_context()
+        assert context == b"x" * len(context)
+        assert len(context) == sum(reg.bitsize // 4 for reg in facade._register_list)
+
+    def test_failed_read_not_cached(self, facade):
+        values = facade.context.core.read_core_registers_raw(facade._full_reg_num_list)
+        facade.context.read_core_registers_raw.side_effect = exceptions.CoreRegisterAccessError
+        context = facade.get_register_context()
+        assert context == b"x" * len(context)
+
+        # The next request reads the registers again rather than returning the failed result.
+        facade.context.read_core_registers_raw.side_effect = lambda regs: values
+        assert facade.get_register_context() == encode_registers(facade, values)
+        assert facade.context.read_core_registers_raw.call_count == 2
+
+    def test_partly_unavailable_registers(self, facade):
+        values = facade.context.core.read_core_registers_raw(facade._full_reg_num_list)
+        values[1] = None
+        facade.context.read_core_registers_raw.side_effect = lambda regs: values
+        context = facade.get_register_context()
+        assert context[:8] == encode_registers(facade, values[:1])
+        assert context[8:16] == b"x" * 8
+        assert context[16:24] == encode_registers(facade, values[2:3])
+
+    def test_cached_until_run_token_changes(self, facade):
+        context = facade.get_register_context()
+        assert facade.get_register_context() == context
+        for reg in facade._register_list:
+            assert facade.gdb_get_register(reg.gdb_regnum) != b''
+        assert facade.context.read_core_registers_raw.call_count == 1
+        assert facade.context.read_core_register_raw.call_count == 0
+
+        facade.context.core.regs[0] = 0x12345678
+        facade.context.core.run_token += 1
+        assert facade.get_register_context()[:8] == b"78563412"
+        assert facade.gdb_get_register(0) == b"78563412"
+        assert facade.context.read_core_registers_raw.call_count == 2
+
+    def test_cached_per_context(self, facade, mockcore):
+        first_context = facade.context
+        facade.get_register_context()
+        other = DebugContext(mockcore)
+        other.read_core_registers_raw = mock.Mock(return_value=[0] * len(facade._register_list))
+        facade.set_context(other)
+        assert facade.get_register_context() == b"0" * len(facade.get_register_context())
+        facade.set_context(first_context)
+        facade.get_register_context()
+        assert first_context.read_core_registers_raw.call_count == 1
+        assert other.read_core_registers_raw.call_count == 1
+
+    def test_get_register_matches_context(self, facade):
+        uncached = [facade.gdb_get_register(reg.gdb_regnum) for reg in facade._register_list]
+        facade.get_register_context()
+        cached = [facade.gdb_get_register(reg.gdb_regnum) for reg in facade._register_list]
+        assert cached == uncached
+
+    def test_set_register_context(self, facade, mockcore):
+        values = [(i * 0x10001) & 0xffffffff for i in range(len(facade._register_list))]
+        d15 = [reg.name for reg in facade._register_list].index('d15')
+        values[d15] = 0xfedcba9876543210
+        data = encode_registers(facade, values)
+        facade.get_register_context()
+        facade.set_register_context(data)
+        assert mockcore.read_core_registers_raw(['d15']) == [0xfedcba9876543210]
+        # The write invalidated the cached context.
+        assert facade.get_register_context() == encode_registers(facade,
+                mockcore.read_core_registers_raw(facade._full_reg_num_list))
+        assert facade.context.read_core_registers_raw.call_count == 2
+
+    def test_set_partial_register_context(self, facade, mockcore):
+        facade.set_register_context(b"11111111" + b"22222222" + b"3333")
+        assert mockcore.regs[0] == 0x11111111
+        assert mockcore.regs[1] == 0x22222222
+        assert mockcore.regs[2] != 0x3333
+
+    def test_set_register_invalidates(self, facade, mockcore):
+        facade.get_register_context()
+        facade.set_register(0, b"efbeadde")
+        assert facade.gdb_get_register(0) == b"efbeadde"
+        assert mockcore.regs[0] == 0xdeadbeef
+
+class FakeSocket:
+    """@brief Stand-in for the gdbserver's abstract socket, fed from a queue."""
+
+    port = 0
+
+    def __init__(self):
+        self.incoming = queue.Queue()
+        self.written = bytearray()
+
+    def set_timeout(self, timeout):
+        self._timeout = timeout
+
+    def read(self):
+        try:
+            return self.incoming.get(timeout=self._timeout)
+        except queue.Empty:
+            raise socket.timeout
+
+    def write(self, data):
+        self.written += data
+        return len(data)
+
+def make_packet(data):
+    return b"$" + data + b"#" + checksum(data)
+
+@pytest.fixture
+def packet_io():
+    sock = FakeSocket()
+    packet_io = GDBServerPacketIOThread(sock)
+    yield packet_io, sock
+    packet_io.stop()
+    packet_io.join()
+
+class TestGdbPacketIO:
+    def test_single_packet(self, packet_io):
+        io, sock = packet_io
+        sock.incoming.put(b"+" + make_packet(b"qSupported"))
+        assert io.receive() == make_packet(b"qSupported")
+        assert sock.written == b"+"
+
+    def test_split_packets(self, packet_io):
+        io, sock = packet_io
+        data = b"X20000000,1000:" + escape(bytes(range(256)) * 16)
+        stream = make_packet(data) + make_packet(b"g") + make_packet(b"m0,4")
+        for offset in range(0, len(stream), 7):
+            sock.incoming.put(stream[offset:offset + 7])
+        assert io.receive() == make_packet(data)
+        assert io.receive() == make_packet(b"g")
+        assert io.receive() == make_packet(b"m0,4")
+        assert sock.written == b"+++"
+
+    def test_escaped_hash(self, packet_io):
+        # '}#' is the escaped form of 0x03, not the end of the packet.
+        io, sock = packet_io
+        data = b"X0,3:a}#b"
+        sock.incoming.put(make_packet(data)[:6])
+        sock.incoming.put(make_packet(data)[6:])
+        assert io.receive() == make_packet(data)
+        assert unescape(data[5:]) == [ord('a'), 3, ord('b')]
+        # An escaped escape character before '#' doesn't escape it.
+        sock.incoming.put(make_packet(b"X0,1:}]") + make_packet(b"X0,1:}}"))
+        assert io.receive() == make_packet(b"X0,1:}]")
+        assert io.receive() == make_packet(b"X0,1:}}")
+
+    def test_bad_checksum(self, packet_io):
+        io, sock = packet_io
+        sock.incoming.put(b"$g#00" + make_packet(b"g"))
+        assert io.receive() == make_packet(b"g")
+        assert sock.written == b"-+"
+
+    def test_ctrl_c(self, packet_io):
+        io, sock = packet_io
+        sock.incoming.put(b"junk" + CTRL_C + make_packet(b"?"))
+        assert io.receive() == make_packet(b"?")
+        assert io.interrupt_event.is_set()
+
+    def test_ack_and_nack(self, packet_io):
+        io, sock = packet_io
+        io.send(make_packet(b"OK"))
+        sock.incoming.put(b"-")
+        sock.incoming.put(b"+" + make_packet(b"g"))
+        assert io.receive() == make_packet(b"g")
+        assert sock.written == make_packet(b"OK") * 2 + b"+"
@@ -16,10 +16,12 @@
 
 import pytest
 import logging
+from unittest import mock
 
 from pyocd.cache.memory import MemoryCache
 from pyocd.debug.context import DebugContext
 from pyocd.core import memory_map
+from pyocd.core.exceptions import TransferFaultError
 from pyocd.utility import conversion
 from pyocd.utility import mask
 
@@ -108,27 +110,27 @@ class TestMemoryCache:
     def test_16_no_mem_region(self, mockcore, memcache):
         assert memcache.read_memory_block8(0x30000000, 4) == [0x55] * 4
         # Make sure we didn't cache anything.
-        assert memcache._cache.overlap(0x30000000, 0x30000004) == set()
+        assert memcache._get_missing_ranges(0x30000000, 4) == [(0x30000000, 0x30000004)]
 
     def test_17_noncacheable_region_read(self, mockcore, memcache):
         mockcore.write_memory_block8(0x20000410, [90, 91, 92, 93])
         assert memcache.read_memory_block8(0x20000410, 4) == [90, 91, 92, 93]
         # Make sure we didn't cache anything.
-        assert memcache._cache.overlap(0x20000410, 0x20000414) == set()
+        assert memcache._get_missing_ranges(0x20000410, 4) == [(0x20000410, 0x20000414)]
 
     def test_18_noncacheable_region_write(self, mockcore, memcache):
         memcache.write_memory_block8(0x20000410, [1, 2, 3, 4])
         mockcore.write_memory_block8(0x20000410, [90, 91, 92, 93])
         assert memcache.read_memory_block8(0x20000410, 4) == [90, 91, 92, 93]
         # Make sure we didn't cache anything.
-        assert memcache._cache.overlap(0x20000410, 0x20000414) == set()
+        assert memcache._get_missing_ranges(0x20000410, 4) == [(0x20000410, 0x20000414)]
 
     def test_19_write_into_cached(self, mockcore, memcache):
         mockcore.write_memory_block8(4, [1, 2, 3, 4, 5, 6, 7, 8])
         assert memcache.read_memory_block8(4, 8) == [1, 2, 3, 4, 5, 6, 7, 8]
         memcache.write_memory_block8(6, [128, 129, 130, 131])
         assert memcache.read_memory_block8(4, 8) == [1, 2, 128, 129, 130, 131, 7, 8]
-        assert len(list(memcache._cache.overlap(4, 12))[0].data) == 8
+        assert memcache._get_missing_ranges(4, 8) == []
 
     def test_20_empty_read(self, memcache):
         assert memcache.read_memory_block8(128, 0) == []
@@ -180,6 +182,81 @@ class TestMemoryCache:
         block = memcache.read_memory_block8(0x2000007e, 4)
         assert block == data[0x7e:0x82]
 
+    def test_27_bytes_round_trip(self, mockcore, memcache):
+        data = bytes((n % 256) for n in range(37))
+        memcache.write_memory_bytes(0x20000003, data)
+        block = memcache.read_memory_bytes(0x20000003, len(data))
+        assert isinstance(block, bytes)
+        assert block == data
+        assert mockcore.read_memory_block8(0x20000003, len(data)) == list(data)
+
+    def test_28_bytes_mixed_cached(self, mockcore, memcache):
+        mockcore.write_memory_block8(0, [50, 51, 52, 53, 54, 55, 56, 57])
+        memcache.write_memory_bytes(4, b'\x03\x04')
+        assert memcache.read_memory_bytes(0, 8) == bytes([50, 51, 52, 53, 3, 4, 56, 57])
+        assert memcache.read_memory_bytes(0, 0) == b''
+
+    def test_29_cross_page_miss_coalesced(self, mockcore):
+        memcache = MemoryCache(DebugContext(mockcore), mockcore, page_size=16)
+        memcache.write_memory_bytes(0x20000008, b'\x01\x02')
+        memcache.write_memory_bytes(0x20000030, b'\x03')
+        assert memcache._get_missing_ranges(0x20000000, 0x40) == [
+                (0x20000000, 0x20000008),
+                (0x2000000a, 0x20000030),
+                (0x20000031, 0x20000040),
+                ]
+        data = memcache.read_memory_bytes(0x20000000, 0x40)
+        assert data[8:10] == b'\x01\x02' and data[0x30] == 3
+        assert memcache._get_missing_ranges(0x20000000, 0x40) == []
+
+    def test_30_invalid_page_size(self, mockcore):
+        with pytest.raises(ValueError):
+            MemoryCache(DebugContext(mockcore), mockcore, page_size=100)
+
+    def test_31_read_ahead(self, mockcore):
+        memcache = MemoryCache(DebugContext(mockcore), mockcore, read_ahead={memory_map.MemoryType.RAM: 64})
+        mockcore.write_memory_block8(0x20000040, range(64))
+        with mock.patch.object(mockcore, 'read_memory_bytes', wraps=mockcore.read_memory_bytes) as reads:
+            assert memcache.read_memory_bytes(0x20000044, 2) == bytes([4, 5])
+            assert memcache.read_memory_bytes(0x20000070, 4) == bytes([48, 49, 50, 51])
+            reads.assert_called_once_with(0x20000040, 64)
+
+    def test_32_read_ahead_merge_and_clip(self, mockcore):
+        memcache = MemoryCache(DebugContext(mockcore), mockcore, read_ahead={memory_map.MemoryType.RAM: 64})
+        # Cached byte in the middle of a line doesn't split the read.
+        memcache.write_memory_bytes(0x20000308, b'\x01')
+        with mock.patch.object(mockcore, 'read_memory_bytes', wraps=mockcore.read_memory_bytes) as reads:
+            memcache.read_memory_bytes(0x20000300, 0x100)
+            assert reads.call_args_list == [mock.call(0x20000300, 0x100)]
+
+        # Read is clipped to the 1 kB RAM region.
+        memcache = MemoryCache(DebugContext(mockcore), mockcore, read_ahead={memory_map.MemoryType.RAM: 0x800})
+        with mock.patch.object(mockcore, 'read_memory_bytes', wraps=mockcore.read_memory_bytes) as reads:
+            memcache.read_memory_bytes(0x200003fc, 4)
+            reads.assert_called_once_with(0x20000000, 0x400)
+
+    def test_33_invalid_read_ahead(self, mockcore):
+        with pytest.raises(ValueError):
+            MemoryCache(DebugContext(mockcore), mockcore, read_ahead={memory_map.MemoryType.RAM: 48})
+
+    def test_34_read_ahead_fault(self, mockcore):
+        memcache = MemoryCache(DebugContext(mockcore), mockcore, read_ahead={memory_map.MemoryType.RAM: 64})
+        mockcore.write_memory_block8(0x20000040, range(8))
+        read_memory_bytes = mockcore.read_memory_bytes
+        # Only memory below 0x20000048 is accessible.
+        def limited_read(addr, size):
+            if addr + size > 0x20000048:
+                raise TransferFaultError()
+            return read_memory_bytes(addr, size)
+        with mock.patch.object(mockcore, 'read_memory_bytes', side_effect=limited_read) as reads:
+            # The widened read faults, so only the requested range is read.
+            assert memcache.read_memory_bytes(0x20000044, 2) == bytes([4, 5])
+            assert reads.call_args_list == [mock.call(0x20000040, 64), mock.call(0x20000044, 2)]
+
+            # A fault reading just the requested range is raised.
+            with pytest.raises(TransferFaultError):
+                memcache.read_memory_bytes(0x20000046, 4)
+
 
 
 # TODO test read32/16/8 with and without callbacks
@@ -0,0 +1,237 @@
+# pyOCD debugger
+# Copyright (c) 2026 pyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import pytest
+from unittest import mock
+
+from pyocd.core import exceptions
+from pyocd.coresight.ap import MEM_AP
+from pyocd.coresight.dwt import DWT
+from pyocd.debug.elf.decoder import (FunctionInfo, LineInfo, SymbolInfo)
+from pyocd.debug.profiler import (
+    PCSampleProfile,
+    PCSampleSink,
+    PCSRProfiler,
+    ProfileSymbolizer,
+    SLEEP_NAME,
+    UNKNOWN_NAME,
+    )
+from pyocd.trace import events
+from pyocd.trace.swo import SWOParser
+
+# Thumb function symbols, with bit 0 set.
+SYMBOLS = [
+    SymbolInfo('main', 0x1001, 0x100, 'STT_FUNC'),
+    SymbolInfo('helper', 0x1101, 0x20, 'STT_FUNC'),
+    SymbolInfo('table', 0x1200, 0x100, 'STT_OBJECT'),
+    ]
+
+def lookup_symbol(addr):
+    for sym in SYMBOLS:
+        if sym.address <= addr < sym.address + sym.size:
+            return sym
+    return None
+
+def lookup_function(addr):
+    if 0x1200 <= addr < 0x1300:
+        return FunctionInfo(b'static_fn', None, 0x1200, 0x1300)
+    return None
+
+def lookup_line(addr):
+    return LineInfo(None, b'main.c', b'src', 10 + (addr - 0x1000) // 0x10)
+
+@pytest.fixture(scope='function')
+def elf():
+    elf = mock.Mock()
+    elf.symbol_decoder.get_symbol_for_address.side_effect = lookup_symbol
+    elf.address_decoder.get_function_for_address.side_effect = lookup_function
+    elf.address_decoder.get_line_for_address.side_effect = lookup_line
+    return elf
+
+@pytest.fixture(scope='function')
+def profile():
+    profile = PCSampleProfile()
+    profile.add_samples([0x1000] * 5 + [0x1010] * 3 + [0x1100] * 2 + [0x1204, 0x2000])
+    profile.sleep_count = 4
+    profile.duration = 2.0
+    return profile
+
+class TestSymbolizer:
+    def test_functions(self, elf):
+        sym = ProfileSymbolizer(elf)
+        # First instruction of a function is matched despite the Thumb bit.
+        assert sym.function_for_address(0x1000) == 'main'
+        assert sym.function_for_address(0x10fe) == 'main'
+        assert sym.function_for_address(0x1100) == 'helper'
+        # Object symbols are skipped in favour of debug info.
+        assert sym.function_for_address(0x1204) == 'static_fn'
+        assert sym.function_for_address(0x2000) == UNKNOWN_NAME
+
+    def test_cache(self, elf):
+        sym = ProfileSymbolizer(elf)
+        sym.function_for_address(0x1000)
+        sym.function_for_address(0x1000)
+        assert elf.symbol_decoder.get_symbol_for_address.call_count == 1
+
+    def test_lines(self, elf):
+        assert ProfileSymbolizer(elf).line_for_address(0x1020) == "main.c:12"
+
+    def test_no_elf(self):
+        sym = ProfileSymbolizer(None)
+        assert sym.function_for_address(0x1000) == UNKNOWN_NAME
+        assert sym.line_for_address(0x1000) is None
+
+class TestProfile:
+    def test_function_counts(self, elf, profile):
+        assert profile.sample_count == 16
+        assert profile.samples_per_second == 8
+        assert profile.function_counts(ProfileSymbolizer(elf)) == [
+                ('main', 8), (SLEEP_NAME, 4), ('helper', 2), ('static_fn', 1), (UNKNOWN_NAME, 1)]
+
+    def test_flat(self, elf, profile):
+        output = io.StringIO()
+        profile.write_flat(output, ProfileSymbolizer(elf), limit=2)
+        lines = output.getvalue().splitlines()
+        assert lines[0] == "16 samples in 2.00 s (8 samples/s)"
+        assert lines[2].split() == ['8', '50.00', 'main']
+        assert lines[3].split() == ['4', '25.00', SLEEP_NAME]
+        assert len(lines) == 4
+
+    def test_collapsed(self, elf, profile):
+        output = io.StringIO()
+        profile.write_collapsed(output, ProfileSymbolizer(elf))
+        assert output.getvalue().splitlines() == [
+                f"{SLEEP_NAME} 4", f"{UNKNOWN_NAME} 1", "helper 2", "main 8", "static_fn 1"]
+
+    def test_collapsed_lines(self, elf, profile):
+        output = io.StringIO()
+        profile.write_collapsed(output, ProfileSymbolizer(elf), lines=True)
+        assert "main;main.c:10 5" in output.getvalue().splitlines()
+        assert "main;main.c:11 3" in output.getvalue().splitlines()
+
+class TestPCSampleSink:
+    # Periodic PC packets, a sleep packet, an ITM packet, and an overflow.
+    STREAM = (b'\x17\x00\x10\x00\x00' * 3 + b'\x15\x00' + b'\x01A' + b'\x17\x00\x11\x00\x00'
+            + b'\x70' + b'\x10')
+
+    def test_parser(self):
+        profile = PCSampleProfile()
+        SWOParser(mock.Mock(), PCSampleSink(profile)).parse(self.STREAM)
+        assert profile.pc_counts == {0x1000: 3, 0x1100: 1}
+        assert (profile.sleep_count, profile.lost_count) == (1, 1)
+
+    def test_receive(self):
+        profile = PCSampleProfile()
+        sink = PCSampleSink(profile)
+        for event in (events.TracePeriodicPC(0x1000), events.TracePeriodicPC(0),
+                events.TraceITMEvent(0, 1, 1), events.TraceOverflow()):
+            sink.receive(event)
+        assert profile.pc_counts == {0x1000: 1}
+        assert (profile.sleep_count, profile.lost_count) == (1, 1)
+
+@pytest.mark.parametrize(("interval", "expected"), [
+        (1, (0, 0, 64)),
+        (64, (0, 0, 64)),
+        (1000, (0, 15, 1024)),
+        (4096, (1, 3, 4096)),
+        (5000, (1, 4, 5120)),
+        (100000, (1, 15, 16384)),
+    ])
+def test_pc_sampling_config(interval, expected):
+    assert DWT.pc_sampling_config(interval) == expected
+
+def test_enable_pc_sampling():
+    dwt = DWT(mock.Mock(), addr=0xe0001000)
+    dwt.dwt_configured = True
+    dwt.ap.read32.return_value = 0x40000001
+    assert dwt.enable_pc_sampling(4096) == 4096
+    ctrl = 0x40000001 | DWT.DWT_CTRL_CYCTAP_MASK | (3 << 5) | (3 << 1)
+    assert dwt.ap.write32.call_args_list == [
+            mock.call(0xe0001000, ctrl),
+            mock.call(0xe0001000, ctrl | DWT.DWT_CTRL_PCSAMPLENA_MASK),
+            ]
+
+class TestPCSRProfiler:
+    @pytest.fixture(scope='function')
+    def samples(self):
+        return iter([0x1000, 0x1000, 0xffffffff, 0x1100] * 1000)
+
+    @pytest.fixture(scope='function')
+    def session(self, samples):
+        def read32(addr, now=True):
+            assert addr == 0xe000101c
+            value = next(samples)
+            return value if now else (lambda: value)
+
+        def read_memory_repeated32(addr, count, now=True):
+            callbacks = [ap.read32(addr, now=False) for _ in range(count)]
+            read_cb = lambda: [cb() for cb in callbacks]
+            return read_cb() if now else read_cb
+
+        ap = mock.Mock(spec=['read32', 'read_memory_repeated32'])
+        ap.read32.side_effect = read32
+        ap.read_memory_repeated32.side_effect = read_memory_repeated32
+        dwt = DWT(ap, addr=0xe0001000)
+        dwt.dwt_configured = True
+        session = mock.Mock()
+        session.target.cores = {0: mock.Mock(dwt=dwt)}
+        return session
+
+    def test_sample(self, session):
+        profiler = PCSRProfiler(session, batch_size=3)
+        profiler.start()
+        assert profiler.sample() == 3 * PCSRProfiler.PIPELINE_DEPTH
+        profile = profiler.stop()
+        assert profiler.read_count == 12
+        assert profile.pc_counts == {0x1000: 6, 0x1100: 3}
+        assert profile.lost_count == 3
+
+    def test_not_implemented(self, session):
+        session.target.cores[0].dwt.ap.read32.side_effect = lambda addr, now=True: 0 if now else (lambda: 0)
+        with pytest.raises(exceptions.TargetSupportError):
+            PCSRProfiler(session).start()
+
+    def test_no_dwt(self):
+        session = mock.Mock()
+        session.target.cores = {0: mock.Mock(dwt=None)}
+        with pytest.raises(exceptions.TargetSupportError):
+            PCSRProfiler(session).run(1)
+
+def test_read_memory_repeated32():
+    dp = mock.Mock()
+    dp.read_ap_multiple.return_value = lambda: [1, 2, 3]
+    ap = mock.Mock(dp=dp, _address_mask=0xffffffff, _reg_offset=0, _csw=0x23000012,
+            _accelerated_memory_interface=None)
+    ap.address.address = 0x01000000
+    assert MEM_AP.read_memory_repeated32(ap, 0xe000101c, 3) == [1, 2, 3]
+    ap.write_reg.assert_any_call(0x00, 0x23000002)
+    ap.write_reg.assert_any_call(0x04, 0xe000101c)
+    dp.read_ap_multiple.assert_called_once_with(0x0100000c, 3, now=False)
+
+def test_read_memory_repeated32_accelerated():
+    # Probes with an accelerated memory interface don't support raw AP register accesses.
+    dp = mock.Mock()
+    dp.read_ap_multiple.side_effect = NotImplementedError
+    values = iter([1, 2, 3])
+    ap = mock.Mock(dp=dp, _address_mask=0xffffffff)
+    ap.read_memory.side_effect = lambda addr, transfer_size=32, now=True: (lambda v=next(values): v)
+    cb = MEM_AP.read_memory_repeated32(ap, 0xe000101c, 3, now=False)
+    assert cb() == [1, 2, 3]
+    ap.read_memory.assert_called_with(0xe000101c, 32, now=False)
+    assert ap.read_memory.call_count == 3
+    dp.read_ap_multiple.assert_not_called()
+    ap.write_reg.assert_not_called()
@@ -0,0 +1,214 @@
+# pyOCD debugger
+# Copyright (c) 2026 pyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+import threading
+from unittest import mock
+
+from pyocd.core import exceptions
+from pyocd.coresight.ap import APv1Address
+from pyocd.probe.tcp_client_probe import TCPClientProbe
+from pyocd.probe.tcp_probe_server import (DebugProbeRequestHandler, DebugProbeServer)
+
+from .mockprobe import MockProbe
+
+@pytest.fixture
+def probe():
+    return MockProbe()
+
+@pytest.fixture
+def server(probe):
+    session = mock.Mock(log_tracebacks=False, options={'probeserver.lock_lease_timeout': 10.0})
+    server = DebugProbeServer(session, probe, port=0, serve_local_only=True)
+    server.start()
+    yield server
+    server.stop()
+
+@pytest.fixture
+def client(server):
+    client = TCPClientProbe(f"localhost:{server.port}")
+    client.open()
+    yield client
+    client.close()
+
+def make_client(server, version):
+    with mock.patch.object(TCPClientProbe, 'PROTOCOL_VERSION', version):
+        client = TCPClientProbe(f"localhost:{server.port}")
+        client.open()
+    return client
+
+@pytest.fixture
+def v1_client(server):
+    client = make_client(server, 1)
+    yield client
+    client.close()
+
+@pytest.fixture
+def v2_client(server):
+    client = make_client(server, 2)
+    yield client
+    client.close()
+
+class TestRemoteProbe:
+    def test_negotiation(self, client, v1_client, v2_client):
+        assert client._protocol_version == 3
+        assert v1_client._protocol_version == 1
+        assert v2_client._protocol_version == 2
+
+    def test_newer_client(self, server):
+        client = make_client(server, 99)
+        assert client._protocol_version == DebugProbeRequestHandler.PROTOCOL_VERSION
+        client.close()
+
+    def test_fallback_to_v1_server(self, server):
+        with mock.patch.object(DebugProbeRequestHandler, 'PROTOCOL_VERSION', 1), \
+                mock.patch.object(DebugProbeRequestHandler, '_request__hello',
+                        lambda self, version: TestRemoteProbe._v1_hello(self, version)):
+            client = TCPClientProbe(f"localhost:{server.port}")
+            client.open()
+            assert client._protocol_version == 1
+            client.write_dp(4, 0x1234)
+            assert client.read_dp(4) == 0x1234
+            client.close()
+
+    @staticmethod
+    def _v1_hello(handler, version):
+        # Behaviour of a server that only supports version 1.
+        if version != 1:
+            raise exceptions.Error("unsupported protocol version")
+
+    def test_properties(self, client):
+        assert client.vendor_name == "Mock"
+        assert client.wire_protocol == client.Protocol.SWD
+
+    def test_deferred_reads_batched(self, client, probe):
+        client.write_ap(0x0c, 0x55)
+        callbacks = [client.read_dp(0x4 * i, now=False) for i in range(4)]
+        callbacks.append(client.read_ap(0x0c, now=False))
+        callbacks.append(client.read_ap_multiple(0x0c, 3, now=False))
+        # Nothing sent until a result is needed.
+        assert probe.transfer_count == 0
+        assert probe.ap == {}
+        probe.dp[0x8] = 0x42
+        assert callbacks[2]() == 0x42
+        # All reads were performed as one probe transfer.
+        assert probe.transfer_count == 1
+        assert callbacks[4]() == 0x55
+        assert callbacks[5]() == [0x55] * 3
+
+    def test_v1_reads_immediate(self, v1_client, probe):
+        probe.dp[0x8] = 0x42
+        cb = v1_client.read_dp(0x8, now=False)
+        probe.dp[0x8] = 0
+        assert cb() == 0x42
+
+    def test_large_batches_pipelined(self, client, probe):
+        count = TCPClientProbe.MAX_BATCH_SIZE * (TCPClientProbe.MAX_PENDING_BATCHES + 2)
+        for i in range(count):
+            client.write_dp(0x8, i)
+        client.flush()
+        assert probe.dp[0x8] == count - 1
+
+    def test_read_error(self, client, probe):
+        probe.fault_addresses.add(0x4)
+        ok = client.read_dp(0x0, now=False)
+        bad = client.read_dp(0x4, now=False)
+        assert ok() == 0
+        with pytest.raises(exceptions.TransferFaultError):
+            bad()
+
+    def test_write_error_raised_later(self, client, probe):
+        probe.fault_addresses.add(0x4)
+        client.write_dp(0x4, 1)
+        client.write_dp(0x8, 2)
+        with pytest.raises(exceptions.TransferFaultError):
+            client.flush()
+        # The write after the failed one was not performed.
+        assert 0x8 not in probe.dp
+        # The error is only reported once.
+        client.flush()
+
+    @pytest.mark.parametrize("client_fixture", ["client", "v1_client", "v2_client"])
+    def test_memory(self, request, client_fixture, probe):
+        client = request.getfixturevalue(client_fixture)
+        memif = client.get_memory_interface_for_ap(APv1Address(0))
+        memif.write_memory_block32(0x100, [0x11223344, 0xdeadbeef])
+        memif.write_memory_block8(0x108, [1, 2, 3])
+        memif.write_memory(0x10c, 0xaa, 8)
+        cb = memif.read_memory(0x104, 32, now=False)
+        assert memif.read_memory_block32(0x100, 2) == [0x11223344, 0xdeadbeef]
+        assert memif.read_memory_block8(0x106, 7) == [0xad, 0xde, 1, 2, 3, 0, 0xaa]
+        assert cb() == 0xdeadbeef
+        assert probe.memory.data[0x100:0x104] == bytes([0x44, 0x33, 0x22, 0x11])
+
+    @pytest.mark.parametrize("client_fixture", ["client", "v2_client"])
+    def test_memory_batched(self, request, client_fixture, probe):
+        # Binary payloads of several requests in one batch, in both directions.
+        client = request.getfixturevalue(client_fixture)
+        memif = client.get_memory_interface_for_ap(APv1Address(0))
+        data = bytes(range(256)) * 16
+        for offset in range(0, len(data), 1024):
+            memif.write_memory_block8(0x1000 + offset, data[offset:offset + 1024])
+        memif.write_memory(0x800, 0x12345678)
+        cb = memif.read_memory(0x800, now=False)
+        assert bytes(memif.read_memory_block8(0x1000, len(data))) == data
+        assert cb() == 0x12345678
+        assert probe.memory.data[0x1000:0x1000 + len(data)] == data
+
+    def test_binary_block_error(self, client):
+        memif = client.get_memory_interface_for_ap(APv1Address(0))
+        with pytest.raises(exceptions.TransferFaultError):
+            memif.read_memory_block32(0xfffff0, 4)
+        # The connection is still in sync.
+        memif.write_memory_block32(0x10, [1, 2])
+        assert memif.read_memory_block32(0x10, 2) == [1, 2]
+
+    def test_multiple_clients(self, server, probe):
+        clients = [make_client(server, version) for version in (1, 2, 3)]
+        try:
+            for i, client in enumerate(clients):
+                client.write_dp(0x4 * i, i + 1)
+                client.flush()
+            for i, client in enumerate(clients):
+                assert client.read_dp(0x4 * i) == i + 1
+            stats = server.client_statistics
+            assert len(stats) == 3
+            assert all(s.request_count > 0 for s in stats)
+        finally:
+            for client in clients:
+                client.close()
+
+    def test_lock_is_exclusive(self, server, probe):
+        first = make_client(server, 3)
+        second = make_client(server, 3)
+        try:
+            first.lock()
+            first.write_dp(0x8, 1)
+            first.flush()
+            result = []
+            thread = threading.Thread(target=lambda: result.append(second.read_dp(0x8)))
+            thread.start()
+            thread.join(0.2)
+            # The second client waits while the first holds the lock.
+            assert thread.is_alive()
+            first.write_dp(0x8, 2)
+            first.unlock()
+            first.flush()
+            thread.join(5)
+            assert result == [2]
+        finally:
+            first.close()
+            second.close()
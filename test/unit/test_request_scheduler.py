@@ -0,0 +1,187 @@
+# pyOCD debugger
+# Copyright (c) 2026 pyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+import threading
+from time import (monotonic, sleep)
+
+from pyocd.core import exceptions
+from pyocd.probe.request_scheduler import (ClientStatistics, ProbeRequestScheduler)
+
+from .mockprobe import MockProbe
+
+@pytest.fixture
+def probe():
+    return MockProbe()
+
+@pytest.fixture
+def scheduler(probe):
+    scheduler = ProbeRequestScheduler(probe, lease_timeout=0.2)
+    scheduler.start()
+    yield scheduler
+    scheduler.stop()
+
+def in_thread(fn, *args):
+    """@brief Run a function in a new thread and return the thread and a list for its result."""
+    result = []
+    thread = threading.Thread(target=lambda: result.append(fn(*args)), daemon=True)
+    thread.start()
+    return thread, result
+
+class TestProbeRequestScheduler:
+    def test_perform(self, scheduler, probe):
+        client = scheduler.add_client("a")
+        scheduler.perform(client, probe.write_dp, 0x8, 5)
+        assert scheduler.perform(client, probe.read_dp, 0x8) == 5
+        assert scheduler.perform_read(client, lambda: probe.read_dp(0x8, now=False)) == 5
+
+    def test_exception(self, scheduler, probe):
+        client = scheduler.add_client("a")
+        probe.fault_addresses.add(0x4)
+        with pytest.raises(exceptions.TransferFaultError):
+            scheduler.perform(client, probe.read_dp, 0x4)
+        with pytest.raises(exceptions.TransferFaultError):
+            scheduler.perform_read(client, lambda: probe.read_dp(0x4, now=False))
+
+    def test_performed_on_worker_with_probe_locked(self, scheduler, probe):
+        client = scheduler.add_client("a")
+
+        def check():
+            # The probe lock is an RLock owned by the worker thread.
+            assert probe._lock._is_owned()
+            return threading.current_thread()
+        assert scheduler.perform(client, check) is not threading.current_thread()
+
+    def test_round_robin(self, scheduler, probe):
+        clients = [scheduler.add_client(name) for name in "abc"]
+        order = []
+        gate = threading.Event()
+        blocker = scheduler.add_client("blocker")
+        # Hold the worker so all clients have a request pending at once.
+        blocked, _ = in_thread(scheduler.perform, blocker, gate.wait)
+        sleep(0.05)
+        threads = [in_thread(scheduler.perform, c, order.append, c.name)[0] for c in reversed(clients)]
+        sleep(0.05)
+        gate.set()
+        for thread in threads + [blocked]:
+            thread.join(5)
+        # Served in registration order after the blocker, not submission order.
+        assert order == ["a", "b", "c"]
+
+    def test_reads_coalesced(self, scheduler, probe):
+        clients = [scheduler.add_client(name) for name in "abc"]
+        for i in range(3):
+            probe.dp[0x4 * i] = i + 10
+        gate = threading.Event()
+        blocker = scheduler.add_client("blocker")
+        blocked, _ = in_thread(scheduler.perform, blocker, gate.wait)
+        sleep(0.05)
+        reads = [in_thread(scheduler.perform_read, c, lambda i=i: probe.read_dp(0x4 * i, now=False))
+                for i, c in enumerate(clients)]
+        sleep(0.05)
+        gate.set()
+        for thread, _ in reads:
+            thread.join(5)
+        assert [result for _, result in reads] == [[10], [11], [12]]
+        # All three reads were performed in one probe transfer.
+        assert probe.transfer_count == 1
+        assert all(c.statistics.coalesced_count == 1 for c in clients)
+
+    def test_lease_is_exclusive(self, scheduler, probe):
+        a = scheduler.add_client("a")
+        b = scheduler.add_client("b")
+        scheduler.perform(a, scheduler.acquire_lease, a)
+        thread, result = in_thread(scheduler.perform, b, probe.read_dp, 0x8)
+        thread.join(0.1)
+        assert thread.is_alive()
+        scheduler.perform(a, probe.write_dp, 0x8, 7)
+        scheduler.perform(a, scheduler.release_lease, a)
+        thread.join(5)
+        assert result == [7]
+
+    def test_nested_lease(self, scheduler):
+        a = scheduler.add_client("a")
+        scheduler.perform(a, scheduler.acquire_lease, a)
+        scheduler.perform(a, scheduler.acquire_lease, a)
+        scheduler.perform(a, scheduler.release_lease, a)
+        assert scheduler._lease_holder is a
+        scheduler.perform(a, scheduler.release_lease, a)
+        assert scheduler._lease_holder is None
+
+    def test_idle_lease_revoked(self, scheduler, probe):
+        a = scheduler.add_client("a")
+        b = scheduler.add_client("b")
+        scheduler.perform(a, scheduler.acquire_lease, a)
+        probe.dp[0x8] = 3
+        # The other client proceeds once the idle lease times out.
+        assert scheduler.perform(b, probe.read_dp, 0x8) == 3
+        # The holder's next request reports the revoked lease, once.
+        with pytest.raises(exceptions.ProbeError, match="revoked"):
+            scheduler.perform(a, probe.read_dp, 0x8)
+        assert scheduler.perform(a, probe.read_dp, 0x8) == 3
+
+    def test_idle_lease_revoked_on_time(self, scheduler, probe):
+        a = scheduler.add_client("a")
+        b = scheduler.add_client("b")
+        scheduler.perform(a, scheduler.acquire_lease, a)
+        start = monotonic()
+        sleep(0.15)
+        # The request arrives shortly before the lease expires; it waits only for the remainder.
+        scheduler.perform(b, probe.read_dp, 0x8)
+        assert monotonic() - start < 0.3
+
+    def test_idle_lease_kept_without_contention(self, scheduler, probe):
+        a = scheduler.add_client("a")
+        scheduler.perform(a, scheduler.acquire_lease, a)
+        sleep(0.3)
+        scheduler.perform(a, probe.read_dp, 0x8)
+        assert scheduler._lease_holder is a
+
+    def test_remove_client_ends_lease(self, scheduler, probe):
+        a = scheduler.add_client("a")
+        b = scheduler.add_client("b")
+        scheduler.perform(a, scheduler.acquire_lease, a)
+        scheduler.remove_client(a)
+        assert scheduler.perform(b, probe.read_dp, 0x8) == 0
+        assert [s.name for s in scheduler.statistics] == ["b"]
+        # The probe lock was released by the worker.
+        assert probe._lock.acquire(blocking=False)
+        probe._lock.release()
+
+    def test_stop_fails_requests(self, probe):
+        scheduler = ProbeRequestScheduler(probe)
+        scheduler.start()
+        client = scheduler.add_client("a")
+        scheduler.stop()
+        with pytest.raises(exceptions.ProbeError):
+            scheduler.perform(client, probe.read_dp, 0x8)
+
+class TestClientStatistics:
+    def test_statistics(self):
+        stats = ClientStatistics("a")
+        assert stats.mean_latency == 0
+        assert stats.percentile_latency(50) == 0
+        for i in range(1, 101):
+            stats.record(i * 0.001, 0.001, i % 2 == 0)
+        assert stats.request_count == 100
+        assert stats.coalesced_count == 50
+        assert stats.max_latency == pytest.approx(0.101)
+        assert stats.mean_latency == pytest.approx(0.0515)
+        assert stats.percentile_latency(50) == pytest.approx(0.052)
+        summary = stats.summary()
+        assert summary['requests'] == 100
+        assert summary['p99_latency'] == pytest.approx(0.101)
+        assert str(stats).startswith("a: 100 requests (50 coalesced)")
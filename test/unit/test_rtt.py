@@ -0,0 +1,305 @@
+# pyOCD debugger
+# Copyright (c) 2026 pyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import struct
+import pytest
+from unittest import mock
+
+from pyocd.debug.elf.decoder import SymbolInfo
+from pyocd.debug.rtt import (GenericRTTControlBlock, RTTPollScheduler)
+from pyocd.core import exceptions
+from pyocd.core.options_manager import OptionsManager
+
+from .mockcore import MockCore
+
+CB_ADDR = 0x20000000
+NUM_UP = 3
+NUM_DOWN = 2
+BUF_SIZE = 32
+# Up buffers are placed back to back, followed by down buffers.
+BUF_BASE = 0x20000100
+NAME_ADDR = 0x200000f0
+
+def up_desc_addr(i):
+    return CB_ADDR + 24 + i * 24
+
+def down_desc_addr(i):
+    return CB_ADDR + 24 + (NUM_UP + i) * 24
+
+def up_buf_addr(i):
+    return BUF_BASE + i * BUF_SIZE
+
+def down_buf_addr(i):
+    return BUF_BASE + (NUM_UP + i) * BUF_SIZE
+
+class RTTMockCore(MockCore):
+    def __init__(self, options=None):
+        super().__init__()
+        self.session = mock.Mock()
+        self.session.options = OptionsManager()
+        self.session.options.add_front(options or {'rtt.address_cache.enable': False})
+        self.elf = None
+        self.block_reads = 0
+        self.flush_count = 0
+
+    def read_memory_block8(self, addr, size):
+        self.block_reads += 1
+        return super().read_memory_block8(addr, size)
+
+    def get_memory_map(self):
+        return self.memory_map
+
+    def flush(self):
+        self.flush_count += 1
+
+    def put(self, addr, data):
+        self.write_memory_block8(addr, list(data))
+
+    def get32(self, addr):
+        return struct.unpack("<I", bytes(self.read_memory_block8(addr, 4)))[0]
+
+def make_target(options=None):
+    target = RTTMockCore(options)
+    target.put(CB_ADDR, b'SEGGER RTT'.ljust(16, b'\0') + struct.pack("<ii", NUM_UP, NUM_DOWN))
+    target.put(NAME_ADDR, b'Terminal\0')
+    for i in range(NUM_UP):
+        target.put(up_desc_addr(i), struct.pack("<6I", NAME_ADDR if i == 0 else 0, up_buf_addr(i),
+                BUF_SIZE, 0, 0, 0))
+    for i in range(NUM_DOWN):
+        target.put(down_desc_addr(i), struct.pack("<6I", 0, down_buf_addr(i), BUF_SIZE, 0, 0, 0))
+    return target
+
+@pytest.fixture(scope='function')
+def target():
+    return make_target()
+
+@pytest.fixture(scope='function')
+def cb(target):
+    cb = GenericRTTControlBlock(target, address=CB_ADDR, size=0)
+    cb.start()
+    target.block_reads = 0
+    return cb
+
+def target_write_up(target, i, data):
+    """Emulate the target writing to an up channel."""
+    write_off = target.get32(up_desc_addr(i) + 12)
+    for b in data:
+        target.put(up_buf_addr(i) + write_off, bytes([b]))
+        write_off = (write_off + 1) % BUF_SIZE
+    target.put(up_desc_addr(i) + 12, struct.pack("<I", write_off))
+
+class TestRTTChannels:
+    def test_start(self, cb):
+        assert len(cb.up_channels) == NUM_UP
+        assert len(cb.down_channels) == NUM_DOWN
+        assert cb.up_channels[0].name == "Terminal"
+        assert cb.up_channels[1].name is None
+
+    def test_read(self, target, cb):
+        target_write_up(target, 0, b'hello')
+        assert cb.up_channels[0].bytes_available == 5
+        assert cb.up_channels[0].read() == b'hello'
+        assert cb.up_channels[0].read() == b''
+        assert cb.up_channels[0].bytes_available == 0
+
+    def test_write(self, target, cb):
+        chan = cb.down_channels[0]
+        assert chan.bytes_free == BUF_SIZE - 1
+        assert chan.write(b'x' * 40) == BUF_SIZE - 1
+        assert chan.bytes_free == 0
+
+class TestRTTTransfer:
+    def test_idle(self, target, cb):
+        assert cb.transfer(range(NUM_UP), {}) == ({}, {})
+        # Only the descriptor array was read.
+        assert target.block_reads == 1
+        assert target.flush_count == 1
+
+    def test_multiple_channels(self, target, cb):
+        target_write_up(target, 0, b'abc')
+        target_write_up(target, 1, b'defg')
+        target_write_up(target, 2, b'h')
+        target.block_reads = 0
+        up_data, written = cb.transfer(range(NUM_UP), {0: b'12', 1: b''})
+        assert up_data == {0: b'abc', 1: b'defg', 2: b'h'}
+        assert written == {0: 2}
+        # Descriptor array plus one coalesced read of the adjacent up buffers.
+        assert target.block_reads == 2
+        assert target.flush_count == 1
+
+        # Read offsets were advanced.
+        assert cb.transfer(range(NUM_UP), {}) == ({}, {})
+
+        # Down channel data and write offset.
+        assert bytes(target.read_memory_block8(down_buf_addr(0), 2)) == b'12'
+        assert target.get32(down_desc_addr(0) + 12) == 2
+
+    def test_selected_channels(self, target, cb):
+        target_write_up(target, 0, b'abc')
+        target_write_up(target, 2, b'xyz')
+        up_data, _ = cb.transfer([2], {})
+        assert up_data == {2: b'xyz'}
+        # Unselected channel data isn't consumed.
+        assert cb.up_channels[0].read() == b'abc'
+
+    def test_wrap(self, target, cb):
+        target_write_up(target, 1, b'a' * 30)
+        assert cb.transfer([1], {}) == ({1: b'a' * 30}, {})
+        target_write_up(target, 1, b'0123456789')
+        assert cb.transfer([1], {}) == ({1: b'0123456789'}, {})
+
+    def test_invalid(self, target, cb):
+        target.put(up_desc_addr(1) + 12, struct.pack("<I", BUF_SIZE + 1))
+        with pytest.raises(exceptions.RTTError):
+            cb.transfer([1], {})
+
+    def test_not_started(self, target):
+        cb = GenericRTTControlBlock(target, address=CB_ADDR, size=0)
+        with pytest.raises(exceptions.RTTError):
+            cb.transfer([0], {})
+
+class TestRTTPollScheduler:
+    def test_idle_backoff(self):
+        sched = RTTPollScheduler(min_interval=0.001, max_interval=0.016)
+        intervals = [sched.update([(0, 1024)]) for _ in range(6)]
+        assert intervals == [0.002, 0.004, 0.008, 0.016, 0.016, 0.016]
+        assert sched.stats.idle_poll_count == 6
+
+    def test_tighten(self):
+        sched = RTTPollScheduler(min_interval=0.001, max_interval=0.016, target_fill=0.25)
+        for _ in range(4):
+            sched.update([(0, 1024)])
+        assert sched.interval == 0.016
+        # Half full buffer halves the interval to reach the target fill.
+        assert sched.update([(512, 1024), (0, 256)]) == 0.008
+        # Nearly full buffer goes straight to the minimum.
+        assert sched.update([(900, 1024)]) == 0.001
+        # Light traffic relaxes the interval by at most a factor of two.
+        assert sched.update([(16, 1024)]) == 0.002
+        assert sched.stats.max_fill == 900 / 1024
+        assert sched.stats.byte_count == 512 + 900 + 16
+        assert sched.stats.overrun_count == 0
+
+    def test_overrun(self):
+        sched = RTTPollScheduler()
+        sched.update([(1023, 1024)])
+        sched.update([(10, 1024), (0, 0)])
+        assert sched.stats.overrun_count == 1
+        assert sched.interval == RTTPollScheduler.MIN_INTERVAL * 2
+        sched.reset()
+        assert sched.stats.poll_count == 0
+
+class TestRTTSearch:
+    def move_control_block(self, target, addr):
+        header = bytes(target.read_memory_block8(CB_ADDR, 24))
+        target.put(CB_ADDR, bytes(24))
+        target.put(addr, header)
+
+    def make_elf(self, build_id=None, symbol_addr=None):
+        elf = mock.Mock()
+        elf.build_id = build_id
+        elf.symbol_decoder.get_symbol_for_name.return_value = (None if symbol_addr is None
+                else SymbolInfo(name="_SEGGER_RTT", address=symbol_addr, size=24, type='STT_OBJECT'))
+        return elf
+
+    @pytest.mark.parametrize("addr", [0x20000000, 0x20000003, 0x20000200, 0x200003e0])
+    def test_search(self, target, addr):
+        self.move_control_block(target, addr)
+        cb = GenericRTTControlBlock(target)
+        cb.SEARCH_READ_SIZE = 64
+        target.block_reads = 0
+        assert cb._find_control_block() == addr
+        assert target.block_reads == (addr - 0x20000000) // 64 + 1
+
+    def test_search_straddles_window(self, target):
+        # ID starts 4 bytes before a window boundary.
+        self.move_control_block(target, 0x20000200 - 4)
+        cb = GenericRTTControlBlock(target)
+        cb.SEARCH_READ_SIZE = 64
+        assert cb._find_control_block() == 0x20000200 - 4
+
+    def test_not_found(self, target):
+        target.put(CB_ADDR, bytes(16))
+        cb = GenericRTTControlBlock(target)
+        assert cb._find_control_block() is None
+        with pytest.raises(exceptions.RTTError):
+            cb.start()
+
+    def test_exact_address(self, target):
+        assert GenericRTTControlBlock(target, address=CB_ADDR, size=0)._find_control_block() == CB_ADDR
+        assert GenericRTTControlBlock(target, address=CB_ADDR + 4, size=0)._find_control_block() is None
+
+    def test_symbol(self, target):
+        self.move_control_block(target, 0x20000500)
+        target.elf = self.make_elf(symbol_addr=0x20000500)
+        cb = GenericRTTControlBlock(target, address=0x20000400, size=0x400)
+        target.block_reads = 0
+        assert cb._find_control_block() == 0x20000500
+        assert target.block_reads == 1
+
+    def test_symbol_outside_search_range(self, target):
+        target.elf = self.make_elf(symbol_addr=CB_ADDR)
+        cb = GenericRTTControlBlock(target, address=0x20000400, size=0x400)
+        assert cb._find_control_block() is None
+        assert GenericRTTControlBlock(target, address=CB_ADDR, size=0)._find_control_block() == CB_ADDR
+
+        # Stale symbol falls back to searching.
+        target.elf = self.make_elf(symbol_addr=CB_ADDR + 0x100)
+        cb = GenericRTTControlBlock(target)
+        assert cb._find_control_block() == CB_ADDR
+
+    def test_address_cache(self, tmp_path):
+        options = {'rtt.address_cache.enable': True, 'rtt.address_cache.dir': str(tmp_path)}
+        target = make_target(options)
+        self.move_control_block(target, 0x20000300)
+        target.elf = self.make_elf(build_id=b'\x12\x34')
+        assert GenericRTTControlBlock(target)._find_control_block() == 0x20000300
+        assert (tmp_path / "control_blocks.json").exists()
+
+        # Reconnect with the same ELF checks only the cached address.
+        target = make_target(options)
+        self.move_control_block(target, 0x20000300)
+        target.elf = self.make_elf(build_id=b'\x12\x34')
+        target.block_reads = 0
+        assert GenericRTTControlBlock(target)._find_control_block() == 0x20000300
+        assert target.block_reads == 1
+
+        # A different build doesn't use the entry.
+        target = make_target(options)
+        target.elf = self.make_elf(build_id=b'\x56')
+        assert GenericRTTControlBlock(target)._find_control_block() == CB_ADDR
+
+        # Cached address that no longer has the ID falls back to searching.
+        target = make_target(options)
+        target.elf = self.make_elf(build_id=b'\x12\x34')
+        assert GenericRTTControlBlock(target)._find_control_block() == CB_ADDR
+
+    def test_address_cache_outside_search_range(self, tmp_path):
+        options = {'rtt.address_cache.enable': True, 'rtt.address_cache.dir': str(tmp_path)}
+        target = make_target(options)
+        target.elf = self.make_elf(build_id=b'\x12\x34')
+        assert GenericRTTControlBlock(target)._find_control_block() == CB_ADDR
+
+        # The cached address is ignored when it is outside of the search range.
+        target = make_target(options)
+        target.elf = self.make_elf(build_id=b'\x12\x34')
+        assert GenericRTTControlBlock(target, address=0x20000400, size=0x400)._find_control_block() is None
+
+    def test_address_cache_disabled_by_default(self, tmp_path):
+        target = make_target({'rtt.address_cache.dir': str(tmp_path)})
+        target.elf = self.make_elf(build_id=b'\x12\x34')
+        cb = GenericRTTControlBlock(target)
+        assert cb._get_address_cache_path() is None
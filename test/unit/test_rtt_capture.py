@@ -0,0 +1,88 @@
+# pyOCD debugger
+# Copyright (c) 2026 pyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import pytest
+
+from pyocd.core import exceptions
+from pyocd.debug.rtt_capture import (RTTCaptureReader, RTTCaptureRecord, RTTCaptureWriter, RTTChannelInfo,
+        convert_to_raw, convert_to_text)
+
+def make_capture(records, channels=()):
+    f = io.BytesIO()
+    writer = RTTCaptureWriter(f)
+    start = writer._start
+    for channel, name, size in channels:
+        writer.write_channel_info(channel, name, size)
+    for channel, timestamp, data in records:
+        writer.write(channel, data, start + int(timestamp * 1e9))
+    writer.close()
+    f.seek(0)
+    return f
+
+class TestRTTCapture:
+    def test_roundtrip(self, tmp_path):
+        path = str(tmp_path / "capture.rtt")
+        with RTTCaptureWriter(path) as writer:
+            writer.write_channel_info(0, "Terminal", 1024)
+            writer.write_channel_info(1, None, 16)
+            writer.write(0, b'hello')
+            writer.write(1, b'')
+            writer.write(1, bytes(range(256)))
+            assert writer.record_count == 2
+            assert writer.byte_count == 261
+
+        with RTTCaptureReader(path) as reader:
+            records = list(reader)
+            assert reader.channels == {0: RTTChannelInfo("Terminal", 1024), 1: RTTChannelInfo(None, 16)}
+            assert reader.start_time > 0
+        assert [(r.channel, r.data) for r in records] == [(0, b'hello'), (1, bytes(range(256)))]
+        assert 0 <= records[0].timestamp <= records[1].timestamp
+
+    def test_truncated(self):
+        f = make_capture([(0, 0.0, b'abc'), (0, 1.0, b'defg')])
+        data = f.getvalue()
+        reader = RTTCaptureReader(io.BytesIO(data[:-2]))
+        assert list(reader) == [RTTCaptureRecord(0, 0.0, b'abc')]
+
+    def test_invalid(self):
+        with pytest.raises(exceptions.RTTError):
+            RTTCaptureReader(io.BytesIO(b'not a capture file at all'))
+        with pytest.raises(exceptions.RTTError):
+            RTTCaptureReader(io.BytesIO(b''))
+
+class TestRTTCaptureConvert:
+    def test_raw(self):
+        f = make_capture([(0, 0.0, b'ab'), (1, 0.1, b'xx'), (0, 0.2, b'cd')])
+        output = io.BytesIO()
+        assert convert_to_raw(RTTCaptureReader(f), output, 0) == 4
+        assert output.getvalue() == b'abcd'
+
+    def test_text(self):
+        f = make_capture([
+                (0, 0.5, b'hel'),
+                (1, 0.75, b'other\r\n'),
+                (0, 1.0, b'lo\nwor'),
+                (0, 2.0, b'ld\n\xff'),
+                ])
+        output = io.StringIO()
+        assert convert_to_text(RTTCaptureReader(f), output) == 4
+        assert output.getvalue().splitlines() == [
+                "    0.750000  1: other",
+                "    0.500000  0: hello",
+                "    1.000000  0: world",
+                "    2.000000  0: \\xff",
+                ]
@@ -0,0 +1,247 @@
+# pyOCD debugger
+# Copyright (c) 2026 pyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import pytest
+import threading
+import time
+from unittest import mock
+
+from pyocd.trace import events
+from pyocd.trace.events import TraceEventBatch
+from pyocd.trace.sink import (TraceEventSink, TraceEventTee)
+from pyocd.trace.swo import SWOParser
+from pyocd.trace.swv import (SWOCaptureBuffer, SWVEventSink)
+
+SYNC = b'\x00' * 5 + b'\x80'
+TS = b'\x10'        # Local timestamp format 2, +1.
+OVERFLOW = b'\x70'
+
+def itm8(port, value):
+    return bytes([(port << 3) | 0x1, value])
+
+def itm32(port, value):
+    return bytes([(port << 3) | 0x3]) + value.to_bytes(4, 'little')
+
+class RecordingSink(TraceEventSink):
+    def __init__(self):
+        self.events = []
+        self.batches = 0
+
+    def receive(self, event):
+        self.events.append(event)
+
+    def receive_many(self, batch):
+        self.batches += 1
+        super().receive_many(batch)
+
+class ReceiveOnlySink:
+    def __init__(self):
+        self.events = []
+
+    def receive(self, event):
+        self.events.append(event)
+
+@pytest.fixture(scope='function')
+def core():
+    core = mock.Mock()
+    core.exception_number_to_name.side_effect = lambda n: f"exc{n}"
+    return core
+
+@pytest.fixture(scope='function')
+def sink():
+    return RecordingSink()
+
+@pytest.fixture(scope='function')
+def parser(core, sink):
+    return SWOParser(core, sink)
+
+def describe(event_list):
+    return [str(e) for e in event_list]
+
+class TestSWOParser:
+    def test_itm(self, parser, sink):
+        parser.parse(SYNC + itm8(0, 0x41) + itm8(3, 0x42) + itm32(31, 0x12345678) + TS)
+        assert [(type(e), e.port, e.data, e.width, e.timestamp) for e in sink.events] == [
+                (events.TraceITMEvent, 0, 0x41, 1, 1),
+                (events.TraceITMEvent, 3, 0x42, 1, 1),
+                (events.TraceITMEvent, 31, 0x12345678, 4, 1),
+                ]
+        assert sink.batches == 1
+        assert parser.bytes_parsed == 6 + 4 + 5 + 1
+
+    def test_events_wait_for_timestamp(self, parser, sink):
+        parser.parse(itm8(0, 1))
+        assert sink.events == []
+        parser.parse(b'\xc0\x85\x01')   # Local timestamp format 1, (5 << 7) | 1.
+        assert [e.timestamp for e in sink.events] == [(5 << 7) | 1]
+        parser.parse(itm8(0, 2) + OVERFLOW)
+        assert [type(e) for e in sink.events[1:]] == [events.TraceITMEvent, events.TraceOverflow]
+
+    def test_split_packets(self, core):
+        stream = (SYNC + itm8(1, 0x61) + itm32(2, 0xdeadbeef) + b'\x08\x00' + b'\x18' + itm8(0, 0x62)
+                + b'\xc0\x81\x02' + b'\x0e\x05\x10' + OVERFLOW)
+        whole = RecordingSink()
+        SWOParser(core, whole).parse(stream)
+        split = RecordingSink()
+        parser = SWOParser(core, split)
+        for b in stream:
+            parser.parse(bytes([b]))
+        assert describe(split.events) == describe(whole.events)
+        assert len(whole.events) == 5
+
+    def test_itm_page(self, parser, sink):
+        # Extension packet sets stimulus page 1, then sync resets it.
+        parser.parse(b'\x18' + itm8(2, 0) + itm32(3, 0) + SYNC + itm8(2, 0) + TS)
+        assert [e.port for e in sink.events] == [34, 35, 2]
+
+    def test_hardware_packets(self, parser, sink):
+        parser.parse(
+                b'\x05\x20'                     # Event counter, CYC.
+                + b'\x0e\x0f\x10'               # Exception 15 entered.
+                + b'\x0e\x0f\x00'               # Invalid exception action, ignored.
+                + b'\x17\x00\x10\x00\x08'       # Periodic PC.
+                + TS)
+        assert describe(sink.events) == [
+                "[1] DWT: Event: Cyc",
+                "[1] DWT: Exception #15 Entered exc15",
+                "[1] DWT: PC=0x08001000",
+                ]
+
+    def test_data_trace_merge(self, parser, sink):
+        parser.parse(
+                b'\x47\x00\x10\x00\x08'         # Comparator 0 PC.
+                + b'\x86\x34\x12'               # Comparator 0 read value, 2 bytes.
+                + b'\x5e\x00\x20'               # Comparator 1 address.
+                + b'\x67\x01\x00\x00\x08'       # Comparator 2 PC, different comparator.
+                + itm8(0, 0)
+                + TS)
+        dt = [e for e in sink.events if isinstance(e, events.TraceDataTraceEvent)]
+        assert [(e.comparator, e.pc, e.address, e.value, e.is_read, e.transfer_size) for e in dt] == [
+                (0, 0x08001000, None, 0x1234, True, 2),
+                (1, None, 0x2000, None, None, None),
+                (2, 0x08000001, None, None, None, None),
+                ]
+        assert isinstance(sink.events[-1], events.TraceITMEvent)
+
+    def test_reset(self, parser, sink):
+        parser.parse(itm8(0, 1) + b'\x03\x00')
+        parser.reset()
+        parser.parse(itm8(0, 2) + TS)
+        assert [e.data for e in sink.events] == [2]
+        assert parser.bytes_parsed == 3
+
+    def test_overflow(self, parser, sink):
+        # A lost partial packet is discarded, and waiting events are sent before the overflow.
+        parser.parse(itm8(0, 1) + b'\x03\x00')
+        parser.overflow()
+        parser.parse(itm8(0, 2) + TS)
+        assert [type(e) for e in sink.events] == [
+                events.TraceITMEvent, events.TraceOverflow, events.TraceITMEvent]
+        assert [sink.events[0].data, sink.events[2].data] == [1, 2]
+
+    def test_receive_only_sink(self, core):
+        sink = ReceiveOnlySink()
+        SWOParser(core, sink).parse(itm8(0, 1) + OVERFLOW)
+        assert [type(e) for e in sink.events] == [events.TraceITMEvent, events.TraceOverflow]
+
+class TestTraceEventBatch:
+    def test_batch(self):
+        batch = TraceEventBatch()
+        batch.append(TraceEventBatch.ITM, 1, 0x41, 0, 1, 10)
+        batch.append(TraceEventBatch.PERIODIC_PC, 0, 0x1000, 0, 0, 11)
+        assert len(batch) == 0
+        batch.count = 2
+        assert str(batch[1]) == "[11] DWT: PC=0x00001000"
+        with pytest.raises(IndexError):
+            batch[2]
+        batch.remove_first(1)
+        assert batch.size == 1 and batch.count == 1
+        assert isinstance(batch[0], events.TracePeriodicPC)
+
+    def test_tee(self, parser):
+        sinks = [RecordingSink(), RecordingSink()]
+        tee = TraceEventTee()
+        tee.connect(sinks)
+        parser.connect(tee)
+        parser.parse(itm8(0, 1) + TS)
+        assert all(s.batches == 1 and len(s.events) == 1 for s in sinks)
+
+class TestSWVEventSink:
+    @pytest.mark.parametrize("stream", [
+            itm8(0, ord('h')) + itm8(0, ord('i')) + TS,
+            itm8(0, ord('h')) + b'\x02' + b'i\x00' + TS,
+            itm8(0, ord('h')) + b'\x0e\x0f\x10' + itm8(0, ord('i')) + TS,
+        ])
+    def test_console(self, core, stream):
+        console = io.StringIO()
+        SWOParser(core, SWVEventSink(console)).parse(stream)
+        assert console.getvalue() == "hi" + ("\0" if b'\x02' in stream else "")
+
+class TestSWOCaptureBuffer:
+    def test_wrap(self):
+        buffer = SWOCaptureBuffer(8)
+        assert buffer.write(b'abcde')
+        assert buffer.read(0) == (b'abcde', False)
+        assert buffer.write(b'fghijk')
+        assert buffer.fill == 6
+        assert buffer.read(0) == (b'fghijk', False)
+        assert buffer.read(0) == (b'', False)
+        assert buffer.max_fill == 6
+
+    def test_overflow(self):
+        buffer = SWOCaptureBuffer(8)
+        assert buffer.write(b'abcdef')
+        assert not buffer.write(b'ghi')
+        assert not buffer.write(b'jkl')
+        assert buffer.write(b'mn')
+        assert (buffer.overflow_count, buffer.dropped_byte_count) == (2, 6)
+        # Data before the gap is returned first, then the data after it with the lost flag.
+        assert buffer.read(0) == (b'abcdef', False)
+        assert buffer.read(0) == (b'mn', True)
+        assert buffer.read(0) == (b'', False)
+
+    def test_close(self):
+        buffer = SWOCaptureBuffer(8)
+        buffer.write(b'ab')
+        buffer.close()
+        assert buffer.read() == (b'ab', False)
+        assert buffer.read() == (b'', False)
+        assert buffer.is_closed
+
+    def test_threads(self):
+        buffer = SWOCaptureBuffer(64)
+        chunks = [bytes([i & 0xff]) * (i % 7 + 1) for i in range(1000)]
+        received = bytearray()
+
+        def reader():
+            while True:
+                data, lost = buffer.read()
+                assert not lost
+                received.extend(data)
+                if not data and buffer.is_closed:
+                    break
+
+        thread = threading.Thread(target=reader)
+        thread.start()
+        for chunk in chunks:
+            # A failed write discards the data, so wait for space first.
+            while buffer.capacity - buffer.fill < len(chunk):
+                time.sleep(0.0001)
+            assert buffer.write(chunk)
+        buffer.close()
+        thread.join()
+        assert bytes(received) == b''.join(chunks)
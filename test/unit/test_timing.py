@@ -0,0 +1,212 @@
+# pyOCD debugger
+# Copyright (c) 2026 pyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import json
+import pytest
+from unittest import mock
+
+from pyocd.core import exceptions
+from pyocd.debug.elf.decoder import SymbolInfo
+from pyocd.debug.timing import (FunctionTimer, FunctionTiming, write_timing_table)
+
+FOO = 0x1000
+BAR = 0x2000
+MAIN_SP = 0x20001000
+
+class SimulatedCore:
+    """@brief Core that runs through a trace of (pc, sp, lr, cycles) tuples.
+
+    Resuming runs until the next trace entry whose PC has a breakpoint, or the end of the trace,
+    where the core keeps running.
+    """
+    def __init__(self, trace, breakpoint_count=4):
+        self.trace = trace
+        self.index = 0
+        self.halted = True
+        self.breakpoints = set()
+        self.bp_manager = mock.Mock()
+        self.dwt = mock.Mock(dwt_configured=True)
+        self.available_breakpoint_count = breakpoint_count
+        self.halt_count = 0
+        self.step_count = 0
+
+    def _set_position(self, index):
+        self.index = index
+        if index < len(self.trace):
+            self.dwt.cycle_count = self.trace[index][3]
+
+    def set_breakpoint(self, addr, type):
+        self.breakpoints.add(addr)
+        return True
+
+    def remove_breakpoint(self, addr):
+        self.breakpoints.remove(addr)
+
+    def is_halted(self):
+        return self.halted
+
+    def get_halt_reason(self):
+        return None
+
+    def read_core_registers_raw(self, regs):
+        return list(self.trace[self.index][:3])
+
+    def step(self):
+        self.step_count += 1
+        self._set_position(self.index + 1)
+
+    def resume(self):
+        assert self.trace[self.index][0] not in self.breakpoints
+        for index in range(self.index + 1, len(self.trace)):
+            if self.trace[index][0] in self.breakpoints:
+                self._set_position(index)
+                self.halt_count += 1
+                return
+        self.index = len(self.trace)
+        self.halted = False
+
+def call(trace, addr, ret, sp, start, cycles):
+    """@brief Append a call of a function to a trace."""
+    trace.append((addr, sp, ret | 1, start))
+    trace.append((addr + 2, sp, ret | 1, start + 1))
+    trace.append((ret, sp, ret | 1, start + cycles))
+
+class TestFunctionTiming:
+    def test_summary(self):
+        timing = FunctionTiming('foo', FOO, cycles=list(range(1, 101)))
+        s = timing.summary()
+        assert s['calls'] == 100
+        assert s['min'] == 1
+        assert s['max'] == 100
+        assert s['mean'] == 50.5
+        assert s['median'] == 50.5
+        assert s['p90'] == 90
+        assert s['p99'] == 99
+        json.dumps(s)
+
+    def test_empty_summary(self):
+        s = FunctionTiming('foo', FOO, skipped_count=2).summary()
+        assert s == {'name': 'foo', 'address': FOO, 'calls': 0, 'skipped': 2}
+
+    def test_table(self):
+        output = io.StringIO()
+        write_timing_table([FunctionTiming('foo', FOO, [10, 20]), FunctionTiming('bar', BAR)], output)
+        lines = output.getvalue().splitlines()
+        assert len(lines) == 3
+        assert lines[1].split()[:3] == ['foo', '2', '10']
+        assert lines[2].split() == ['bar', '0']
+
+class TestFunctionTimer:
+    def test_calls(self):
+        trace = [(0x100, MAIN_SP, 0, 0)]
+        for i in range(5):
+            call(trace, FOO, 0x200, MAIN_SP - 8, 1000 * i, 100 + i)
+        core = SimulatedCore(trace)
+        timer = FunctionTimer(core, [('foo', FOO | 1)])
+        timings = timer.run(3)
+        assert timings[0].cycles == [100, 101, 102]
+        assert core.halt_count == 6
+        assert core.step_count == 0
+        assert core.breakpoints == set()
+
+    def test_counter_wrap(self):
+        trace = [(0x100, MAIN_SP, 0, 0)]
+        call(trace, FOO, 0x200, MAIN_SP, 0xfffffff0, 0x20)
+        trace[-1] = (0x200, MAIN_SP, 0x201, 0x10)
+        core = SimulatedCore(trace)
+        assert FunctionTimer(core, [('foo', FOO)]).run(1)[0].cycles == [0x20]
+
+    def test_nested(self):
+        # foo calls bar.
+        trace = [(0x100, MAIN_SP, 0, 0)]
+        for i in range(2):
+            start = 1000 * i
+            trace.append((FOO, MAIN_SP, 0x201, start))
+            call(trace, BAR, FOO + 0x10, MAIN_SP - 16, start + 10, 50)
+            trace.append((0x200, MAIN_SP, 0x201, start + 100))
+        core = SimulatedCore(trace)
+        timings = FunctionTimer(core, [('foo', FOO), ('bar', BAR)]).run(2)
+        assert timings[0].cycles == [100, 100]
+        assert timings[1].cycles == [50, 50]
+
+    def test_recursive_return(self):
+        # foo called recursively from within foo, so the inner call returns to the same address
+        # with a different SP before the timed call returns.
+        ret = FOO + 0x20
+        trace = [
+            (0x100, MAIN_SP, 0, 0),
+            (FOO, MAIN_SP - 8, ret | 1, 10),
+            (FOO, MAIN_SP - 16, ret | 1, 20),
+            (ret, MAIN_SP - 16, ret | 1, 30),
+            (ret + 2, MAIN_SP - 16, ret | 1, 31),
+            (ret, MAIN_SP - 8, ret | 1, 40),
+            ]
+        core = SimulatedCore(trace)
+        timings = FunctionTimer(core, [('foo', FOO)]).run(1)
+        assert timings[0].cycles == [30]
+        assert core.step_count == 1
+
+    def test_exception_return_skipped(self):
+        trace = [
+            (0x100, MAIN_SP, 0, 0),
+            (FOO, MAIN_SP, 0xfffffff9, 10),
+            (FOO + 2, MAIN_SP, 0xfffffff9, 11),
+            ]
+        call(trace, FOO, 0x200, MAIN_SP, 100, 10)
+        core = SimulatedCore(trace)
+        timings = FunctionTimer(core, [('foo', FOO)]).run(1)
+        assert timings[0].cycles == [10]
+        assert timings[0].skipped_count == 1
+
+    def test_timeout(self):
+        core = SimulatedCore([(0x100, MAIN_SP, 0, 0)])
+        timings = FunctionTimer(core, [('foo', FOO)]).run(1, timeout=0.01)
+        assert timings[0].cycles == []
+        assert core.breakpoints == set()
+
+    def test_poll_sleeps(self):
+        core = SimulatedCore([(0x100, MAIN_SP, 0, 0)])
+        with mock.patch('pyocd.debug.timing.time.sleep') as sleep:
+            FunctionTimer(core, [('foo', FOO)]).run(1, timeout=0.01)
+        assert sleep.call_count > 0
+        sleep.assert_called_with(FunctionTimer.POLL_INTERVAL)
+
+    def test_unexpected_halt(self):
+        core = SimulatedCore([(0x100, MAIN_SP, 0, 0)])
+        core.resume = mock.Mock()
+        with pytest.raises(exceptions.DebugError):
+            FunctionTimer(core, [('foo', FOO)]).run(1)
+        assert core.breakpoints == set()
+
+    def test_too_many_functions(self):
+        core = SimulatedCore([], breakpoint_count=1)
+        with pytest.raises(exceptions.TargetSupportError):
+            FunctionTimer(core, [('foo', FOO), ('bar', BAR)])
+
+    def test_from_elf(self):
+        symbols = {
+            'foo': SymbolInfo('foo', FOO | 1, 0x10, 'STT_FUNC'),
+            'table': SymbolInfo('table', 0x3000, 0x10, 'STT_OBJECT'),
+            }
+        elf = mock.Mock()
+        elf.symbol_decoder.get_symbol_for_name.side_effect = symbols.get
+        timer = FunctionTimer.from_elf(SimulatedCore([]), elf, ['foo'])
+        assert timer.timings[0].address == FOO
+        with pytest.raises(ValueError):
+            FunctionTimer.from_elf(SimulatedCore([]), elf, ['table'])
+        with pytest.raises(ValueError):
+            FunctionTimer.from_elf(SimulatedCore([]), elf, ['missing'])